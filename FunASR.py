@@ -31,8 +31,35 @@ import threading
 import time
 import queue
 import os
-import torch
-import torchaudio
+import logging
+
+from latency_tracer import get_tracer
+from runtime_metrics import observe
+from cpu_tuning import configure_torch_threads, pin_current_thread
+
+logger = logging.getLogger(__name__)
+
+# 使用的FunASR模型
+ASR_MODEL_NAME = "paraformer-zh-streaming"
+VAD_MODEL_NAME = "fsmn-vad"
+PUNC_MODEL_NAME = "ct-punc"
+
+# 音频块RMS超过该值视为有人说话（更新说话音量；不使用VAD时作为句子语音开始）
+SPEECH_ENERGY_THRESHOLD = 0.005
+
+
+def load_models(use_vad=True, use_punc=True, torch_threads=None):
+    """
+    一次性加载ASR/VAD/标点模型，返回 {"asr": ..., "vad": ..., "punc": ...}（未启用的为None）
+
+    供多个 FastLoadASR 共享（preloaded_models），例如预派生进程池在fork前加载一份。
+    """
+    kwargs = {"ncpu": torch_threads} if torch_threads else {}
+    return {
+        "asr": AutoModel(model=ASR_MODEL_NAME, **kwargs),
+        "vad": AutoModel(model=VAD_MODEL_NAME, **kwargs) if use_vad else None,
+        "punc": AutoModel(model=PUNC_MODEL_NAME, **kwargs) if use_punc else None,
+    }
 
 
 class FastLoadASR:
@@ -48,7 +75,9 @@ class FastLoadASR:
     """
 
     def __init__(self, use_vad=True, use_punc=True, disable_update=True, text_output_callback=None,
-                 max_segment_duration_seconds=3.0, input_device_index=None):
+                 max_segment_duration_seconds=3.0, input_device_index=None, open_input_stream=True,
+                 force_final_timeout=None, torch_threads=None, torch_interop_threads=None,
+                 inference_cpus=None, audio_cpus=None, preloaded_models=None):
         """
         初始化快速加载版语音识别系统
 
@@ -59,6 +88,14 @@ class FastLoadASR:
             text_output_callback: 识别文本输出的回调函数
             max_segment_duration_seconds: 最大语音片段时长（秒），用于强制分段
             input_device_index: 输入设备的索引
+            open_input_stream: start() 时是否打开麦克风输入流；为False时由调用方通过
+                               audio_callback 送入音频（例如回放录音做基准测试）
+            force_final_timeout: 识别文本多久（秒）没有新增时强制结束当前句子，None表示不启用
+            torch_threads: torch算子内并行线程数，None表示使用FunASR默认值
+            torch_interop_threads: torch算子间并行线程数，None表示使用默认值
+            inference_cpus: 推理线程（VAD/ASR/标点）绑定的CPU，如 "1-3"，None表示不绑定
+            audio_cpus: 音频回调线程绑定的CPU，如 "0"，None表示不绑定
+            preloaded_models: load_models() 返回的已加载模型，提供时不再自行加载（多个实例共享一份权重）
 
         特性:
             - 动态静音检测：当音量下降80%并持续1秒时自动结束句子
@@ -72,6 +109,16 @@ class FastLoadASR:
         self.text_output_callback = text_output_callback
         self.max_segment_duration_seconds = max_segment_duration_seconds  # 新增
         self.input_device_index = input_device_index  # 新增
+        self.open_input_stream = open_input_stream
+        self.force_final_timeout = force_final_timeout
+
+        # 推理线程数与CPU亲和性（见 cpu_tuning）
+        self.torch_threads = torch_threads
+        self.inference_cpus = inference_cpus
+        self.audio_cpus = audio_cpus
+        self._audio_thread_pinned = False
+        if torch_threads or torch_interop_threads:
+            configure_torch_threads(torch_threads, torch_interop_threads)
 
         # 语音识别参数设置
         self.sample_rate = 16000  # 采样率(Hz)
@@ -104,6 +151,8 @@ class FastLoadASR:
         # 运行时变量
         self.running = False
         self.audio_queue = queue.Queue()
+        # 处理线程已开始的循环轮数（wait_drained 据此确认取走的音频已处理完）
+        self.processed_loops = 0
         self.complete_transcript = ""  # 每次识别会话（start->stop)的完整记录
         self.current_sentence_transcript = ""  # 当前正在形成的句子
         self.raw_transcript = ""
@@ -112,6 +161,18 @@ class FastLoadASR:
         self.current_segment_start_time = None  # 新增：用于追踪当前（VAD定义的）语音片段开始时间
         self.last_forced_segment_time = 0  # 新增: 用于记录上次强制分段的时间
 
+        # 句子编号：中间结果与最终结果都带上所属句子的编号，每次最终结果后加一
+        self.sentence_id = 0
+        # 强制断句的截止时间（time.monotonic），每次识别文本增长时顺延
+        self.final_deadline = None
+
+        # 逐句延迟追踪：当前句子的trace id，在本句语音开始时（VAD检测到语音，或不使用VAD时音量超过说话下限）分配
+        self.tracer = get_tracer()
+        self.current_trace_id = None
+        self.sentence_speech_started = False
+        # 本句语音开始时的回调 (语音所在音频块的到达时间, VAD检测时间或None)，子进程用它把追踪起点交给父进程
+        self.speech_start_callback = None
+
         # 模型变量
         self.asr_model = None
         self.vad_model = None
@@ -123,71 +184,86 @@ class FastLoadASR:
         if self.disable_update:
             os.environ["FUNASR_DISABLE_UPDATE"] = "True"
 
+        if preloaded_models:
+            self.asr_model = preloaded_models.get("asr")
+            self.vad_model = preloaded_models.get("vad")
+            self.punc_model = preloaded_models.get("punc")
+            return
+
         # 异步预加载ASR模型
-        print("开始加载ASR模型...")
-        self.asr_load_thread = threading.Thread(target=self.load_asr_model)
+        logger.info("开始加载ASR模型...")
+        self.asr_load_thread = threading.Thread(target=self.load_asr_model, name="asr-load")
         self.asr_load_thread.daemon = True
         self.asr_load_thread.start()
 
+    def _model_kwargs(self):
+        # AutoModel 构建时会按 ncpu（默认4）调用 torch.set_num_threads，需显式传入以免覆盖配置
+        return {"ncpu": self.torch_threads} if self.torch_threads else {}
+
     def load_asr_model(self):
         """加载ASR模型的线程函数"""
         try:
             # 使用与FunASR.py相同的加载方式
-            self.asr_model = AutoModel(model="paraformer-zh-streaming")
-            print("ASR模型加载完成!")
+            self.asr_model = AutoModel(model=ASR_MODEL_NAME, **self._model_kwargs())
+            logger.info("ASR模型加载完成!")
         except Exception as e:
-            print(f"ASR模型加载失败: {e}")
+            logger.error(f"ASR模型加载失败: {e}")
 
     def ensure_asr_model_loaded(self):
         """确保ASR模型已加载"""
         if self.asr_model is None:
-            print("等待ASR模型加载完成...")
+            logger.info("等待ASR模型加载完成...")
             if hasattr(self, 'asr_load_thread'):
                 self.asr_load_thread.join()
 
             # 如果线程结束后模型仍未加载，再次尝试加载
             if self.asr_model is None:
-                print("重新尝试加载ASR模型...")
+                logger.info("重新尝试加载ASR模型...")
                 try:
-                    self.asr_model = AutoModel(model="paraformer-zh-streaming")
-                    print("ASR模型加载完成!")
+                    self.asr_model = AutoModel(model=ASR_MODEL_NAME, **self._model_kwargs())
+                    logger.info("ASR模型加载完成!")
                 except Exception as e:
-                    print(f"ASR模型加载失败: {e}")
+                    logger.error(f"ASR模型加载失败: {e}")
                     return False
         return True
 
     def load_vad_model_if_needed(self):
         """仅在需要时加载VAD模型"""
         if self.use_vad and self.vad_model is None:
-            print("加载VAD模型...")
+            logger.info("加载VAD模型...")
             try:
-                self.vad_model = AutoModel(model="fsmn-vad")
-                print("VAD模型加载完成!")
+                self.vad_model = AutoModel(model=VAD_MODEL_NAME, **self._model_kwargs())
+                logger.info("VAD模型加载完成!")
                 return True
             except Exception as e:
-                print(f"VAD模型加载失败: {e}")
+                logger.error(f"VAD模型加载失败: {e}")
                 return False
         return True
 
     def load_punc_model_if_needed(self):
         """仅在需要时加载标点恢复模型"""
         if self.use_punc and self.punc_model is None:
-            print("加载标点恢复模型...")
+            logger.info("加载标点恢复模型...")
             try:
-                self.punc_model = AutoModel(model="ct-punc")
-                print("标点恢复模型加载完成!")
+                self.punc_model = AutoModel(model=PUNC_MODEL_NAME, **self._model_kwargs())
+                logger.info("标点恢复模型加载完成!")
                 return True
             except Exception as e:
-                print(f"标点恢复模型加载失败: {e}")
+                logger.error(f"标点恢复模型加载失败: {e}")
                 return False
         return True
 
-    def audio_callback(self, indata, frames, time, status):
+    def audio_callback(self, indata, frames, time_info, status):
         """音频流回调函数"""
         if status:
-            print(f"音频状态: {status}")
-        # 将音频数据放入队列
-        self.audio_queue.put(indata.copy())
+            logger.warning(f"音频状态: {status}")
+        if not self._audio_thread_pinned:
+            # 音频回调线程由PortAudio创建，只能在回调内绑定（仅第一次调用时执行）
+            self._audio_thread_pinned = True
+            if self.audio_cpus is not None:
+                pin_current_thread(self.audio_cpus, "音频回调线程")
+        # 将音频数据连同到达时间放入队列（逐句追踪的起点取语音所在音频块的到达时间）
+        self.audio_queue.put((time.perf_counter(), indata.copy()))
 
     def check_silence(self, audio_chunk):
         """
@@ -205,7 +281,7 @@ class FastLoadASR:
         current_time = time.time()
 
         # 如果正在说话且音量不是特别小，更新说话音量
-        if self.is_speaking and audio_energy > 0.005:
+        if self.is_speaking and audio_energy > SPEECH_ENERGY_THRESHOLD:
             # 使用移动平均更新说话音量
             if self.speaking_volume > 0:
                 self.speaking_volume = 0.7 * self.speaking_volume + 0.3 * audio_energy
@@ -224,8 +300,9 @@ class FastLoadASR:
             if not self.is_in_silence:
                 self.is_in_silence = True
                 self.silence_start_time = current_time
-                print(
-                    f"\n检测到相对静音开始 (当前音量: {audio_energy:.4f}, 说话音量: {self.speaking_volume:.4f}, 比率: {volume_ratio:.2f})...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("检测到相对静音开始 (当前音量: %.4f, 说话音量: %.4f, 比率: %.2f)...",
+                                 audio_energy, self.speaking_volume, volume_ratio)
             else:
                 # 检查静音持续时间
                 silence_duration = current_time - self.silence_start_time
@@ -236,14 +313,14 @@ class FastLoadASR:
                     if (silence_duration > self.silence_duration_threshold and
                             self.is_speaking and
                             (len(self.speech_buffer) > 0 or self.current_sentence_transcript)):
-                        print(
-                            f"\n检测到相对静音超时 ({silence_duration:.2f}s > {self.silence_duration_threshold}s)，触发句子结束...")
+                        logger.info(
+                            f"检测到相对静音超时 ({silence_duration:.2f}s > {self.silence_duration_threshold}s)，触发句子结束...")
                         self.last_silence_check_time = current_time
                         return True
         else:
             # 音量恢复，退出静音状态
-            if self.is_in_silence:
-                print(f"\n相对静音结束 (当前音量: {audio_energy:.4f}, 说话音量: {self.speaking_volume:.4f})...")
+            if self.is_in_silence and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("相对静音结束 (当前音量: %.4f, 说话音量: %.4f)...", audio_energy, self.speaking_volume)
             self.is_in_silence = False
             self.silence_start_time = None
 
@@ -263,15 +340,21 @@ class FastLoadASR:
         - 触发ASR处理
         - 管理强制分段
         """
+        # 推理在本线程进行，torch在本线程上创建的并行线程继承这里的CPU绑定
+        if self.inference_cpus is not None:
+            pin_current_thread(self.inference_cpus, "ASR推理线程")
+
         vad_buffer = np.array([], dtype=np.float32)
+        vad_buffer_end_time = 0.0  # vad_buffer 末尾样本的到达时间（perf_counter）
         audio_accumulator = np.array([], dtype=np.float32)  # 用于累积音频进行静音检测
         last_audio_time = time.time()  # 记录最后接收到音频的时间
 
         while self.running:
+            self.processed_loops += 1
             try:
                 audio_chunk_processed_this_loop = False
                 while not self.audio_queue.empty() and self.running:
-                    chunk = self.audio_queue.get_nowait()
+                    arrival_time, chunk = self.audio_queue.get_nowait()
                     audio_chunk_processed_this_loop = True
                     last_audio_time = time.time()  # 更新最后音频时间
 
@@ -280,9 +363,13 @@ class FastLoadASR:
 
                     if self.use_vad:
                         vad_buffer = np.append(vad_buffer, chunk.flatten())
+                        vad_buffer_end_time = arrival_time
                     else:
                         # 不使用VAD时，直接将音频块添加到语音缓冲区
                         self.speech_buffer = np.append(self.speech_buffer, chunk.flatten())
+                        if (not self.sentence_speech_started
+                                and np.sqrt(np.mean(chunk ** 2)) > SPEECH_ENERGY_THRESHOLD):
+                            self._speech_started(arrival_time - len(chunk) / self.sample_rate)
                         if self.current_segment_start_time is None:  # For non-VAD, start timing on first audio
                             self.current_segment_start_time = time.time()
 
@@ -293,7 +380,7 @@ class FastLoadASR:
                 if self.is_speaking and self.is_in_silence and self.silence_start_time:
                     silence_duration = current_time - self.silence_start_time
                     if silence_duration > self.silence_duration_threshold and len(self.speech_buffer) > 0:
-                        print(f"\n相对静音超时触发 ({silence_duration:.2f}s > {self.silence_duration_threshold}s)...")
+                        logger.info(f"相对静音超时触发 ({silence_duration:.2f}s > {self.silence_duration_threshold}s)...")
                         self.process_asr_buffer(is_final=True)
                         # 重置状态
                         self.is_speaking = False
@@ -312,7 +399,7 @@ class FastLoadASR:
 
                     if silence_triggered:
                         # 相对静音超时触发句子结束
-                        print("\n动态静音检测触发ASR最终处理...")
+                        logger.info("动态静音检测触发ASR最终处理...")
                         self.process_asr_buffer(is_final=True)
                         # 重置状态
                         self.is_speaking = False
@@ -335,18 +422,21 @@ class FastLoadASR:
                 # 使用VAD处理
                 if self.use_vad and self.vad_model is not None:
                     while len(vad_buffer) >= self.vad_chunk_samples and self.running:
-                        # 提取一个VAD音频块
+                        # 提取一个VAD音频块（记下其开头样本的到达时间）
+                        vad_chunk_time = vad_buffer_end_time - len(vad_buffer) / self.sample_rate
                         vad_chunk = vad_buffer[:self.vad_chunk_samples]
                         vad_buffer = vad_buffer[self.vad_chunk_samples:]
                         audio_chunk_processed_this_loop = True
 
                         # 使用VAD模型处理
+                        inference_start = time.perf_counter()
                         vad_res = self.vad_model.generate(
                             input=vad_chunk,
                             cache=self.vad_cache,
                             is_final=False,
                             chunk_size=self.vad_chunk_duration_ms
                         )
+                        observe("asr.vad_inference", time.perf_counter() - inference_start)
 
                         # 处理VAD结果
                         if len(vad_res[0]["value"]):
@@ -361,7 +451,8 @@ class FastLoadASR:
                                         self.is_in_silence = False
                                         self.silence_start_time = None
                                         self.speaking_volume = 0.0  # 重置说话音量
-                                        print("\n检测到语音开始 (VAD)...")
+                                        self._speech_started(vad_chunk_time, time.perf_counter())
+                                        logger.debug("检测到语音开始 (VAD)...")
                                 elif segment_info[0] == -1 and segment_info[1] != -1:
                                     # 检测到语音结束
                                     if self.is_speaking:  # Process only if we were speaking
@@ -371,9 +462,9 @@ class FastLoadASR:
                                         self.is_in_silence = False
                                         self.silence_start_time = None
                                         self.speaking_volume = 0.0  # 重置说话音量
-                                        print("\n检测到语音结束 (VAD)...")
+                                        logger.debug("检测到语音结束 (VAD)...")
                                         if len(self.speech_buffer) > 0:
-                                            print("VAD结束，处理剩余ASR缓冲区...")
+                                            logger.debug("VAD结束，处理剩余ASR缓冲区...")
                                             self.process_asr_buffer(is_final=True)
                         # 如果正在说话，将当前块添加到语音缓冲区
                         if self.is_speaking:
@@ -397,8 +488,8 @@ class FastLoadASR:
                     time_since_last_force = current_time - self.last_forced_segment_time
 
                     if segment_duration > self.max_segment_duration_seconds and time_since_last_force > self.max_segment_duration_seconds / 2.0:  # Ensure not too close forced cuts
-                        print(
-                            f"\n片段达到最大时长 ({segment_duration:.2f}s > {self.max_segment_duration_seconds}s)，强制结束当前片段...")
+                        logger.info(
+                            f"片段达到最大时长 ({segment_duration:.2f}s > {self.max_segment_duration_seconds}s)，强制结束当前片段...")
                         if len(self.speech_buffer) > 0:
                             self.process_asr_buffer(is_final=True)  # Process current buffer as final
                         # Reset timing for the *next* segment, which starts now conceptually
@@ -412,6 +503,16 @@ class FastLoadASR:
                         # VAD should eventually detect silence or another forced cut will occur.
                         # If not using VAD, this effectively restarts the segment timer.
 
+                # 识别文本超时未增长：在本线程内按截止时间强制断句（与其他断句路径串行，不会重复）
+                if self.final_deadline is not None and time.monotonic() >= self.final_deadline:
+                    self.final_deadline = None
+                    if self.current_sentence_transcript:
+                        logger.info(f"识别文本 {self.force_final_timeout}s 未更新，强制结束当前句子...")
+                        self.process_asr_buffer(is_final=True)
+                        self.current_segment_start_time = time.time() if self.is_speaking else None
+                        self.is_in_silence = False
+                        self.silence_start_time = None
+
                 if not audio_chunk_processed_this_loop:
                     time.sleep(0.01)  # Sleep if no audio was processed in this loop iteration
             except queue.Empty:
@@ -419,10 +520,96 @@ class FastLoadASR:
                     time.sleep(0.01)
                 continue
             except Exception as e:
-                print(f"\n音频处理错误: {e}")
+                logger.error(f"音频处理错误: {e}")
                 if not self.running: break
                 time.sleep(0.1)  # Avoid busy loop on other errors
 
+    def get_stats(self):
+        """运行状态（供运行时指标采集）"""
+        return {
+            "running": self.running,
+            "audio_queue_depth": self.audio_queue.qsize(),
+            "speech_buffer_seconds": round(len(self.speech_buffer) / self.sample_rate, 2),
+            "is_speaking": self.is_speaking,
+            "sentences": self.sentence_id,
+        }
+
+    def audio_drained(self):
+        """已送入的音频是否都已被处理线程取走"""
+        return self.audio_queue.empty()
+
+    def wait_drained(self, timeout=2.0):
+        """
+        等待已送入的音频都被处理线程处理完（队列取空后再完成一轮处理），用于 stop() 之前
+
+        返回:
+            是否在超时前处理完
+        """
+        deadline = time.monotonic() + timeout
+        while not self.audio_drained():
+            if not self.running or time.monotonic() >= deadline:
+                return self.audio_drained()
+            time.sleep(0.005)
+        # 最后一块可能刚被取走、仍在本轮的VAD/ASR处理中；等下一轮开始即说明本轮已结束
+        loops = self.processed_loops
+        while self.running and self.processed_loops == loops:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _speech_started(self, onset_time, vad_time=None):
+        """
+        本句语音开始：开始逐句追踪（在处理线程中调用，每句只处理第一次）
+
+        参数:
+            onset_time: 语音所在音频块的到达时间，记为 first_audio（不含语音之前的静音）
+            vad_time: VAD检测到语音的时间，记为 vad_start；不使用VAD时为None
+        """
+        if self.sentence_speech_started:
+            return
+        self.sentence_speech_started = True
+        if self.current_trace_id is None:
+            self.current_trace_id = self.tracer.begin(t=onset_time)
+        if vad_time is not None:
+            self.tracer.mark(self.current_trace_id, "vad_start", t=vad_time)
+        if self.speech_start_callback is not None:
+            self.speech_start_callback(onset_time, vad_time)
+
+    def detach_trace(self):
+        """取走当前句子的trace id，下一句语音开始时将开始新的追踪"""
+        trace_id, self.current_trace_id = self.current_trace_id, None
+        self.sentence_speech_started = False
+        return trace_id
+
+    def _finish_sentence(self, text):
+        """
+        句子结束：应用标点（如启用）并以 is_sentence_end=True 回调
+
+        参数:
+            text: 未加标点的完整句子
+        """
+        trace_id = self.detach_trace()
+        self.tracer.mark(trace_id, "asr_final")
+        final_text = text
+        if self.use_punc and self.punc_model is not None and text:
+            inference_start = time.perf_counter()
+            punc_res = self.punc_model.generate(input=text)
+            observe("asr.punc_inference", time.perf_counter() - inference_start)
+            if punc_res and punc_res[0]["text"]:
+                final_text = punc_res[0]["text"]
+            # 标点失败时回退到无标点文本
+            self.tracer.mark(trace_id, "punctuation")
+        if self.text_output_callback:
+            # 回调参数：当前处理好的片段，完整的当前句子，是否句子结束
+            self.text_output_callback(final_text, final_text, True, trace_id=trace_id, sentence_id=self.sentence_id)
+        else:
+            self.tracer.discard(trace_id)
+        self.complete_transcript += final_text + (" " if final_text else "")
+        self.current_sentence_transcript = ""
+        self.sentence_id += 1
+        self.final_deadline = None
+
     def process_asr_buffer(self, is_final=False):
         """处理语音缓冲区进行ASR识别"""
         if self.asr_model is None:
@@ -434,15 +621,8 @@ class FastLoadASR:
             if len(self.speech_buffer) == 0 and is_final:
                 # 如果是最后一块，且buffer为空，可能VAD已经处理过最后一块，直接判断是否有未发送的 current_sentence
                 if self.current_sentence_transcript and self.text_output_callback:
-                    print(f"ASR Final (empty buffer, pending sentence): {self.current_sentence_transcript}")
-                    # Force punctuation on this pending sentence if is_final and punc enabled
-                    final_text_to_send = self.current_sentence_transcript
-                    if self.use_punc and self.punc_model is not None:
-                        punc_res = self.punc_model.generate(input=self.current_sentence_transcript)
-                        if punc_res and punc_res[0]["text"]:
-                            final_text_to_send = punc_res[0]["text"]
-                    self.text_output_callback(final_text_to_send, final_text_to_send, True)
-                    self.complete_transcript += final_text_to_send + " "
+                    logger.debug("ASR Final (empty buffer, pending sentence): %s", self.current_sentence_transcript)
+                    self._finish_sentence(self.current_sentence_transcript)
                 self.current_sentence_transcript = ""  # Always reset on final with empty buffer
                 self.asr_cache = {}  # Reset ASR cache on final segment
                 return
@@ -461,6 +641,7 @@ class FastLoadASR:
 
             # 使用ASR模型处理
             if len(asr_chunk) > 0:
+                inference_start = time.perf_counter()
                 asr_res = self.asr_model.generate(
                     input=asr_chunk,
                     cache=self.asr_cache,
@@ -469,81 +650,49 @@ class FastLoadASR:
                     encoder_chunk_look_back=self.encoder_chunk_look_back,
                     decoder_chunk_look_back=self.decoder_chunk_look_back
                 )
+                observe("asr.asr_inference", time.perf_counter() - inference_start)
 
                 # 如果有识别结果，处理并应用标点
                 if asr_res and asr_res[0]["text"]:
                     segment_text = asr_res[0]["text"]
 
                     # 流式输出时，ASR可能返回不完整的片段
-                    # 标点模型通常需要更完整的句子上下文
-                    # 我们这里将 segment_text 认为是当前识别到的新片段
-
-                    if self.use_punc and self.punc_model is not None and is_final:
-                        # 仅在is_final时对累积的current_sentence_transcript应用标点
-                        # 或者如果asr_res表明这是一个完整的句子结束点 (FunASR的流式模型可能不会明确给这个信息)
-                        # 这里简化处理：is_final 才用标点，或者当检测到语音结束时 (VAD驱动的is_final)
-                        full_input_for_punc = self.current_sentence_transcript + segment_text
-                        punc_res = self.punc_model.generate(input=full_input_for_punc)
-                        if punc_res and punc_res[0]["text"]:
-                            final_text_segment = punc_res[0]["text"]
-                            if self.text_output_callback:
-                                # 回调参数：当前处理好的片段，完整的当前句子，是否句子结束
-                                self.text_output_callback(final_text_segment, final_text_segment, True)
-                            self.complete_transcript += final_text_segment + (" " if final_text_segment else "")
-                            self.current_sentence_transcript = ""  # 重置当前句子
-                        else:
-                            # 标点失败，回退到无标点文本
-                            final_text_segment = full_input_for_punc
-                            if self.text_output_callback:
-                                self.text_output_callback(final_text_segment, final_text_segment, True)
-                            self.complete_transcript += final_text_segment + (" " if final_text_segment else "")
-                            self.current_sentence_transcript = ""  # 重置当前句子
-                    elif not is_final:
+                    # 标点模型通常需要更完整的句子上下文，因此仅在is_final时对累积的句子应用标点
+                    if is_final:
+                        self._finish_sentence(self.current_sentence_transcript + segment_text)
+                    else:
                         # 非最终块，累积到 current_sentence_transcript
                         self.current_sentence_transcript += segment_text
+                        if self.force_final_timeout:
+                            self.final_deadline = time.monotonic() + self.force_final_timeout
                         if self.text_output_callback:  # 实时反馈（可能是未标点的）
-                            self.text_output_callback(segment_text, self.current_sentence_transcript, False)
-                    else:  # is_final and no punctuation
-                        final_text_segment = self.current_sentence_transcript + segment_text
-                        if self.text_output_callback:
-                            self.text_output_callback(final_text_segment, final_text_segment, True)
-                        self.complete_transcript += final_text_segment + (" " if final_text_segment else "")
-                        self.current_sentence_transcript = ""
+                            self.text_output_callback(segment_text, self.current_sentence_transcript, False,
+                                                      sentence_id=self.sentence_id)
 
             elif is_final and self.current_sentence_transcript:  # 如果asr_chunk为空，但is_final且有累积的句子
                 # 这通常发生在VAD检测到语音结束，且speech_buffer中剩余部分不足一个asr_chunk_samples
                 # 或者asr_chunk处理后没有新文本，但仍需处理累积的句子
-                if self.use_punc and self.punc_model is not None:
-                    punc_res = self.punc_model.generate(input=self.current_sentence_transcript)
-                    if punc_res and punc_res[0]["text"]:
-                        final_text_segment = punc_res[0]["text"]
-                    else:
-                        final_text_segment = self.current_sentence_transcript  # 标点失败
-                else:
-                    final_text_segment = self.current_sentence_transcript
-
-                if self.text_output_callback:
-                    self.text_output_callback(final_text_segment, final_text_segment, True)
-                self.complete_transcript += final_text_segment + (" " if final_text_segment else "")
-                self.current_sentence_transcript = ""
+                self._finish_sentence(self.current_sentence_transcript)
 
         except Exception as e:
-            print(f"\nASR处理错误: {e}")
+            logger.error(f"ASR处理错误: {e}")
 
     def start(self):
         """开始录音和识别过程"""
         if self.running:
-            print("已经在运行中。")
+            logger.warning("已经在运行中。")
             return
 
-        print("开始录音和识别...")
+        logger.info("开始录音和识别...")
         self.running = True
+        self._audio_thread_pinned = False
         self.complete_transcript = ""
         self.current_sentence_transcript = ""
         self.raw_transcript = ""
         self.speech_buffer = np.array([], dtype=np.float32)
         self.last_forced_segment_time = 0  # 重置强制分段时间
         self.current_segment_start_time = None  # 重置当前片段开始时间
+        self.final_deadline = None
 
         # 重置动态静音检测状态
         self.is_in_silence = False
@@ -554,16 +703,16 @@ class FastLoadASR:
 
         # 确保所有模型都已加载
         if not self.ensure_asr_model_loaded():
-            print("ASR模型加载失败，无法启动。")
+            logger.error("ASR模型加载失败，无法启动。")
             self.running = False
             return
         if not self.load_vad_model_if_needed():
-            print("VAD模型加载失败，但将继续 (如果VAD已禁用)。")
+            logger.warning("VAD模型加载失败，但将继续 (如果VAD已禁用)。")
             if self.use_vad:  # 仅当use_vad为True时才作为错误处理
                 self.running = False
                 return
         if not self.load_punc_model_if_needed():
-            print("标点模型加载失败，但将继续 (如果标点恢复已禁用)。")
+            logger.warning("标点模型加载失败，但将继续 (如果标点恢复已禁用)。")
             if self.use_punc:  # 仅当use_punc为True时才作为错误处理
                 self.running = False
                 return
@@ -573,13 +722,17 @@ class FastLoadASR:
             self.audio_queue.get_nowait()
 
         # 启动音频处理线程
-        self.process_thread = threading.Thread(target=self.process_audio_thread)
+        self.process_thread = threading.Thread(target=self.process_audio_thread, name="process-audio")
         self.process_thread.daemon = True
         self.process_thread.start()
 
+        if not self.open_input_stream:
+            logger.info("未打开输入设备，等待外部送入音频。")
+            return
+
         # 打开音频流
         try:
-            print(f"尝试打开音频流 (设备索引: {self.input_device_index})...")
+            logger.info(f"尝试打开音频流 (设备索引: {self.input_device_index})...")
             self.stream = sd.InputStream(
                 callback=self.audio_callback,
                 channels=1,
@@ -588,13 +741,13 @@ class FastLoadASR:
                 device=self.input_device_index  # 使用指定的设备索引
             )
             self.stream.start()
-            print("音频流已成功打开并开始。")
+            logger.info("音频流已成功打开并开始。")
         except Exception as e:
-            print(f"打开音频流失败: {e}")
-            print("请检查您的麦克风是否连接并配置正确。")
+            logger.error(f"打开音频流失败: {e}")
+            logger.error("请检查您的麦克风是否连接并配置正确。")
             # 尝试使用默认设备（如果之前指定了设备）
             if self.input_device_index is not None:
-                print("尝试使用默认输入设备...")
+                logger.info("尝试使用默认输入设备...")
                 try:
                     self.stream = sd.InputStream(
                         callback=self.audio_callback,
@@ -604,22 +757,22 @@ class FastLoadASR:
                         device=None  # 使用默认设备
                     )
                     self.stream.start()
-                    print("音频流已使用默认设备成功打开并开始。")
+                    logger.info("音频流已使用默认设备成功打开并开始。")
                     # 更新 self.input_device_index 以反映实际使用的设备 (或者标记为默认)
                     # self.input_device_index = None # 或一个特殊值代表默认
                 except Exception as e_default:
-                    print(f"使用默认设备打开音频流仍失败: {e_default}")
+                    logger.error(f"使用默认设备打开音频流仍失败: {e_default}")
                     self.running = False
                     return
             else:  # 如果一开始就没指定设备且失败了
                 self.running = False
                 return
 
-        print("系统已启动。按回车键停止。")  # 与原始脚本行为一致
+        logger.info("系统已启动。按回车键停止。")  # 与原始脚本行为一致
 
     def stop(self):
         """停止录音和识别"""
-        print("正在停止录音和识别...")
+        logger.info("正在停止录音和识别...")
         self.running = False
 
         # 停止音频流
@@ -628,20 +781,20 @@ class FastLoadASR:
                 if not self.stream.stopped:
                     self.stream.stop()
                 self.stream.close()
-                print("录音设备已停止并关闭。")
+                logger.info("录音设备已停止并关闭。")
             except Exception as e:
-                print(f"停止或关闭录音设备时出错: {e}")
+                logger.error(f"停止或关闭录音设备时出错: {e}")
             del self.stream
 
         # 等待音频处理线程结束
         if hasattr(self, 'process_thread') and self.process_thread.is_alive():
-            print("等待音频处理线程结束...")
+            logger.info("等待音频处理线程结束...")
             self.process_thread.join(timeout=2)
             if self.process_thread.is_alive():
-                print("警告: 音频处理线程超时未结束。")
+                logger.warning("警告: 音频处理线程超时未结束。")
 
         # 处理剩余的音频数据 (确保最后一块被处理)
-        print("处理任何剩余的音频数据...")
+        logger.info("处理任何剩余的音频数据...")
         if len(self.speech_buffer) > 0 or self.current_sentence_transcript:
             self.process_asr_buffer(is_final=True)
 
@@ -653,11 +806,16 @@ class FastLoadASR:
         self.silence_start_time = None
         self.last_audio_volume = 0.0
         self.speaking_volume = 0.0
-        print("FunASR已停止。")
+        self.tracer.discard(self.detach_trace())
+        logger.info("FunASR已停止。")
 
 
 if __name__ == "__main__":
-    def demo_callback(segment, full_sentence, is_sentence_end):
+    from log_config import setup_logging
+
+    setup_logging()
+
+    def demo_callback(segment, full_sentence, is_sentence_end, trace_id=None, sentence_id=None):
         if is_sentence_end:
             print(f"\n[FINAL]: {full_sentence}")
         else:
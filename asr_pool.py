@@ -0,0 +1,662 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+预派生ASR进程池
+----------------------------
+多路识别各开一个进程时，每个进程都会通过 AutoModel 单独加载 paraformer-zh-streaming、fsmn-vad、ct-punc，
+常驻内存与启动时间都随进程数成倍增长。预派生模式下:
+- 父进程只加载一次模型，gc.collect() 后 gc.freeze()，此后的垃圾回收不再改写这些对象的GC头，
+  模型所在的内存页不会因此被复制
+- 以 fork 派生N个工作进程，按写时复制（copy-on-write）共享模型权重
+- 新的识别流分配给当前流数最少的工作进程；音频经共享内存环形缓冲送入，结果经 Pipe 返回
+- 工作进程意外退出时重新派生，并在新进程中恢复它负责的识别流
+- 按工作进程报告共享/私有内存（Linux读取 /proc/<pid>/smaps_rollup）
+
+仅支持提供 fork 的平台（Linux）。父进程在派生前不做推理，避免 torch 线程池在fork后失效。
+
+fork 只复制调用线程，其他线程持有的锁在子进程中永远不会释放，因此工作进程入口只使用自己新建的对象:
+- 首次启动时先派生全部工作进程，再启动各自的读取线程
+- 重新派生时父进程已有读取线程和日志写入线程（QueueListener）；派生期间持有日志输出的锁
+  （log_config.paused_output），子进程第一件事是把日志改为经 Pipe 发回，不再使用父进程的日志队列
+- 进程池的锁、连接等父进程对象在工作进程中都不会被使用
+
+使用方法:
+    python asr_pool.py meeting.wav --workers 4 --streams 8
+    python asr_pool.py meeting.wav --workers 2 --streams 4 --speed 0 --pin-workers
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+from asr_process import SharedAudioRing, PipeLogHandler, SAMPLE_RATE, DEFAULT_RING_SECONDS, DRAIN_TIMEOUT
+from cpu_tuning import available_cpus, configure_torch_threads, pin_current_thread
+from latency_tracer import get_tracer
+from log_config import paused_output, setup_logging
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+worker_logger = logging.getLogger(__name__ + ".worker")
+
+# 在 RESTART_WINDOW 秒内每个工作进程最多重新派生的次数
+DEFAULT_MAX_RESTARTS = 3
+RESTART_WINDOW = 300.0
+COMMAND_TIMEOUT = 10.0
+
+# smaps_rollup 中参与统计的字段（kB）
+_SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def process_memory(pid):
+    """
+    进程内存（MB）：rss、pss、shared（与其他进程共享的页）、private（本进程独占的页）
+
+    Linux读取 /proc/<pid>/smaps_rollup；其他平台尝试psutil（可能没有 shared），都不可用时返回None
+    """
+    try:
+        values = {}
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in _SMAPS_FIELDS:
+                    values[key] = int(rest.split()[0])
+        return {
+            "rss_mb": round(values.get("Rss", 0) / 1024, 1),
+            "pss_mb": round(values.get("Pss", 0) / 1024, 1),
+            "shared_mb": round((values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)) / 1024, 1),
+            "private_mb": round((values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024, 1),
+            "swap_mb": round(values.get("Swap", 0) / 1024, 1),
+        }
+    except (OSError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            info = psutil.Process(pid).memory_full_info()
+            return {
+                "rss_mb": round(info.rss / (1024 * 1024), 1),
+                "pss_mb": round(getattr(info, "pss", 0) / (1024 * 1024), 1) or None,
+                "shared_mb": round(getattr(info, "shared", 0) / (1024 * 1024), 1) or None,
+                "private_mb": round(info.uss / (1024 * 1024), 1),
+                "swap_mb": round(getattr(info, "swap", 0) / (1024 * 1024), 1),
+            }
+        except (psutil.Error, AttributeError):
+            pass
+    return None
+
+
+def _split_cpus(count):
+    """把可用CPU尽量平均地分成 count 组"""
+    cpus = available_cpus()
+    if count <= 0 or len(cpus) < count:
+        return [None] * count
+    size, extra = divmod(len(cpus), count)
+    groups, start = [], 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+def _worker_main(index, conn, models, asr_kwargs, torch_threads, cpus, log_level):
+    """工作进程入口（fork得到，模型已在内存中）：管理分配到本进程的识别流"""
+    send_lock = threading.Lock()
+
+    def send(kind, payload=None):
+        with send_lock:
+            conn.send((kind, payload))
+
+    # fork只保留当前线程，父进程的日志写入线程不存在，改为经 Pipe 发回
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [PipeLogHandler(send)]
+    root_logger.setLevel(log_level)
+    get_tracer().enabled = False
+    if cpus:
+        pin_current_thread(cpus, f"ASR工作进程{index}")
+    if torch_threads:
+        configure_torch_threads(torch_threads)
+
+    from FunASR import FastLoadASR
+
+    streams = {}  # stream_id -> (ring, asr)
+
+    def open_stream(payload):
+        stream_id = payload["stream_id"]
+
+        def on_text(segment, full_sentence, is_sentence_end, trace_id=None, sentence_id=None):
+            send("text", (stream_id, segment, full_sentence, is_sentence_end, sentence_id))
+
+        def on_speech_start(onset_time, vad_time):
+            send("speech", (stream_id, onset_time, vad_time))
+
+        ring = SharedAudioRing(payload["ring_capacity"], name=payload["ring_name"])
+        asr = FastLoadASR(text_output_callback=on_text, open_input_stream=False,
+                          preloaded_models=models, **asr_kwargs)
+        for key, value in payload["settings"].items():
+            setattr(asr, key, value)
+        asr.sentence_id = payload["sentence_id"]
+        asr.speech_start_callback = on_speech_start
+        asr.start()
+        streams[stream_id] = (ring, asr)
+        send("opened", (stream_id, asr.running))
+
+    def close_stream(stream_id):
+        ring, asr = streams.pop(stream_id)
+        # 剩余音频交给识别线程并等它处理完再停止；stop() 不处理音频队列，直接停止会丢掉最后一块
+        if asr.running:
+            remaining = ring.read()
+            if len(remaining):
+                asr.audio_callback(remaining[:, None], len(remaining), None, None)
+            if not asr.wait_drained(DRAIN_TIMEOUT):
+                worker_logger.warning(f"识别流 {stream_id} 关闭前等待剩余音频处理超时。")
+            asr.stop()
+        ring.close()
+        return asr.sentence_id
+
+    try:
+        while True:
+            if conn.poll(0 if streams else 0.05):
+                try:
+                    command, payload = conn.recv()
+                except EOFError:
+                    break  # 父进程已退出
+                if command == "open":
+                    open_stream(payload)
+                elif command == "close":
+                    sentence_id = close_stream(payload) if payload in streams else None
+                    send("closed", (payload, sentence_id))
+                elif command == "settings":
+                    stream_id, settings = payload
+                    if stream_id in streams:
+                        for key, value in settings.items():
+                            setattr(streams[stream_id][1], key, value)
+                elif command == "stats":
+                    send("stats", {stream_id: asr.get_stats() for stream_id, (_, asr) in streams.items()})
+                elif command == "exit":
+                    break
+
+            idle = True
+            for ring, asr in list(streams.values()):
+                samples = ring.read()
+                if len(samples):
+                    idle = False
+                    asr.audio_callback(samples[:, None], len(samples), None, None)
+            if idle and streams:
+                time.sleep(0.005)
+    finally:
+        for stream_id in list(streams):
+            close_stream(stream_id)
+
+
+class PoolStream:
+    """
+    池中的一路识别流
+
+    audio_callback 与 FastLoadASR.audio_callback 相同（可直接作为 sounddevice 回调），
+    结果以 FastLoadASR 的 text_output_callback 形式回调。
+    """
+
+    def __init__(self, pool, stream_id, text_output_callback, ring_seconds=DEFAULT_RING_SECONDS):
+        self.pool = pool
+        self.stream_id = stream_id
+        self.text_output_callback = text_output_callback
+        self.ring = SharedAudioRing(int(ring_seconds * SAMPLE_RATE))
+        self.worker_index = None
+        self.sentence_id = 0
+        self.settings = {}
+        self.closed = False
+        self.tracer = get_tracer()
+        self.current_trace_id = None
+
+    def audio_callback(self, indata, frames, time_info, status):
+        self.ring.write(indata[:, 0] if indata.ndim > 1 else indata)
+
+    def update_settings(self, **settings):
+        """修改静音参数等（silence_duration_threshold / relative_silence_threshold / force_final_timeout）"""
+        self.settings.update(settings)
+        self.pool._send(self.worker_index, "settings", (self.stream_id, settings))
+
+    def detach_trace(self):
+        trace_id, self.current_trace_id = self.current_trace_id, None
+        return trace_id
+
+    def discard_trace(self):
+        self.tracer.discard(self.detach_trace())
+
+    def _speech_started(self, onset_time, vad_time):
+        """工作进程报告本句语音开始：此时才开始追踪（时间戳为系统级单调时钟）"""
+        if self.current_trace_id is None:
+            self.current_trace_id = self.tracer.begin(t=onset_time)
+        if vad_time is not None:
+            self.tracer.mark(self.current_trace_id, "vad_start", t=vad_time)
+
+    def _deliver(self, segment, full_sentence, is_sentence_end, sentence_id):
+        if not self.text_output_callback:
+            return
+        if is_sentence_end:
+            trace_id = self.detach_trace()
+            self.tracer.mark(trace_id, "asr_final")
+            self.sentence_id = sentence_id + 1
+            self.text_output_callback(segment, full_sentence, True, trace_id=trace_id, sentence_id=sentence_id)
+        else:
+            self.text_output_callback(segment, full_sentence, False, sentence_id=sentence_id)
+
+    def close(self):
+        """处理完已送入的音频后关闭"""
+        if not self.closed:
+            self.pool.close_stream(self)
+
+
+class _Worker:
+    __slots__ = ['index', 'process', 'conn', 'streams', 'cpus', 'restart_times', 'restarts', 'events',
+                 'stream_stats']
+
+    def __init__(self, index, cpus):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.streams = {}
+        self.cpus = cpus
+        self.restart_times = deque()
+        self.restarts = 0
+        self.events = {}
+        self.stream_stats = {}
+
+
+class PreforkASRPool:
+    """
+    预派生ASR进程池
+
+    参数:
+        workers: 工作进程数
+        use_vad / use_punc: 是否加载VAD/标点模型
+        torch_threads: 每个工作进程的torch线程数，默认可用核心数 / 工作进程数
+        pin_workers: 是否把工作进程分别绑定到不重叠的CPU组
+        max_restarts: RESTART_WINDOW 秒内每个工作进程最多重新派生的次数
+        asr_kwargs: 传给每路 FastLoadASR 的其他参数（如 max_segment_duration_seconds）
+    """
+
+    def __init__(self, workers=2, use_vad=True, use_punc=True, torch_threads=None, pin_workers=False,
+                 max_restarts=DEFAULT_MAX_RESTARTS, **asr_kwargs):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("预派生进程池需要 fork（当前平台不支持），请改用 asr_mode=\"process\"。")
+        self.worker_count = max(1, int(workers))
+        self.use_vad = use_vad
+        self.use_punc = use_punc
+        self.torch_threads = torch_threads or max(1, len(available_cpus()) // self.worker_count)
+        self.max_restarts = max_restarts
+        self.asr_kwargs = dict(asr_kwargs, use_vad=use_vad, use_punc=use_punc)
+        cpu_groups = _split_cpus(self.worker_count) if pin_workers else [None] * self.worker_count
+        self.workers = [_Worker(index, cpus) for index, cpus in enumerate(cpu_groups)]
+
+        self.models = None
+        self.timings = {}
+        self._context = multiprocessing.get_context("fork")
+        self._lock = threading.RLock()
+        self._next_stream_id = 0
+        self._closing = False
+
+    # ---- 启动 ----
+
+    def start(self):
+        """加载模型、冻结GC并派生工作进程"""
+        start = time.perf_counter()
+        from FunASR import load_models
+
+        logger.info("父进程加载共享模型...")
+        self.models = load_models(self.use_vad, self.use_punc, self.torch_threads)
+        self.timings["model_load_seconds"] = round(time.perf_counter() - start, 3)
+
+        # 把当前所有对象移入永久代：之后的GC不再遍历和改写它们，模型页保持共享
+        gc.collect()
+        gc.freeze()
+        logger.info(f"模型加载完成，已冻结 {gc.get_freeze_count()} 个对象，派生 {self.worker_count} 个工作进程...")
+
+        # 先在父进程中启动资源跟踪进程，工作进程继承它；否则每个工作进程各起一个，
+        # 退出时会把仍在使用的共享内存当作泄漏删除
+        resource_tracker.ensure_running()
+        fork_start = time.perf_counter()
+        # 全部派生完再启动读取线程，首次派生时父进程中只有日志写入线程
+        processes = [self._fork(worker) for worker in self.workers]
+        for worker, process in zip(self.workers, processes):
+            self._start_reader(worker, process)
+        self.timings["fork_seconds"] = round(time.perf_counter() - fork_start, 3)
+        self.timings["startup_seconds"] = round(time.perf_counter() - start, 3)
+        return self
+
+    def _spawn(self, worker):
+        """（重新）派生一个工作进程并启动其读取线程"""
+        self._start_reader(worker, self._fork(worker))
+
+    def _fork(self, worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, name=f"asr-worker-{worker.index}", daemon=True,
+            args=(worker.index, child_conn, self.models, self.asr_kwargs, self.torch_threads, worker.cpus,
+                  logging.getLogger().getEffectiveLevel()))
+        # 派生期间日志写入线程不会处于写终端/文件的过程中（见模块说明）
+        with paused_output():
+            process.start()
+        child_conn.close()
+        with self._lock:
+            worker.process, worker.conn = process, parent_conn
+        logger.info(f"ASR工作进程 {worker.index} 已启动 (pid {process.pid})")
+        return process
+
+    def _start_reader(self, worker, process):
+        threading.Thread(target=self._reader, args=(worker, process, worker.conn),
+                         name=f"asr-worker-{worker.index}-reader", daemon=True).start()
+        # 恢复重新派生前分配到该进程的识别流
+        for stream in list(worker.streams.values()):
+            self._send_open(worker, stream)
+
+    def _send(self, index, command, payload=None):
+        if index is None:
+            return False
+        worker = self.workers[index]
+        with self._lock:
+            if worker.conn is None:
+                return False
+            try:
+                worker.conn.send((command, payload))
+                return True
+            except (OSError, ValueError) as e:
+                logger.warning(f"向ASR工作进程 {index} 发送 {command} 失败: {e}")
+                return False
+
+    def _request(self, worker, command, payload, key):
+        """发送命令并等待对应的回复"""
+        event = worker.events[key] = threading.Event()
+        if not self._send(worker.index, command, payload) or not event.wait(COMMAND_TIMEOUT):
+            logger.warning(f"ASR工作进程 {worker.index} 未响应 {command}")
+        worker.events.pop(key, None)
+
+    def _reader(self, worker, process, conn):
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                self._handle_message(worker, kind, payload)
+            except Exception as e:
+                logger.error(f"处理ASR工作进程 {worker.index} 消息 {kind} 时出错: {e}")
+
+        process.join(timeout=5)
+        conn.close()
+        with self._lock:
+            if process is not worker.process:
+                return
+            worker.conn = None
+        if not self._closing:
+            self._on_worker_exit(worker, process.exitcode)
+
+    def _handle_message(self, worker, kind, payload):
+        if kind == "text":
+            stream_id, segment, full_sentence, is_sentence_end, sentence_id = payload
+            stream = worker.streams.get(stream_id)
+            if stream is not None:
+                stream._deliver(segment, full_sentence, is_sentence_end, sentence_id)
+        elif kind == "speech":
+            stream_id, onset_time, vad_time = payload
+            stream = worker.streams.get(stream_id)
+            if stream is not None:
+                stream._speech_started(onset_time, vad_time)
+        elif kind == "log":
+            level, message = payload
+            worker_logger.log(level, f"[{worker.index}] {message}")
+        elif kind == "opened":
+            stream_id, running = payload
+            if not running:
+                logger.error(f"识别流 {stream_id} 在工作进程 {worker.index} 中启动失败")
+            self._set_event(worker, ("opened", stream_id))
+        elif kind == "closed":
+            stream_id, sentence_id = payload
+            stream = worker.streams.get(stream_id)
+            if stream is not None and sentence_id is not None:
+                stream.sentence_id = sentence_id
+            self._set_event(worker, ("closed", stream_id))
+        elif kind == "stats":
+            worker.stream_stats = payload
+            self._set_event(worker, "stats")
+
+    @staticmethod
+    def _set_event(worker, key):
+        event = worker.events.get(key)
+        if event is not None:
+            event.set()
+
+    def _on_worker_exit(self, worker, exitcode):
+        now = time.monotonic()
+        while worker.restart_times and now - worker.restart_times[0] > RESTART_WINDOW:
+            worker.restart_times.popleft()
+        if len(worker.restart_times) >= self.max_restarts:
+            logger.error(f"ASR工作进程 {worker.index} 退出 (exitcode {exitcode})，"
+                         f"{RESTART_WINDOW:.0f}s内已重新派生 {len(worker.restart_times)} 次，不再派生；"
+                         f"其上的 {len(worker.streams)} 路识别流停止。")
+            return
+        worker.restart_times.append(now)
+        worker.restarts += 1
+        for stream in worker.streams.values():
+            # 未完成句子的trace随工作进程一起丢失
+            stream.discard_trace()
+        logger.error(f"ASR工作进程 {worker.index} 意外退出 (exitcode {exitcode})，重新派生并恢复 "
+                     f"{len(worker.streams)} 路识别流...")
+        self._spawn(worker)
+
+    # ---- 识别流 ----
+
+    def _send_open(self, worker, stream):
+        self._send(worker.index, "open", {
+            "stream_id": stream.stream_id, "ring_name": stream.ring.name,
+            "ring_capacity": stream.ring.capacity, "settings": dict(stream.settings),
+            "sentence_id": stream.sentence_id,
+        })
+
+    def open_stream(self, text_output_callback, ring_seconds=DEFAULT_RING_SECONDS, **settings):
+        """
+        新建一路识别流，分配给当前流数最少的工作进程
+
+        参数:
+            text_output_callback: 与 FastLoadASR 相同的结果回调
+            settings: 初始静音参数（silence_duration_threshold 等）
+        """
+        if self.models is None:
+            raise RuntimeError("进程池尚未启动（先调用 start()）")
+        with self._lock:
+            stream_id = self._next_stream_id
+            self._next_stream_id += 1
+            alive = [worker for worker in self.workers if worker.conn is not None] or self.workers
+            worker = min(alive, key=lambda w: (len(w.streams), w.index))
+            stream = PoolStream(self, stream_id, text_output_callback, ring_seconds)
+            stream.settings.update(settings)
+            stream.worker_index = worker.index
+            worker.streams[stream_id] = stream
+        worker.events[("opened", stream_id)] = event = threading.Event()
+        self._send_open(worker, stream)
+        if not event.wait(COMMAND_TIMEOUT):
+            logger.warning(f"识别流 {stream_id} 在工作进程 {worker.index} 中未按时启动")
+        worker.events.pop(("opened", stream_id), None)
+        logger.info(f"识别流 {stream_id} 已分配到工作进程 {worker.index}")
+        return stream
+
+    def close_stream(self, stream):
+        worker = self.workers[stream.worker_index]
+        if stream.stream_id in worker.streams:
+            self._request(worker, "close", stream.stream_id, ("closed", stream.stream_id))
+            with self._lock:
+                worker.streams.pop(stream.stream_id, None)
+        stream.closed = True
+        stream.discard_trace()
+        stream.ring.close()
+
+    # ---- 统计 ----
+
+    def memory_report(self):
+        """父进程与各工作进程的共享/私有内存（MB）及流数"""
+        report = {"parent": dict(pid=os.getpid(), **(process_memory(os.getpid()) or {})), "workers": []}
+        for worker in self.workers:
+            pid = worker.process.pid if worker.process else None
+            alive = bool(worker.process and worker.process.is_alive())
+            entry = {"index": worker.index, "pid": pid, "alive": alive, "streams": len(worker.streams),
+                     "restarts": worker.restarts, "cpus": worker.cpus}
+            if alive:
+                entry.update(process_memory(pid) or {})
+            report["workers"].append(entry)
+        workers = [entry for entry in report["workers"] if "private_mb" in entry]
+        if workers:
+            report["total_private_mb"] = round(sum(entry["private_mb"] for entry in workers), 1)
+            report["total_pss_mb"] = round(sum(entry["pss_mb"] or 0 for entry in workers), 1)
+        return report
+
+    def get_stats(self, refresh=True):
+        """各工作进程中每路识别流的运行状态"""
+        if refresh:
+            for worker in self.workers:
+                if worker.conn is not None:
+                    self._request(worker, "stats", None, "stats")
+        return {
+            "timings": dict(self.timings),
+            "workers": [{"index": worker.index, "restarts": worker.restarts, "streams": worker.stream_stats}
+                        for worker in self.workers],
+        }
+
+    def close(self):
+        """关闭全部识别流与工作进程"""
+        if self._closing:
+            return
+        for worker in self.workers:
+            for stream in list(worker.streams.values()):
+                stream.close()
+        self._closing = True
+        for worker in self.workers:
+            self._send(worker.index, "exit")
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    logger.warning(f"ASR工作进程 {worker.index} 未按时退出，强制结束。")
+                    worker.process.terminate()
+                    worker.process.join(timeout=2)
+            with self._lock:
+                if worker.conn is not None:
+                    worker.conn.close()
+                    worker.conn = None
+        gc.unfreeze()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="预派生ASR进程池：多路录音同时识别，报告共享/私有内存")
+    parser.add_argument("wav", help="每路识别流送入的WAV文件")
+    parser.add_argument("--workers", type=int, default=2, help="工作进程数 (默认2)")
+    parser.add_argument("--streams", type=int, default=4, help="识别流数 (默认4)")
+    parser.add_argument("--speed", type=float, default=1.0, help="送入倍速，1为实时，0为不限速 (默认1)")
+    parser.add_argument("--block-ms", type=int, default=20, help="每次送入的音频长度 (默认20ms)")
+    parser.add_argument("--torch-threads", type=int, default=None, help="每个工作进程的torch线程数")
+    parser.add_argument("--pin-workers", action="store_true", help="工作进程分别绑定到不重叠的CPU组")
+    parser.add_argument("--no-vad", action="store_true", help="不加载VAD模型")
+    parser.add_argument("--no-punc", action="store_true", help="不加载标点模型")
+    parser.add_argument("--output", default=None, help="报告JSON输出路径")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别 (默认WARNING)")
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_level)
+    from replay_harness import DEFAULT_TAIL_SILENCE, load_wav
+
+    audio = load_wav(args.wav)
+    audio = np.concatenate([audio, np.zeros(int(DEFAULT_TAIL_SILENCE * SAMPLE_RATE), dtype=np.float32)])
+    pool = PreforkASRPool(args.workers, use_vad=not args.no_vad, use_punc=not args.no_punc,
+                          torch_threads=args.torch_threads, pin_workers=args.pin_workers).start()
+    finals = {}
+
+    def make_callback(index):
+        def on_text(segment, full_sentence, is_sentence_end, trace_id=None, sentence_id=None):
+            if is_sentence_end:
+                finals.setdefault(index, []).append(full_sentence)
+        return on_text
+
+    streams = [pool.open_stream(make_callback(index)) for index in range(args.streams)]
+    block = max(1, int(SAMPLE_RATE * args.block_ms / 1000))
+
+    def feed(stream):
+        start = time.perf_counter()
+        for offset in range(0, len(audio), block):
+            chunk = audio[offset:offset + block]
+            stream.audio_callback(chunk[:, None], len(chunk), None, None)
+            if args.speed > 0:
+                delay = start + (offset + len(chunk)) / SAMPLE_RATE / args.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    feed_start = time.perf_counter()
+    feeders = [threading.Thread(target=feed, args=(stream,), daemon=True) for stream in streams]
+    for feeder in feeders:
+        feeder.start()
+    for feeder in feeders:
+        feeder.join()
+    # 送入结束时测内存（所有工作进程都在识别）
+    memory = pool.memory_report()
+    for stream in streams:
+        stream.close()
+    total_seconds = time.perf_counter() - feed_start
+    pool.close()
+
+    audio_seconds = len(audio) / SAMPLE_RATE
+    report = {
+        "workers": pool.worker_count,
+        "streams": len(streams),
+        "torch_threads_per_worker": pool.torch_threads,
+        "audio_seconds": round(audio_seconds, 2),
+        "total_seconds": round(total_seconds, 2),
+        # 全部识别流的音频总时长 / 墙钟时间
+        "throughput_x_realtime": round(audio_seconds * len(streams) / total_seconds, 2) if total_seconds else None,
+        "sentences_per_stream": [len(finals.get(index, [])) for index in range(len(streams))],
+        "timings": pool.timings,
+        "memory": memory,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n=== 预派生进程池 ===")
+    for key in ("workers", "streams", "torch_threads_per_worker", "audio_seconds", "total_seconds",
+                "throughput_x_realtime", "sentences_per_stream", "timings"):
+        print(f"{key}: {report[key]}")
+    parent = memory["parent"]
+    print(f"\n{'进程':>8} {'pid':>7} {'streams':>7} {'rss_mb':>8} {'pss_mb':>8} {'shared_mb':>9} {'private_mb':>10}")
+    print(f"{'parent':>8} {parent['pid']:>7} {'-':>7} {parent.get('rss_mb')!s:>8} {parent.get('pss_mb')!s:>8} "
+          f"{parent.get('shared_mb')!s:>9} {parent.get('private_mb')!s:>10}")
+    for entry in memory["workers"]:
+        print(f"{'worker' + str(entry['index']):>8} {entry['pid']!s:>7} {entry['streams']:>7} "
+              f"{entry.get('rss_mb')!s:>8} {entry.get('pss_mb')!s:>8} {entry.get('shared_mb')!s:>9} "
+              f"{entry.get('private_mb')!s:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
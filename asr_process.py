@@ -0,0 +1,585 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+子进程ASR引擎
+----------------------------
+FastLoadASR 的采集、NumPy缓冲与三个PyTorch模型原本与Tk界面、TTS事件循环共用一个GIL，
+界面线程的GC停顿会造成音频回调抖动。ProcessASR 把VAD/ASR/标点推理放到子进程:
+- 父进程只保留麦克风回调，音频写入 multiprocessing.shared_memory 上的环形缓冲（不经过pickle）
+- 子进程读取环形缓冲，交给其中的 FastLoadASR 处理，识别结果与日志经 Pipe 发回
+- 子进程意外退出时自动重启并重新加载模型（有次数上限），运行中则自动恢复识别
+
+接口与 FastLoadASR 一致（start/stop/audio_callback/get_stats 及静音参数），
+流水线配置 asr_mode="process" 时使用。
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from latency_tracer import get_tracer
+from cpu_tuning import pin_current_thread
+
+logger = logging.getLogger(__name__)
+engine_logger = logging.getLogger(__name__ + ".engine")
+
+SAMPLE_RATE = 16000
+# 环形缓冲容纳的音频秒数（子进程重启、加载模型期间的音频暂存于此，超出后丢弃新音频）
+DEFAULT_RING_SECONDS = 30.0
+# 在 RESTART_WINDOW 秒内最多自动重启的次数
+DEFAULT_MAX_RESTARTS = 3
+RESTART_WINDOW = 300.0
+LOAD_TIMEOUT = 600.0
+COMMAND_TIMEOUT = 10.0
+# 子进程停止前等待剩余音频处理完的最长秒数（小于 COMMAND_TIMEOUT）
+DRAIN_TIMEOUT = 2.0
+# 子进程主动上报运行状态的间隔（秒）
+STATS_INTERVAL = 1.0
+
+# 环形缓冲头部: [写入位置, 读取位置]（单调递增的样本计数），数据区按缓存行对齐
+_HEADER_BYTES = 64
+
+
+class SharedAudioRing:
+    """
+    shared_memory 上的单生产者/单消费者 float32 环形缓冲
+
+    生产者只写写入位置，消费者只写读取位置，因此不需要跨进程锁。
+    写入空间不足时整块丢弃（音频回调不能等待）。
+    """
+
+    def __init__(self, capacity, name=None):
+        self.capacity = int(capacity)
+        size = _HEADER_BYTES + self.capacity * 4
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self._header = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf[:16])
+        self._data = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf[_HEADER_BYTES:size])
+        if self.owner:
+            self._header[:] = 0
+        self.overruns = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def available(self):
+        """可读取的样本数"""
+        return int(self._header[0] - self._header[1])
+
+    def write(self, samples):
+        """写入样本（生产者调用），空间不足时丢弃并返回 False"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        count = len(samples)
+        write_pos = int(self._header[0])
+        if count > self.capacity - (write_pos - int(self._header[1])):
+            self.overruns += 1
+            return False
+        start = write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < count:
+            self._data[:count - first] = samples[first:]
+        # 数据写完后再推进写入位置，消费者不会读到未写完的样本
+        self._header[0] = write_pos + count
+        return True
+
+    def read(self, max_samples=None):
+        """读取并移除可读的样本（消费者调用），返回副本"""
+        read_pos = int(self._header[1])
+        count = int(self._header[0]) - read_pos
+        if max_samples is not None:
+            count = min(count, int(max_samples))
+        if count <= 0:
+            return np.empty(0, dtype=np.float32)
+        start = read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        if first < count:
+            samples = np.concatenate([self._data[start:], self._data[:count - first]])
+        else:
+            samples = self._data[start:start + count].copy()
+        self._header[1] = read_pos + count
+        return samples
+
+    def discard(self):
+        """丢弃全部未读样本（消费者调用）"""
+        self._header[1] = self._header[0]
+
+    def close(self):
+        # 先释放指向共享内存的数组，否则 close 会因缓冲区仍被引用而失败
+        self._header = None
+        self._data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class PipeLogHandler(logging.Handler):
+    """子进程中把日志记录经 Pipe 发回父进程"""
+
+    def __init__(self, send):
+        super().__init__()
+        self._send = send
+
+    def emit(self, record):
+        try:
+            self._send("log", (record.levelno, f"{record.name}: {record.getMessage()}"))
+        except Exception:
+            pass
+
+
+def _engine_main(ring_name, ring_capacity, asr_kwargs, conn, log_level):
+    """子进程入口：加载模型，读取环形缓冲并执行识别，按父进程命令启停"""
+    send_lock = threading.Lock()
+
+    def send(kind, payload=None):
+        # 识别线程与主循环都会发送，Connection 本身不是线程安全的
+        with send_lock:
+            conn.send((kind, payload))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [PipeLogHandler(send)]
+    root_logger.setLevel(log_level)
+    # 逐句追踪在父进程中进行
+    get_tracer().enabled = False
+
+    from FunASR import FastLoadASR
+    from runtime_metrics import get_registry
+
+    def on_text(segment, full_sentence, is_sentence_end, trace_id=None, sentence_id=None):
+        send("text", (segment, full_sentence, is_sentence_end, sentence_id))
+
+    def on_speech_start(onset_time, vad_time):
+        # perf_counter 是系统级单调时钟，父进程可直接使用这些时间戳
+        send("speech", (onset_time, vad_time))
+
+    ring = SharedAudioRing(ring_capacity, name=ring_name)
+    asr = FastLoadASR(text_output_callback=on_text, open_input_stream=False, **asr_kwargs)
+    asr.speech_start_callback = on_speech_start
+    try:
+        asr.ensure_asr_model_loaded()
+        asr.load_vad_model_if_needed()
+        asr.load_punc_model_if_needed()
+        send("loaded", {"asr": asr.asr_model is not None, "vad": asr.vad_model is not None,
+                        "punc": asr.punc_model is not None})
+
+        def stats():
+            result = asr.get_stats()
+            result["pid"] = os.getpid()
+            result["timings"] = get_registry().snapshot()["timings"]
+            return result
+
+        next_stats = 0.0
+        while True:
+            if conn.poll(0 if asr.running else 0.01):
+                try:
+                    command, payload = conn.recv()
+                except EOFError:
+                    break  # 父进程已退出
+                if command == "settings":
+                    for key, value in payload.items():
+                        setattr(asr, key, value)
+                elif command == "start":
+                    for key, value in payload["settings"].items():
+                        setattr(asr, key, value)
+                    asr.sentence_id = payload["sentence_id"]
+                    if payload["discard"]:
+                        ring.discard()
+                    asr.start()
+                    send("started", asr.running)
+                elif command == "stop":
+                    # 先把环形缓冲中剩余的音频交给识别线程并等它处理完，再停止（停止时识别剩余的语音缓冲）；
+                    # stop() 不会再处理音频队列，直接停止会丢掉最后一块
+                    if asr.running:
+                        remaining = ring.read()
+                        if len(remaining):
+                            asr.audio_callback(remaining[:, None], len(remaining), None, None)
+                        if not asr.wait_drained(DRAIN_TIMEOUT):
+                            logger.warning("停止前等待剩余音频处理超时。")
+                        asr.stop()
+                    send("stopped", asr.sentence_id)
+                elif command == "stats":
+                    send("stats", stats())
+                elif command == "exit":
+                    break
+
+            if asr.running:
+                samples = ring.read()
+                if len(samples):
+                    asr.audio_callback(samples[:, None], len(samples), None, None)
+                else:
+                    time.sleep(0.005)
+
+            now = time.monotonic()
+            if now >= next_stats:
+                send("stats", stats())
+                next_stats = now + STATS_INTERVAL
+    finally:
+        if asr.running:
+            asr.stop()
+        ring.close()
+
+
+class ProcessASR:
+    """
+    在子进程中运行的 FastLoadASR（接口相同）
+
+    额外参数:
+        ring_seconds: 共享环形缓冲的容量（秒）
+        max_restarts: RESTART_WINDOW 秒内最多自动重启的次数
+    """
+
+    def __init__(self, use_vad=True, use_punc=True, disable_update=True, text_output_callback=None,
+                 max_segment_duration_seconds=3.0, input_device_index=None, open_input_stream=True,
+                 force_final_timeout=None, torch_threads=None, torch_interop_threads=None,
+                 inference_cpus=None, audio_cpus=None, ring_seconds=DEFAULT_RING_SECONDS,
+                 max_restarts=DEFAULT_MAX_RESTARTS):
+        self.use_vad = use_vad
+        self.use_punc = use_punc
+        self.text_output_callback = text_output_callback
+        self.input_device_index = input_device_index
+        self.open_input_stream = open_input_stream
+        self.audio_cpus = audio_cpus
+        self._audio_thread_pinned = False
+        self.sample_rate = SAMPLE_RATE
+        self.max_restarts = max_restarts
+
+        # 子进程中 FastLoadASR 的构造参数（音频回调在父进程，不传 audio_cpus）
+        self._asr_kwargs = {
+            "use_vad": use_vad, "use_punc": use_punc, "disable_update": disable_update,
+            "max_segment_duration_seconds": max_segment_duration_seconds,
+            "force_final_timeout": force_final_timeout, "torch_threads": torch_threads,
+            "torch_interop_threads": torch_interop_threads, "inference_cpus": inference_cpus,
+        }
+        # 运行中可修改、需要同步给子进程的参数
+        self._settings = {
+            "silence_duration_threshold": 0.5,
+            "relative_silence_threshold": 0.8,
+            "force_final_timeout": force_final_timeout,
+        }
+
+        self.running = False
+        self.sentence_id = 0
+        self.tracer = get_tracer()
+        self.current_trace_id = None
+
+        # 子进程中已加载的模型（父进程不持有模型，只记录名称）
+        self.asr_model = None
+        self.vad_model = None
+        self.punc_model = None
+
+        self.ring = SharedAudioRing(int(ring_seconds * SAMPLE_RATE))
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        self._started = threading.Event()
+        self._stopped = threading.Event()
+        self._stats_event = threading.Event()
+        self._engine_started = False
+        self._engine_stats = {}
+        self._restart_times = deque()
+        self.restarts = 0
+        self._closing = False
+        atexit.register(self.close)
+
+        # 与 FastLoadASR 一样在构造时开始加载模型（在子进程中）
+        logger.info("开始在子进程中加载ASR模型...")
+        self._spawn()
+
+    # ---- 子进程管理 ----
+
+    def _spawn(self):
+        with self._lock:
+            self._loaded.clear()
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_engine_main, name="asr-engine", daemon=True,
+                args=(self.ring.name, self.ring.capacity, self._asr_kwargs, child_conn,
+                      logging.getLogger().getEffectiveLevel()))
+            process.start()
+            # 关闭父进程中的子端，子进程退出时 recv 才会得到 EOF
+            child_conn.close()
+            self._process, self._conn = process, parent_conn
+        logger.info(f"ASR子进程已启动 (pid {process.pid})")
+        threading.Thread(target=self._reader, args=(process, parent_conn),
+                         name="asr-engine-reader", daemon=True).start()
+
+    def _send(self, command, payload=None):
+        with self._lock:
+            if self._conn is None:
+                return False
+            try:
+                self._conn.send((command, payload))
+                return True
+            except (OSError, ValueError) as e:
+                logger.warning(f"向ASR子进程发送 {command} 失败: {e}")
+                return False
+
+    def _reader(self, process, conn):
+        """接收子进程消息；子进程退出后按需重启"""
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                self._handle_message(kind, payload)
+            except Exception as e:
+                logger.error(f"处理ASR子进程消息 {kind} 时出错: {e}")
+
+        process.join(timeout=5)
+        conn.close()
+        with self._lock:
+            if process is not self._process:
+                return
+            self._conn = None
+        if not self._closing:
+            self._on_engine_exit(process.exitcode)
+
+    def _handle_message(self, kind, payload):
+        if kind == "text":
+            segment, full_sentence, is_sentence_end, sentence_id = payload
+            if not self.text_output_callback:
+                return
+            if is_sentence_end:
+                trace_id = self.detach_trace()
+                self.tracer.mark(trace_id, "asr_final")
+                self.sentence_id = sentence_id + 1
+                self.text_output_callback(segment, full_sentence, True, trace_id=trace_id, sentence_id=sentence_id)
+            else:
+                self.text_output_callback(segment, full_sentence, False, sentence_id=sentence_id)
+        elif kind == "speech":
+            # 本句语音开始（子进程中VAD检测到语音）时才开始追踪，不计入语音之前的静音
+            onset_time, vad_time = payload
+            if self.current_trace_id is None:
+                self.current_trace_id = self.tracer.begin(t=onset_time)
+            if vad_time is not None:
+                self.tracer.mark(self.current_trace_id, "vad_start", t=vad_time)
+        elif kind == "log":
+            level, message = payload
+            engine_logger.log(level, message)
+        elif kind == "stats":
+            self._engine_stats = payload
+            self._stats_event.set()
+        elif kind == "loaded":
+            self.asr_model = "paraformer-zh-streaming" if payload["asr"] else None
+            self.vad_model = "fsmn-vad" if payload["vad"] else None
+            self.punc_model = "ct-punc" if payload["punc"] else None
+            self._loaded.set()
+            if self.running:
+                # 重启后恢复识别，保留重启期间缓冲的音频
+                self._send_start(discard=False)
+        elif kind == "started":
+            self._engine_started = payload
+            self._started.set()
+        elif kind == "stopped":
+            self.sentence_id = payload
+            self._stopped.set()
+
+    def _on_engine_exit(self, exitcode):
+        if not self._loaded.is_set():
+            # 导入或加载模型阶段就退出（如缺少依赖），重启也无济于事
+            logger.error(f"ASR子进程在加载模型时退出 (exitcode {exitcode})。")
+            self.running = False
+            self.asr_model = None
+            self._loaded.set()
+            return
+        now = time.monotonic()
+        while self._restart_times and now - self._restart_times[0] > RESTART_WINDOW:
+            self._restart_times.popleft()
+        if len(self._restart_times) >= self.max_restarts:
+            logger.error(f"ASR子进程退出 (exitcode {exitcode})，{RESTART_WINDOW:.0f}s内已重启"
+                         f" {len(self._restart_times)} 次，不再重启。")
+            self.running = False
+            self.asr_model = None
+            self._loaded.set()
+            self._started.set()
+            self._stopped.set()
+            return
+        self._restart_times.append(now)
+        self.restarts += 1
+        # 未完成句子的trace随子进程一起丢失
+        self.tracer.discard(self.detach_trace())
+        logger.error(f"ASR子进程意外退出 (exitcode {exitcode})，正在重启（第 {self.restarts} 次）...")
+        self._spawn()
+
+    def _send_start(self, discard=True):
+        self._started.clear()
+        self._send("start", {"settings": dict(self._settings), "sentence_id": self.sentence_id,
+                             "discard": discard})
+
+    # ---- 与 FastLoadASR 相同的接口 ----
+
+    def _make_setting(name):
+        def getter(self):
+            return self._settings[name]
+
+        def setter(self, value):
+            self._settings[name] = value
+            self._send("settings", {name: value})
+        return property(getter, setter)
+
+    silence_duration_threshold = _make_setting("silence_duration_threshold")
+    relative_silence_threshold = _make_setting("relative_silence_threshold")
+    force_final_timeout = _make_setting("force_final_timeout")
+    del _make_setting
+
+    def ensure_asr_model_loaded(self):
+        """等待子进程加载模型"""
+        if self._process is None or not self._process.is_alive():
+            if self._conn is None and not self._closing:
+                self._spawn()
+        if not self._loaded.wait(LOAD_TIMEOUT):
+            logger.error("等待ASR子进程加载模型超时。")
+            return False
+        return self.asr_model is not None
+
+    def load_vad_model_if_needed(self):
+        return not self.use_vad or (self.ensure_asr_model_loaded() and self.vad_model is not None)
+
+    def load_punc_model_if_needed(self):
+        return not self.use_punc or (self.ensure_asr_model_loaded() and self.punc_model is not None)
+
+    def audio_callback(self, indata, frames, time_info, status):
+        """音频流回调：只把样本写入共享环形缓冲"""
+        if status:
+            logger.warning(f"音频状态: {status}")
+        if not self._audio_thread_pinned:
+            self._audio_thread_pinned = True
+            if self.audio_cpus is not None:
+                pin_current_thread(self.audio_cpus, "音频回调线程")
+        if not self.ring.write(indata[:, 0] if indata.ndim > 1 else indata) and self.ring.overruns == 1:
+            logger.warning("ASR子进程处理不及，共享音频缓冲已满，开始丢弃音频。")
+
+    def detach_trace(self):
+        trace_id, self.current_trace_id = self.current_trace_id, None
+        return trace_id
+
+    def audio_drained(self):
+        """已送入的音频是否都已被子进程取走并交给识别线程"""
+        if self.ring.available():
+            return False
+        stats = self.get_stats(refresh=True).get("engine", {})
+        return stats.get("audio_queue_depth", 0) == 0
+
+    def get_stats(self, refresh=False):
+        """运行状态；refresh=True 时向子进程请求最新状态（最多等待1秒）"""
+        if refresh and self._process is not None:
+            self._stats_event.clear()
+            if self._send("stats"):
+                self._stats_event.wait(1.0)
+        return {
+            "mode": "process",
+            "running": self.running,
+            "engine_pid": self._process.pid if self._process else None,
+            "engine_alive": bool(self._process and self._process.is_alive()),
+            "restarts": self.restarts,
+            "ring_fill_seconds": round(self.ring.available() / self.sample_rate, 2),
+            "ring_overruns": self.ring.overruns,
+            "sentences": self.sentence_id,
+            "engine": self._engine_stats,
+        }
+
+    def start(self):
+        """开始识别（子进程开始读取缓冲），并按需打开麦克风"""
+        if self.running:
+            logger.warning("已经在运行中。")
+            return
+        if not self.ensure_asr_model_loaded():
+            logger.error("ASR模型加载失败，无法启动。")
+            return
+        if not self.load_vad_model_if_needed() or not self.load_punc_model_if_needed():
+            logger.error("VAD或标点模型加载失败，无法启动。")
+            return
+
+        logger.info("开始录音和识别 (ASR子进程)...")
+        self._audio_thread_pinned = False
+        self.ring.overruns = 0
+        self.running = True
+        self._send_start()
+        if not self._started.wait(COMMAND_TIMEOUT) or not self._engine_started:
+            logger.error("ASR子进程未能开始识别。")
+            self.running = False
+            return
+
+        if not self.open_input_stream:
+            logger.info("未打开输入设备，等待外部送入音频。")
+            return
+
+        import sounddevice as sd
+        for device in ([self.input_device_index, None] if self.input_device_index is not None else [None]):
+            try:
+                logger.info(f"尝试打开音频流 (设备索引: {device})...")
+                self.stream = sd.InputStream(callback=self.audio_callback, channels=1,
+                                             samplerate=self.sample_rate, dtype='float32', device=device)
+                self.stream.start()
+                logger.info("音频流已成功打开并开始。")
+                return
+            except Exception as e:
+                logger.error(f"打开音频流失败: {e}")
+        self.stop()
+
+    def stop(self):
+        """停止录音；子进程处理完剩余音频后返回"""
+        logger.info("正在停止录音和识别...")
+        stream = getattr(self, "stream", None)
+        if stream is not None:
+            try:
+                if not stream.stopped:
+                    stream.stop()
+                stream.close()
+                logger.info("录音设备已停止并关闭。")
+            except Exception as e:
+                logger.error(f"停止或关闭录音设备时出错: {e}")
+            self.stream = None
+
+        was_running, self.running = self.running, False
+        if was_running:
+            self._stopped.clear()
+            if self._send("stop") and not self._stopped.wait(COMMAND_TIMEOUT):
+                logger.warning("等待ASR子进程停止超时。")
+        self.tracer.discard(self.detach_trace())
+        logger.info("ASR子进程已停止识别。")
+
+    def close(self):
+        """结束子进程并释放共享内存"""
+        if self._closing:
+            return
+        if self.running:
+            self.stop()
+        self._closing = True
+        atexit.unregister(self.close)
+        process = self._process
+        self._send("exit")
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                logger.warning("ASR子进程未按时退出，强制结束。")
+                process.terminate()
+                process.join(timeout=2)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self.ring.close()
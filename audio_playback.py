@@ -0,0 +1,389 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+TTS音频解码、PCM缓存与输出
+----------------------------
+- 每段合成的MP3只解码一次，转换为设备采样率的float32 PCM（基于FFT的向量化重采样）
+- 解码结果与压缩音频一起缓存，重复的语句无需再次合成或解码
+- 通过 sounddevice 输出流播放，多段音频在回调中首尾相接，切换输出设备只需重建输出流，
+  不必重新初始化整个音频栈（不再依赖 pygame.mixer 播放）
+- sounddevice 在首次打开输出流时才导入：没有PortAudio的机器上仍可解码、缓存与离线渲染
+
+依赖库:
+- numpy
+- sounddevice
+- soundfile（可选，libsndfile>=1.1 可直接解码MP3；不可用时退回pygame解码）
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from latency_tracer import LatencyTracer, get_tracer
+
+logger = logging.getLogger(__name__)
+
+# 尝试使用libsndfile解码MP3
+try:
+    import soundfile
+    use_soundfile = True
+except ImportError:
+    soundfile = None
+    use_soundfile = False
+
+# 缓存的默认容量（PCM与MP3合计字节数）
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+_pygame_decoder_lock = threading.Lock()
+
+
+def _sounddevice():
+    """导入 sounddevice（缺少PortAudio时抛出 OSError）"""
+    import sounddevice
+    return sounddevice
+
+
+def _decode_with_pygame(mp3_data):
+    """
+    使用pygame解码MP3
+
+    mixer未初始化时只为本次解码临时初始化：期间 SDL_AUDIODRIVER 设为dummy（不占用输出设备），
+    初始化后立即恢复原值，解码完关闭mixer，之后在本进程中使用pygame/SDL音频不受影响。
+    """
+    import pygame
+
+    with _pygame_decoder_lock:
+        own_mixer = not pygame.mixer.get_init()
+        if own_mixer:
+            previous_driver = os.environ.get("SDL_AUDIODRIVER")
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+            try:
+                pygame.mixer.init(frequency=24000, size=-16, channels=1)
+            finally:
+                if previous_driver is None:
+                    os.environ.pop("SDL_AUDIODRIVER", None)
+                else:
+                    os.environ["SDL_AUDIODRIVER"] = previous_driver
+        try:
+            sample_rate, size, channels = pygame.mixer.get_init()
+            sound = pygame.mixer.Sound(file=io.BytesIO(mp3_data))
+            samples = pygame.sndarray.array(sound)
+        finally:
+            if own_mixer:
+                pygame.mixer.quit()
+    pcm = samples.astype(np.float32) / float(2 ** (abs(size) - 1))
+    if pcm.ndim > 1:
+        pcm = pcm.mean(axis=1)
+    return pcm, sample_rate
+
+
+def decode_mp3(mp3_data):
+    """
+    将MP3数据解码为单声道float32 PCM
+
+    返回:
+        (pcm, sample_rate)
+    """
+    if use_soundfile:
+        try:
+            pcm, sample_rate = soundfile.read(io.BytesIO(mp3_data), dtype='float32', always_2d=True)
+            return pcm.mean(axis=1) if pcm.shape[1] > 1 else pcm[:, 0], sample_rate
+        except Exception as e:
+            # 旧版libsndfile不支持MP3
+            logger.warning(f"soundfile解码MP3失败，改用pygame解码: {e}")
+    return _decode_with_pygame(mp3_data)
+
+
+def resample(pcm, src_rate, dst_rate):
+    """
+    向量化重采样（频域截断/补零，带限且无逐样本Python循环）
+
+    参数:
+        pcm: 一维float32数组
+        src_rate: 原采样率
+        dst_rate: 目标采样率
+    """
+    src_rate = int(src_rate)
+    dst_rate = int(dst_rate)
+    if src_rate == dst_rate or len(pcm) == 0:
+        return pcm
+    n_in = len(pcm)
+    n_out = int(round(n_in * dst_rate / src_rate))
+    spectrum = np.fft.rfft(pcm)
+    n_bins = n_out // 2 + 1
+    if n_bins <= len(spectrum):
+        spectrum = spectrum[:n_bins]
+    else:
+        spectrum = np.concatenate([spectrum, np.zeros(n_bins - len(spectrum), dtype=spectrum.dtype)])
+    out = np.fft.irfft(spectrum, n_out) * (n_out / n_in)
+    return np.clip(out, -1.0, 1.0).astype(np.float32)
+
+
+class DecodedClip:
+    """一段合成音频：压缩数据、原始采样率PCM及按设备采样率重采样后的PCM"""
+
+    __slots__ = ['mp3_data', 'pcm', 'sample_rate', 'resampled', 'lock']
+
+    def __init__(self, mp3_data, pcm, sample_rate):
+        self.mp3_data = mp3_data
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.resampled = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_mp3(cls, mp3_data):
+        pcm, sample_rate = decode_mp3(mp3_data)
+        return cls(mp3_data, pcm, sample_rate)
+
+    def pcm_at(self, sample_rate):
+        """返回指定采样率的PCM（首次请求时重采样并缓存）"""
+        sample_rate = int(sample_rate)
+        if sample_rate == self.sample_rate:
+            return self.pcm
+        pcm = self.resampled.get(sample_rate)
+        if pcm is not None:
+            return pcm
+        with self.lock:
+            pcm = self.resampled.get(sample_rate)
+            if pcm is None:
+                pcm = resample(self.pcm, self.sample_rate, sample_rate)
+                self.resampled[sample_rate] = pcm
+            return pcm
+
+    def has_rate(self, sample_rate):
+        """是否已有该采样率的PCM（pcm_at 不需要重采样）"""
+        return int(sample_rate) == self.sample_rate or int(sample_rate) in self.resampled
+
+    @property
+    def duration(self):
+        return len(self.pcm) / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def nbytes(self):
+        return len(self.mp3_data) + self.pcm.nbytes + sum(p.nbytes for p in self.resampled.values())
+
+
+class ClipCache:
+    """按字节数限制容量的LRU缓存，键通常为 (文本, 音色, 语速, 音量)"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text, voice, rate=None, volume=None):
+        return hashlib.sha1(f"{voice}|{rate}|{volume}|{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            clip = self.cache.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key, clip):
+        with self.lock:
+            old = self.cache.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.nbytes
+            self.cache[key] = clip
+            self.total_bytes += clip.nbytes
+            while self.total_bytes > self.max_bytes and len(self.cache) > 1:
+                _, evicted = self.cache.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+
+    def refresh_size(self):
+        """重采样会增加条目占用，播放后重新统计"""
+        with self.lock:
+            self.total_bytes = sum(clip.nbytes for clip in self.cache.values())
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get_stats(self):
+        return {
+            "entries": len(self.cache),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class _PlaybackItem:
+    __slots__ = ['pcm', 'position', 'future', 'loop', 'trace_id', 'started_at']
+
+    def __init__(self, pcm, future, loop, trace_id=None):
+        self.pcm = pcm
+        self.position = 0
+        self.future = future
+        self.loop = loop
+        self.trace_id = trace_id
+        self.started_at = None
+
+    def finish(self, result=True):
+        # 音频回调中只记录时间戳，追踪事件在事件循环线程中写入（不在回调里争用锁）
+        if self.trace_id is not None and self.started_at is not None:
+            self.loop.call_soon_threadsafe(_mark_playback, self.trace_id, self.started_at, time.perf_counter())
+        if self.future is not None and not self.future.done():
+            self.loop.call_soon_threadsafe(_set_future_result, self.future, result)
+
+
+def _set_future_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _mark_playback(trace_id, started_at, ended_at):
+    # 一句话可能分成多段播放：开始取第一段，结束取最后一段
+    tracer = get_tracer()
+    tracer.mark(trace_id, "playback_start", t=started_at)
+    tracer.mark(trace_id, "playback_end", t=ended_at, keep_last=True)
+
+
+class AudioOutput:
+    """
+    基于 sounddevice.OutputStream 的播放器
+
+    排队的PCM在音频回调中首尾相接播放；切换设备时只关闭并重建输出流。
+    """
+
+    def __init__(self, device=None, blocksize=0, latency='low'):
+        self.device = device
+        self.blocksize = blocksize
+        self.latency = latency
+        self.sample_rate = None
+        self.channels = 1
+        self.stream = None
+        self._queue = deque()
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _device_params(self, device):
+        info = _sounddevice().query_devices(device, 'output')
+        return int(info['default_samplerate']), max(1, min(2, int(info['max_output_channels'])))
+
+    def open(self):
+        """打开输出流（已打开时直接返回）"""
+        with self._lock:
+            if self.stream is not None:
+                return
+            self.sample_rate, self.channels = self._device_params(self.device)
+            self.stream = _sounddevice().OutputStream(
+                device=self.device,
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                dtype='float32',
+                blocksize=self.blocksize,
+                latency=self.latency,
+                callback=self._callback,
+            )
+            self.stream.start()
+        logger.info(f"音频输出已打开 (设备: {self.device if self.device is not None else '默认'}, "
+              f"采样率: {self.sample_rate}Hz)")
+
+    def close(self):
+        """关闭输出流，未播放完的音频视为已结束"""
+        with self._lock:
+            stream, self.stream = self.stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                logger.error(f"关闭音频输出时出错: {e}")
+        self._drain_queue(False)
+
+    def set_device(self, device):
+        """切换输出设备：仅重建输出流"""
+        if self.stream is not None and device == self.device:
+            return
+        self.close()
+        self.device = device
+        try:
+            self.open()
+        except Exception as e:
+            logger.warning(f"打开输出设备 {device} 失败，改用默认设备: {e}")
+            self.device = None
+            self.open()
+
+    @property
+    def is_open(self):
+        return self.stream is not None
+
+    def _drain_queue(self, result):
+        if self._current is not None:
+            self._current.finish(result)
+            self._current = None
+        while self._queue:
+            self._queue.popleft().finish(result)
+
+    def _callback(self, outdata, frames, time_info, status):
+        filled = 0
+        while filled < frames:
+            item = self._current
+            if item is None:
+                if not self._queue:
+                    break
+                item = self._current = self._queue.popleft()
+            if item.started_at is None:
+                item.started_at = time.perf_counter()
+            count = min(frames - filled, len(item.pcm) - item.position)
+            outdata[filled:filled + count] = item.pcm[item.position:item.position + count, None]
+            filled += count
+            item.position += count
+            if item.position >= len(item.pcm):
+                item.finish(True)
+                self._current = None
+        if filled < frames:
+            outdata[filled:] = 0
+
+    def enqueue(self, clip, trace_id=None):
+        """
+        将一段音频排入播放队列，返回在播放完成时完成的asyncio.Future（需在事件循环中调用）
+
+        trace_id 为空时使用当前上下文中的句子追踪（见 latency_tracer）。
+        DecodedClip 应事先在线程池中按设备采样率重采样（见 edge_TTS._prepare_for_output），
+        否则重采样会在事件循环线程中进行
+        """
+        if self.stream is None:
+            self.open()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pcm = clip.pcm_at(self.sample_rate) if isinstance(clip, DecodedClip) else clip
+        if trace_id is None:
+            trace_id = LatencyTracer.current()
+        self._queue.append(_PlaybackItem(pcm, future, loop, trace_id))
+        return future
+
+    async def play(self, clip):
+        """播放一段音频并等待播放完成，返回是否完整播放"""
+        return await self.enqueue(clip)
+
+    @property
+    def queued_items(self):
+        return len(self._queue) + (1 if self._current is not None else 0)
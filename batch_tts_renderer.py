@@ -0,0 +1,391 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+离线批量TTS渲染
+----------------------------
+将整场会议的翻译稿渲染为音频，不进行播放。
+
+输入为JSONL，每行一个片段:
+    {"id": "seg-0001", "text": "...", "voice": "en-US-AriaNeural", "start": 12.5, "end": 15.0}
+    可选字段: "rate"、"volume"（如 "+10%"）
+
+输出:
+    - 每个片段一个MP3文件: <输出目录>/segments/<id>.mp3
+    - 可选的时间轴对齐WAV: <输出目录>/timeline.wav（按start放置各片段，重叠部分混音）；
+      片段音频超出其end（未给出end时为之后第一个start更晚的片段的start）时给出警告，加 --trim 时在该处截断并淡出
+    - 断点续传清单: <输出目录>/manifest.jsonl（已完成的片段在重新运行时跳过；文本、音色、语速或音量
+      改变后重新渲染）
+
+使用方法:
+    python batch_tts_renderer.py transcript.jsonl out_dir --concurrency 4 --timeline
+    python batch_tts_renderer.py transcript.jsonl out_dir --timeline --trim
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+import re
+import sys
+import time
+import wave
+
+import edge_TTS
+from audio_playback import DecodedClip
+from log_config import setup_logging
+from tts_session_manager import TTSConnectionManager, OUTPUT_BITRATE, OUTPUT_SAMPLE_RATE
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+SEGMENTS_DIR_NAME = "segments"
+TIMELINE_NAME = "timeline.wav"
+# 截断超时片段时的淡出时长（秒），避免截断处爆音
+TRIM_FADE_SECONDS = 0.02
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^0-9A-Za-z._-]')
+
+
+def load_segments(jsonl_path, default_voice=None):
+    """读取并校验JSONL片段列表，返回字典列表（保持输入顺序）"""
+    segments = []
+    seen_ids = set()
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(f"第{line_no}行不是有效的JSON")
+
+            segment_id = record.get("id", record.get("segment_id"))
+            if segment_id is None:
+                raise ValueError(f"第{line_no}行缺少片段id")
+            segment_id = str(segment_id)
+            if segment_id in seen_ids:
+                raise ValueError(f"第{line_no}行片段id重复: {segment_id}")
+            seen_ids.add(segment_id)
+
+            voice = record.get("voice") or default_voice
+            if not voice:
+                raise ValueError(f"第{line_no}行未指定音色，且未提供默认音色")
+
+            start = float(record.get("start", 0.0) or 0.0)
+            end = float(record["end"]) if record.get("end") is not None else None
+            if end is not None and end <= start:
+                raise ValueError(f"第{line_no}行的end ({end}) 不大于start ({start})")
+
+            segments.append({
+                "id": segment_id,
+                "text": record.get("text", ""),
+                "voice": voice,
+                "start": start,
+                "end": end,
+                "rate": record.get("rate"),
+                "volume": record.get("volume"),
+            })
+    return segments
+
+
+def segment_filename(segment_id):
+    """片段id -> 安全的文件名（含非法字符的id追加短哈希，避免替换后重名）"""
+    safe_name = _UNSAFE_FILENAME_CHARS.sub("_", segment_id)
+    if safe_name != segment_id:
+        safe_name += "-" + hashlib.sha1(segment_id.encode("utf-8")).hexdigest()[:8]
+    return safe_name + ".mp3"
+
+
+def segment_hash(segment):
+    """决定合成结果的字段（文本、音色、语速、音量）的哈希，记入清单用于判断已有音频是否过期"""
+    key = json.dumps([segment["text"], segment["voice"], segment["rate"], segment["volume"]], ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def load_manifest(output_dir):
+    """读取已完成片段的清单，忽略文件已丢失的条目"""
+    completed = {}
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return completed
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 上次中断时写了一半的行
+            if os.path.exists(os.path.join(output_dir, entry.get("file", ""))):
+                completed[entry["id"]] = entry
+    return completed
+
+
+def _segment_limits(segments):
+    """
+    片段id -> 音频允许延续到的时间（秒）
+
+    有end时为end；否则为之后第一个start更晚的片段的start（start相同的片段同时开始，不互相限制）；
+    都没有时为None（不限制，按片段自身长度）
+    """
+    starts = sorted({segment["start"] for segment in segments})
+    limits = {}
+    for segment in segments:
+        limit = segment["end"]
+        if limit is None:
+            index = bisect.bisect_right(starts, segment["start"])
+            limit = starts[index] if index < len(starts) else None
+        limits[segment["id"]] = limit
+    return limits
+
+
+def write_timeline(output_dir, segments, completed, sample_rate=OUTPUT_SAMPLE_RATE, trim=False):
+    """
+    按片段start时间将已完成片段混合为一条WAV音轨
+
+    参数:
+        trim: 是否将超出end（或下一片段start）的音频截断并淡出，否则只警告
+
+    返回:
+        (音轨时长（秒）, 超时片段列表 [(片段id, 超出秒数)])
+    """
+    import numpy as np
+
+    limits = _segment_limits(segments)
+    fade_samples = int(TRIM_FADE_SECONDS * sample_rate)
+    placed = []
+    overruns = []
+    total_samples = 0
+    for segment in segments:
+        entry = completed.get(segment["id"])
+        if entry is None:
+            continue
+        with open(os.path.join(output_dir, entry["file"]), 'rb') as f:
+            clip = DecodedClip.from_mp3(f.read())
+        pcm = (clip.pcm_at(sample_rate) * 32767).astype(np.int16)
+        offset = int(round(segment["start"] * sample_rate))
+        limit = limits[segment["id"]]
+        if limit is not None:
+            allowed = max(0, int(round(limit * sample_rate)) - offset)
+            if len(pcm) > allowed:
+                overrun = (len(pcm) - allowed) / sample_rate
+                overruns.append((segment["id"], overrun))
+                if trim:
+                    pcm = pcm[:allowed].copy()
+                    fade = min(fade_samples, len(pcm))
+                    if fade:
+                        pcm[-fade:] = (pcm[-fade:] * np.linspace(1.0, 0.0, fade)).astype(np.int16)
+                    logger.warning(f"片段 {segment['id']} 超出时间轴 {overrun:.2f}s，已截断")
+                else:
+                    logger.warning(f"片段 {segment['id']} 超出时间轴 {overrun:.2f}s，将与后续片段重叠")
+        placed.append((offset, pcm))
+        total_samples = max(total_samples, offset + len(pcm))
+
+    mix = np.zeros(total_samples, dtype=np.int32)
+    for offset, pcm in placed:
+        mix[offset:offset + len(pcm)] += pcm
+    mix = np.clip(mix, -32768, 32767).astype(np.int16)
+
+    timeline_path = os.path.join(output_dir, TIMELINE_NAME)
+    with wave.open(timeline_path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(mix.tobytes())
+    return total_samples / sample_rate, overruns
+
+
+class BatchTTSRenderer:
+    """
+    并发批量渲染器
+
+    参数:
+        output_dir: 输出目录
+        concurrency: 同时进行的合成请求数（asyncio信号量上限）
+        retries: 单个片段失败后的重试次数
+    """
+
+    def __init__(self, output_dir, concurrency=4, retries=2):
+        self.output_dir = output_dir
+        self.segments_dir = os.path.join(output_dir, SEGMENTS_DIR_NAME)
+        self.concurrency = max(1, int(concurrency))
+        self.retries = max(0, int(retries))
+
+        self.completed = {}
+        self.failed = {}
+        self.skipped = 0
+        self.rendered = 0
+        self.rendered_chars = 0
+        self.rendered_bytes = 0
+
+    def _append_manifest(self, entry):
+        with open(os.path.join(self.output_dir, MANIFEST_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def _render_segment(self, segment, semaphore, managers):
+        async with semaphore:
+            # 每个并发槽位持有独立的连接管理器，连接可在同一槽位的后续片段中复用
+            manager = await managers.get()
+            try:
+                last_error = None
+                for attempt in range(self.retries + 1):
+                    start = time.perf_counter()
+                    try:
+                        audio = await edge_TTS.synthesize_audio(
+                            segment["text"], segment["voice"],
+                            rate=segment["rate"], volume=segment["volume"], manager=manager)
+                        if not audio:
+                            raise RuntimeError("未生成音频数据")
+                        break
+                    except Exception as e:
+                        last_error = e
+                        if attempt < self.retries:
+                            await asyncio.sleep(0.5 * (2 ** attempt))
+                else:
+                    self.failed[segment["id"]] = str(last_error)
+                    logger.warning(f"片段 {segment['id']} 渲染失败: {last_error}")
+                    return
+                elapsed = time.perf_counter() - start
+            finally:
+                managers.put_nowait(manager)
+
+        filename = segment_filename(segment["id"])
+        path = os.path.join(self.segments_dir, filename)
+        tmp_path = path + ".part"
+        with open(tmp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+        entry = {
+            "id": segment["id"],
+            "file": os.path.join(SEGMENTS_DIR_NAME, filename),
+            "bytes": len(audio),
+            "chars": len(segment["text"]),
+            "hash": segment_hash(segment),
+            "synthesis_seconds": round(elapsed, 3),
+        }
+        self._append_manifest(entry)
+        self.completed[segment["id"]] = entry
+        self.rendered += 1
+        self.rendered_chars += len(segment["text"])
+        self.rendered_bytes += len(audio)
+
+    async def render(self, segments):
+        """渲染所有未完成的片段，返回吞吐统计"""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self.completed = load_manifest(self.output_dir)
+
+        pending = []
+        stale = 0
+        for segment in segments:
+            entry = self.completed.get(segment["id"])
+            if entry is not None and entry.get("hash") != segment_hash(segment):
+                # 文本、音色等已改变（或清单来自未记录哈希的旧版本）：旧音频不再使用，重新渲染
+                del self.completed[segment["id"]]
+                entry = None
+                stale += 1
+            if entry is not None:
+                self.skipped += 1
+            elif not segment["text"].strip():
+                self.skipped += 1
+            else:
+                pending.append(segment)
+        print(f"共 {len(segments)} 个片段，待渲染 {len(pending)} 个，已跳过 {self.skipped} 个。"
+              + (f"（{stale} 个已完成片段的内容有变化，重新渲染）" if stale else ""))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        managers = asyncio.Queue()
+        for _ in range(self.concurrency):
+            managers.put_nowait(TTSConnectionManager())
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._render_segment(s, semaphore, managers) for s in pending))
+        finally:
+            handshakes = 0
+            while not managers.empty():
+                manager = managers.get_nowait()
+                handshakes += manager.get_stats()["handshakes"]
+                await manager.close()
+        wall_time = time.perf_counter() - start
+
+        audio_seconds = self.rendered_bytes * 8 / OUTPUT_BITRATE
+        return {
+            "segments_total": len(segments),
+            "rendered": self.rendered,
+            "skipped": self.skipped,
+            "stale": stale,
+            "failed": len(self.failed),
+            "wall_seconds": round(wall_time, 3),
+            "segments_per_second": round(self.rendered / wall_time, 3) if wall_time > 0 else 0.0,
+            "chars_per_second": round(self.rendered_chars / wall_time, 1) if wall_time > 0 else 0.0,
+            "audio_seconds": round(audio_seconds, 2),
+            "realtime_factor": round(audio_seconds / wall_time, 2) if wall_time > 0 else 0.0,
+            "handshakes": handshakes,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量TTS渲染（不播放）")
+    parser.add_argument("input", help="片段JSONL文件 (id, text, voice, start, end)")
+    parser.add_argument("output_dir", help="输出目录")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发合成数 (默认4)")
+    parser.add_argument("--retries", type=int, default=2, help="单个片段失败重试次数 (默认2)")
+    parser.add_argument("--default-voice", default=None, help="片段未指定音色时使用的音色")
+    parser.add_argument("--timeline", action="store_true", help="额外输出按时间轴对齐的 timeline.wav")
+    parser.add_argument("--trim", action="store_true",
+                        help="时间轴中截断超出end（或下一片段start）的片段音频，默认只警告")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    try:
+        segments = load_segments(args.input, default_voice=args.default_voice)
+    except (OSError, ValueError) as e:
+        print(f"读取片段文件失败: {e}")
+        return 2
+
+    catalog = edge_TTS.get_voice_catalog()
+    unknown_voices = sorted({s["voice"] for s in segments if catalog.get_voice(s["voice"]) is None})
+    if unknown_voices:
+        print(f"警告：以下音色不在config.json中，可能无法合成: {', '.join(unknown_voices)}")
+
+    renderer = BatchTTSRenderer(args.output_dir, concurrency=args.concurrency, retries=args.retries)
+    stats = asyncio.run(renderer.render(segments))
+
+    if args.timeline:
+        if renderer.failed:
+            print("存在失败片段，时间轴音轨中将缺少这些片段（重新运行可续传）。")
+        timeline_seconds, overruns = write_timeline(args.output_dir, segments, renderer.completed,
+                                                    trim=args.trim)
+        stats["timeline_seconds"] = round(timeline_seconds, 2)
+        stats["timeline_overruns"] = len(overruns)
+        if overruns and not args.trim:
+            print(f"{len(overruns)} 个片段超出其时间段，与后续片段重叠（可用 --trim 截断）。")
+
+    print("\n=== 渲染统计 ===")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    return 1 if renderer.failed else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n渲染已中断，重新运行相同命令可继续。")
+        sys.exit(130)
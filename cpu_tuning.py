@@ -0,0 +1,103 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+推理线程数与CPU亲和性
+----------------------------
+VAD/ASR/标点三个模型默认使用torch的全部核心做算子内并行，与音频回调和翻译/TTS事件循环争抢CPU，
+造成音频回调抖动。这里集中提供:
+- torch 算子内（intra-op）/算子间（inter-op）线程数设置
+- 把当前线程绑定到指定CPU（仅Linux支持按线程绑定；torch在该线程上创建的并行线程继承绑定）
+
+CPU列表写法与 taskset 相同，例如 "1-3" 或 "0,2,4-5"。
+"""
+
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# inter-op线程数只能在torch执行任何并行工作之前设置一次
+_interop_applied = False
+_lock = threading.Lock()
+
+
+def parse_cpu_list(spec):
+    """解析 "0,2,4-5" / [0, 2] / None 为排序后的CPU编号列表（None表示不绑定）"""
+    if spec is None or spec == "":
+        return None
+    if isinstance(spec, int):
+        return [spec]
+    if isinstance(spec, (list, tuple, set)):
+        return sorted({int(cpu) for cpu in spec})
+    cpus = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def available_cpus():
+    """当前进程可用的CPU编号"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_current_thread(cpus, label=""):
+    """
+    将调用线程绑定到指定CPU，返回是否成功
+
+    仅Linux支持按线程设置；其他平台只记录警告（进程级绑定会连同音频回调一起限制，这里不做）。
+    """
+    cpus = parse_cpu_list(cpus)
+    if not cpus:
+        return False
+    if not sys.platform.startswith("linux") or not hasattr(os, "sched_setaffinity"):
+        logger.warning(f"当前平台不支持按线程绑定CPU，忽略 {label or '线程'} 的亲和性设置")
+        return False
+    try:
+        os.sched_setaffinity(threading.get_native_id(), cpus)
+        logger.info(f"{label or threading.current_thread().name} 已绑定CPU {cpus}")
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"绑定CPU {cpus} 失败: {e}")
+        return False
+
+
+def configure_torch_threads(intra_threads=None, interop_threads=None):
+    """
+    设置torch线程数，返回实际生效的 (intra, interop)
+
+    参数:
+        intra_threads: 算子内并行线程数（torch.set_num_threads），None表示保持默认
+        interop_threads: 算子间并行线程数（torch.set_num_interop_threads），只能设置一次
+    """
+    global _interop_applied
+    import torch
+
+    with _lock:
+        if intra_threads:
+            torch.set_num_threads(int(intra_threads))
+        if interop_threads and not _interop_applied:
+            try:
+                torch.set_num_interop_threads(int(interop_threads))
+                _interop_applied = True
+            except RuntimeError as e:
+                # torch已开始并行工作后不能再修改
+                logger.warning(f"无法设置torch inter-op线程数: {e}")
+        applied = (torch.get_num_threads(), torch.get_num_interop_threads())
+    logger.info(f"torch线程数: intra-op={applied[0]}, inter-op={applied[1]}")
+    return applied
@@ -8,57 +8,287 @@ os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscop
 # 导入所需的库
 import asyncio
 import edge_tts
-import pygame
-import io
-from pygame import mixer
+import logging
 import sys
+import pickle
+import re
+import threading
+import time
+import unicodedata
+
+from tts_session_manager import get_connection_manager
+from audio_playback import AudioOutput, ClipCache, DecodedClip
+from latency_tracer import get_tracer
+from runtime_metrics import get_registry, observe
+
+logger = logging.getLogger(__name__)
 
 # 尝试使用更快的JSON库
 try:
     import ujson as json
-    print("EdgeTTS模块使用ujson")
+    logger.debug("EdgeTTS模块使用ujson")
 except ImportError:
     import json
-    print("EdgeTTS模块使用标准json库")
+    logger.debug("EdgeTTS模块使用标准json库")
 
-# 定义支持的语音列表 - 将由 load_config() 动态填充
+# 定义支持的语音列表 - 将由 load_config() 在首次使用时填充
 SUPPORTED_VOICES = []
 CONFIG_LOADED = False
 
+CONFIG_PATH = os.path.join(project_root, 'config.json')
+# 预编译的语音索引缓存（pickle），以config.json的修改时间和大小作为失效依据
+VOICE_CATALOG_CACHE_PATH = os.path.join(project_root, "models", "cached_models", "voice_catalog.pickle")
+VOICE_CATALOG_CACHE_VERSION = 1
+
+# 翻译模块语言代码 -> edge-tts 语言/地区代码（两者不一致的部分）
+TTS_LANGUAGE_ALIASES = {
+    "cn": "zh-CN",
+    "yue": "zh-HK",
+    "kka": "kk",
+    "nm": "mn",
+    "tl": "fil",
+}
+
+# 性别别名，统一到config.json中的gender_display
+GENDER_ALIASES = {
+    "female": "女性",
+    "male": "男性",
+    "f": "女性",
+    "m": "男性",
+}
+
+
+class VoiceCatalog:
+    """
+    语音目录：将config.json中的tts_config.voices编译为紧凑的行元组及多个索引
+
+    索引（键 -> 行号元组）:
+        by_language: language_code_primary，例如 'en'、'zh-CN'
+        by_locale:   地区代码（由short_name推导），例如 'en-US'、'zh-CN-liaoning'
+        by_base:     基础语言（short_name首段），例如 'zh'
+        by_gender:   gender_display，例如 '女性'
+        by_display:  language_display，例如 '英语'（供交互式菜单使用）
+        by_short_name: short_name -> 单个行号
+    """
+
+    # 每行元组中字段的顺序
+    FIELDS = ("short_name", "language_display", "gender_display", "locale_display",
+              "voice_display", "language_code_primary", "locale")
+
+    __slots__ = ['rows', 'by_language', 'by_locale', 'by_base', 'by_gender', 'by_display', 'by_short_name']
+
+    def __init__(self, rows, by_language, by_locale, by_base, by_gender, by_display, by_short_name):
+        self.rows = rows
+        self.by_language = by_language
+        self.by_locale = by_locale
+        self.by_base = by_base
+        self.by_gender = by_gender
+        self.by_display = by_display
+        self.by_short_name = by_short_name
+
+    @classmethod
+    def from_voices(cls, voices):
+        """从config.json中的语音字典列表构建目录"""
+        rows = []
+        indexes = ({}, {}, {}, {}, {})  # language, locale, base, gender, display
+        by_short_name = {}
+        for voice in voices:
+            short_name = voice.get("short_name")
+            if not short_name or short_name in by_short_name:
+                continue
+            locale = short_name.rsplit("-", 1)[0]
+            row = (
+                short_name,
+                voice.get("language_display", ""),
+                voice.get("gender_display", ""),
+                voice.get("locale_display", ""),
+                voice.get("voice_display", ""),
+                voice.get("language_code_primary", "") or locale.split("-")[0],
+                locale,
+            )
+            row_id = len(rows)
+            rows.append(row)
+            by_short_name[short_name] = row_id
+            keys = (row[5].lower(), locale.lower(), locale.split("-")[0].lower(), row[2], row[1])
+            for index, key in zip(indexes, keys):
+                index.setdefault(key, []).append(row_id)
+
+        frozen = [{key: tuple(ids) for key, ids in index.items()} for index in indexes]
+        return cls(tuple(rows), *frozen, by_short_name)
+
+    def to_cache(self):
+        """导出为可pickle的紧凑形式"""
+        return (self.rows, self.by_language, self.by_locale, self.by_base, self.by_gender,
+                self.by_display, self.by_short_name)
+
+    @classmethod
+    def from_cache(cls, payload):
+        return cls(*payload)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _row_to_dict(self, row_id):
+        row = self.rows[row_id]
+        voice = dict(zip(self.FIELDS, row))
+        # 兼容 edge_tts.list_voices() 的字段命名
+        voice["ShortName"] = row[0]
+        voice["Locale"] = row[6]
+        voice["Gender"] = row[2]
+        return voice
+
+    def resolve_language_ids(self, lang_code):
+        """按 language_code_primary -> 地区 -> 基础语言 的顺序查找，返回行号元组"""
+        if not lang_code:
+            return ()
+        key = TTS_LANGUAGE_ALIASES.get(lang_code, lang_code).lower()
+        return (self.by_language.get(key)
+                or self.by_locale.get(key)
+                or self.by_base.get(key)
+                or ())
+
+    def voices_for_language(self, lang_code, gender=None):
+        """返回某语言（可选性别）下的语音字典列表；lang_code为空时按性别或全部返回"""
+        if gender:
+            gender = GENDER_ALIASES.get(gender.lower(), gender)
+        if not lang_code:
+            row_ids = self.by_gender.get(gender, ()) if gender else range(len(self.rows))
+        else:
+            row_ids = self.resolve_language_ids(lang_code)
+            if gender:
+                row_ids = [i for i in row_ids if self.rows[i][2] == gender]
+        return [self._row_to_dict(i) for i in row_ids]
+
+    def get_voice(self, short_name):
+        """按short_name查找语音，不存在时返回None"""
+        row_id = self.by_short_name.get(short_name)
+        return None if row_id is None else self._row_to_dict(row_id)
+
+    def voices_for_display(self, language_display, gender_display=None):
+        """按语种显示名（可选性别显示名）返回语音字典列表"""
+        row_ids = self.by_display.get(language_display, ())
+        if gender_display:
+            row_ids = [i for i in row_ids if self.rows[i][2] == gender_display]
+        return [self._row_to_dict(i) for i in row_ids]
+
+    def language_displays(self):
+        """返回所有语种的显示名（排序后）"""
+        return sorted(self.by_display)
+
+    def as_voice_dicts(self):
+        """返回与config.json结构一致的语音字典列表"""
+        return [dict(zip(self.FIELDS[:6], row[:6])) for row in self.rows]
+
+
+_voice_catalog = None
+_voice_catalog_lock = threading.Lock()
+
+
+def _config_signature(path):
+    stat = os.stat(path)
+    return (VOICE_CATALOG_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+
+def _load_catalog_cache(signature):
+    try:
+        with open(VOICE_CATALOG_CACHE_PATH, 'rb') as f:
+            cached_signature, payload = pickle.load(f)
+        if cached_signature == signature:
+            return VoiceCatalog.from_cache(payload)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"读取语音索引缓存失败，将重新构建: {e}")
+    return None
+
+
+def _save_catalog_cache(signature, catalog):
+    try:
+        os.makedirs(os.path.dirname(VOICE_CATALOG_CACHE_PATH), exist_ok=True)
+        tmp_path = VOICE_CATALOG_CACHE_PATH + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((signature, catalog.to_cache()), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, VOICE_CATALOG_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"写入语音索引缓存失败: {e}")
+
+
+def get_voice_catalog():
+    """
+    获取语音目录（首次访问时加载）
+
+    优先读取预编译缓存；缓存缺失或config.json已变更时解析config.json并重建缓存。
+    加载失败时返回空目录。
+    """
+    global _voice_catalog
+    if _voice_catalog is not None:
+        return _voice_catalog
+
+    with _voice_catalog_lock:
+        if _voice_catalog is not None:
+            return _voice_catalog
+
+        catalog = None
+        try:
+            signature = _config_signature(CONFIG_PATH)
+            catalog = _load_catalog_cache(signature)
+            if catalog is None:
+                with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
+                # 从配置的 tts_config.voices 加载语音
+                tts_voices = config_data.get('tts_config', {}).get('voices', [])
+                catalog = VoiceCatalog.from_voices(tts_voices)
+                if len(catalog):
+                    _save_catalog_cache(signature, catalog)
+        except FileNotFoundError:
+            logger.error(f"错误：配置文件 config.json 未找到于 {CONFIG_PATH} (EdgeTTS模块)")
+        except ValueError:
+            logger.error("错误：解析配置文件 config.json 失败 (EdgeTTS模块)。请检查JSON格式。")
+        except Exception as e:
+            logger.error(f"加载TTS配置时发生未知错误: {e}")
+
+        if catalog is None:
+            # 加载失败时不缓存，允许修复配置后重试
+            return VoiceCatalog.from_voices([])
+        if not len(catalog):
+            logger.warning("警告：配置文件中未找到有效的TTS语音信息 (tts_config.voices 为空或不存在)。")
+        _voice_catalog = catalog
+        return _voice_catalog
+
+
 def load_config():
-    """加载配置文件并填充SUPPORTED_VOICES"""
-    global SUPPORTED_VOICES, CONFIG_LOADED
+    """加载配置文件并填充SUPPORTED_VOICES（保留给需要完整列表的调用方）"""
+    global CONFIG_LOADED
     if CONFIG_LOADED:
         return
 
-    config_path = os.path.join(project_root, 'config.json')
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-        
-        # 从配置的 tts_config.voices 加载语音
-        tts_voices = config_data.get('tts_config', {}).get('voices', [])
-        SUPPORTED_VOICES.clear()
-        SUPPORTED_VOICES.extend(tts_voices)
-        
-        if not SUPPORTED_VOICES:
-            print("警告：配置文件中未找到有效的TTS语音信息 (tts_config.voices 为空或不存在)。")
-        else:
-            print("EdgeTTS模块配置加载成功，语音列表已更新。")
+    catalog = get_voice_catalog()
+    SUPPORTED_VOICES.clear()
+    SUPPORTED_VOICES.extend(catalog.as_voice_dicts())
+    if SUPPORTED_VOICES:
+        logger.info("EdgeTTS模块配置加载成功，语音列表已更新。")
         CONFIG_LOADED = True
 
-    except FileNotFoundError:
-        print(f"错误：配置文件 config.json 未找到于 {config_path} (EdgeTTS模块)")
-        SUPPORTED_VOICES.clear() # 确保列表为空
-    except json.JSONDecodeError:
-        print(f"错误：解析配置文件 config.json 失败 (EdgeTTS模块)。请检查JSON格式。")
-        SUPPORTED_VOICES.clear()
-    except Exception as e:
-        print(f"加载TTS配置时发生未知错误: {e}")
-        SUPPORTED_VOICES.clear()
 
-# 在模块加载时执行配置加载
-load_config()
+async def list_voices_by_language(lang_code, gender=None):
+    """
+    按语言代码列出可用语音
+
+    参数:
+        lang_code (str): language_code_primary（如 'en'、'zh-CN'）、地区代码（如 'en-US'）、
+                         基础语言（如 'zh'）或翻译模块的语言代码（如 'cn'）
+        gender (str, optional): 性别过滤（'女性'/'男性' 或 'Female'/'Male'）
+
+    返回:
+        list[dict]: 语音信息列表，包含 config.json 中的字段以及 'ShortName'、'Locale'、'Gender'
+    """
+    return get_voice_catalog().voices_for_language(lang_code, gender)
+
+
+def get_available_languages():
+    """返回所有可用语种的显示名列表"""
+    return get_voice_catalog().language_displays()
+
 
 # # 定义支持的语音列表 (此部分将被移除，由load_config替代)
 # # 结构: {"language_display": "用户界面语言名", "gender_display": "性别", "locale_display": "地区/方言", "voice_display": "语音名", "short_name": "edge-tts短名称"}
@@ -66,23 +296,348 @@ load_config()
 #     # ... (此处省略了所有硬编码的语音条目) ...
 # ]
 
+# 长句切分参数（按显示宽度计，全角/宽字符计2）
+TTS_SPLIT_THRESHOLD = 60      # 超过该长度才切分
+TTS_FIRST_PIECE_LIMIT = 40    # 首段尽量短，降低首音延迟
+TTS_PIECE_LIMIT = 120         # 后续各段的长度上限
+TTS_MAX_CONCURRENT_PIECES = 3 # 同一句话同时合成的分段数
+
+# 无需后随空白即可断开的分句标点：中日文、阿拉伯文、天城文、亚美尼亚文、埃塞俄比亚文、缅甸文、高棉文、藏文、希腊文等
+_CLAUSE_BREAK_CHARS = "。！？；，、：…．｡､" + "،؛؟۔" + "।॥" + "։" + "።፣፤፥፦" + "။၊" + "។៕៖" + "།" + "\u0387\u037e\n"
+# 拉丁/西里尔等以空格分词的文字，标点后需跟空白或结尾才视为分句点（避免切断 3.14、e.g. 中间）
+_CLAUSE_BREAK_RE = re.compile(
+    "(?:[" + re.escape(_CLAUSE_BREAK_CHARS) + "]+|[.!?;:,]+(?=[\\s\"'”’)\\]]|$))"
+    "[”’\"'）)\\]」』》]*"
+)
+# 泰文/老挝文前置元音应与后面的辅音在一起，后置元音（非组合类别）不能作为分段开头
+_LEADING_VOWELS = "เแโใไເແໂໃໄ"
+_FOLLOWING_VOWELS = "ะาำๅະາຳ"
+# 硬切分后剩余部分小于该宽度时并入前一段，避免产生过短的尾段
+_MIN_TAIL_WIDTH = 10
+
+
+def _display_width(text):
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _is_attached_char(ch):
+    """组合附标、零宽连接符、变体选择符及日文长音等不能出现在分段开头"""
+    return (unicodedata.category(ch) in ("Mn", "Mc", "Me")
+            or ch in _FOLLOWING_VOWELS or ch in "\u200c\u200d\ufe0e\ufe0fーッっ")
+
+
+def _hard_split(text, limit, first_limit=None):
+    """
+    在没有标点的长段中按长度切分：优先在空白处，其次在不破坏字形簇的位置
+
+    first_limit 只用于第一段（为空时与 limit 相同），其余各段按 limit 切分
+    """
+    pieces = []
+    piece_limit = first_limit or limit
+    while _display_width(text) > piece_limit:
+        # 找到宽度达到上限的位置
+        width = 0
+        cut = len(text)
+        for i, ch in enumerate(text):
+            width += 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+            if width > piece_limit:
+                cut = i
+                break
+        space = text.rfind(" ", cut // 2, cut)
+        if space > 0:
+            cut = space
+        else:
+            while cut > 1 and (_is_attached_char(text[cut]) or text[cut - 1] in _LEADING_VOWELS):
+                cut -= 1
+        if _display_width(text[cut:]) < _MIN_TAIL_WIDTH:
+            break
+        piece = text[:cut].strip()
+        if piece:
+            pieces.append(piece)
+        text = text[cut:].lstrip()
+        piece_limit = limit
+    if text.strip():
+        pieces.append(text.strip())
+    return pieces
+
+
+def split_text_for_tts(text, threshold=TTS_SPLIT_THRESHOLD, first_limit=TTS_FIRST_PIECE_LIMIT,
+                       limit=TTS_PIECE_LIMIT):
+    """
+    将长文本切分为适合分段合成的小段
+
+    先按分句标点切成从句，再把相邻从句贪心合并到长度上限内；首段不再合并超过first_limit的从句，
+    以尽快出声。超过limit且没有标点的从句（如泰文、日文长句）在空白或安全的字符边界处切开。
+
+    返回:
+        list[str]: 按原顺序排列的文本段；短文本原样返回单个元素
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if _display_width(text) <= threshold:
+        return [text]
+
+    clauses = []
+    last = 0
+    for match in _CLAUSE_BREAK_RE.finditer(text):
+        clause = text[last:match.end()].strip()
+        if clause:
+            clauses.append(clause)
+        last = match.end()
+    if text[last:].strip():
+        clauses.append(text[last:].strip())
+
+    pieces = []
+    current = ""
+    for clause in clauses:
+        merge_limit = first_limit if not pieces else limit
+        if current and _display_width(current) + _display_width(clause) + 1 > merge_limit:
+            pieces.append(current)
+            current = ""
+        if _display_width(clause) > limit:
+            sub_pieces = _hard_split(clause, limit, first_limit if not pieces and not current else None)
+            if current:
+                pieces.append(current)
+            pieces.extend(sub_pieces[:-1])
+            current = sub_pieces[-1] if sub_pieces else ""
+            continue
+        # 以空格分词的文字拼接时保留空格
+        joiner = " " if current and unicodedata.east_asian_width(current[-1]) not in "WF" else ""
+        current = f"{current}{joiner}{clause}" if current else clause
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+# 切分回归表: (文本, 各段显示宽度)；没有标点的长首句只有第一段按 TTS_FIRST_PIECE_LIMIT 切，其余按 TTS_PIECE_LIMIT
+SPLIT_CASES = (
+    ("the quick brown fox jumps over the lazy dog " * 7, (39, 117, 115, 33)),
+    ("สวัสดีครับวันนี้เราจะมาประชุมเรื่องงบประมาณประจำปี" * 4, (40, 120, 40)),
+    ("本日の会議では来年度の予算案について詳しく説明します" * 8, (40, 120, 120, 120, 16)),
+    ("今天的会议到此结束。感谢大家今天的积极参与和讨论，下次会议的具体时间和地点另行通知，请大家留意邮件。", (20, 80)),
+)
+
+
+def check_split_cases():
+    """校验 SPLIT_CASES，返回 [(文本, 期望宽度, 实际宽度)] 中不符合的条目"""
+    failures = []
+    for text, expected in SPLIT_CASES:
+        widths = tuple(_display_width(piece) for piece in split_text_for_tts(text))
+        if widths != expected:
+            failures.append((text, expected, widths))
+    return failures
+
+
+# 播放输出与已解码音频缓存（首次使用时创建）
+_audio_output = None
+_clip_cache = ClipCache()
+
+
+def get_audio_output():
+    """获取全局音频输出（首次调用时按默认设备创建，尚未打开输出流）"""
+    global _audio_output
+    if _audio_output is None:
+        _audio_output = AudioOutput()
+    return _audio_output
+
+
+def set_output_device(device):
+    """
+    切换播放设备（sounddevice的设备索引或名称，None为默认设备）
+
+    只重建输出流；缓存中的PCM会在下次播放时按新设备的采样率重采样。
+    """
+    get_audio_output().set_device(device)
+
+
+def close_audio_output():
+    """关闭音频输出流"""
+    if _audio_output is not None:
+        _audio_output.close()
+
+
+def get_clip_cache_stats():
+    """获取已解码音频缓存的统计信息"""
+    return _clip_cache.get_stats()
+
+
+def _collect_tts_metrics():
+    stats = {"clip_cache": _clip_cache.get_stats()}
+    if _audio_output is not None:
+        stats["output_open"] = _audio_output.is_open
+        stats["output_queued_items"] = _audio_output.queued_items
+    return stats
+
+
+get_registry().register("tts", _collect_tts_metrics)
+
+
+def _decode_for_output(audio_data):
+    clip = DecodedClip.from_mp3(audio_data)
+    # 输出流已打开时顺便重采样到设备采样率，排队播放时不再做FFT
+    sample_rate = get_audio_output().sample_rate
+    if sample_rate:
+        clip.pcm_at(sample_rate)
+    return clip
+
+
+async def _decode_clip(audio_data):
+    """在线程池中解码MP3并重采样，避免阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _decode_for_output, audio_data)
+
+
+async def _prepare_for_output(clip):
+    """
+    确保音频已有输出设备采样率的PCM（打开输出流与重采样都在线程池中进行）
+
+    缓存中的音频在切换设备后采样率可能不同，首次打开输出流前解码的音频也尚未重采样
+    """
+    output = get_audio_output()
+    loop = asyncio.get_running_loop()
+    if output.sample_rate is None:
+        await loop.run_in_executor(None, output.open)
+    if not clip.has_rate(output.sample_rate):
+        await loop.run_in_executor(None, clip.pcm_at, output.sample_rate)
+    return clip
+
+
+async def play_audio_sequence(clips):
+    """
+    按顺序无缝播放多段音频
+
+    参数:
+        clips: 异步迭代器，按播放顺序产出 DecodedClip；每段就绪后立即排入输出队列，
+               在前一段播放期间即可衔接
+    返回:
+        实际播放的段数
+    """
+    output = get_audio_output()
+    played = 0
+    last_future = None
+    start = time.perf_counter()
+    async for clip in clips:
+        last_future = output.enqueue(await _prepare_for_output(clip))
+        played += 1
+    if last_future is not None:
+        await last_future
+        observe("tts.playback", time.perf_counter() - start)
+    _clip_cache.refresh_size()
+    return played
+
+
 async def play_audio_from_memory(audio_data):
-    """直接从内存播放音频数据 (假定mixer已初始化)"""
-    if not mixer.get_init():
-        print("错误: Pygame Mixer 未初始化。")
-        return
+    """直接从内存播放音频数据（MP3字节或已解码的DecodedClip）"""
+    clip = audio_data if isinstance(audio_data, DecodedClip) else await _decode_clip(audio_data)
+    await _prepare_for_output(clip)
+    logger.debug("正在播放语音...")
+    start = time.perf_counter()
+    await get_audio_output().play(clip)
+    observe("tts.playback", time.perf_counter() - start)
+    _clip_cache.refresh_size()
+    logger.debug("播放完成！")
+
+
+async def _synthesize_with_communicate(text, voice, rate=None, volume=None):
+    """使用 edge_tts.Communicate 合成（每次新建连接），作为持久连接的后备方案"""
+    tts_options = {}
+    if rate is not None:
+        tts_options['rate'] = rate
+    if volume is not None:
+        tts_options['volume'] = volume
+    communicate = edge_tts.Communicate(text, voice, **tts_options)
+    audio_chunks = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            if not audio_chunks:
+                get_tracer().mark_current("tts_first_byte")
+            audio_chunks.append(chunk["data"])
+    return b"".join(audio_chunks)
+
+
+async def synthesize_audio(text, voice, rate=None, volume=None, manager=None):
+    """
+    合成文本并返回MP3数据（不播放）
+
+    优先复用持久WebSocket连接；连接管理器出现协议或网络异常时，退回到 edge_tts.Communicate。
+    manager 为空时使用当前事件循环的默认连接管理器。
+    """
+    try:
+        manager = manager or get_connection_manager()
+        audio_chunks = []
+        async for audio in manager.stream(text, voice, rate=rate, volume=volume):
+            if not audio_chunks:
+                # 当前句子的追踪（如有）经contextvar传入，记录首个音频块到达的时间
+                get_tracer().mark_current("tts_first_byte")
+            audio_chunks.append(audio)
+        return b"".join(audio_chunks)
+    except edge_tts.exceptions.NoAudioReceived:
+        raise
+    except Exception as e:
+        logger.warning(f"持久TTS连接合成失败，改用单次连接: {e}")
+        return await _synthesize_with_communicate(text, voice, rate=rate, volume=volume)
+
+
+async def prewarm_voice(voice):
+    """为指定音色预先建立TTS连接（选择音色时调用）"""
+    return await get_connection_manager().prewarm(voice)
+
 
-    audio_io = io.BytesIO(audio_data)
-    print("正在播放语音...")
-    mixer.music.load(audio_io)
-    mixer.music.play()
+async def close_connections():
+    """关闭当前事件循环上的所有TTS连接"""
+    await get_connection_manager().close()
 
-    while mixer.music.get_busy():
-        await asyncio.sleep(0.1)
-    mixer.music.unload()
-    print("播放完成！")
 
-async def text_to_speech(text, voice, rate=None, volume=None):
+async def get_connection_stats():
+    """获取TTS连接统计（握手次数、握手延迟、复用次数），需在事件循环线程中调用"""
+    return get_connection_manager().get_stats()
+
+
+async def get_clip(text, voice, rate=None, volume=None):
+    """返回文本对应的已解码音频；相同文本/音色/语速/音量的语句直接命中缓存"""
+    key = ClipCache.make_key(text, voice, rate, volume)
+    clip = _clip_cache.get(key)
+    if clip is not None:
+        get_tracer().mark_current("tts_first_byte")
+        return clip
+    start = time.perf_counter()
+    audio_data = await synthesize_audio(text, voice, rate=rate, volume=volume)
+    observe("tts.synthesis", time.perf_counter() - start)
+    if not audio_data:
+        return None
+    start = time.perf_counter()
+    clip = await _decode_clip(audio_data)
+    observe("tts.decode", time.perf_counter() - start)
+    _clip_cache.put(key, clip)
+    return clip
+
+
+async def _synthesize_pieces_in_order(pieces, voice, rate=None, volume=None):
+    """并发合成并解码各段（并发数有上限），按原顺序产出 DecodedClip；失败的段被跳过"""
+    semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENT_PIECES)
+
+    async def synthesize_piece(piece):
+        async with semaphore:
+            return await get_clip(piece, voice, rate=rate, volume=volume)
+
+    tasks = [asyncio.ensure_future(synthesize_piece(piece)) for piece in pieces]
+    try:
+        for index, task in enumerate(tasks):
+            try:
+                clip = await task
+            except edge_tts.exceptions.NoAudioReceived:
+                logger.warning(f"警告：第{index + 1}段未收到音频数据，已跳过: {pieces[index][:20]}")
+                continue
+            if clip is not None:
+                yield clip
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def text_to_speech(text, voice, rate=None, volume=None, split_long_text=True, trace_id=None):
     """将文本转换为语音并直接播放（不保存文件）
 
     参数:
@@ -90,6 +645,8 @@ async def text_to_speech(text, voice, rate=None, volume=None):
         voice (str): 使用的语音名称 (e.g., \'en-US-AriaNeural\').
         rate (str, optional): 语速调整 (e.g., \'+20%\', \'-10%\'). 默认为 None.
         volume (str, optional): 音量调整 (e.g., \'+15%\', \'-5%\'). 默认为 None.
+        split_long_text (bool, optional): 长文本按从句切分后并发合成、顺序播放，以缩短首音延迟. 默认为 True.
+        trace_id (int, optional): 句子的延迟追踪id，记录首个音频块与播放起止时间. 默认为 None.
     """
     log_message = f"正在使用音色 {voice}"
     if rate is not None:
@@ -97,42 +654,50 @@ async def text_to_speech(text, voice, rate=None, volume=None):
     if volume is not None:
         log_message += f", 音量: {volume}"
     log_message += " 生成语音..."
-    print(log_message)
+    logger.debug(log_message)
 
+    trace_token = get_tracer().set_current(trace_id)
     try:
-        tts_options = {}
-        if rate is not None:
-            tts_options['rate'] = rate
-        if volume is not None:
-            tts_options['volume'] = volume
-        communicate = edge_tts.Communicate(text, voice, **tts_options)
-        audio_data = bytes()
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_data += chunk["data"]
-
-        if not audio_data:
-            print("警告：未生成音频数据，可能是文本或语音选择有问题")
+        pieces = split_text_for_tts(text) if split_long_text else [text]
+        if len(pieces) > 1:
+            logger.debug("长文本已切分为 %d 段，边合成边播放...", len(pieces))
+            audio_parts = _synthesize_pieces_in_order(pieces, voice, rate=rate, volume=volume)
+            try:
+                played = await play_audio_sequence(audio_parts)
+            finally:
+                await audio_parts.aclose()
+            if not played:
+                logger.warning("警告：未生成音频数据，可能是文本或语音选择有问题")
+                return False
+            return True
+
+        clip = await get_clip(text, voice, rate=rate, volume=volume)
+
+        if clip is None:
+            logger.warning("警告：未生成音频数据，可能是文本或语音选择有问题")
             return False
 
-        print("语音生成完成，准备播放...")
-        await play_audio_from_memory(audio_data)
+        logger.debug("语音生成完成，准备播放...")
+        await play_audio_from_memory(clip)
         return True
 
     except edge_tts.exceptions.NoAudioReceived:
-        print("错误：未收到音频数据。可能的原因：")
-        print("1. 所选语音不支持输入的文本")
-        print("2. 网络连接问题")
-        print("3. 请尝试不同的语音或更简短的文本")
+        logger.error("错误：未收到音频数据。可能的原因：")
+        logger.error("1. 所选语音不支持输入的文本")
+        logger.error("2. 网络连接问题")
+        logger.error("3. 请尝试不同的语音或更简短的文本")
         return False
     except Exception as e:
-        print(f"错误：生成语音时发生异常: {str(e)}")
+        logger.error(f"错误：生成语音时发生异常: {str(e)}")
         return False
+    finally:
+        get_tracer().reset_current(trace_token)
 
 
 async def main():
     """主函数，交互式运行TTS"""
-    if not CONFIG_LOADED or not SUPPORTED_VOICES:
+    catalog = get_voice_catalog()
+    if not len(catalog):
         print("错误：TTS 配置未能成功加载或语音列表为空，无法启动交互式演示。")
         print("请检查 config.json 文件是否存在且格式正确，并包含 tts_config.voices 列表。")
         return
@@ -140,7 +705,7 @@ async def main():
     print("=== Edge TTS 交互式演示程序 (新流程) ===")
 
     try:
-        mixer.init()  # 初始化 Pygame Mixer
+        get_audio_output().open()  # 打开默认输出设备
 
         while True:
             # 1. 获取用户输入的文本
@@ -150,7 +715,7 @@ async def main():
                 break
 
             # 2. 选择语种
-            available_languages = sorted(list(set(v["language_display"] for v in SUPPORTED_VOICES)))
+            available_languages = catalog.language_displays()
             print("\n可用的语种:")
             for i, lang_name in enumerate(available_languages, 1):
                 print(f"{i}. {lang_name}")
@@ -170,7 +735,7 @@ async def main():
 
 
             # 3. 选择性别
-            voices_in_lang = [v for v in SUPPORTED_VOICES if v["language_display"] == selected_language_display]
+            voices_in_lang = catalog.voices_for_display(selected_language_display)
             available_genders = sorted(list(set(v["gender_display"] for v in voices_in_lang)))
             print(f"\n可用的性别 ({selected_language_display}):")
             for i, gender_name in enumerate(available_genders, 1):
@@ -190,9 +755,7 @@ async def main():
                 except KeyboardInterrupt: print("\n程序已中断。"); sys.exit(0)
 
             # 4. 选择音色
-            voices_for_selection = [
-                v for v in voices_in_lang if v["gender_display"] == selected_gender_display
-            ]
+            voices_for_selection = catalog.voices_for_display(selected_language_display, selected_gender_display)
             print(f"\n可用的音色 ({selected_language_display} - {selected_gender_display}):")
             for i, voice_info in enumerate(voices_for_selection, 1):
                 # 组合显示名称：地区/方言 - 语音名
@@ -228,10 +791,20 @@ async def main():
     except Exception as e:
         print(f"主程序发生错误: {e}")
     finally:
-        if mixer.get_init():
-            mixer.quit() # 关闭 Pygame Mixer
+        close_audio_output()
 
 if __name__ == "__main__":
+    from log_config import setup_logging
+
+    # python edge_TTS.py --check-split  校验长句切分回归表，不符合时退出码为1
+    if "--check-split" in sys.argv[1:]:
+        split_failures = check_split_cases()
+        for case_text, expected_widths, widths in split_failures:
+            print(f"不符合: {case_text[:30]!r}... 期望 {expected_widths}，实际 {widths}")
+        print(f"切分回归表: {len(SPLIT_CASES) - len(split_failures)}/{len(SPLIT_CASES)} 通过")
+        sys.exit(1 if split_failures else 0)
+
+    setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
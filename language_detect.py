@@ -0,0 +1,564 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+表驱动的语言检测
+----------------------------
+覆盖 translation_module.LANGUAGE_CODES 中的全部语言，分两步:
+1. 预先计算的 Unicode 码点 → 文字 查找表，对整段文本（或整批文本）一次性用NumPy求各文字的字符直方图，
+   泰文、韩文、希伯来文、格鲁吉亚文等一种文字只对应一种语言的直接得出结果；
+   汉字按假名与粤语用字的比例区分 cn / ja / yue
+2. 多种语言共用的文字（拉丁、西里尔、阿拉伯、天城文）用紧凑的字符n-gram模型（单字与三元组哈希到固定桶数，
+   朴素贝叶斯打分）在该文字的语言中选出得分最高者；模型由本文件中的常用词种子在首次使用时构建。
+   en/es 与调用方给出的源语言带有先验加分；n-gram 太少或领先该文字默认语言（拉丁 en、西里尔 ru、
+   阿拉伯 ar、天城文 hi）不够多时保留默认语言，"Hello"、"OK" 这类短语不会被判成小语种
+
+批量接口把所有文本拼接成一个码点数组处理，没有逐字符的Python循环，适合大量转写文本的路由。
+
+使用方法:
+    from language_detect import detect_language, detect_languages
+    detect_language("Dziękuję bardzo")              # 'pl'
+    detect_languages(["谢谢", "ありがとう", "Merci"])  # ['cn', 'ja', 'fr']
+
+    detect_language("Hallo", source_language="de")   # 'de'（短文本在没有把握时取源语言）
+
+    python language_detect.py "Terima kasih banyak"
+    python language_detect.py --check                 # 短语回归表（SHORT_PHRASES）
+    python language_detect.py --benchmark 100000
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_LANGUAGE = "en"
+
+# ---- 文字查找表 ----
+
+SCRIPTS = (
+    "other", "latin", "cyrillic", "arabic", "devanagari", "han", "kana", "han_yue", "hangul",
+    "greek", "armenian", "hebrew", "georgian", "thai", "lao", "myanmar", "khmer", "sinhala",
+    "bengali", "tamil", "telugu", "malayalam", "ethiopic", "mongolian", "yi",
+)
+_S = {name: index for index, name in enumerate(SCRIPTS)}
+OTHER, HAN, KANA, HAN_YUE = _S["other"], _S["han"], _S["kana"], _S["han_yue"]
+
+# 闭区间；数字与标点在表中之后被重置为 other
+SCRIPT_RANGES = {
+    "latin": [(0x41, 0x5A), (0x61, 0x7A), (0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x24F), (0x2BB, 0x2BC),
+              (0x1E00, 0x1EFF), (0xFF21, 0xFF3A), (0xFF41, 0xFF5A)],
+    "greek": [(0x370, 0x3FF), (0x1F00, 0x1FFF)],
+    "cyrillic": [(0x400, 0x52F), (0x1C80, 0x1C8F), (0x2DE0, 0x2DFF), (0xA640, 0xA69F)],
+    "armenian": [(0x531, 0x58F)],
+    "hebrew": [(0x591, 0x5FF), (0xFB1D, 0xFB4F)],
+    "arabic": [(0x600, 0x6FF), (0x750, 0x77F), (0x8A0, 0x8FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)],
+    "devanagari": [(0x900, 0x97F), (0xA8E0, 0xA8FF)],
+    "bengali": [(0x980, 0x9FF)],
+    "tamil": [(0xB80, 0xBFF)],
+    "telugu": [(0xC00, 0xC7F)],
+    "malayalam": [(0xD00, 0xD7F)],
+    "sinhala": [(0xD80, 0xDFF)],
+    "thai": [(0xE00, 0xE7F)],
+    "lao": [(0xE80, 0xEFF)],
+    "myanmar": [(0x1000, 0x109F)],
+    "georgian": [(0x10A0, 0x10FF), (0x1C90, 0x1CBF)],
+    "hangul": [(0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)],
+    "ethiopic": [(0x1200, 0x139F)],
+    "khmer": [(0x1780, 0x17FF), (0x19E0, 0x19FF)],
+    "mongolian": [(0x1800, 0x18AF)],
+    "kana": [(0x3040, 0x30FA), (0x30FC, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9F)],
+    "han": [(0x3005, 0x3005), (0x3007, 0x3007), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF),
+            (0x20000, 0x2FFFD)],
+    "yi": [(0xA000, 0xA4CF)],
+}
+NON_LETTER_RANGES = [
+    (0x60C, 0x60C), (0x61B, 0x61B), (0x61F, 0x61F), (0x660, 0x66D), (0x6D4, 0x6D4), (0x6F0, 0x6F9),
+    (0x964, 0x96F), (0x9E6, 0x9EF), (0xBE6, 0xBEF), (0xC66, 0xC6F), (0xD66, 0xD6F), (0xE3F, 0xE3F),
+    (0xE50, 0xE59), (0x1040, 0x1049), (0x17E0, 0x17E9), (0x1810, 0x1819), (0x37E, 0x37E), (0x387, 0x387),
+    (0x589, 0x58A), (0x5BE, 0x5BE), (0x5C0, 0x5C0), (0x5C3, 0x5C3), (0x5F3, 0x5F4), (0x1362, 0x1368),
+]
+# 粤语书面语常用而普通话几乎不用的字
+YUE_CHARS = "嘅咗喺冇啲嘢佢哋睇咁乜嚟唔咩噉啱攞揾畀嗰嘞囉嘥諗瞓𠮶"
+
+# 一种文字只对应一种语言
+SCRIPT_LANGUAGES = {
+    "hangul": "ko", "greek": "el", "armenian": "hy", "hebrew": "he", "georgian": "ka", "thai": "th",
+    "lao": "lo", "myanmar": "my", "khmer": "km", "sinhala": "si", "bengali": "bn", "tamil": "ta",
+    "telugu": "te", "malayalam": "ml", "ethiopic": "am", "mongolian": "mn", "yi": "ii",
+}
+# 假名占汉字+假名的比例达到该值判为日语，粤语用字占比达到该值判为粤语
+KANA_RATIO = 0.1
+YUE_RATIO = 0.05
+
+
+def _build_script_table():
+    table = np.zeros(0x30000, dtype=np.uint8)
+    for name, ranges in SCRIPT_RANGES.items():
+        for start, end in ranges:
+            table[start:end + 1] = _S[name]
+    for start, end in NON_LETTER_RANGES:
+        table[start:end + 1] = OTHER
+    for char in YUE_CHARS:
+        if ord(char) < len(table):
+            table[ord(char)] = HAN_YUE
+    # 超出表范围的码点被截断到最后一项
+    table[-1] = OTHER
+    return table
+
+
+SCRIPT_TABLE = _build_script_table()
+
+# ---- n-gram 模型种子（各语言的常用词）----
+
+NGRAM_SEEDS = {
+    "latin": {
+        "en": "the of and to in is you that it he was for on are as with his they at be this have from or one "
+              "had by word but not what all were we when your can said there use an each which she do how their "
+              "if will up other about out many then them these so some her would make like him into time has "
+              "look two more write go see number no way could people my than first water been call who its now "
+              "find long down day did get come made may part thank very much today meeting "
+              "hello hi yes okay please thanks sorry good morning friend "
+              "one two three four five six seven eight nine ten hour week year",
+        "es": "de la que el en y a los se del las un por con no una su para es al lo como más pero sus le ya o "
+              "este sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos "
+              "durante todos uno les ni contra otros ese eso ante ellos esto mí antes algunos qué unos yo otro "
+              "otras otra él tanto esa estos mucho quienes nada muchos cual poco ella estar estas algo nosotros "
+              "año días niño señor está gracias hoy reunión hola amigo amiga buenos buenas noches "
+              "uno dos tres cuatro cinco seis siete ocho nueve diez hora semana",
+        "it": "di che e la il un a per è in non una sono mi si ho lo ma ti ha le cosa con da io se ci no come "
+              "questo qui hai sei del bene tu sì me più al mio c'è solo perché della gli anche così fatto tutto "
+              "nel molto città però già può dove voglio essere grazie oggi riunione questa quello siamo "
+              "uno due tre quattro cinque sei sette otto nove dieci ora settimana anno",
+        "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das "
+              "tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre era "
+              "depois sem mesmo aos ter seus quem nas esse eles estão você tinha foram essa nem suas meu às "
+              "minha têm numa pelos elas havia seja qual será nós tenho lhe deles ação são coração obrigado hoje "
+              "um dois três quatro cinco seis sete oito nove dez hora semana próxima",
+        "fr": "de la le et les des en un du une que est pour qui dans par plus pas au sur ne se ce il sont avec "
+              "son aux mais nous comme ou si leur dont elle été très ça même ces être où aussi tout bien fait "
+              "cette là déjà après peut avoir vous je merci beaucoup aujourd'hui réunion français "
+              "un deux trois quatre cinq six sept huit neuf dix heure semaine",
+        "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an "
+              "werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum war "
+              "haben nur oder aber vor zur bis mehr durch man sein wurde sei größe schön müssen können straße "
+              "heißt ich wir danke heute sehr hallo guten morgen "
+              "eins zwei drei vier fünf sechs sieben acht neun zehn uhr woche jahr",
+        "nl": "de en van ik te dat die in een hij het niet zijn is was op aan met als voor had er maar om hem "
+              "dan zou of wat mijn men dit zo door over ze zich bij ook tot je mij uit daar haar naar heb hoe "
+              "heeft hebben deze u want nog zal zij nu geen omdat iets worden toch al waren veel meer doen toen "
+              "moet ben zonder kan hun dus alles onder ja eens hier wie werd altijd wordt kunnen ons zelf tegen "
+              "bedankt vandaag "
+              "een twee drie vier vijf zes zeven acht negen tien uur week jaar",
+        "af": "die en van is in te dat nie het vir op hy met ek sy was word ons wat aan om as daar sal kan deur "
+              "by ook hulle maar uit of jy baie nog my kom moet al sê gaan hierdie weet waar toe hom haar jou "
+              "net wees goed mense nou eers lê môre dankie vandag ' n",
+        "da": "og i jeg det at en den til er som på de med han af for ikke der var mig sig men et har om vi "
+              "min havde ham hun nu over da fra du ud sin dem os op man hans hvor eller hvad skal selv her "
+              "alle vil blev kunne ind når være dog noget ville jo deres efter ned skulle denne end dette mit "
+              "også under have dig anden hende meget hvis nogle blive mange bliver været sådan børn går tak "
+              "i dag gerne aften hvordan kommer gøre spørgsmål "
+              "to tre fire fem seks syv otte ni ti klokken uge år",
+        "nb": "og i jeg det at en et den til er som på de med han av ikke der så var meg seg men har om vi "
+              "min mitt ha hadde hun nå over da ved fra du ut sin dem oss opp man kan hans hvor eller hva "
+              "skal selv her alle vil bli ble blitt kunne inn når være kom noen noe ville dere deres kun ja "
+              "etter ned skulle denne for deg si sine sitt mot å hvorfor dette disse uten hvordan ingen "
+              "ditt blir samme også gå få før takk i dag gjerne kveld kommer gjøre spørsmål "
+              "to tre fire fem seks sju åtte ni ti klokken uke år",
+        "sv": "och det att i en jag hon som han på den med var sig för så till är men ett om hade de av "
+              "mig du henne då sin nu har inte hans honom skulle hennes där min man vid kunde något från ut "
+              "när efter upp vi dem vara vad över än dig kan sina här ha mot alla under någon eller allt "
+              "mycket sedan denna själv detta åt utan varit hur ingen mitt ni bli blev oss din dessa några "
+              "deras blir mina samma vilken vår också även gå får tack idag "
+              "två tre fyra fem sex sju åtta nio tio klockan vecka år",
+        "is": "og að er í á það sem til hann ekki við um með ég var en hún af þeir fyrir þú eru hafa frá "
+              "þetta eftir þegar hefur þá líka verið vera nú eða sér mér hvað svo þar mjög þessi gera voru "
+              "ár þau bara öll þó þess þær hér takk fyrir í dag",
+        "fi": "ja on ei se että hän oli joka olla ovat mutta kun niin tai kuin jos myös vain nyt sitten minä "
+              "sinä me te he tämä tuo mikä kuka missä miksi koska ole olen olet olemme kanssa mukaan jälkeen "
+              "ennen aikana kaikki hyvin paljon vielä jo täällä siellä hyvä päivä työ käydä kiitos tänään "
+              "yksi kaksi kolme neljä viisi kuusi seitsemän kahdeksan yhdeksän kymmenen kello viikko vuosi",
+        "hu": "a az és hogy nem is egy meg de van volt csak már ez mint még ki el mi azt én pedig te mert "
+              "most vagy ha le fel sem után minden így kell lesz sok ami aki lett nagy ott itt nekem neki ő "
+              "őket hát között első több való szerint évben úgy össze köszönöm ma nagyon "
+              "egy kettő három négy öt hat hét nyolc kilenc tíz óra év",
+        "pl": "i w nie na się z do to że a o jak ale po co tak za od jest jego jej być może tylko czy przez "
+              "mnie już ich który która które dla ten ta bardzo gdy kiedy jeszcze tym tego był była było są "
+              "będzie sobie też przy lub więc tu tam wszystko dzień żeby ciebie wiele dziękuję proszę źle "
+              "łatwo dzisiaj "
+              "jeden dwa trzy cztery pięć sześć siedem osiem dziewięć dziesięć godzina tydzień rok",
+        "cs": "a se na je že v to s z o do i jako ale jeho by jsem jsou byl bylo jak tak když pro po k jen "
+              "už od není jsme nebo ve ze co tam tu být které který která také proto může mezi před ještě "
+              "při velmi všechno děkuji prosím řeč čas dobrý člověk můžete dnes moc "
+              "jeden dva tři čtyři pět šest sedm osm devět deset hodina týden rok",
+        "sk": "a sa na je že v to s z o do i ako ale jeho by som sú bol bolo tak keď pre po k len už od "
+              "nie sme alebo vo zo čo tam tu byť ktoré ktorý ktorá tiež preto môže medzi pred ešte pri "
+              "veľmi všetko ďakujem prosím ľudia až môj dobrý človek ôsmy dnes "
+              "jeden dva tri štyri päť šesť sedem osem deväť desať hodina týždeň rok",
+        "sl": "in je se na da v za z so ne pa bi to ki sem bil bila kot tudi ali le še po od do iz pri samo "
+              "zelo tako kaj če kako že smo ste biti ima imajo lahko mi vi oni ona jaz ti dobro hvala prosim "
+              "človek čas življenje šola danes",
+        "hr": "i je u se na da za s su ne to a od kao što ali bi sam bio bila iz po do samo još ili kako "
+              "već smo ste biti ima imaju može mi vi oni ona ja ti dobro hvala molim čovjek vrijeme život "
+              "škola gdje ćemo će ništa danas puno",
+        "lt": "ir yra kad į su ne iš kaip bet tai jis ji mes jūs jie aš tu buvo bus būti apie per po prie "
+              "už dar tik labai viskas ačiū prašom laikas žmogus diena šiandien čia kur kas savo mūsų jų jo "
+              "šis ši tas ta",
+        "lv": "un ir ka ar uz no par kā bet tas tā viņš viņa mēs jūs viņi es tu bija būs būt pie pēc vēl "
+              "tikai ļoti viss paldies lūdzu laiks cilvēks diena šodien šeit kur kas savu mūsu viņu šis šī "
+              "arī jā nē",
+        "ro": "și de la în a pe cu o un nu se că din care mai este sunt au fost ce să ca le lui dar sau ei "
+              "el ea noi voi eu tu foarte bine aici acolo când unde cum pentru despre după până mulțumesc "
+              "vă rog astăzi țară către își "
+              "unu doi trei patru cinci șase șapte opt nouă zece oră săptămână an",
+        "ca": "de la i el que a en un per les no amb una és del es al als com més però els seu va o ha fer "
+              "molt també quan on tot aquest aquesta ja si jo tu ell ella nosaltres vosaltres ells són està "
+              "perquè gràcies sí això així avui bon dia bona nit adéu amic",
+        "tr": "ve bir bu da de için ile çok ne o ben sen biz siz onlar gibi daha var yok değil ama en kadar "
+              "olan olarak sonra şey her mi mı mu mü şimdi nasıl neden çünkü teşekkür ederim evet hayır "
+              "güzel iyi büyük küçük gün ağaç ışık öğrenci bugün istiyorum akşam misin musun "
+              "geliyor gidiyor yapmak "
+              "iki üç dört beş altı yedi sekiz dokuz on saat hafta yıl",
+        "az": "və bir bu da də üçün ilə çox nə o mən sən biz siz onlar kimi daha var yox deyil amma ən "
+              "qədər olan olaraq sonra şey hər indi necə niyə çünki təşəkkür edirəm bəli xeyr gözəl yaxşı "
+              "böyük kiçik gün əlbəttə həyat ağac bu gün "
+              "iki üç dörd beş altı yeddi səkkiz doqquz on saat həftə il",
+        "uz": "va bir bu ham uchun bilan juda nima u men sen biz siz ular kabi yana bor yoʻq emas lekin "
+              "eng qadar boʻlgan sifatida keyin narsa har endi qanday nega chunki rahmat ha yaxshi katta "
+              "kichik kun oʻzbek gʻalaba shu bugun "
+              "ikki uch toʻrt besh olti yetti sakkiz toʻqqiz oʻn soat hafta yil",
+        "tk": "we bir bu hem üçin bilen örän näme ol men sen biz siz olar ýaly ýene bar ýok däl emma iň "
+              "çenli bolan soňra zat her indi nähili sebäbi sag bol hawa gowy uly kiçi gün türkmen ýurt "
+              "şu gün",
+        "vi": "và của là có được trong cho không này với các những một người đã để khi đến về như từ cũng "
+              "nhưng thì rất tôi bạn chúng ta họ năm nay ở ra làm sẽ nhiều đó theo vào hơn việc nước mình "
+              "cảm ơn xin chào hôm "
+              "hai ba bốn sáu bảy tám chín mười giờ tuần",
+        "id": "yang dan di ini itu dengan untuk tidak dari dalam akan pada juga ke karena saya kamu kami "
+              "kita mereka ada adalah bisa sudah belum harus oleh tersebut seperti atau lebih bahwa hanya "
+              "banyak tetapi jika sangat terima kasih hari orang baru bagaimana apa siapa sekarang "
+              "satu dua tiga empat lima enam tujuh delapan sembilan sepuluh jam minggu tahun",
+        "ms": "yang dan di ini itu dengan untuk tidak dari dalam akan pada juga ke kerana saya awak kami "
+              "kita mereka ada ialah boleh sudah belum mesti oleh tersebut seperti atau lebih bahawa hanya "
+              "banyak tetapi jika sangat terima kasih hari orang baharu bagaimana apa siapa sahaja kerajaan "
+              "satu dua tiga empat lima enam tujuh lapan sembilan sepuluh jam minggu tahun",
+        "jv": "lan ing iku kang ora karo wis bisa aku kowe awake dhewe ana arep saka marang kanggo uga "
+              "menyang yen amarga banget matur nuwun sampeyan dina wong iki kuwi apa sapa piye kepriye "
+              "mangan turu omah",
+        "su": "jeung di nu ka teu ku kana ti abdi anjeun urang aya bisa geus keur rek sareng oge lamun "
+              "kusabab pisan hatur nuhun dinten jalma ieu éta naon saha kumaha dahar sare imah",
+        "tl": "ang ng sa na at mga ay ko mo siya kami tayo sila ito iyan iyon hindi oo po may wala para "
+              "kung pero dahil din rin lang naman ba salamat magandang araw tao bahay kumain ngayon",
+        "sw": "na ya wa kwa ni la katika za kuwa hii ili kama lakini pia sana mimi wewe yeye sisi ninyi "
+              "wao hapana ndiyo asante habari siku mtu watu nyumba chakula kula kwenda leo kesho",
+        "zu": "futhi ukuthi kodwa uma ngoba yena mina wena thina nina bona lokhu lokho kakhulu ngiyabonga "
+              "sawubona yebo cha umuntu abantu indlu ukudla usuku namuhla kusasa ngiya kuba khona",
+        "ha": "da a na ba ta ya ce su wannan cikin kuma amma idan saboda shi ita ni kai mu ku sosai na gode "
+              "sannu eh mutum mutane gida abinci rana yau gobe ƙasa ɗaya ɓangare",
+    },
+    "cyrillic": {
+        "ru": "и в не на я что он с как а то все она так его но да ты к у же вы за бы по только её мне было "
+              "вот от меня ещё нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до "
+              "вас опять уж вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их "
+              "чем была сам без будто чего раз тоже себе под будет тогда кто этот того потому этого какой "
+              "совсем здесь этом один почти мой чтобы сейчас были можно после больше через эти нас спасибо "
+              "сегодня "
+              "один два три четыре пять шесть семь восемь девять десять час неделя год",
+        "uk": "і в не на я що він з як а то все вона так його але ти до у же ви за би по тільки її мені "
+              "було ось від мене ще ні о із йому тепер коли навіть ну раптом чи якщо вже або бути був нього "
+              "вас знову там потім себе нічого їй може вони тут де є треба для ми тебе їх чим була сам без "
+              "ніби чого раз теж собі під буде тоді хто цей того тому цього який зовсім один майже мій "
+              "дякую будь ласка їхній ґанок сьогодні "
+              "один два три чотири п'ять шість сім вісім дев'ять десять година тиждень рік",
+        "bg": "и в не на аз че той с като а то всичко тя така но да ти към у вече вие за би по само мен "
+              "беше ето от още няма о из му сега когато дори или ни бъде него до вас отново там после себе "
+              "си нищо може те тук къде е трябва нея ние теб им какво сам без сякаш път също под ще тогава "
+              "кой този защото един почти моят благодаря много хубаво ъгъл днес "
+              "едно две три четири пет шест седем осем девет десет час седмица година",
+        "sr": "и у не на ја да он с као а то све она тако његов али ти к већ ви за би по само њен мени "
+              "било ево од мене још нема о из њему сада када чак или ни бити био њега до вас опет тамо "
+              "онда себе ништа јој може они овде где је треба њу ми тебе их била сам без ћемо ће хвала "
+              "молим човек ђак љубав њива џеп данас",
+        "kka": "және бір бұл да де үшін мен өте не ол сен біз сіз олар сияқты тағы бар жоқ емес бірақ ең "
+               "дейін болған ретінде кейін нәрсе әр енді қалай неге өйткені рахмет иә жақсы үлкен кіші күн "
+               "қазақ ғана қала өз бүгін",
+        "tg": "ва дар ба аз ки ин бо барои як он ман ту мо шумо онҳо ҳам ҳар чӣ кӣ не ҳа аст буд мешавад "
+              "кард хуб калон хурд рӯз тоҷик ташаккур хона ғизо ӯ қадар ҷой имрӯз",
+        "nm": "ба нь энэ тэр би чи бид та тэд байна байсан юм гэж гэсэн хийх ямар яагаад хаана хэн сайн "
+              "том жижиг өдөр монгол баярлалаа тийм үгүй бол хүн ус гэр өөр үү өнөөдөр",
+    },
+    "arabic": {
+        "ar": "في من على أن إلى عن مع هذا هذه التي الذي كان لا ما هو هي كل قد لم بين عند بعد ذلك أو كما "
+              "حتى إذا نحن أنا أنت هم شكرا جدا اليوم الله يوم العربية مدينة جامعة",
+        "fa": "و در به از که این را با است برای آن یک خود تا می شود کرد شده بود هم نیز ما من تو شما آنها "
+              "چه چرا چگونه ممنون خیلی امروز گفت پس بر های ی پ چ ژ گ",
+        "ur": "کے میں کی ہے اور کو سے ایک یہ کا کہ ہیں پر بھی نہیں تھا تو کر جو ہو گیا اس لیے نے وہ کچھ "
+              "کیا رہا ساتھ تک یا اپنے بہت ہوتا تھے شکریہ آپ ہم کیوں کیسے ٹ ڈ ڑ ں ے ھ",
+        "ps": "د او په چې له ته دا هغه یو دی وو شي کې کړي سره لپاره نه هم زه موږ تاسو دوی څه ولې څنګه "
+              "مننه ډېر نن ورځ ښه ټول ړ ږ ښ ګ ڼ ۍ ې ځ",
+    },
+    "devanagari": {
+        "hi": "है के में की और को से एक यह का कि हैं पर भी नहीं था तो कर जो हो गया इस लिए ने वह कुछ किया "
+              "रहा साथ तक या अपने बहुत होता थे जाता दिया धन्यवाद आप हम मैं क्या क्यों कैसे आज",
+        "mr": "आहे आणि च्या ला मध्ये हे ते की या एक ने नाही होते होता त्या त्याचे करून केले आता पण म्हणून "
+              "तर मी तू आम्ही तुम्ही काय का कसे धन्यवाद खूप आपण झाले असे आज",
+        "ne": "छ र को मा ले का हो यो त्यो एक पनि गर्न भएको गरेको थियो छन् छैन हुन्छ भने तर म तिमी हामी "
+              "तपाईं के किन कसरी धन्यवाद धेरै आफ्नो गर्नुहोस् थिए आज",
+    },
+}
+NGRAM_BUCKETS = 1 << 13
+NGRAM_ALPHA = 0.01
+
+# 多语言文字的默认语言：n-gram 证据不足时返回
+SCRIPT_DEFAULTS = {"latin": "en", "cyrillic": "ru", "arabic": "ar", "devanagari": "hi"}
+# 各语言的对数先验加分（会议场景中最常见的语言），调用方给出的源语言另加 SOURCE_PRIOR
+LANGUAGE_PRIORS = {"en": 3.0, "es": 1.0}
+SOURCE_PRIOR = 3.0
+# 离开默认语言所需的最少 n-gram 数与最低得分领先（对数似然）
+MIN_NGRAMS = 14
+MIN_MARGIN = 3.0
+
+# 短语回归表：(文本, 期望语言)，python language_detect.py --check 校验
+SHORT_PHRASES = (
+    ("Hello", "en"), ("OK", "en"), ("Yes", "en"), ("No", "en"), ("Thanks", "en"), ("Hallo", "en"),
+    ("Hola", "en"), ("Hola amigo", "es"), ("Ciao", "en"), ("Good morning", "en"),
+    ("Thank you very much", "en"), ("Gracias", "es"), ("Muchas gracias", "es"), ("Buenos días", "es"),
+    ("Merci beaucoup", "fr"), ("Danke schön", "de"), ("Obrigado", "pt"), ("Grazie mille", "it"),
+    ("مرحبا", "ar"), ("شكرا", "ar"), ("Привет", "ru"), ("Спасибо", "ru"),
+)
+
+_SPACE = np.uint64(32)
+_K1 = np.uint64(0x9E3779B97F4A7C15)
+_K2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_K3 = np.uint64(0x165667B19E3779F9)
+# 一批拼接后最多处理的字符数，限制n-gram打分矩阵的内存
+CHUNK_CHARS = 1 << 16
+
+
+def _codepoints(texts):
+    """文本列表 → (码点数组, 每个码点所属文本的下标)；每段文本小写并在两端加空格"""
+    padded = [f" {text.lower()} " for text in texts]
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32)
+    segments = np.repeat(np.arange(len(padded)), lengths)
+    return codes, segments
+
+
+def _ngram_features(codes, scripts, segments, bits):
+    """
+    单字（仅字母）与字符三元组（中间为字母、不跨文本）的哈希桶号
+
+    返回:
+        [(单字桶号, 所属文本), (三元组桶号, 所属文本)]，所属文本按升序排列
+    """
+    letters = scripts != OTHER
+    chars = np.where(letters, codes, 32).astype(np.uint64)
+    shift = np.uint64(64 - bits)
+    unigram = ((chars[letters] * _K1) >> shift).astype(np.intp)
+    valid = letters[1:-1] & (segments[:-2] == segments[2:])
+    trigram = ((((chars[:-2] * _K1) ^ (chars[1:-1] * _K2) ^ (chars[2:] * _K3)) * _K1)[valid] >> shift).astype(np.intp)
+    return [(unigram, segments[letters]), (trigram, segments[:-2][valid])]
+
+
+def _segment_sums(values, owners, count):
+    """按（已排序的）所属文本对 values 的行求和，返回 [count, 列数]"""
+    sums = np.zeros((count, values.shape[1]), dtype=np.float64)
+    if len(owners):
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        sums[owners[starts]] = np.add.reduceat(values, starts, axis=0)
+    return sums
+
+
+class LanguageDetector:
+    """
+    文字直方图 + n-gram 朴素贝叶斯的语言检测器（构建后只读，可在多线程中共用）
+
+    参数:
+        seeds: {文字: {语言代码: 种子文本}}
+        buckets: n-gram 哈希桶数（2的幂）
+        default: 没有任何字母时返回的语言
+        priors: {语言代码: 对数先验加分}
+    """
+
+    def __init__(self, seeds=NGRAM_SEEDS, buckets=NGRAM_BUCKETS, alpha=NGRAM_ALPHA, default=DEFAULT_LANGUAGE,
+                 priors=LANGUAGE_PRIORS):
+        self.bits = int(buckets).bit_length() - 1
+        self.default = default
+        # 文字 → (语言代码数组, 对数概率矩阵 [桶数, 语言数], 对数先验 [语言数])
+        self.models = {}
+        for script, languages in seeds.items():
+            codes = list(languages)
+            log_probs = np.empty((1 << self.bits, len(codes)), dtype=np.float32)
+            for column, code in enumerate(codes):
+                points, segments = _codepoints([languages[code]])
+                features = _ngram_features(points, SCRIPT_TABLE[points], segments, self.bits)
+                hashes = np.concatenate([feature_hashes for feature_hashes, _ in features])
+                counts = np.bincount(hashes, minlength=1 << self.bits).astype(np.float64)
+                log_probs[:, column] = np.log((counts + alpha) / (counts.sum() + alpha * len(counts)))
+            prior = np.array([priors.get(code, 0.0) for code in codes], dtype=np.float64)
+            self.models[_S[script]] = (np.array(codes, dtype=object), log_probs, prior)
+        self._script_result = np.array(
+            [SCRIPT_LANGUAGES.get(name, default) for name in SCRIPTS], dtype=object)
+
+    def languages(self):
+        """可检测的全部语言代码"""
+        codes = {"cn", "ja", "yue"} | set(SCRIPT_LANGUAGES.values())
+        for language_codes, _, _ in self.models.values():
+            codes.update(language_codes)
+        return codes
+
+    def script_histogram(self, texts):
+        """每段文本各文字的字母数，形状 [文本数, len(SCRIPTS)]"""
+        codes, segments = _codepoints(texts)
+        scripts = SCRIPT_TABLE[np.minimum(codes, len(SCRIPT_TABLE) - 1)]
+        return np.bincount(segments * len(SCRIPTS) + scripts,
+                           minlength=len(texts) * len(SCRIPTS)).reshape(len(texts), len(SCRIPTS))
+
+    def detect(self, text, source_language=None):
+        return self.detect_batch([text], source_language)[0]
+
+    def detect_batch(self, texts, source_language=None):
+        """
+        批量检测，返回语言代码列表
+
+        参数:
+            source_language: 已配置的源语言（可选），得分加 SOURCE_PRIOR，并在证据不足时代替该文字的默认语言
+        """
+        results = []
+        start, chars = 0, 0
+        for index, text in enumerate(texts):
+            chars += len(text) + 2
+            if chars >= CHUNK_CHARS:
+                results.extend(self._detect_chunk(texts[start:index + 1], source_language))
+                start, chars = index + 1, 0
+        if start < len(texts):
+            results.extend(self._detect_chunk(texts[start:], source_language))
+        return results
+
+    def _detect_chunk(self, texts, source_language=None):
+        codes, segments = _codepoints(texts)
+        scripts = SCRIPT_TABLE[np.minimum(codes, len(SCRIPT_TABLE) - 1)]
+        counts = np.bincount(segments * len(SCRIPTS) + scripts,
+                             minlength=len(texts) * len(SCRIPTS)).reshape(len(texts), len(SCRIPTS))
+
+        # 汉字、假名与粤语用字合并为一组参与主文字的比较
+        han = counts[:, HAN] + counts[:, KANA] + counts[:, HAN_YUE]
+        grouped = counts.copy()
+        grouped[:, [OTHER, KANA, HAN_YUE]] = 0
+        grouped[:, HAN] = han
+        dominant = grouped.argmax(axis=1)
+
+        results = self._script_result[dominant]
+        results[grouped[np.arange(len(texts)), dominant] == 0] = self.default
+        is_han = dominant == HAN
+        results[is_han] = "cn"
+        results[is_han & (counts[:, HAN_YUE] >= np.maximum(1, YUE_RATIO * han))] = "yue"
+        results[is_han & (counts[:, KANA] >= np.maximum(1, KANA_RATIO * han))] = "ja"
+
+        for script, (language_codes, log_probs, prior) in self.models.items():
+            selected = np.flatnonzero(dominant == script)
+            if not len(selected):
+                continue
+            in_script = np.zeros(len(texts), dtype=bool)
+            in_script[selected] = True
+            mask = in_script[segments]
+            features = _ngram_features(codes[mask], scripts[mask], segments[mask], self.bits)
+            scores = sum(_segment_sums(log_probs[hashes], owners, len(texts)) for hashes, owners in features)
+            ngrams = sum(np.bincount(owners, minlength=len(texts)) for _, owners in features)
+
+            default = SCRIPT_DEFAULTS[SCRIPTS[script]]
+            prior = prior.copy()
+            if source_language in language_codes:
+                prior[language_codes == source_language] += SOURCE_PRIOR
+                default = source_language
+            default_column = int(np.flatnonzero(language_codes == default)[0])
+            scores = scores[selected] + prior
+            best = scores.argmax(axis=1)
+            margin = scores[np.arange(len(selected)), best] - scores[:, default_column]
+            # 证据不足时保留默认语言，而不是在几十种语言中随意挑一个
+            confident = (ngrams[selected] >= MIN_NGRAMS) & (margin >= MIN_MARGIN)
+            results[selected] = np.where(confident, language_codes[best], default)
+        return results.tolist()
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """全局检测器（首次调用时构建n-gram模型）"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = LanguageDetector()
+    return _detector
+
+
+def detect_language(text, source_language=None):
+    """
+    检测文本的语言
+
+    参数:
+        text: 要检测的文本
+        source_language: 已配置的源语言（可选），短文本没有把握时优先返回它
+
+    返回:
+        translation_module.LANGUAGE_CODES 中的语言代码，没有任何字母时返回 'en'
+    """
+    return get_detector().detect(text, source_language)
+
+
+def detect_languages(texts, source_language=None):
+    """批量检测语言，返回与 texts 等长的语言代码列表"""
+    return get_detector().detect_batch(list(texts), source_language)
+
+
+def check_short_phrases(detector=None):
+    """校验 SHORT_PHRASES，返回 [(文本, 期望, 实际)] 中不符合的条目"""
+    detector = detector or get_detector()
+    texts = [text for text, _ in SHORT_PHRASES]
+    return [(text, expected, got)
+            for (text, expected), got in zip(SHORT_PHRASES, detector.detect_batch(texts))
+            if got != expected]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="表驱动的语言检测")
+    parser.add_argument("texts", nargs="*", help="要检测的文本")
+    parser.add_argument("--source", default=None, help="已配置的源语言代码")
+    parser.add_argument("--check", action="store_true", help="校验短语回归表，不符合时退出码为1")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="N", help="批量检测N条样例句子并输出吞吐量")
+    args = parser.parse_args(argv)
+
+    detector = get_detector()
+    for text in args.texts:
+        print(f"{detector.detect(text, args.source)}\t{text}")
+    if args.check:
+        failures = check_short_phrases(detector)
+        for text, expected, got in failures:
+            print(f"不符合: {text!r} 期望 {expected}，实际 {got}")
+        print(f"短语回归表: {len(SHORT_PHRASES) - len(failures)}/{len(SHORT_PHRASES)} 通过")
+        if failures:
+            return 1
+    if args.benchmark:
+        samples = ["今天的会议到此结束，谢谢大家。", "Thank you all for coming today.", "ありがとうございました",
+                   "Muchas gracias por venir hoy.", "Спасибо всем, что пришли.", "شكرا جزيلا لكم جميعا",
+                   "오늘 회의는 여기까지입니다", "Vielen Dank für Ihre Aufmerksamkeit."]
+        batch = (samples * (args.benchmark // len(samples) + 1))[:args.benchmark]
+        start = time.perf_counter()
+        detector.detect_batch(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{len(batch)} 条: {elapsed * 1000:.1f}ms ({len(batch) / elapsed:,.0f} 条/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
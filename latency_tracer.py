@@ -0,0 +1,324 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+逐句端到端延迟追踪
+----------------------------
+每句话在语音开始时（VAD检测到语音，不使用VAD时音量超过说话下限）分配一个 trace id，
+沿 ASR → 翻译 → TTS → 播放 传递，并在各阶段记录时间戳（time.perf_counter）:
+
+    first_audio        语音所在的音频块进入回调（不含句子之间的静音）
+    vad_start          VAD检测到语音开始
+    asr_final          ASR给出最终结果（标点之前）
+    punctuation        标点恢复完成
+    translate_dequeue  翻译协程取出句子
+    translate_response 翻译接口返回
+    tts_first_byte     收到第一个TTS音频块
+    playback_start     开始播放（音频回调第一次输出该句）
+    playback_end       播放结束
+
+导出格式（均可离线查看）:
+    - <前缀>.jsonl          每句一行，含各事件相对时间与相邻阶段耗时
+    - <前缀>.trace.json     Chrome Trace Event 格式，可在 chrome://tracing 或 ui.perfetto.dev 中打开
+    - <前缀>.histograms.json 各阶段耗时的直方图与分位数
+
+使用方法:
+    python latency_tracer.py traces/trace_20250101_120000.jsonl   # 汇总已导出的文件
+"""
+
+import argparse
+import bisect
+import contextvars
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+# 按流水线顺序排列的事件名
+STAGES = (
+    "first_audio",
+    "vad_start",
+    "asr_final",
+    "punctuation",
+    "translate_dequeue",
+    "translate_response",
+    "tts_first_byte",
+    "playback_start",
+    "playback_end",
+)
+
+# 额外统计的跨阶段区间: 名称 -> (起点事件, 终点事件)
+SUMMARY_SPANS = OrderedDict([
+    ("speech_to_heard", ("vad_start", "playback_start")),
+    ("asr_final_to_heard", ("asr_final", "playback_start")),
+    ("translation", ("translate_dequeue", "translate_response")),
+    ("tts_first_byte", ("translate_response", "tts_first_byte")),
+    ("playback", ("playback_start", "playback_end")),
+])
+
+# 直方图桶上界（毫秒），最后一个桶为 +inf
+HISTOGRAM_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+TRACE_DIR = os.path.join(project_root, "traces")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class SentenceTrace:
+    __slots__ = ['trace_id', 'events', 'attrs']
+
+    def __init__(self, trace_id, attrs=None):
+        self.trace_id = trace_id
+        self.events = {}
+        self.attrs = dict(attrs) if attrs else {}
+
+    def spans(self):
+        """按STAGES顺序，相邻两个已记录事件之间的耗时（毫秒）"""
+        result = OrderedDict()
+        previous = None
+        for stage in STAGES:
+            if stage not in self.events:
+                continue
+            if previous is not None:
+                result[f"{previous}->{stage}"] = (self.events[stage] - self.events[previous]) * 1000
+            previous = stage
+        for name, (start, end) in SUMMARY_SPANS.items():
+            if start in self.events and end in self.events:
+                result[name] = (self.events[end] - self.events[start]) * 1000
+        return result
+
+    def to_dict(self):
+        origin = min(self.events.values()) if self.events else 0.0
+        return {
+            "trace_id": self.trace_id,
+            **self.attrs,
+            "origin": round(origin, 6),
+            "events_ms": {stage: round((self.events[stage] - origin) * 1000, 2)
+                          for stage in STAGES if stage in self.events},
+            "spans_ms": {name: round(value, 2) for name, value in self.spans().items()},
+        }
+
+
+class Histogram:
+    """固定桶的毫秒直方图，同时保留有限个样本用于分位数"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS, max_samples=10000):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.samples = deque(maxlen=max_samples)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value_ms):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.samples.append(value_ms)
+        self.total += value_ms
+        self.count += 1
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 2),
+            "p90_ms": round(self.percentile(0.9), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "max_ms": round(max(self.samples), 2) if self.samples else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class LatencyTracer:
+    """
+    线程安全的逐句追踪器
+
+    参数:
+        enabled: 关闭时 begin 返回 None，其余调用均为空操作
+        max_open: 同时未结束的追踪上限（超出时丢弃最早的，例如只有静音、没有产生句子的追踪）
+        max_finished: 内存中保留的已结束追踪数
+    """
+
+    def __init__(self, enabled=True, max_open=256, max_finished=10000):
+        self.enabled = enabled
+        self.max_open = max_open
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._open = OrderedDict()
+        self.finished = deque(maxlen=max_finished)
+        self.histograms = OrderedDict()
+        self.dropped = 0
+
+    def begin(self, t=None, **attrs):
+        """开始一条追踪并记录 first_audio，返回trace id"""
+        if not self.enabled:
+            return None
+        trace_id = next(self._ids)
+        trace = SentenceTrace(trace_id, attrs)
+        trace.events["first_audio"] = time.perf_counter() if t is None else t
+        with self._lock:
+            self._open[trace_id] = trace
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+                self.dropped += 1
+        return trace_id
+
+    def mark(self, trace_id, event, t=None, keep_last=False):
+        """记录事件时间戳；默认保留第一次出现的时间，keep_last=True 时以最后一次为准"""
+        if trace_id is None:
+            return
+        if t is None:
+            t = time.perf_counter()
+        with self._lock:
+            trace = self._open.get(trace_id)
+            if trace is not None and (keep_last or event not in trace.events):
+                trace.events[event] = t
+
+    def annotate(self, trace_id, **attrs):
+        if trace_id is None:
+            return
+        with self._lock:
+            trace = self._open.get(trace_id)
+            if trace is not None:
+                trace.attrs.update(attrs)
+
+    def finish(self, trace_id):
+        """结束追踪，计入直方图"""
+        if trace_id is None:
+            return None
+        with self._lock:
+            trace = self._open.pop(trace_id, None)
+            if trace is None:
+                return None
+            self.finished.append(trace)
+            for name, value in trace.spans().items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.add(value)
+        return trace
+
+    def discard(self, trace_id):
+        if trace_id is None:
+            return
+        with self._lock:
+            self._open.pop(trace_id, None)
+
+    # ---- 通过contextvar传递当前句子（在asyncio任务中自动继承） ----
+
+    @staticmethod
+    def set_current(trace_id):
+        return _current_trace.set(trace_id)
+
+    @staticmethod
+    def reset_current(token):
+        _current_trace.reset(token)
+
+    @staticmethod
+    def current():
+        return _current_trace.get()
+
+    def mark_current(self, event, t=None, keep_last=False):
+        self.mark(_current_trace.get(), event, t=t, keep_last=keep_last)
+
+    # ---- 导出 ----
+
+    def summary(self):
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+
+    def export(self, prefix=None):
+        """
+        导出已结束的追踪，返回写入的文件路径列表
+
+        参数:
+            prefix: 文件路径前缀（不含扩展名），默认 traces/trace_<时间>
+        """
+        if prefix is None:
+            prefix = os.path.join(TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        with self._lock:
+            traces = list(self.finished)
+        histograms = self.summary()
+
+        jsonl_path = prefix + ".jsonl"
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for trace in traces:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+
+        chrome_path = prefix + ".trace.json"
+        with open(chrome_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": chrome_trace_events(traces), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+        histogram_path = prefix + ".histograms.json"
+        with open(histogram_path, 'w', encoding='utf-8') as f:
+            json.dump(histograms, f, ensure_ascii=False, indent=2)
+        return [jsonl_path, chrome_path, histogram_path]
+
+
+def chrome_trace_events(traces):
+    """将追踪转换为Chrome Trace Event（每句一行，相邻阶段为一个区间）"""
+    events = []
+    for trace in traces:
+        label = trace.attrs.get("text", "")[:40]
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": trace.trace_id,
+                       "args": {"name": f"#{trace.trace_id} {label}"}})
+        previous = None
+        for stage in STAGES:
+            if stage not in trace.events:
+                continue
+            t = trace.events[stage]
+            events.append({"name": stage, "ph": "i", "s": "t", "pid": 1, "tid": trace.trace_id,
+                           "ts": round(t * 1e6, 1)})
+            if previous is not None:
+                start = trace.events[previous]
+                events.append({"name": f"{previous}->{stage}", "ph": "X", "pid": 1, "tid": trace.trace_id,
+                               "ts": round(start * 1e6, 1), "dur": round((t - start) * 1e6, 1)})
+            previous = stage
+    return events
+
+
+def summarize_jsonl(path):
+    """读取导出的JSONL，重新计算各区间的直方图"""
+    histograms = OrderedDict()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            for name, value in json.loads(line).get("spans_ms", {}).items():
+                histograms.setdefault(name, Histogram()).add(value)
+    return {name: histogram.to_dict() for name, histogram in histograms.items()}
+
+
+_tracer = LatencyTracer(enabled=os.environ.get("APP_TRACE", "1") != "0")
+
+
+def get_tracer():
+    """进程内共享的追踪器（设置环境变量 APP_TRACE=0 关闭）"""
+    return _tracer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="汇总导出的逐句延迟追踪")
+    parser.add_argument("jsonl", help="latency_tracer 导出的 .jsonl 文件")
+    args = parser.parse_args()
+    for name, stats in summarize_jsonl(args.jsonl).items():
+        print(f"{name}: n={stats['count']} avg={stats['avg_ms']}ms p50={stats['p50_ms']}ms "
+              f"p90={stats['p90_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
@@ -0,0 +1,189 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+分级、异步的日志配置
+----------------------------
+- 各模块使用 logging.getLogger(__name__) 获取自己的logger
+- 根logger只挂一个 QueueHandler：音频/工作线程上的日志调用只是入队，
+  格式化与终端/文件写入由后台 QueueListener 线程完成
+- 热路径上的调试日志默认关闭（级别INFO），调用处以 isEnabledFor(DEBUG) 守卫，关闭时不做格式化
+- 日志面板通过 UIHandler 接入，只是日志流的一个有界视图
+
+环境变量:
+    APP_LOG_LEVEL   根级别，默认 INFO（设为 DEBUG 可打开热路径日志）
+    APP_LOG_FILE    额外写入的日志文件路径（按大小轮转）
+"""
+
+import atexit
+import contextlib
+import logging
+import logging.handlers
+import queue
+import threading
+
+DEFAULT_LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+DEFAULT_UI_FORMAT = "%(asctime)s %(message)s"
+DEFAULT_DATE_FORMAT = "%H:%M:%S"
+
+# 日志队列上限；队列满时丢弃新记录而不阻塞调用线程
+DEFAULT_QUEUE_SIZE = 10000
+
+_setup_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃记录并计数，绝不阻塞音频回调或工作线程"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # 只合并消息参数（同进程队列，异常信息留给后台线程格式化）
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class UIHandler(logging.Handler):
+    """
+    将日志行交给UI（例如 UIUpdateDispatcher.post_log）
+
+    在QueueListener的后台线程中执行，sink 必须是线程安全的。
+    """
+
+    def __init__(self, sink, level=logging.INFO, fmt=DEFAULT_UI_FORMAT):
+        super().__init__(level)
+        self.sink = sink
+        self.setFormatter(logging.Formatter(fmt, DEFAULT_DATE_FORMAT))
+
+    def emit(self, record):
+        try:
+            self.sink(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def _resolve_level(level):
+    if level is None:
+        level = os.environ.get("APP_LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    return level
+
+
+def setup_logging(level=None, log_file=None, console=True, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    配置根logger（重复调用时只在传入 level 时更新级别）
+
+    参数:
+        level: 日志级别（名称或数值），首次配置时默认读取 APP_LOG_LEVEL
+        log_file: 日志文件路径，默认读取 APP_LOG_FILE，为空时不写文件
+        console: 是否输出到终端（stderr）
+        queue_size: 日志队列上限
+    """
+    global _listener, _queue_handler
+
+    root_logger = logging.getLogger()
+
+    with _setup_lock:
+        if _listener is not None:
+            # 已配置过：未指定级别时保留当前级别（例如用户在运行中调低/调高的级别）
+            if level is not None:
+                root_logger.setLevel(_resolve_level(level))
+            return root_logger
+
+        root_logger.setLevel(_resolve_level(level))
+
+        handlers = []
+        formatter = logging.Formatter(DEFAULT_LOG_FORMAT, DEFAULT_DATE_FORMAT)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+        log_file = log_file or os.environ.get("APP_LOG_FILE")
+        if log_file:
+            log_dir = os.path.dirname(os.path.abspath(log_file))
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=10 * 1024 * 1024, backupCount=3, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = _NonBlockingQueueHandler(log_queue)
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return root_logger
+
+
+def add_handler(handler):
+    """在后台写入线程上追加一个输出（例如日志面板的 UIHandler），不改变当前日志级别"""
+    setup_logging()
+    with _setup_lock:
+        _listener.handlers = _listener.handlers + (handler,)
+
+
+def remove_handler(handler):
+    with _setup_lock:
+        if _listener is not None:
+            _listener.handlers = tuple(h for h in _listener.handlers if h is not handler)
+
+
+@contextlib.contextmanager
+def paused_output():
+    """
+    持有后台写入线程各输出的锁，期间写入线程不会处于写终端/文件的过程中
+
+    用于在多线程进程中 fork：子进程不会继承一把写到一半时被持有的输出锁（logging 在子进程中会重建
+    处理器自身的锁，但不会重建 stderr/文件对象内部的缓冲锁）。
+    """
+    with _setup_lock:
+        handlers = list(_listener.handlers) if _listener is not None else []
+    for handler in handlers:
+        handler.acquire()
+    try:
+        yield
+    finally:
+        for handler in reversed(handlers):
+            handler.release()
+
+
+def get_dropped_count():
+    """因队列满而丢弃的日志条数"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def shutdown_logging():
+    """停止后台写入线程（会先写完队列中剩余的记录）"""
+    global _listener
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
@@ -0,0 +1,452 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+热路径微基准
+----------------------------
+离线运行（不访问网络、不打开音频设备、不加载模型），覆盖:
+
+    lru_cache.get_put              LRUCache 单线程读写（命中与淘汰混合）
+    lru_cache.contended            4个线程同时读写同一个 LRUCache
+    translation.auth_url           TranslationModule.assemble_auth_url（HMAC签名）
+    translation.request_body       TranslationModule._prepare_request_body
+    translation_memory.lookup      翻译记忆库近似匹配
+    detect_language.single         逐条语言检测
+    detect_language.batch          批量语言检测（每次1000条）
+    asr.check_silence              FastLoadASR.check_silence（100ms音频块）
+    asr.audio_buffers              process_audio_thread 的缓冲处理（合成音频，模型替换为不做推理的空模型），
+                                   每次操作为1秒音频
+    ui.update_text_area            大文本量下的 TranscriptView.update（_update_text_area 的实现，需要显示器）
+    edge_tts.load_config           edge_TTS.load_config（读取预编译语音索引）
+    edge_tts.catalog_build         从 config.json 的语音列表构建索引（缓存失效时的路径）
+
+每项先校准调用次数使单轮不少于 --min-time 秒，再重复 --repeat 轮，记录每次操作耗时的中位数、最小值与最大值。
+依赖缺失（如 funasr、显示器）的项记为跳过。结果保存为JSON（含提交号），compare 子命令比较两次结果并标出退化。
+
+使用方法:
+    python micro_benchmarks.py list
+    python micro_benchmarks.py run                          # 写入 benchmarks/<提交号>.json
+    python micro_benchmarks.py run --filter lru_cache --repeat 7 --output base.json
+    python micro_benchmarks.py compare benchmarks/abc1234.json benchmarks/def5678.json --threshold 0.1
+"""
+
+import argparse
+import fnmatch
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from replay_harness import git_commit
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+RESULTS_DIR = os.path.join(project_root, "benchmarks")
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2
+# 中位数变慢超过该比例、且当前最快一轮也慢于基线中位数时判为退化
+DEFAULT_THRESHOLD = 0.10
+
+SAMPLE_TEXTS = [
+    "今天的会议到此结束，谢谢大家。", "Thank you all for coming to today's meeting.",
+    "本日の会議はこれで終わります。", "Muchas gracias a todos por venir hoy.",
+    "Спасибо всем, что пришли сегодня.", "شكرا لكم جميعا على الحضور اليوم",
+    "오늘 회의는 여기까지입니다", "Vielen Dank an alle für Ihr Kommen.",
+]
+
+
+class BenchmarkSkipped(Exception):
+    """当前环境无法运行该项（缺少依赖、没有显示器等）"""
+
+
+# 名称 → (说明, 构建函数)；构建函数返回 (被测函数, 每次调用包含的操作数, 清理函数或None)
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, description):
+    def register(factory):
+        BENCHMARKS[name] = (description, factory)
+        return factory
+    return register
+
+
+def _import(module_name):
+    try:
+        return __import__(module_name)
+    except (ImportError, OSError) as e:
+        # sounddevice 在找不到PortAudio时抛出OSError
+        raise BenchmarkSkipped(f"无法导入 {module_name}: {e}")
+
+
+# ---- 翻译 ----
+
+@benchmark("lru_cache.get_put", "LRUCache 单线程读写，容量200、400个键")
+def _bench_lru_single():
+    cache = _import("translation_module").LRUCache(capacity=200)
+    keys = [f"sentence {i % 400}_cn_en_True" for i in range(0, 4000, 7)]
+
+    def run():
+        for key in keys:
+            if cache.get(key) is None:
+                cache.put(key, key)
+    return run, len(keys), None
+
+
+@benchmark("lru_cache.contended", "4个线程同时读写同一个 LRUCache")
+def _bench_lru_contended():
+    cache = _import("translation_module").LRUCache(capacity=200)
+    threads, per_thread = 4, 2000
+    keys = [[f"sentence {(i * 7 + t) % 400}" for i in range(per_thread)] for t in range(threads)]
+
+    def worker(thread_keys):
+        for key in thread_keys:
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    def run():
+        workers = [threading.Thread(target=worker, args=(thread_keys,)) for thread_keys in keys]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return run, threads * per_thread, None
+
+
+def _translator():
+    module = _import("translation_module")
+    return module.TranslationModule(app_id="benchmark", api_secret="secret", api_key="key")
+
+
+@benchmark("translation.auth_url", "TranslationModule.assemble_auth_url")
+def _bench_auth_url():
+    translator = _translator()
+    return (lambda: translator.assemble_auth_url(translator.url)), 1, None
+
+
+@benchmark("translation.request_body", "TranslationModule._prepare_request_body")
+def _bench_request_body():
+    translator = _translator()
+    text = SAMPLE_TEXTS[0] * 3
+    return (lambda: translator._prepare_request_body(text, "cn", "en", True)), 1, None
+
+
+@benchmark("translation_memory.lookup", "翻译记忆库近似匹配（1万条记录）")
+def _bench_translation_memory():
+    memory = _import("translation_memory").TranslationMemory(path=None)
+    for i in range(10000):
+        memory.add(f"这是第{i}条会议记录里的测试句子", f"test sentence {i}", "cn", "en")
+    queries = [f"这是第{i}条会议记录里的测试句子啊" for i in range(0, 10000, 97)]
+
+    def run():
+        for query in queries:
+            memory.lookup(query, "cn", "en")
+    return run, len(queries), None
+
+
+@benchmark("detect_language.single", "逐条 detect_language")
+def _bench_detect_single():
+    detect_language = _import("language_detect").detect_language
+    return (lambda: [detect_language(text) for text in SAMPLE_TEXTS]), len(SAMPLE_TEXTS), None
+
+
+@benchmark("detect_language.batch", "detect_languages，每次1000条")
+def _bench_detect_batch():
+    detect_languages = _import("language_detect").detect_languages
+    texts = (SAMPLE_TEXTS * 125)[:1000]
+    return (lambda: detect_languages(texts)), len(texts), None
+
+
+# ---- ASR ----
+
+class _EmptyASRModel:
+    """不做推理、总返回空文本的ASR模型（只测缓冲处理）"""
+
+    def generate(self, **kwargs):
+        return [{"text": ""}]
+
+
+class _AlwaysSpeechVAD:
+    """第一块报告语音开始、之后无事件的VAD模型（使音频持续进入语音缓冲区）"""
+
+    def __init__(self):
+        self.started = False
+
+    def generate(self, **kwargs):
+        if self.started:
+            return [{"value": []}]
+        self.started = True
+        return [{"value": [[0, -1]]}]
+
+
+def _synthetic_audio(seconds, sample_rate=16000):
+    """440Hz正弦 + 噪声，每0.5秒在说话音量与静音音量之间切换"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    envelope = np.where((t // 0.5) % 2 == 0, 0.3, 0.01).astype(np.float32)
+    return (np.sin(2 * np.pi * 440 * t) * envelope + rng.normal(0, 0.003, t.shape)).astype(np.float32)
+
+
+def _fast_load_asr(**kwargs):
+    asr_module = _import("FunASR")
+    latency_tracer = _import("latency_tracer")
+    asr = asr_module.FastLoadASR(use_punc=False, open_input_stream=False, **kwargs)
+    asr.tracer = latency_tracer.LatencyTracer(enabled=False)
+    return asr
+
+
+@benchmark("asr.check_silence", "FastLoadASR.check_silence，100ms音频块")
+def _bench_check_silence():
+    asr = _fast_load_asr(use_vad=False, preloaded_models={"asr": _EmptyASRModel()})
+    asr.is_speaking = True
+    audio = _synthetic_audio(2.0)
+    chunks = audio.reshape(-1, 1600)
+
+    def run():
+        for chunk in chunks:
+            asr.check_silence(chunk)
+    return run, len(chunks), None
+
+
+@benchmark("asr.audio_buffers", "process_audio_thread 缓冲处理，每次操作为1秒合成音频（20ms块）")
+def _bench_audio_buffers():
+    seconds = 10
+    blocks = _synthetic_audio(seconds).reshape(-1, 320, 1)
+    asr = _fast_load_asr(use_vad=True, preloaded_models={"asr": _EmptyASRModel(), "vad": _AlwaysSpeechVAD()})
+    asr.start()
+
+    def run():
+        for block in blocks:
+            asr.audio_callback(block, len(block), None, None)
+        # 等待处理线程取完队列并消化VAD缓冲
+        while not asr.audio_drained():
+            time.sleep(0.0005)
+    return run, seconds, asr.stop
+
+
+# ---- 界面 ----
+
+@benchmark("ui.update_text_area", "已满500行的文本框上的中间/最终结果更新（TranscriptView.update）")
+def _bench_update_text_area():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        raise BenchmarkSkipped(f"无法创建Tk窗口: {e}")
+    root.withdraw()
+    transcript_view = _import("transcript_view")
+    area = tk.Text(root, height=8, wrap=tk.WORD, state="disabled")
+    area.pack()
+    history_dir = tempfile.TemporaryDirectory()
+    view = transcript_view.TranscriptView(area, name="benchmark", history_dir=history_dir.name)
+    sentence = "这是一个用于测试大文本量下更新耗时的句子 " * 4
+    for _ in range(view.max_lines + 50):
+        view.update(sentence + "\n")
+    words = sentence.split()
+
+    def run():
+        for count in range(1, len(words) + 1):
+            view.update(" ".join(words[:count]), mode='update_interim')
+        view.update(sentence + "\n", mode='replace_interim_with_final')
+        root.update_idletasks()
+
+    def cleanup():
+        view.close()
+        root.destroy()
+        history_dir.cleanup()
+    return run, len(words) + 1, cleanup
+
+
+# ---- TTS ----
+
+@benchmark("edge_tts.load_config", "edge_TTS.load_config（读取预编译语音索引）")
+def _bench_load_config():
+    edge_tts_module = _import("edge_TTS")
+
+    def run():
+        edge_tts_module._voice_catalog = None
+        edge_tts_module.CONFIG_LOADED = False
+        edge_tts_module.load_config()
+    return run, 1, None
+
+
+@benchmark("edge_tts.catalog_build", "从 config.json 的语音列表构建语音索引")
+def _bench_catalog_build():
+    edge_tts_module = _import("edge_TTS")
+    with open(edge_tts_module.CONFIG_PATH, 'r', encoding='utf-8') as f:
+        voices = json.load(f).get('tts_config', {}).get('voices', [])
+    return (lambda: edge_tts_module.VoiceCatalog.from_voices(voices)), 1, None
+
+
+# ---- 运行与比较 ----
+
+def _time_calls(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return time.perf_counter() - start
+
+
+def run_benchmark(name, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """
+    运行一项基准
+
+    返回:
+        结果dict；跳过时含 skipped 原因
+    """
+    description, factory = BENCHMARKS[name]
+    try:
+        func, ops, cleanup = factory()
+    except BenchmarkSkipped as e:
+        return {"description": description, "skipped": str(e)}
+    try:
+        # 预热一次，再按耗时倍增调用次数直到单轮不少于 min_time
+        func()
+        calls = 1
+        while True:
+            elapsed = _time_calls(func, calls)
+            if elapsed >= min_time or calls >= 1 << 20:
+                break
+            calls *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed * 1.2) + 1))
+        per_op = [_time_calls(func, calls) / (calls * ops) for _ in range(repeat)]
+    finally:
+        if cleanup:
+            cleanup()
+    median = statistics.median(per_op)
+    return {
+        "description": description,
+        "ops_per_round": calls * ops,
+        "median_us": round(median * 1e6, 4),
+        "min_us": round(min(per_op) * 1e6, 4),
+        "max_us": round(max(per_op) * 1e6, 4),
+        "ops_per_second": round(1 / median) if median else None,
+    }
+
+
+def run_suite(patterns=None, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME, progress=None):
+    """运行匹配 patterns（fnmatch通配或子串）的全部基准，返回完整报告"""
+    names = [name for name in BENCHMARKS
+             if not patterns or any(fnmatch.fnmatch(name, p) or p in name for p in patterns)]
+    results = OrderedDict()
+    for name in names:
+        results[name] = run_benchmark(name, repeat, min_time)
+        if progress:
+            progress(name, results[name])
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "benchmarks": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    比较两次运行
+
+    返回:
+        [(名称, 基线中位数us, 当前中位数us, 变化百分比, 状态)]，状态为 regression / improvement / ok / missing
+    """
+    rows = []
+    for name, new in current["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if not old or "median_us" not in old or "median_us" not in new:
+            rows.append((name, old and old.get("median_us"), new.get("median_us"), None, "missing"))
+            continue
+        change = (new["median_us"] - old["median_us"]) / old["median_us"]
+        if change > threshold and new["min_us"] > old["median_us"]:
+            status = "regression"
+        elif change < -threshold and new["max_us"] < old["median_us"]:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((name, old["median_us"], new["median_us"], round(change * 100, 1), status))
+    return rows
+
+
+def _print_result(name, result):
+    if "skipped" in result:
+        print(f"{name:28s}  跳过: {result['skipped']}")
+    else:
+        print(f"{name:28s}  {result['median_us']:12.3f}us  (min {result['min_us']:.3f}, "
+              f"max {result['max_us']:.3f}, {result['ops_per_second']:,}/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="热路径微基准")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="列出全部基准")
+
+    run_parser = subparsers.add_parser("run", help="运行基准并保存JSON")
+    run_parser.add_argument("--filter", action="append", default=None, help="只运行匹配的基准（可重复）")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="重复轮数 (默认5)")
+    run_parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="单轮最少秒数 (默认0.2)")
+    run_parser.add_argument("--output", default=None, help="结果JSON (默认 benchmarks/<提交号>.json)")
+    run_parser.add_argument("--baseline", default=None, help="运行后与该结果比较")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="退化阈值 (默认0.10)")
+
+    compare_parser = subparsers.add_parser("compare", help="比较两次结果")
+    compare_parser.add_argument("baseline", help="基线结果JSON")
+    compare_parser.add_argument("current", help="当前结果JSON")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="退化阈值 (默认0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, (description, _) in BENCHMARKS.items():
+            print(f"{name:28s}  {description}")
+        return 0
+
+    if args.command == "run":
+        logging.basicConfig(level=logging.WARNING)
+        report = run_suite(args.filter, args.repeat, args.min_time, progress=_print_result)
+        output = args.output or os.path.join(RESULTS_DIR, f"{report['commit'] or 'local'}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {output}")
+        if not args.baseline:
+            return 0
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        current, threshold = report, args.threshold
+    else:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        threshold = args.threshold
+
+    print(f"\n基线 {baseline.get('commit')} → 当前 {current.get('commit')} (阈值 {threshold:.0%})")
+    rows = compare_results(baseline, current, threshold)
+    labels = {"regression": "退化", "improvement": "提升", "ok": "", "missing": "无对比"}
+    for name, old, new, change, status in rows:
+        old_text = f"{old:12.3f}" if old is not None else f"{'-':>12s}"
+        new_text = f"{new:12.3f}" if new is not None else f"{'-':>12s}"
+        change_text = f"{change:+7.1f}%" if change is not None else f"{'':8s}"
+        print(f"{name:28s}  {old_text}  {new_text}  {change_text}  {labels[status]}")
+    regressions = [row[0] for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"退化: {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
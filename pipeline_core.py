@@ -0,0 +1,963 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+无界面的同声传译流水线核心
+----------------------------
+ASR → 翻译 → TTS 的完整流程与 Tkinter 无关：
+- 强制断句由 FastLoadASR 在音频处理线程中按截止时间完成，结果带句子编号，不再靠文本比较去重
+- 识别/翻译文本通过 on_text 回调交给调用方（GUI 只是其中一个客户端）
+- ASR/翻译/TTS 后端在首次使用时才导入（load_backend），导入本模块不会加载 torch 等重型依赖
+- 启动耗时、空闲CPU与句子延迟可在没有显示器的服务器上测量
+- 翻译与TTS阶段是同一个asyncio事件循环（安装了uvloop时使用uvloop）中的协程，
+  通过通道的 get_async/put_async 衔接，无轮询、无跨线程等待，停止时直接取消
+
+翻译接口密钥读取环境变量 TRANSLATION_APP_ID / TRANSLATION_API_SECRET / TRANSLATION_API_KEY，
+或 config.json 的 pipeline_config 段中的 app_id / api_secret / api_key；未配置时翻译不可用。
+
+使用方法:
+    python pipeline_core.py --target-lang en --voice en-US-AriaNeural
+    python pipeline_core.py --config config.json --duration 600 --idle-seconds 10
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import logging
+import signal
+import sys
+import threading
+import time
+
+from log_config import setup_logging
+from latency_tracer import get_tracer
+from sampling_profiler import get_profiler, install_signal_handler
+from stage_channel import StageChannel, POLICIES
+import runtime_metrics
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+# 可选：更快的事件循环实现（Windows上不可用）
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# 后端模块在首次使用时才导入：FunASR 会带入 funasr/torch，translation_module 带入 httpx，
+# edge_TTS 带入 edge_tts/aiohttp/sounddevice。界面可以先显示，再在后台线程中加载
+BACKEND_MODULES = {
+    "asr": "FunASR",
+    "asr_process": "asr_process",
+    "translation": "translation_module",
+    "translation_memory": "translation_memory",
+    "tts": "edge_TTS",
+}
+# ASR运行方式: thread 在本进程的线程中推理；process 在子进程中推理（见 asr_process）
+ASR_MODES = ("thread", "process")
+# translation_module 不可用时的目标语言
+DEFAULT_LANGUAGE_CODES = {"中文": "cn", "英语": "en"}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+# 翻译接口（讯飞）的密钥：读取环境变量，或在 config.json 的 pipeline_config 段中设置 app_id / api_secret / api_key
+TRANSLATION_APP_ID = os.environ.get("TRANSLATION_APP_ID")
+TRANSLATION_API_SECRET = os.environ.get("TRANSLATION_API_SECRET")
+TRANSLATION_API_KEY = os.environ.get("TRANSLATION_API_KEY")
+
+CONFIG_PATH = os.path.join(project_root, "config.json")
+
+# 识别/翻译文本流名称（on_text 回调的第一个参数）
+STREAM_RECOGNIZED = "recognized"
+STREAM_TRANSLATED = "translated"
+
+# 单句语音合成与播放的最长秒数
+TTS_TIMEOUT = 30
+
+
+def load_backend(name):
+    """
+    导入并缓存后端模块（"asr" / "translation" / "tts"），导入失败时返回 None
+
+    可在任意线程调用；同一后端只导入一次，耗时记入运行时指标 import.<name>
+    """
+    with _backends_lock:
+        if name in _backends:
+            return _backends[name]
+        module_name = BACKEND_MODULES[name]
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+            elapsed = time.perf_counter() - start
+            runtime_metrics.observe(f"import.{name}", elapsed)
+            logger.info(f"{module_name} 已导入 (耗时 {elapsed:.2f}s)")
+        except ImportError as e:
+            module = None
+            logger.warning(f"{module_name} 未找到或无法导入: {e}")
+        _backends[name] = module
+        return module
+
+
+def get_language_codes():
+    """目标语言名称 → 语言代码（会导入 translation_module）"""
+    module = load_backend("translation")
+    return module.LANGUAGE_CODES if module else DEFAULT_LANGUAGE_CODES
+
+
+class PipelineConfig:
+    """流水线配置，可来自 config.json 的 pipeline_config 段、命令行或GUI控件"""
+
+    DEFAULTS = {
+        "source_lang": "cn",
+        "target_lang": "en",
+        "voice": None,
+        "tts_rate": 0,
+        "tts_volume": 0,
+        "input_device": None,
+        "output_device": None,
+        "use_vad": True,
+        "use_punc": True,
+        "silence_duration": 0.5,
+        "relative_silence": 0.5,
+        # 识别文本多久（秒）没有新增时由ASR强制结束当前句子
+        "force_sentence_end_timeout": 1.0,
+        # ASR运行方式（thread / process）
+        "asr_mode": "thread",
+        # 阶段间通道容量与满载策略（block / drop_oldest / merge / skip，见 stage_channel）
+        "asr_queue_size": 8,
+        "asr_queue_policy": "merge",
+        "tts_queue_size": 4,
+        "tts_queue_policy": "drop_oldest",
+        # torch线程数与CPU亲和性（见 cpu_tuning，CPU列表如 "1-3"），None表示保持默认
+        "torch_threads": None,
+        "torch_interop_threads": None,
+        "inference_cpus": None,
+        "audio_cpus": None,
+        # 运行时指标：本机HTTP端口和/或定期写入的JSON文件（为空时读取 APP_METRICS_* 环境变量）
+        "metrics_port": None,
+        "metrics_file": None,
+        "metrics_interval": 5.0,
+        # 翻译记忆库文件（为空时不使用）与近似匹配复用译文的最低相似度
+        "translation_memory": None,
+        "translation_memory_threshold": 0.85,
+        # 翻译请求是否使用HTTP/2（None表示安装了h2即启用）；会话期间保持翻译连接不因空闲断开
+        "translation_http2": None,
+        "translation_keep_warm": True,
+        # 翻译请求慢于最近p95时发送对冲请求（有预算上限）
+        "translation_hedging": True,
+        # 安装了uvloop时用其运行事件循环
+        "use_uvloop": True,
+        "app_id": TRANSLATION_APP_ID,
+        "api_secret": TRANSLATION_API_SECRET,
+        "api_key": TRANSLATION_API_KEY,
+    }
+
+    def __init__(self, **kwargs):
+        for key, value in self.DEFAULTS.items():
+            setattr(self, key, value)
+        self.update(**kwargs)
+
+    def update(self, **kwargs):
+        for key, value in kwargs.items():
+            if key not in self.DEFAULTS:
+                raise ValueError(f"未知的流水线配置项: {key}")
+            setattr(self, key, value)
+
+    @classmethod
+    def from_file(cls, path=CONFIG_PATH, **overrides):
+        """读取 config.json 的 pipeline_config 段（不存在时使用默认值）"""
+        values = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                values = dict(json.load(f).get("pipeline_config", {}))
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    @property
+    def rate_str(self):
+        return f"{int(self.tts_rate):+d}%"
+
+    @property
+    def volume_str(self):
+        return f"{int(self.tts_volume):+d}%"
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.DEFAULTS}
+
+
+class CpuMeter:
+    """进程CPU占用率（process_time增量 / 墙钟增量）"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def percent(self):
+        wall = time.perf_counter() - self.wall_start
+        if wall <= 0:
+            return 0.0
+        return (time.process_time() - self.cpu_start) / wall * 100.0
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class SimultaneousPipeline:
+    """
+    ASR → 翻译 → TTS 流水线
+
+    参数:
+        config: PipelineConfig
+        on_text: 回调 (stream, text, mode)，stream为 "recognized"/"translated"，
+                 mode与文本区域更新模式一致（append_final / update_interim / ...）
+        on_state: 回调 (state)，state为 models_loading / models_ready / models_failed / started / stopped
+        translator: 翻译后端（提供 translate(text, from_lang, to_lang)），默认在加载模型时按配置创建 TranslationModule
+        tts: TTS后端（接口同 edge_TTS 模块），默认在首次使用时导入 edge_TTS；回放测试可传入本地替身
+    """
+
+    def __init__(self, config=None, on_text=None, on_state=None, translator=None, tts=None):
+        self.created_at = time.perf_counter()
+        self.config = config or PipelineConfig()
+        self.on_text = on_text
+        self.on_state = on_state
+
+        self.is_running = False
+        self.all_models_loaded = False
+        self.asr_instance = None
+        self.translation_instance = None
+        self.audio_output_ready = False
+
+        # ASR → 翻译、翻译 → TTS 的有界通道，条目为 (文本, 最终结果时间, trace id)
+        self.asr_output_queue = StageChannel(
+            "asr->translation", merge_func=_merge_sentences,
+            on_drop=self._on_channel_drop, on_merge=self._on_channel_merge)
+        self.translation_output_queue = StageChannel(
+            "translation->tts", merge_func=_merge_sentences,
+            on_drop=self._on_channel_drop, on_merge=self._on_channel_merge)
+        self._configure_channels()
+
+        # 识别回调来自ASR处理线程；stop() 时ASR在调用线程中处理剩余音频，仍以锁保护
+        self._state_lock = threading.RLock()
+        self.current_recognized_sentence = ""
+        self.recognized_text_has_interim = False
+        # 已发布的最后一个句子编号（由FastLoadASR分配），用于丢弃迟到的中间结果与重复的最终结果
+        self.last_final_sentence_id = -1
+
+        self.async_loop = None
+        self.async_loop_thread = None
+        self._loop_ready = threading.Event()
+        # 翻译/TTS阶段协程（在事件循环中运行的 asyncio.Task）
+        self._stage_tasks = []
+
+        # 性能统计
+        self.timings = {}
+        self.sentence_latencies = []
+        self.cpu_meter = CpuMeter()
+        self.tracer = get_tracer()
+
+        # 后端在首次使用时才导入（见 load_backend），构造流水线不等待重型依赖
+        self._tts = tts
+        self.translation_instance = translator
+
+        self.start_metrics()
+
+    @property
+    def tts(self):
+        if self._tts is None:
+            self._tts = load_backend("tts")
+        return self._tts
+
+    def create_translator(self):
+        """按配置创建翻译实例（会导入 translation_module），返回翻译是否可用"""
+        if self.translation_instance is not None:
+            return True
+        module = load_backend("translation")
+        if module and self.config.app_id and self.config.api_key and self.config.api_secret:
+            self.translation_instance = module.TranslationModule(
+                app_id=self.config.app_id,
+                api_secret=self.config.api_secret,
+                api_key=self.config.api_key,
+                memory=self._create_translation_memory(),
+                http2=self.config.translation_http2,
+                hedging=self.config.translation_hedging
+            )
+            return True
+        logger.warning("翻译模块API密钥未配置或模块导入失败。翻译功能将不可用。")
+        return False
+
+    def _create_translation_memory(self):
+        if not self.config.translation_memory:
+            return None
+        module = load_backend("translation_memory")
+        if module is None:
+            return None
+        try:
+            return module.TranslationMemory(self.config.translation_memory,
+                                            threshold=self.config.translation_memory_threshold)
+        except OSError as e:
+            logger.error(f"打开翻译记忆库失败: {e}")
+            return None
+
+    # ---- 回调 ----
+
+    def _emit_text(self, stream, text, mode='append_final'):
+        if self.on_text:
+            try:
+                self.on_text(stream, text, mode)
+            except Exception as e:
+                logger.error(f"文本回调出错: {e}")
+
+    def _emit_state(self, state):
+        if self.on_state:
+            try:
+                self.on_state(state)
+            except Exception as e:
+                logger.error(f"状态回调出错: {e}")
+
+    # ---- 阶段间通道 ----
+
+    def _configure_channels(self):
+        """按配置设置通道容量与策略（启动时调用，运行中修改配置在下次启动生效）"""
+        for channel, size, policy in (
+                (self.asr_output_queue, self.config.asr_queue_size, self.config.asr_queue_policy),
+                (self.translation_output_queue, self.config.tts_queue_size, self.config.tts_queue_policy)):
+            if policy not in POLICIES:
+                raise ValueError(f"未知的通道策略: {policy}（可选: {', '.join(POLICIES)}）")
+            channel.maxsize = int(size or 0)
+            channel.policy = policy
+
+    def _on_channel_drop(self, item, reason):
+        trace_id = item[2]
+        if reason == "closed":
+            self.tracer.discard(trace_id)
+            return
+        self.tracer.annotate(trace_id, dropped=reason)
+        self.tracer.finish(trace_id)
+
+    def _on_channel_merge(self, merged, newer):
+        # 合并后的句子沿用较早句子的追踪，较新句子的追踪就此结束
+        self.tracer.annotate(merged[2], merged=True)
+        if newer[2] != merged[2]:
+            self.tracer.annotate(newer[2], merged_into=merged[2])
+            self.tracer.finish(newer[2])
+
+    def get_channel_stats(self):
+        """各阶段通道的深度与等待时间"""
+        return {channel.name: channel.get_stats()
+                for channel in (self.asr_output_queue, self.translation_output_queue)}
+
+    # ---- 运行时指标 ----
+
+    def start_metrics(self):
+        """注册流水线的指标采集函数，并按配置启动HTTP接口/定期写文件"""
+        registry = runtime_metrics.get_registry()
+        registry.register("pipeline", self._collect_pipeline_metrics)
+        registry.register("asr", lambda: self.asr_instance.get_stats() if self.asr_instance else {})
+        registry.register("translation", self._collect_translation_metrics)
+        return runtime_metrics.start_exporters(
+            port=self.config.metrics_port, path=self.config.metrics_file,
+            interval=self.config.metrics_interval)
+
+    def _collect_pipeline_metrics(self):
+        latencies = sorted(self.sentence_latencies[-500:])
+        return {
+            "running": self.is_running,
+            "models_loaded": self.all_models_loaded,
+            "sentences": len(self.sentence_latencies),
+            "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+            "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+            "channels": self.get_channel_stats(),
+        }
+
+    def _collect_translation_metrics(self):
+        get_cache_stats = getattr(self.translation_instance, "get_cache_stats", None)
+        return get_cache_stats() if get_cache_stats else {}
+
+    # ---- asyncio 事件循环 ----
+
+    def start_loop(self):
+        """启动后台asyncio事件循环（翻译与TTS阶段在其中运行）"""
+        if self.async_loop_thread and self.async_loop_thread.is_alive():
+            return
+        use_uvloop = bool(uvloop and self.config.use_uvloop)
+
+        def loop_runner():
+            self.async_loop = uvloop.new_event_loop() if use_uvloop else asyncio.new_event_loop()
+            asyncio.set_event_loop(self.async_loop)
+            self.async_loop.call_soon(self._loop_ready.set)
+            try:
+                self.async_loop.run_forever()
+            finally:
+                self.async_loop.close()
+
+        self._loop_ready.clear()
+        self.async_loop_thread = threading.Thread(target=loop_runner, name="asyncio-loop", daemon=True)
+        self.async_loop_thread.start()
+        self._loop_ready.wait(timeout=5)
+        logger.info(f"Asyncio事件循环已启动{' (uvloop)' if use_uvloop else ''}。")
+
+    def run_async_task(self, coro):
+        """在后台事件循环中执行协程，返回 concurrent.futures.Future"""
+        if not self.async_loop or not self.async_loop.is_running():
+            logger.warning("Asyncio事件循环未运行，尝试重新启动...")
+            self.start_loop()
+            if not self.async_loop or not self.async_loop.is_running():
+                logger.error("Asyncio事件循环仍未运行。异步任务无法执行。")
+                coro.close()
+                return None
+        return asyncio.run_coroutine_threadsafe(coro, self.async_loop)
+
+    def stop_loop(self):
+        if self.async_loop and self.async_loop.is_running():
+            self.async_loop.call_soon_threadsafe(self.async_loop.stop)
+        if self.async_loop_thread and self.async_loop_thread.is_alive():
+            self.async_loop_thread.join(timeout=2)
+            if self.async_loop_thread.is_alive():
+                logger.warning("Asyncio线程超时未结束。")
+
+    # ---- 模型与设备 ----
+
+    def create_asr(self):
+        if self.config.asr_mode not in ASR_MODES:
+            logger.error(f"未知的ASR运行方式: {self.config.asr_mode}（可选: {', '.join(ASR_MODES)}）")
+            return False
+        if self.config.asr_mode == "process":
+            asr_module, class_name = load_backend("asr_process"), "ProcessASR"
+        else:
+            asr_module, class_name = load_backend("asr"), "FastLoadASR"
+        if not asr_module:
+            logger.error("FunASR 模块未找到，语音识别不可用。")
+            return False
+        try:
+            self.asr_instance = getattr(asr_module, class_name)(
+                use_vad=self.config.use_vad,
+                use_punc=self.config.use_punc,
+                text_output_callback=self.asr_text_callback,
+                input_device_index=self.config.input_device,
+                torch_threads=self.config.torch_threads,
+                torch_interop_threads=self.config.torch_interop_threads,
+                inference_cpus=self.config.inference_cpus,
+                audio_cpus=self.config.audio_cpus
+            )
+            self.apply_asr_settings()
+            return True
+        except Exception as e:
+            logger.error(f"创建FunASR实例失败: {e}")
+            self.asr_instance = None
+            return False
+
+    def apply_asr_settings(self, silence_duration=None, relative_silence=None):
+        """更新静音检测参数（运行中也可调用）"""
+        if silence_duration is not None:
+            self.config.silence_duration = silence_duration
+        if relative_silence is not None:
+            self.config.relative_silence = relative_silence
+        if self.asr_instance:
+            self.asr_instance.silence_duration_threshold = self.config.silence_duration
+            self.asr_instance.relative_silence_threshold = self.config.relative_silence
+            self.asr_instance.force_final_timeout = self.config.force_sentence_end_timeout
+            logger.info(f"FunASR静音参数: Duration={self.config.silence_duration:.2f}s, "
+                        f"RelativeVol={self.config.relative_silence:.2f}")
+
+    def load_models(self):
+        """加载ASR/VAD/标点模型（阻塞），返回核心模型是否就绪"""
+        start = time.perf_counter()
+        self.all_models_loaded = False
+        self._emit_state("models_loading")
+        self.create_translator()
+        if self.asr_instance is None and not self.create_asr():
+            self._emit_state("models_failed")
+            return False
+
+        logger.info("正在加载ASR主模型 (如果尚未加载)...")
+        if not self.asr_instance.ensure_asr_model_loaded():
+            logger.error("ASR主模型加载失败。")
+            self._emit_state("models_failed")
+            return False
+        if self.asr_instance.use_vad and not self.asr_instance.load_vad_model_if_needed():
+            logger.error("VAD模型加载失败。")
+        if self.asr_instance.use_punc and not self.asr_instance.load_punc_model_if_needed():
+            logger.error("标点模型加载失败。ASR将不带标点运行或无法运行。")
+
+        self.all_models_loaded = bool(self.asr_instance.asr_model)
+        self.timings["model_load_seconds"] = round(time.perf_counter() - start, 3)
+        self.timings["startup_seconds"] = round(time.perf_counter() - self.created_at, 3)
+        if self.all_models_loaded:
+            logger.info(f"所有核心ASR模型已成功加载/验证 (耗时 {self.timings['model_load_seconds']:.2f}s)。")
+            self._emit_state("models_ready")
+        else:
+            logger.error("ASR主模型加载失败，无法启动同传。")
+            self._emit_state("models_failed")
+        return self.all_models_loaded
+
+    def set_output_device(self, device):
+        """打开/切换音频输出设备（只重建输出流）"""
+        self.config.output_device = device
+        if not self.tts:
+            return False
+        try:
+            logger.info(f"正在打开音频输出，设备ID: {device}...")
+            self.tts.set_output_device(device)
+            self.audio_output_ready = True
+            logger.info("音频输出已就绪。")
+        except Exception as e:
+            logger.error(f"打开音频输出失败: {e}")
+            self.audio_output_ready = False
+        return self.audio_output_ready
+
+    def close_output_device(self):
+        if self.audio_output_ready and self._tts:
+            self._tts.close_audio_output()
+            self.audio_output_ready = False
+            logger.info("音频输出已关闭。")
+
+    def set_voice(self, voice):
+        """切换音色并预先建立TTS连接，减少首句合成的握手延迟"""
+        self.config.voice = voice
+        if self.tts and voice:
+            self.run_async_task(self.tts.prewarm_voice(voice))
+
+    def list_voices(self, lang_code):
+        """返回该语言可用音色ShortName列表的Future"""
+        async def fetch():
+            if not self.tts:
+                return []
+            voices = await self.tts.list_voices_by_language(lang_code)
+            return [v['ShortName'] for v in voices]
+        return self.run_async_task(fetch())
+
+    # ---- 启停 ----
+
+    def start(self):
+        """开始同传，返回是否成功启动"""
+        if self.is_running:
+            return True
+        if not self.all_models_loaded or not self.asr_instance:
+            logger.error("模型尚未完全加载，无法开始。")
+            return False
+        if not self.translation_instance:
+            logger.error("翻译模块未初始化（请检查API密钥），无法开始。")
+            return False
+        if not self.tts:
+            logger.error("edge_TTS模块未加载，无法开始。")
+            return False
+        if not self.config.target_lang or not self.config.voice:
+            logger.error("请选择有效的目标语言和音色。")
+            return False
+
+        try:
+            self._configure_channels()
+        except ValueError as e:
+            logger.error(str(e))
+            return False
+        for channel in (self.asr_output_queue, self.translation_output_queue):
+            channel.reopen()
+            channel.reset_stats()
+
+        self.start_loop()
+        logger.info("正在启动同声传译服务...")
+        with self._state_lock:
+            self.current_recognized_sentence = ""
+            self.recognized_text_has_interim = False
+            self.last_final_sentence_id = self.asr_instance.sentence_id - 1
+        self.is_running = True
+        self.asr_instance.input_device_index = self.config.input_device
+        self.asr_instance.force_final_timeout = self.config.force_sentence_end_timeout
+
+        if self.config.translation_keep_warm:
+            # 首句到达前预先建立翻译连接，会话期间空闲时刷新
+            start_keep_warm = getattr(self.translation_instance, "start_keep_warm", None)
+            if start_keep_warm:
+                start_keep_warm()
+
+        # 先启动翻译/TTS协程，ASR的首个结果到达时下游已在等待
+        future = self.run_async_task(self._start_stages())
+        try:
+            self._stage_tasks = future.result(timeout=5) if future else []
+        except Exception as e:
+            logger.error(f"启动翻译/TTS协程失败: {e}")
+        if not self._stage_tasks:
+            self.is_running = False
+            return False
+
+        try:
+            threading.Thread(target=self.asr_instance.start, name="asr-start", daemon=True).start()
+        except Exception as e:
+            logger.error(f"启动FunASR失败: {e}")
+            self.is_running = False
+            self._cancel_stages()
+            return False
+        self.timings["started_at"] = time.time()
+        self.cpu_meter.reset()
+        logger.info("同声传译已启动。 FunASR正在聆听...")
+        self._emit_state("started")
+        return True
+
+    def stop(self):
+        """停止同传（模型保留，以便下次快速启动）"""
+        if not self.is_running:
+            return
+        logger.info("正在停止同声传译服务...")
+        if self.asr_instance:
+            try:
+                self.asr_instance.stop()
+            except Exception as e:
+                logger.error(f"停止FunASR时出错: {e}")
+        self.is_running = False
+        self._cancel_stages()
+        self._clear_queues()
+        stop_keep_warm = getattr(self.translation_instance, "stop_keep_warm", None)
+        if stop_keep_warm:
+            stop_keep_warm()
+        self.log_translation_connection_stats()
+        self.log_tts_connection_stats()
+        logger.info(f"流水线统计: {self.get_metrics()}")
+        self.export_traces()
+        logger.info("同声传译已停止。")
+        self._emit_state("stopped")
+
+    def close(self):
+        """释放输出设备、TTS连接、事件循环与指标输出"""
+        self.stop()
+        runtime_metrics.stop_exporters()
+        close_asr = getattr(self.asr_instance, "close", None)
+        if close_asr:
+            close_asr()
+        close_translator = getattr(self.translation_instance, "close", None)
+        if close_translator:
+            close_translator()
+        memory = getattr(self.translation_instance, "memory", None)
+        if memory is not None:
+            memory.close()
+        self.close_output_device()
+        # 未用过TTS时不为关闭连接而导入 edge_TTS
+        if self._tts and self.async_loop and self.async_loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._tts.close_connections(), self.async_loop)
+            try:
+                future.result(timeout=2)
+            except Exception as e:
+                logger.error(f"关闭TTS连接时出错: {e}")
+        self.stop_loop()
+
+    def _clear_queues(self):
+        for channel in [self.asr_output_queue, self.translation_output_queue]:
+            channel.close()
+            for item in channel.clear():
+                self.tracer.discard(item[2])
+
+    # ---- ASR 结果处理 ----
+
+    def asr_text_callback(self, recognized_segment, current_full_sentence, is_sentence_end,
+                          trace_id=None, sentence_id=None):
+        if not self.is_running:
+            self.tracer.discard(trace_id)
+            return
+        with self._state_lock:
+            if sentence_id is not None and sentence_id <= self.last_final_sentence_id:
+                # 该句已发布过最终结果（迟到的中间结果或重复的最终结果）
+                logger.debug("ASR (Stale result ignored, sentence %s): %s", sentence_id, current_full_sentence)
+                self.tracer.discard(trace_id)
+                return
+
+            if is_sentence_end:
+                final_text = current_full_sentence.strip()
+                if sentence_id is not None:
+                    self.last_final_sentence_id = sentence_id
+                if final_text:
+                    logger.info(f"ASR (Final): {final_text}")
+                    self._publish_final(final_text, trace_id)
+                    return
+                self.tracer.discard(trace_id)
+                logger.info("ASR (Final Empty Ignored)")
+                if self.recognized_text_has_interim:
+                    self._emit_text(STREAM_RECOGNIZED, "", 'clear_interim')
+                self.recognized_text_has_interim = False
+                self.current_recognized_sentence = ""
+                return
+
+            self.current_recognized_sentence = current_full_sentence
+            logger.debug("ASR (Interim Update): %s (Segment: %s)", self.current_recognized_sentence, recognized_segment)
+            self._emit_text(STREAM_RECOGNIZED, self.current_recognized_sentence, 'update_interim')
+            self.recognized_text_has_interim = True
+
+    def _publish_final(self, final_text, trace_id=None):
+        """显示最终结果并送入翻译队列（调用方持有 _state_lock）"""
+        update_mode = 'replace_interim_with_final' if self.recognized_text_has_interim else 'append_final'
+        self._emit_text(STREAM_RECOGNIZED, final_text + "\n", update_mode)
+        self.tracer.annotate(trace_id, text=final_text)
+        self.asr_output_queue.put((final_text, time.perf_counter(), trace_id))
+        self.recognized_text_has_interim = False
+        self.current_recognized_sentence = ""
+
+    # ---- 翻译/TTS 阶段 ----
+
+    async def _start_stages(self):
+        return [asyncio.create_task(self.translation_stage()),
+                asyncio.create_task(self.tts_stage())]
+
+    def _cancel_stages(self):
+        """取消翻译/TTS协程并等待其结束（正在进行的翻译与播放随之中止）"""
+        tasks, self._stage_tasks = self._stage_tasks, []
+        if not tasks or not self.async_loop or not self.async_loop.is_running():
+            return
+
+        async def cancel():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel(), self.async_loop).result(timeout=5)
+        except Exception as e:
+            logger.error(f"等待翻译/TTS协程结束超时: {e}")
+
+    async def translation_stage(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                source_text, finalized_at, trace_id = await self.asr_output_queue.get_async()
+                self.tracer.mark(trace_id, "translate_dequeue")
+                if not source_text or not self.translation_instance:
+                    self.tracer.finish(trace_id)
+                    continue
+                to_lang_code = self.config.target_lang
+                logger.debug("开始翻译: %.30s... -> %s", source_text, to_lang_code)
+                try:
+                    # 翻译后端是同步接口，在线程池中执行，事件循环继续驱动TTS
+                    translated_text = await loop.run_in_executor(None, functools.partial(
+                        self.translation_instance.translate,
+                        text=source_text,
+                        from_lang=self.config.source_lang,
+                        to_lang=to_lang_code
+                    ))
+                except asyncio.CancelledError:
+                    self.tracer.discard(trace_id)
+                    raise
+                except Exception as e:
+                    logger.error(f"翻译API调用失败: {e}")
+                    self.tracer.finish(trace_id)
+                    continue
+                self.tracer.mark(trace_id, "translate_response")
+                if translated_text:
+                    logger.debug("翻译完成: %.30s...", translated_text)
+                    await self.translation_output_queue.put_async((translated_text, finalized_at, trace_id))
+                    self._emit_text(STREAM_TRANSLATED, translated_text + "\n", 'append_final')
+                else:
+                    logger.info(f"翻译结果为空 for: {source_text[:30]}")
+                    self.tracer.finish(trace_id)
+        finally:
+            logger.info("翻译协程已停止。")
+
+    async def tts_stage(self):
+        try:
+            while True:
+                translated_text, finalized_at, trace_id = await self.translation_output_queue.get_async()
+                if not translated_text or not self.tts:
+                    self.tracer.finish(trace_id)
+                    continue
+                voice = self.config.voice
+                if not voice:
+                    logger.error("TTS错误: 未选择音色。语音无法合成。")
+                    self.tracer.finish(trace_id)
+                    continue
+
+                rate_str = self.config.rate_str
+                volume_str = self.config.volume_str
+                logger.debug("开始语音合成: %.30s... (音色: %s, 语速: %s, 音量: %s)", translated_text, voice, rate_str, volume_str)
+                try:
+                    success = await asyncio.wait_for(
+                        self.tts.text_to_speech(translated_text, voice, rate=rate_str, volume=volume_str, trace_id=trace_id),
+                        TTS_TIMEOUT)
+                    if success:
+                        # 句子延迟: ASR最终结果 -> 译文播放完成
+                        self.sentence_latencies.append(time.perf_counter() - finalized_at)
+                        logger.debug("语音播放成功: %.30s...", translated_text)
+                    else:
+                        logger.error(f"语音合成或播放失败: {translated_text[:30]}")
+                except asyncio.CancelledError:
+                    self.tracer.discard(trace_id)
+                    raise
+                except asyncio.TimeoutError:
+                    logger.error(f"TTS播放超时（{TTS_TIMEOUT}秒）: {translated_text[:30]}")
+                except Exception as e:
+                    logger.error(f"TTS播放时发生错误: {e}")
+                self.tracer.finish(trace_id)
+        finally:
+            logger.info("TTS协程已停止。")
+
+    # ---- 统计 ----
+
+    def log_translation_connection_stats(self):
+        get_request_stats = getattr(self.translation_instance, "get_request_stats", None)
+        if get_request_stats:
+            stats = get_request_stats()
+            logger.info(
+                f"翻译请求统计: p50 {stats['latency_p50_ms']:.0f}ms, p99 {stats['latency_p99_ms']:.0f}ms, "
+                f"对冲{stats['hedged']}次 (对冲率{stats['hedge_rate']:.1%}, 对冲请求先返回{stats['hedge_wins']}次), "
+                f"熔断{stats['breaker']['opens']}次, 记忆库回退{stats['fallbacks']}次")
+        connection_stats = getattr(self.translation_instance, "connection_stats", None)
+        if connection_stats is None:
+            return
+        stats = connection_stats.get_stats()
+        if not stats["requests"] and not stats["warmups"]:
+            return
+        versions = ", ".join(f"{version} {count}次" for version, count in stats["http_versions"].items())
+        logger.info(
+            f"翻译连接统计: 请求{stats['requests']}次, 预热{stats['warmups']}次, "
+            f"新建连接{stats['new_connections']}次 (握手平均{stats['handshake_avg_ms']:.0f}ms), "
+            f"复用连接{stats['reused']}次 ({versions})")
+
+    def log_tts_connection_stats(self):
+        if not self.tts or not self.async_loop or not self.async_loop.is_running():
+            return
+        future = self.run_async_task(self.tts.get_connection_stats())
+
+        def log_stats(f):
+            try:
+                stats = f.result()
+                logger.info(
+                    f"TTS连接统计: 握手{stats['handshakes']}次 (平均{stats['handshake_avg_ms']:.0f}ms, "
+                    f"最大{stats['handshake_max_ms']:.0f}ms), 合成{stats['turns']}次, "
+                    f"复用连接{stats['reused_turns']}次, 重连{stats['reconnects']}次")
+            except Exception as e:
+                logger.error(f"获取TTS连接统计失败: {e}")
+        if future:
+            future.add_done_callback(log_stats)
+
+    def export_traces(self):
+        """导出本进程已结束的逐句延迟追踪（traces/ 目录）"""
+        if not self.tracer.finished:
+            return []
+        try:
+            paths = self.tracer.export()
+            logger.info(f"逐句延迟追踪已导出: {', '.join(paths)}")
+            return paths
+        except OSError as e:
+            logger.error(f"导出延迟追踪失败: {e}")
+            return []
+
+    def get_metrics(self):
+        """启动耗时、CPU占用与句子延迟（ASR最终结果到译文播放完成）"""
+        latencies = sorted(self.sentence_latencies)
+        metrics = dict(self.timings)
+        metrics.pop("started_at", None)
+        metrics.update({
+            "cpu_percent": round(self.cpu_meter.percent(), 1),
+            "sentences": len(latencies),
+            "latency_avg_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+            "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+            "latency_max_s": round(latencies[-1], 3) if latencies else 0.0,
+            "channels": self.get_channel_stats(),
+        })
+        return metrics
+
+
+def _merge_sentences(older, newer):
+    """合并两个排队的 (文本, 最终结果时间, trace id)：文本相连，延迟按较早的句子计算"""
+    older_text, newer_text = older[0], newer[0]
+    # 两端都是拉丁字母/数字时以空格分隔，中日韩文本直接相连
+    separator = " " if older_text[-1:].isascii() and newer_text[:1].isascii() else ""
+    return (older_text.rstrip() + separator + newer_text.lstrip(), older[1], older[2])
+
+
+def measure_idle_cpu(seconds):
+    """在不做任何处理时测量进程CPU占用（后台线程的空转开销）"""
+    meter = CpuMeter()
+    time.sleep(seconds)
+    return round(meter.percent(), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面同声传译（ASR → 翻译 → TTS）")
+    parser.add_argument("--config", default=CONFIG_PATH, help="配置文件 (读取其中的 pipeline_config 段)")
+    parser.add_argument("--target-lang", default=None, help="目标语言代码，如 en、ja")
+    parser.add_argument("--voice", default=None, help="TTS音色ShortName，默认取该语言的第一个音色")
+    parser.add_argument("--input-device", type=int, default=None, help="输入设备ID")
+    parser.add_argument("--output-device", type=int, default=None, help="输出设备ID")
+    parser.add_argument("--duration", type=float, default=0, help="运行秒数，0为一直运行直到Ctrl+C")
+    parser.add_argument("--idle-seconds", type=float, default=0, help="开始前测量空闲CPU的秒数")
+    parser.add_argument("--asr-mode", choices=ASR_MODES, default=None, help="ASR在本进程线程或子进程中运行")
+    parser.add_argument("--asr-queue-policy", choices=POLICIES, default=None, help="ASR→翻译通道满载策略")
+    parser.add_argument("--tts-queue-policy", choices=POLICIES, default=None, help="翻译→TTS通道满载策略")
+    parser.add_argument("--translation-memory", default=None, help="翻译记忆库文件 (JSONL)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="本机运行时指标HTTP端口")
+    parser.add_argument("--metrics-file", default=None, help="定期写入运行时指标的JSON文件")
+    parser.add_argument("--profile", action="store_true", help="整个运行期间采样调用栈，退出时写入 profiles/")
+    parser.add_argument("--log-level", default=None, help="日志级别 (默认读取 APP_LOG_LEVEL)")
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_level)
+    config = PipelineConfig.from_file(
+        args.config, target_lang=args.target_lang, voice=args.voice,
+        input_device=args.input_device, output_device=args.output_device, asr_mode=args.asr_mode,
+        asr_queue_policy=args.asr_queue_policy, tts_queue_policy=args.tts_queue_policy,
+        translation_memory=args.translation_memory,
+        metrics_port=args.metrics_port, metrics_file=args.metrics_file)
+
+    pipeline = SimultaneousPipeline(config, on_text=_print_text)
+    pipeline.start_loop()
+    if not config.voice:
+        voices = pipeline.list_voices(config.target_lang).result(timeout=10) if pipeline.tts else []
+        if not voices:
+            logger.error(f"未找到语言代码 {config.target_lang} 的音色。")
+            return 2
+        config.voice = voices[0]
+    pipeline.set_voice(config.voice)
+    pipeline.set_output_device(config.output_device)
+
+    if not pipeline.load_models():
+        pipeline.close()
+        return 1
+    if args.idle_seconds > 0:
+        pipeline.timings["idle_cpu_percent"] = measure_idle_cpu(args.idle_seconds)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    install_signal_handler()
+    if args.profile:
+        get_profiler().start()
+
+    if not pipeline.start():
+        pipeline.close()
+        return 1
+    stop_event.wait(args.duration if args.duration > 0 else None)
+
+    metrics = pipeline.get_metrics()
+    pipeline.close()
+    get_profiler().stop()
+    print("\n=== 流水线统计 ===")
+    for key, value in metrics.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+def _print_text(stream, text, mode):
+    if mode == 'update_interim':
+        print(f"[{stream}] {text} ...", end='\r')
+    elif text:
+        print(f"[{stream}] {text}", end='' if text.endswith("\n") else "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,533 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+录音回放基准测试
+----------------------------
+把WAV文件按实时（或加速）节奏送入 FastLoadASR.audio_callback，不打开麦克风；
+翻译与TTS由本地确定性的替身代替（延迟可配置），不访问任何网络服务。
+每次运行输出一份JSON报告，可用于比较不同提交:
+
+    - 实时率 RTF（模型推理耗时 / 音频时长）与回放墙钟实时率
+    - 句子延迟分位数（ASR最终结果 → 播放完成），以及逐句追踪的各阶段直方图
+    - 进程CPU占用与峰值RSS
+
+使用方法:
+    python replay_harness.py meeting.wav --speed 1 --output reports/baseline.json
+    python replay_harness.py meeting.wav --speed 0 --translate-ms 150 --baseline reports/baseline.json
+    python replay_harness.py meeting.wav --sweep-threads 1,2,4 --inference-cpus 1-3 --audio-cpus 0
+    python replay_harness.py meeting.wav --compare-asr-modes     # 本进程线程 vs 子进程ASR
+"""
+
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from cpu_tuning import available_cpus
+from latency_tracer import get_tracer
+from log_config import setup_logging
+from pipeline_core import ASR_MODES, CONFIG_PATH, CpuMeter, PipelineConfig, SimultaneousPipeline, _percentile
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+# 峰值RSS：Unix使用resource，其他平台尝试psutil
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+ASR_SAMPLE_RATE = 16000
+# 每次回调送入的音频长度（毫秒），与声卡常见的回调粒度相近
+DEFAULT_BLOCK_MS = 20
+# 录音结束后追加的静音（秒），让最后一句正常断句
+DEFAULT_TAIL_SILENCE = 2.0
+
+
+def load_wav(path, sample_rate=ASR_SAMPLE_RATE):
+    """读取WAV为单声道float32，并重采样到ASR采样率"""
+    try:
+        import soundfile
+        data, file_rate = soundfile.read(path, dtype='float32', always_2d=True)
+    except ImportError:
+        with wave.open(path, 'rb') as wf:
+            file_rate = wf.getframerate()
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            frames = wf.readframes(wf.getnframes())
+        if width == 2:
+            data = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+        elif width == 4:
+            data = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+        elif width == 1:
+            data = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        else:
+            raise ValueError(f"不支持的WAV采样位宽: {width * 8}bit（可安装soundfile）")
+        data = data.reshape(-1, channels)
+    audio = data.mean(axis=1).astype(np.float32)
+    if file_rate != sample_rate and len(audio):
+        duration = len(audio) / file_rate
+        target_len = int(round(duration * sample_rate))
+        audio = np.interp(np.linspace(0, len(audio) - 1, target_len),
+                          np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def peak_rss_mb(children=False):
+    """进程（children=True 时为已回收子进程中最大的）峰值常驻内存（MB），无法获取时返回None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        # Linux单位为KB，macOS为字节
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if psutil is not None and not children:
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    return None
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                                capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class _TimedModel:
+    """包装FunASR模型，累计 generate 的耗时（用于计算RTF）"""
+
+    def __init__(self, model, counter, key):
+        self._model = model
+        self._counter = counter
+        self._key = key
+
+    def generate(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._model.generate(*args, **kwargs)
+        finally:
+            self._counter[self._key] += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class FakeTranslator:
+    """确定性的翻译替身：固定延迟后返回带目标语言前缀的原文"""
+
+    def __init__(self, latency_ms=150.0):
+        self.latency = latency_ms / 1000.0
+        self.in_flight = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, from_lang="cn", to_lang="en"):
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        try:
+            time.sleep(self.latency)
+            return f"[{to_lang}] {text}"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeTTS:
+    """
+    确定性的TTS替身，接口同 edge_TTS 模块（流水线用到的部分）
+
+    首个音频块在 first_byte_ms 后到达，"播放"时长按文本长度 ms_per_char 计算，
+    并像真实播放一样记录 tts_first_byte / playback_start / playback_end。
+    """
+
+    def __init__(self, first_byte_ms=200.0, ms_per_char=60.0):
+        self.first_byte = first_byte_ms / 1000.0
+        self.per_char = ms_per_char / 1000.0
+        self.in_flight = 0
+        self.calls = 0
+
+    async def text_to_speech(self, text, voice, rate=None, volume=None, split_long_text=True, trace_id=None):
+        tracer = get_tracer()
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.first_byte)
+            tracer.mark(trace_id, "tts_first_byte")
+            tracer.mark(trace_id, "playback_start")
+            await asyncio.sleep(len(text) * self.per_char)
+            tracer.mark(trace_id, "playback_end", keep_last=True)
+            return True
+        finally:
+            self.in_flight -= 1
+
+    def set_output_device(self, device):
+        pass
+
+    def close_audio_output(self):
+        pass
+
+    async def prewarm_voice(self, voice):
+        return None
+
+    async def list_voices_by_language(self, lang_code):
+        return [{"ShortName": "replay-voice"}]
+
+    async def close_connections(self):
+        pass
+
+    async def get_connection_stats(self):
+        return {"handshakes": 0, "handshake_avg_ms": 0, "handshake_max_ms": 0,
+                "turns": self.calls, "reused_turns": 0, "reconnects": 0}
+
+
+def _wait_until(predicate, timeout, interval=0.05):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return predicate()
+
+
+def run_replay(wav_path, speed=1.0, block_ms=DEFAULT_BLOCK_MS, tail_silence=DEFAULT_TAIL_SILENCE,
+               translate_ms=150.0, tts_first_byte_ms=200.0, tts_ms_per_char=60.0,
+               config=None, drain_timeout=60.0):
+    """
+    回放一段录音并返回报告字典
+
+    参数:
+        wav_path: WAV文件路径
+        speed: 回放倍速，1为实时，<=0 表示不限速（尽快送入）
+        block_ms: 每次回调送入的音频长度
+        tail_silence: 录音结束后追加的静音秒数
+        translate_ms / tts_first_byte_ms / tts_ms_per_char: 翻译与TTS替身的延迟
+        config: PipelineConfig，默认读取 config.json 的 pipeline_config 段
+        drain_timeout: 送完音频后等待流水线处理完毕的最长秒数
+    """
+    audio = load_wav(wav_path)
+    audio_seconds = len(audio) / ASR_SAMPLE_RATE
+    if tail_silence > 0:
+        audio = np.concatenate([audio, np.zeros(int(tail_silence * ASR_SAMPLE_RATE), dtype=np.float32)])
+
+    config = config or PipelineConfig.from_file()
+    config.voice = config.voice or "replay-voice"
+    translator = FakeTranslator(translate_ms)
+    tts = FakeTTS(tts_first_byte_ms, tts_ms_per_char)
+    finals = []
+
+    def on_text(stream, text, mode):
+        if mode != 'update_interim' and text.strip():
+            finals.append((stream, text.strip()))
+
+    pipeline = SimultaneousPipeline(config, on_text=on_text, translator=translator, tts=tts)
+    pipeline.start_loop()
+    if not pipeline.load_models():
+        pipeline.close()
+        raise RuntimeError("ASR模型加载失败")
+
+    asr = pipeline.asr_instance
+    asr.open_input_stream = False
+    model_seconds = {"asr": 0.0, "vad": 0.0, "punc": 0.0}
+    for key in model_seconds:
+        model = getattr(asr, f"{key}_model", None)
+        # 子进程模式下父进程只有模型名称，推理耗时取自子进程上报的指标
+        if hasattr(model, "generate"):
+            setattr(asr, f"{key}_model", _TimedModel(model, model_seconds, key))
+
+    tracer = get_tracer()
+    finished_before = len(tracer.finished)
+    cpu_meter = CpuMeter()
+
+    if not pipeline.start():
+        pipeline.close()
+        raise RuntimeError("流水线启动失败")
+    # ASR在后台线程中启动，等待其开始处理
+    _wait_until(lambda: asr.running, timeout=30)
+
+    block = max(1, int(ASR_SAMPLE_RATE * block_ms / 1000))
+    # 送入时刻相对计划时刻的延后（模拟音频回调被推理线程挤占时的抖动）
+    feed_lateness = []
+    feed_start = time.perf_counter()
+    for offset in range(0, len(audio), block):
+        chunk = audio[offset:offset + block]
+        asr.audio_callback(chunk[:, None], len(chunk), None, None)
+        if speed > 0:
+            # 以起点为基准计算送入时刻，避免逐块sleep的误差累积
+            due = feed_start + (offset + len(chunk)) / ASR_SAMPLE_RATE / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+                feed_lateness.append(max(0.0, time.perf_counter() - due))
+            else:
+                feed_lateness.append(-delay)
+    feed_seconds = time.perf_counter() - feed_start
+    feed_lateness.sort()
+
+    # 等待ASR处理完积压的音频，再等待翻译与TTS完成
+    _wait_until(asr.audio_drained, timeout=drain_timeout)
+    asr_done_seconds = time.perf_counter() - feed_start
+    _wait_until(lambda: (pipeline.asr_output_queue.empty() and pipeline.translation_output_queue.empty()
+                         and translator.in_flight == 0 and tts.in_flight == 0), timeout=drain_timeout)
+    total_seconds = time.perf_counter() - feed_start
+
+    cpu_percent = round(cpu_meter.percent(), 1)
+    channel_stats = pipeline.get_channel_stats()
+    latencies = sorted(pipeline.sentence_latencies)
+    asr_stats = asr.get_stats(refresh=True) if config.asr_mode == "process" else asr.get_stats()
+    engine_timings = asr_stats.get("engine", {}).get("timings", {})
+    for key in model_seconds:
+        model_seconds[key] += engine_timings.get(f"asr.{key}_inference", {}).get("total_s", 0.0)
+    pipeline.close()
+
+    traces = list(tracer.finished)[finished_before:]
+    stage_summary = {}
+    for trace in traces:
+        for name, value in trace.spans().items():
+            stage_summary.setdefault(name, []).append(value)
+
+    inference_seconds = sum(model_seconds.values())
+    return {
+        "commit": git_commit(),
+        "wav": os.path.basename(wav_path),
+        "audio_seconds": round(audio_seconds, 2),
+        "speed": speed,
+        "fakes": {"translate_ms": translate_ms, "tts_first_byte_ms": tts_first_byte_ms,
+                  "tts_ms_per_char": tts_ms_per_char},
+        "rtf": round(inference_seconds / audio_seconds, 4) if audio_seconds else None,
+        "rtf_by_model": {key: round(value / audio_seconds, 4) for key, value in model_seconds.items()}
+                        if audio_seconds else {},
+        "wall_rtf": round(asr_done_seconds / audio_seconds, 4) if audio_seconds else None,
+        "feed_seconds": round(feed_seconds, 2),
+        "feed_jitter_p99_ms": round(_percentile(feed_lateness, 0.99) * 1000, 2),
+        "feed_jitter_max_ms": round(feed_lateness[-1] * 1000, 2) if feed_lateness else 0.0,
+        "torch_threads": config.torch_threads,
+        "torch_interop_threads": config.torch_interop_threads,
+        "inference_cpus": config.inference_cpus,
+        "audio_cpus": config.audio_cpus,
+        "asr_mode": config.asr_mode,
+        "ring_overruns": asr_stats.get("ring_overruns"),
+        "engine_restarts": asr_stats.get("restarts"),
+        "total_seconds": round(total_seconds, 2),
+        "sentences": sum(1 for stream, _ in finals if stream == "recognized"),
+        "spoken": len(latencies),
+        "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+        "latency_p90_s": round(_percentile(latencies, 0.9), 3),
+        "latency_p99_s": round(_percentile(latencies, 0.99), 3),
+        "latency_max_s": round(latencies[-1], 3) if latencies else 0.0,
+        "stages_p50_ms": {name: round(_percentile(sorted(values), 0.5), 1)
+                          for name, values in stage_summary.items()},
+        "stages_p90_ms": {name: round(_percentile(sorted(values), 0.9), 1)
+                          for name, values in stage_summary.items()},
+        "cpu_percent": cpu_percent,
+        "peak_rss_mb": peak_rss_mb(),
+        # 子进程模式下ASR子进程的峰值RSS（子进程已在 close 中回收）
+        "engine_peak_rss_mb": peak_rss_mb(children=True) if config.asr_mode == "process" else None,
+        "model_load_seconds": pipeline.timings.get("model_load_seconds"),
+        "channels": channel_stats,
+        "transcript": [text for stream, text in finals if stream == "recognized"],
+    }
+
+
+# 与基线比较时列出的指标（数值越小越好）
+COMPARE_KEYS = ("rtf", "wall_rtf", "latency_p50_s", "latency_p90_s", "latency_p99_s",
+                "cpu_percent", "peak_rss_mb", "model_load_seconds")
+
+
+def compare_reports(baseline, current):
+    """返回 [(指标, 基线值, 当前值, 变化百分比)]"""
+    rows = []
+    for key in COMPARE_KEYS:
+        old, new = baseline.get(key), current.get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        rows.append((key, old, new, round(change, 1)))
+    return rows
+
+
+def _default_thread_counts():
+    counts, n = [], 1
+    cores = len(available_cpus())
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    counts.append(cores)
+    return counts
+
+
+def _run_in_subprocess(argv, extra_args, label):
+    """在独立子进程中回放一次，返回报告（失败时为None）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, "report.json")
+        command = [sys.executable, os.path.abspath(__file__), *argv, *extra_args, "--output", output]
+        print(f"--- {label} ---", flush=True)
+        completed = subprocess.run(command, cwd=project_root)
+        if completed.returncode == 0 and os.path.exists(output):
+            with open(output, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def run_thread_sweep(argv, thread_counts):
+    """
+    对每个torch线程数在独立子进程中回放一次（inter-op线程数只能在进程内设置一次），
+    返回 [(线程数, 报告)]，失败的设置报告为None
+    """
+    return [(threads, _run_in_subprocess(argv, ["--torch-threads", str(threads)], f"torch线程数 {threads}"))
+            for threads in thread_counts]
+
+
+def run_mode_comparison(argv, modes=ASR_MODES):
+    """分别以本进程线程与子进程方式运行ASR回放，返回 [(方式, 报告)]"""
+    return [(mode, _run_in_subprocess(argv, ["--asr-mode", mode], f"ASR运行方式 {mode}")) for mode in modes]
+
+
+# 由扫描/对比本身决定、不传给子进程的开关与带值参数
+_SWEEP_FLAGS = ("--compare-asr-modes",)
+_SWEEP_OPTIONS = ("--sweep-threads", "--output", "--baseline", "--torch-threads", "--asr-mode")
+
+
+def _strip_sweep_args(argv):
+    """去掉子进程不需要的参数（扫描本身与各自的输出路径）"""
+    stripped, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg in _SWEEP_FLAGS:
+            continue
+        if arg in _SWEEP_OPTIONS:
+            skip = True
+            continue
+        if arg.startswith(tuple(option + "=" for option in _SWEEP_OPTIONS)):
+            continue
+        stripped.append(arg)
+    return stripped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="录音回放的端到端基准测试（翻译与TTS使用本地替身）")
+    parser.add_argument("wav", help="输入WAV文件")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，1为实时，0为不限速 (默认1)")
+    parser.add_argument("--block-ms", type=int, default=DEFAULT_BLOCK_MS, help="每次回调的音频长度 (默认20ms)")
+    parser.add_argument("--tail-silence", type=float, default=DEFAULT_TAIL_SILENCE, help="末尾追加的静音秒数")
+    parser.add_argument("--translate-ms", type=float, default=150.0, help="翻译替身延迟 (默认150ms)")
+    parser.add_argument("--tts-first-byte-ms", type=float, default=200.0, help="TTS替身首包延迟 (默认200ms)")
+    parser.add_argument("--tts-ms-per-char", type=float, default=60.0, help="TTS替身每字符播放时长 (默认60ms)")
+    parser.add_argument("--config", default=None, help="配置文件 (读取其中的 pipeline_config 段)")
+    parser.add_argument("--output", default=None, help="报告JSON输出路径")
+    parser.add_argument("--baseline", default=None, help="用于比较的基线报告JSON")
+    parser.add_argument("--torch-threads", type=int, default=None, help="torch算子内线程数")
+    parser.add_argument("--interop-threads", type=int, default=None, help="torch算子间线程数")
+    parser.add_argument("--inference-cpus", default=None, help="推理线程绑定的CPU，如 1-3")
+    parser.add_argument("--audio-cpus", default=None, help="音频回调（送入）线程绑定的CPU，如 0")
+    parser.add_argument("--asr-mode", choices=ASR_MODES, default=None, help="ASR在本进程线程或子进程中运行")
+    parser.add_argument("--compare-asr-modes", action="store_true",
+                        help="分别以 thread 与 process 方式回放，比较送入抖动与吞吐")
+    parser.add_argument("--sweep-threads", default=None,
+                        help="依次测试的torch线程数，如 1,2,4；为 auto 时按可用核心数取 1,2,4,...")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别 (默认WARNING)")
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_level)
+
+    if args.sweep_threads:
+        if args.sweep_threads == "auto":
+            thread_counts = _default_thread_counts()
+        else:
+            thread_counts = [int(n) for n in args.sweep_threads.split(",") if n.strip()]
+        results = run_thread_sweep(_strip_sweep_args(sys.argv[1:] if argv is None else argv), thread_counts)
+        print(f"\n=== torch线程数扫描 (可用核心 {len(available_cpus())}) ===")
+        print(f"{'threads':>7} {'rtf':>8} {'wall_rtf':>8} {'p50_s':>7} {'p90_s':>7} {'jitter_p99_ms':>13} {'cpu%':>6}")
+        valid = [(threads, report) for threads, report in results if report]
+        for threads, report in results:
+            if report is None:
+                print(f"{threads:>7} 失败")
+                continue
+            print(f"{threads:>7} {report['rtf']:>8} {report['wall_rtf']:>8} {report['latency_p50_s']:>7} "
+                  f"{report['latency_p90_s']:>7} {report['feed_jitter_p99_ms']:>13} {report['cpu_percent']:>6}")
+        if valid:
+            # 以推理实时率为主，送入抖动为次要指标
+            best_threads, best = min(valid, key=lambda item: (item[1]['rtf'], item[1]['feed_jitter_p99_ms']))
+            print(f"\n推荐 torch_threads = {best_threads} (rtf={best['rtf']}, "
+                  f"送入抖动p99={best['feed_jitter_p99_ms']}ms)")
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({"sweep": [{"torch_threads": threads, "report": report} for threads, report in results]},
+                          f, ensure_ascii=False, indent=2)
+        return 0 if valid else 1
+
+    if args.compare_asr_modes:
+        results = run_mode_comparison(_strip_sweep_args(sys.argv[1:] if argv is None else argv))
+        print("\n=== ASR运行方式对比 ===")
+        print(f"{'mode':>8} {'rtf':>8} {'wall_rtf':>8} {'jitter_p99_ms':>13} {'jitter_max_ms':>13} "
+              f"{'p50_s':>7} {'p90_s':>7} {'cpu%':>6} {'rss_mb':>7} {'engine_mb':>9}")
+        for mode, report in results:
+            if report is None:
+                print(f"{mode:>8} 失败")
+                continue
+            print(f"{mode:>8} {report['rtf']:>8} {report['wall_rtf']:>8} {report['feed_jitter_p99_ms']:>13} "
+                  f"{report['feed_jitter_max_ms']:>13} {report['latency_p50_s']:>7} {report['latency_p90_s']:>7} "
+                  f"{report['cpu_percent']:>6} {report['peak_rss_mb']!s:>7} {report['engine_peak_rss_mb']!s:>9}")
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({"modes": [{"asr_mode": mode, "report": report} for mode, report in results]},
+                          f, ensure_ascii=False, indent=2)
+        return 0 if all(report for _, report in results) else 1
+
+    overrides = {"torch_threads": args.torch_threads, "torch_interop_threads": args.interop_threads,
+                 "inference_cpus": args.inference_cpus, "audio_cpus": args.audio_cpus,
+                 "asr_mode": args.asr_mode}
+    config = PipelineConfig.from_file(args.config or CONFIG_PATH, **overrides)
+    report = run_replay(args.wav, speed=args.speed, block_ms=args.block_ms, tail_silence=args.tail_silence,
+                        translate_ms=args.translate_ms, tts_first_byte_ms=args.tts_first_byte_ms,
+                        tts_ms_per_char=args.tts_ms_per_char, config=config)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n=== 回放基准 ===")
+    for key, value in report.items():
+        if key not in ("transcript", "channels"):
+            print(f"{key}: {value}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n=== 与基线比较 ({baseline.get('commit')} -> {report.get('commit')}) ===")
+        for key, old, new, change in compare_reports(baseline, report):
+            print(f"{key}: {old} -> {new} ({change:+.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+运行时指标
+----------------------------
+进程内共享一个指标注册表:
+- 各模块在热路径上用 observe(name, seconds) 记录耗时（VAD/ASR/标点推理、翻译请求、TTS合成与播放），
+  只做一次加锁追加，统计在读取时计算
+- 流水线注册采集函数（ASR音频队列深度、阶段通道深度、翻译缓存命中率等），读取时调用
+- 快照中附带进程累计CPU秒数、CPU占用（同一读取方两次读取之间）与常驻内存；
+  HTTP接口与写文件各自保留CPU基准，互不影响
+
+可选的两种输出（默认都关闭）:
+- 本机HTTP接口: GET http://127.0.0.1:<端口>/metrics 返回JSON
+- 定期把JSON快照写入文件（原子替换），便于外部程序采集和告警
+
+环境变量:
+    APP_METRICS_PORT      HTTP端口
+    APP_METRICS_FILE      JSON快照文件路径
+    APP_METRICS_INTERVAL  写文件间隔秒数，默认5
+
+使用方法:
+    python runtime_metrics.py --port 9108       # 读取并打印正在运行的实例的指标
+"""
+
+import argparse
+import http.server
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_DUMP_INTERVAL = 5.0
+# 每个耗时指标保留的样本数
+DEFAULT_WINDOW = 500
+
+
+class RollingTimer:
+    """最近若干次耗时（秒）的滚动窗口与累计次数"""
+
+    __slots__ = ['samples', 'count', 'total']
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        if not n:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "avg_ms": round(sum(ordered) / n * 1000, 2),
+            "p50_ms": round(ordered[n // 2] * 1000, 2),
+            "p95_ms": round(ordered[min(n - 1, int(n * 0.95))] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            "total_s": round(self.total, 3),
+        }
+
+
+def _rss_mb():
+    if psutil is not None:
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._timers = OrderedDict()
+        self._counters = OrderedDict()
+        self._collectors = OrderedDict()
+        self.started_at = time.time()
+        # 每个读取方（HTTP接口、写文件等）各自的CPU基准: 名称 -> (墙钟, CPU时间)
+        self._cpu_baselines = {}
+        self._cpu_start = (time.perf_counter(), time.process_time())
+
+    def observe(self, name, seconds):
+        """记录一次耗时（秒）"""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = RollingTimer(self.window)
+            timer.add(seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def register(self, name, collector):
+        """注册采集函数 collector() -> dict，读取快照时调用（同名覆盖）"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def unregister(self, name):
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def _process_stats(self, consumer):
+        now_wall = time.perf_counter()
+        now_cpu = time.process_time()
+        last_wall, last_cpu = self._cpu_baselines.get(consumer, self._cpu_start)
+        wall = now_wall - last_wall
+        cpu_percent = (now_cpu - last_cpu) / wall * 100.0 if wall > 0 else 0.0
+        self._cpu_baselines[consumer] = (now_wall, now_cpu)
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "cpu_seconds": round(now_cpu, 3),
+            "cpu_percent": round(cpu_percent, 1),
+            "rss_mb": _rss_mb(),
+            "threads": threading.active_count(),
+        }
+
+    def snapshot(self, consumer="default"):
+        """
+        当前全部指标（可直接序列化为JSON）
+
+        参数:
+            consumer: 读取方名称，cpu_percent 为该读取方上次读取以来的占用
+        """
+        with self._lock:
+            process = self._process_stats(consumer)
+            timings = {name: timer.to_dict() for name, timer in self._timers.items()}
+            counters = dict(self._counters)
+            collectors = list(self._collectors.items())
+        result = {"timestamp": time.time(), "process": process, "timings": timings, "counters": counters}
+        for name, collector in collectors:
+            try:
+                result[name] = collector()
+            except Exception as e:
+                result[name] = {"error": str(e)}
+        return result
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.registry.snapshot(consumer="http"), ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics %s - %s", self.address_string(), format % args)
+
+
+class MetricsServer:
+    """只监听本机的HTTP指标接口（后台线程）"""
+
+    def __init__(self, registry, port, host=DEFAULT_METRICS_HOST):
+        handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": registry})
+        self.httpd = http.server.ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def start(self):
+        self.thread.start()
+        logger.info(f"运行时指标接口: http://{self.address[0]}:{self.address[1]}/metrics")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MetricsDumper:
+    """定期把指标快照写入JSON文件（先写临时文件再替换，读取方不会看到半个文件）"""
+
+    def __init__(self, registry, path, interval=DEFAULT_DUMP_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.interval = max(0.5, float(interval))
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+
+    def dump(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.registry.snapshot(consumer="file"), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                logger.error(f"写入指标文件失败: {e}")
+
+    def start(self):
+        self.thread.start()
+        logger.info(f"运行时指标每 {self.interval:g}s 写入 {self.path}")
+
+    def stop(self):
+        self._stop.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=2)
+        try:
+            self.dump()
+        except Exception as e:
+            logger.error(f"写入指标文件失败: {e}")
+
+
+_registry = MetricsRegistry()
+_exporters_lock = threading.Lock()
+_exporters = []
+
+
+def get_registry():
+    """进程内共享的指标注册表"""
+    return _registry
+
+
+def observe(name, seconds):
+    _registry.observe(name, seconds)
+
+
+def start_exporters(port=None, path=None, interval=None):
+    """
+    按参数（或环境变量）启动HTTP接口和/或定期写文件，已启动时不重复启动
+
+    返回:
+        已启动的输出对象列表
+    """
+    if port is None and os.environ.get("APP_METRICS_PORT"):
+        port = int(os.environ["APP_METRICS_PORT"])
+    path = path or os.environ.get("APP_METRICS_FILE")
+    if interval is None:
+        interval = float(os.environ.get("APP_METRICS_INTERVAL", DEFAULT_DUMP_INTERVAL))
+
+    with _exporters_lock:
+        if _exporters:
+            return list(_exporters)
+        if port:
+            try:
+                server = MetricsServer(_registry, port)
+                server.start()
+                _exporters.append(server)
+            except OSError as e:
+                logger.error(f"无法在端口 {port} 启动指标接口: {e}")
+        if path:
+            dumper = MetricsDumper(_registry, path, interval)
+            dumper.start()
+            _exporters.append(dumper)
+        return list(_exporters)
+
+
+def stop_exporters():
+    with _exporters_lock:
+        exporters = list(_exporters)
+        _exporters.clear()
+    for exporter in exporters:
+        try:
+            exporter.stop()
+        except Exception as e:
+            logger.error(f"停止指标输出时出错: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="读取运行中实例的指标")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("APP_METRICS_PORT", 9108)),
+                        help="指标接口端口 (默认 APP_METRICS_PORT 或 9108)")
+    parser.add_argument("--host", default=DEFAULT_METRICS_HOST)
+    args = parser.parse_args()
+
+    from urllib.request import urlopen
+    try:
+        with urlopen(f"http://{args.host}:{args.port}/metrics", timeout=5) as response:
+            print(json.dumps(json.loads(response.read().decode("utf-8")), ensure_ascii=False, indent=2))
+    except OSError as e:
+        print(f"无法读取指标: {e}")
+        sys.exit(1)
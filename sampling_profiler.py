@@ -0,0 +1,240 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+按需开启的采样分析器
+----------------------------
+会话变卡时用来判断是音频处理线程、ASR推理、Tk主循环还是TTS事件循环的问题。
+开启后由一个后台线程按固定间隔读取 sys._current_frames()，把每个线程的调用栈
+（以线程名为根，如 MainThread、process-audio、asyncio-loop；翻译与TTS协程都在 asyncio-loop 中）
+累计为折叠栈（collapsed stack）格式，停止时写入 profiles/ 目录:
+
+    profiles/profile_20250101_120000.folded    每行 "线程;函数 (文件:行);... 样本数"
+
+可直接交给 flamegraph.pl、speedscope (https://www.speedscope.app) 或 inferno 生成火焰图。
+未开启时没有采样线程，不产生任何开销。
+
+开启方式:
+- 信号: kill -USR2 <pid> 开始，再发一次停止并写文件（仅POSIX；信号可用 APP_PROFILE_SIGNAL 修改）
+- 界面: 菜单 诊断 → 开始/停止性能采样
+- 命令行: python pipeline_core.py --profile  整个运行期间采样，退出时写文件
+
+环境变量:
+    APP_PROFILE_INTERVAL_MS  采样间隔（毫秒），默认10
+    APP_PROFILE_SIGNAL       切换采样的信号名，默认 SIGUSR2
+
+使用方法:
+    python sampling_profiler.py profiles/profile_20250101_120000.folded   # 各线程样本数与耗时最多的函数
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(project_root, "profiles")
+DEFAULT_INTERVAL = float(os.environ.get("APP_PROFILE_INTERVAL_MS", "10")) / 1000
+DEFAULT_SIGNAL = os.environ.get("APP_PROFILE_SIGNAL", "SIGUSR2")
+
+
+class SamplingProfiler:
+    """
+    对进程内所有（或指定名称的）线程定期采样调用栈
+
+    参数:
+        interval: 采样间隔（秒）
+        output_dir: 折叠栈文件输出目录
+        thread_names: 只采样这些名称的线程，None表示全部
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, output_dir=PROFILE_DIR, thread_names=None):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.thread_names = set(thread_names) if thread_names else None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self.last_path = None
+        # 代码对象 → 栈帧标签，避免每次采样都格式化字符串
+        self._labels = {}
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration=None):
+        """开始采样；duration秒后自动停止并写文件。已在采样时返回False"""
+        with self.lock:
+            if self.running:
+                return False
+            self.stop_event.clear()
+            self.stacks = Counter()
+            self.samples = 0
+            self.sampling_seconds = 0.0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.thread = threading.Thread(target=self._run, args=(duration,),
+                                           name="sampling-profiler", daemon=True)
+            self.thread.start()
+        logger.info(f"性能采样已开始 (间隔 {self.interval * 1000:.0f}ms)")
+        return True
+
+    def stop(self):
+        """停止采样，返回写入的文件路径（没有样本时为None）"""
+        with self.lock:
+            thread = self.thread
+            if thread is None:
+                return None
+            self.stop_event.set()
+            thread.join()
+            self.thread = None
+        return self.last_path
+
+    def toggle(self):
+        """未采样时开始，采样中则停止；返回停止时写入的文件路径"""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def _run(self, duration):
+        deadline = time.monotonic() + duration if duration else None
+        own_ident = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            start = time.perf_counter()
+            self._sample(own_ident)
+            self.sampling_seconds += time.perf_counter() - start
+            if deadline and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+        self.last_path = self._write()
+
+    def _sample(self, own_ident):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        labels = self._labels
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            name = names.get(ident, f"thread-{ident}")
+            if self.thread_names is not None and name not in self.thread_names:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(name)
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def _write(self):
+        if not self.stacks:
+            logger.info("性能采样已停止，没有样本。")
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir,
+                            f"profile_{time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        stats = self.get_stats()
+        logger.info(f"性能采样已停止: {stats['samples']} 次采样，采样本身耗时占 "
+                    f"{stats['overhead_percent']:.2f}%，已写入 {path}")
+        return path
+
+    def get_stats(self):
+        elapsed = (self.stopped_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "elapsed_seconds": round(elapsed, 2),
+            "overhead_percent": round(100 * self.sampling_seconds / elapsed, 3) if elapsed else 0.0,
+        }
+
+
+_profiler = SamplingProfiler()
+
+
+def get_profiler():
+    """进程内共享的采样分析器"""
+    return _profiler
+
+
+def install_signal_handler(signal_name=DEFAULT_SIGNAL, profiler=None):
+    """
+    收到信号时切换采样（必须在主线程调用）
+
+    返回:
+        是否已安装（平台不支持该信号时为False）
+    """
+    signum = getattr(signal, signal_name, None)
+    if signum is None:
+        return False
+    profiler = profiler or _profiler
+
+    def handler(signum, frame):
+        # 停止时要等待采样线程并写文件，放到后台线程中，信号处理函数立即返回
+        threading.Thread(target=profiler.toggle, name="profiler-toggle", daemon=True).start()
+
+    signal.signal(signum, handler)
+    logger.info(f"发送 {signal_name} 到进程 {os.getpid()} 可开始/停止性能采样")
+    return True
+
+
+def summarize_folded(path):
+    """
+    汇总折叠栈文件
+
+    返回:
+        (各线程样本数 Counter, 各函数自身样本数 Counter)
+    """
+    threads, leaves = Counter(), Counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if not stack:
+                continue
+            frames = stack.split(";")
+            threads[frames[0]] += int(count)
+            leaves[f"{frames[0]}: {frames[-1]}"] += int(count)
+    return threads, leaves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总采样分析器输出的折叠栈文件")
+    parser.add_argument("path", help="profiles/ 下的 .folded 文件")
+    parser.add_argument("--top", type=int, default=15, help="列出自身样本最多的函数数")
+    args = parser.parse_args(argv)
+
+    threads, leaves = summarize_folded(args.path)
+    total = sum(threads.values()) or 1
+    print("各线程样本数:")
+    for name, count in threads.most_common():
+        print(f"  {count:8d}  {100 * count / total:5.1f}%  {name}")
+    print("自身样本最多的函数:")
+    for name, count in leaves.most_common(args.top):
+        print(f"  {count:8d}  {100 * count / total:5.1f}%  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
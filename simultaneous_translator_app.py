@@ -8,40 +8,24 @@ os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscop
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import asyncio
 import threading
-import queue
-import time # Added for sleep in worker threads on error
-import sounddevice as sd # 添加 sounddevice
-import pygame # 添加 pygame
-
-# 尝试导入现有模块
-try:
-    from FunASR import FastLoadASR
-    # Placeholder for FunASR modification: FunASR will need a way to callback/put results to this app
-except ImportError:
-    print("警告: FunASR.py 未找到或无法导入。语音识别功能将不可用。")
-    FastLoadASR = None
-
-try:
-    from translation_module import TranslationModule, LANGUAGE_CODES, LANGUAGE_NAMES
-    # TODO: Replace with your actual API keys for translation_module
-    TRANSLATION_APP_ID = "86c79fb7"  # <--- 在此处替换您的 APPID
-    TRANSLATION_API_SECRET = "MDY3ZGFkYWEyZDBiOTJkOGIyOTllOWMz" # <--- 在此处替换您的 API_SECRET
-    TRANSLATION_API_KEY = "f4369644e37eddd43adfe436e7904cf1"   # <--- 在此处替换您的 API_KEY
-except ImportError:
-    print("警告: translation_module.py 未找到或无法导入。翻译功能将不可用。")
-    TranslationModule = None
-    LANGUAGE_CODES = {"中文": "cn", "英语": "en"} # Fallback
-    LANGUAGE_NAMES = {"cn": "中文", "en": "英语"} # Fallback
-
-try:
-    import edge_TTS
-    # We will call edge_TTS.get_available_languages() and edge_TTS.list_voices_by_language()
-    # and edge_TTS.text_to_speech()
-except ImportError:
-    print("警告: edge_TTS.py 未找到或无法导入。语音合成功能将不可用。")
-    edge_TTS = None
+import logging
+from transcript_view import TranscriptView
+from ui_dispatcher import UIUpdateDispatcher, DEFAULT_FRAME_INTERVAL_MS
+from log_config import setup_logging, add_handler, remove_handler, get_dropped_count, UIHandler
+from sampling_profiler import get_profiler, install_signal_handler
+# 同传流程（ASR → 翻译 → TTS）在无界面的流水线核心中，界面只是它的一个客户端。
+# sounddevice、FunASR(torch)、translation_module、edge_TTS 都在窗口显示后由启动线程导入
+from pipeline_core import (SimultaneousPipeline, PipelineConfig, STREAM_RECOGNIZED, STREAM_TRANSLATED,
+                           get_language_codes)
+
+logger = logging.getLogger(__name__)
+
+# 日志面板最多保留的行数（完整日志见终端或 APP_LOG_FILE）
+MAX_LOG_PANE_LINES = 1000
+
+# 启动线程的步骤（进度条按步骤推进）
+STARTUP_STEPS = ("语音合成模块", "音频设备", "翻译模块", "语音识别模块", "语音识别模型")
 
 class SimultaneousTranslatorApp:
     def __init__(self, root):
@@ -49,41 +33,26 @@ class SimultaneousTranslatorApp:
         self.root.title("同声传译应用")
         self.root.geometry("800x750") # 稍微增加高度以容纳新控件
 
-        self.is_running = False
-        # self.asr_instance = None # Will be initialized below
-        self.translation_instance = None
-        self.selected_input_device_idx = None
-        self.selected_output_device_name = None
-
-        # 初始化 Pygame Mixer 标记
-        self.mixer_initialized = False
-
-        # Initialize Translation Module
-        if TranslationModule and TRANSLATION_APP_ID != "YOUR_APP_ID" and TRANSLATION_API_KEY != "YOUR_API_KEY" and TRANSLATION_API_SECRET != "YOUR_API_SECRET":
-            self.translation_instance = TranslationModule(
-                app_id=TRANSLATION_APP_ID,
-                api_secret=TRANSLATION_API_SECRET,
-                api_key=TRANSLATION_API_KEY
-            )
-        else:
-            print("警告: 翻译模块API密钥未配置或模块导入失败。翻译功能将不可用。")
-            if TRANSLATION_APP_ID == "YOUR_APP_ID":
-                print("请在 simultaneous_translator_app.py 中设置 TRANSLATION_APP_ID, TRANSLATION_API_SECRET, 和 TRANSLATION_API_KEY")
-
-        self.asr_output_queue = queue.Queue()
-        self.translation_output_queue = queue.Queue()
-
-        self.current_recognized_sentence = ""
-        self.last_final_asr_text = ""
-        self.recognized_text_has_interim = False
+        # 工作线程的UI更新统一排队，由Tk主线程每帧处理
+        self.ui_updates = UIUpdateDispatcher()
+        # 日志面板作为日志流的一个输出（在后台写入线程中投递）
+        self.log_pane_handler = UIHandler(self.ui_updates.post_log)
+        add_handler(self.log_pane_handler)
 
-        # ASR activity timeout logic
-        self.last_asr_activity_time = None
-        self.force_sentence_end_timeout = 1.0  # Seconds
-        self.asr_timeout_check_timer_id = None
-        self.raw_text_of_last_forced_sentence = None # New: Store raw text of the last sentence that was force-finalized
+        self.config = PipelineConfig.from_file()
+        self.pipeline = SimultaneousPipeline(self.config, on_text=self._on_pipeline_text,
+                                             on_state=self._on_pipeline_state)
+        self.selected_input_device_idx = None
+        self.selected_output_device_idx = None
+        self.language_codes = {}
+        self.profiler = get_profiler()
 
-        self.all_models_loaded = False # New: For model loading status
+        # 诊断菜单：按需开启采样分析器（打开菜单时刷新标签，信号触发的切换也能反映出来）
+        menu_bar = tk.Menu(root)
+        self.diagnostics_menu = tk.Menu(menu_bar, tearoff=0, postcommand=self._refresh_diagnostics_menu)
+        self.diagnostics_menu.add_command(label="开始性能采样", command=self.toggle_profiler)
+        menu_bar.add_cascade(label="诊断", menu=self.diagnostics_menu)
+        root.config(menu=menu_bar)
 
         # --- UI Elements ---
         control_frame = ttk.Frame(root, padding="10")
@@ -122,13 +91,14 @@ class SimultaneousTranslatorApp:
         self.tts_voice_var = tk.StringVar()
         self.tts_voice_dropdown = ttk.Combobox(lang_frame, textvariable=self.tts_voice_var, state="readonly", width=35)
         self.tts_voice_dropdown.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0,10))
+        self.tts_voice_dropdown.bind("<<ComboboxSelected>>", self.on_tts_voice_selected)
 
         # ASR Settings Frame
         asr_settings_frame = ttk.Frame(control_frame)
         asr_settings_frame.pack(fill=tk.X, pady=(5,0))
 
         ttk.Label(asr_settings_frame, text="ASR静音时长(s):").pack(side=tk.LEFT, padx=(0,5))
-        self.asr_silence_duration_var = tk.DoubleVar(value=0.5) # Default changed to 0.5
+        self.asr_silence_duration_var = tk.DoubleVar(value=self.config.silence_duration)
         self.asr_silence_duration_scale = ttk.Scale(
             asr_settings_frame, from_=0.1, to=2.0, # Range can be kept or adjusted if needed
             variable=self.asr_silence_duration_var, orient=tk.HORIZONTAL,
@@ -139,7 +109,7 @@ class SimultaneousTranslatorApp:
         ttk.Label(asr_settings_frame, textvariable=self.asr_silence_duration_label_var, width=6).pack(side=tk.LEFT, padx=(0,10))
 
         ttk.Label(asr_settings_frame, text="ASR相对静音阈值:").pack(side=tk.LEFT, padx=(0,5))
-        self.asr_relative_silence_var = tk.DoubleVar(value=0.5) # Default changed to 0.5
+        self.asr_relative_silence_var = tk.DoubleVar(value=self.config.relative_silence)
         self.asr_relative_silence_scale = ttk.Scale(
             asr_settings_frame, from_=0.0, to=1.0, # Range changed to 0.0 - 1.0
             variable=self.asr_relative_silence_var, orient=tk.HORIZONTAL,
@@ -155,23 +125,32 @@ class SimultaneousTranslatorApp:
 
         # Rate Scale
         ttk.Label(prosody_frame, text="语速:").pack(side=tk.LEFT, padx=(0,5))
-        self.tts_rate_var = tk.DoubleVar(value=0) # Default rate: 0%
+        self.tts_rate_var = tk.DoubleVar(value=self.config.tts_rate)
         self.tts_rate_scale = ttk.Scale(prosody_frame, from_=-100, to=100, variable=self.tts_rate_var, orient=tk.HORIZONTAL, command=self._update_rate_label)
         self.tts_rate_scale.pack(side=tk.LEFT, padx=(0,5), fill=tk.X, expand=True)
-        self.tts_rate_label_var = tk.StringVar(value="0%")
+        self.tts_rate_label_var = tk.StringVar(value=self.config.rate_str)
         ttk.Label(prosody_frame, textvariable=self.tts_rate_label_var, width=5).pack(side=tk.LEFT, padx=(0,10))
 
         # Volume Scale
         ttk.Label(prosody_frame, text="音量:").pack(side=tk.LEFT, padx=(0,5))
-        self.tts_volume_var = tk.DoubleVar(value=0) # Default volume: 0%
+        self.tts_volume_var = tk.DoubleVar(value=self.config.tts_volume)
         self.tts_volume_scale = ttk.Scale(prosody_frame, from_=-100, to=100, variable=self.tts_volume_var, orient=tk.HORIZONTAL, command=self._update_volume_label)
         self.tts_volume_scale.pack(side=tk.LEFT, padx=(0,5), fill=tk.X, expand=True)
-        self.tts_volume_label_var = tk.StringVar(value="0%")
+        self.tts_volume_label_var = tk.StringVar(value=self.config.volume_str)
         ttk.Label(prosody_frame, textvariable=self.tts_volume_label_var, width=5).pack(side=tk.LEFT, padx=(0,10))
 
         self.start_stop_button = ttk.Button(control_frame, text="开始同传", command=self.toggle_translation, width=12, state="disabled")
         self.start_stop_button.pack(side=tk.RIGHT, padx=(10,0))
 
+        # 启动进度：后端导入与模型加载在后台进行，窗口先显示
+        status_frame = ttk.Frame(root, padding=(10, 0, 10, 5))
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_var = tk.StringVar(value="正在启动...")
+        ttk.Label(status_frame, textvariable=self.status_var).pack(side=tk.LEFT)
+        self.startup_progress = ttk.Progressbar(status_frame, mode="determinate",
+                                                maximum=len(STARTUP_STEPS), length=200)
+        self.startup_progress.pack(side=tk.RIGHT)
+
         text_frame = ttk.Frame(root, padding="5")
         text_frame.pack(fill=tk.BOTH, expand=True)
         text_frame.columnconfigure(0, weight=1)
@@ -192,144 +171,119 @@ class SimultaneousTranslatorApp:
         self.log_text_area.grid(row=5, column=0, sticky="nsew", padx=5, pady=(0,5))
         # --- End of UI Elements from previous version ---
 
-        self.async_loop_thread = None
-        self.async_loop = None
-        if edge_TTS:
-            self.start_asyncio_loop()
+        # 文本区域以Tk标记跟踪中间结果行，只保留有限行数，旧行转存到 history/ 目录
+        self.text_views = {
+            self.recognized_text_area: TranscriptView(self.recognized_text_area, name="recognized"),
+            self.translated_text_area: TranscriptView(self.translated_text_area, name="translated"),
+        }
+        self.stream_areas = {
+            STREAM_RECOGNIZED: self.recognized_text_area,
+            STREAM_TRANSLATED: self.translated_text_area,
+        }
 
-        self.populate_audio_devices() # 填充音频设备列表
-        self.populate_target_languages()
         self.root.after(100, self.process_ui_updates)
-        self.log_message("应用已初始化。")
-
-        # Initialize ASR Instance and load models once
-        self.asr_instance = None
-        if FastLoadASR:
-            self.log_message("正在初始化 FunASR 实例...")
-            try:
-                self.asr_instance = FastLoadASR(
-                    use_vad=True,
-                    use_punc=True,
-                    text_output_callback=self.asr_text_callback,
-                    input_device_index=self.selected_input_device_idx # 使用选择的输入设备
-                    # Add max_speech_segment_duration_seconds if we implement it in FunASR
-                )
-                if self.asr_instance: # 新增：确保实例存在
-                    try:
-                        # 从UI控件获取初始值
-                        initial_duration = self.asr_silence_duration_var.get()
-                        initial_relative_vol = self.asr_relative_silence_var.get()
-                        self.asr_instance.silence_duration_threshold = initial_duration
-                        self.asr_instance.relative_silence_threshold = initial_relative_vol
-                        self.log_message(f"FunASR静音参数已初始化: Duration={initial_duration:.2f}s, RelativeVol={initial_relative_vol:.2f}")
-                    except AttributeError:
-                        self.log_message("警告: 无法动态修改FunASR的内部参数。可能需要直接修改FunASR.py。")
-
-                threading.Thread(target=self._initial_model_load, daemon=True).start()
-            except Exception as e:
-                self.log_message(f"创建FunASR实例失败: {e}")
-                self.asr_instance = None
+        self.log_message("界面已显示，正在后台加载模块...")
+        threading.Thread(target=self._startup_worker, name="startup", daemon=True).start()
+
+    def _startup_worker(self):
+        """依次导入后端并加载模型，每一步完成后把界面更新投递到UI队列"""
+        self._post_startup_progress(0)
+        if self.pipeline.tts:
+            self.pipeline.start_loop()
         else:
-            self.log_message("错误: FunASR 模块未找到，语音识别不可用。", True)
-
-
-    def _initial_model_load(self):
-        self.all_models_loaded = False # Reset status at the beginning of load attempt
-        # Ensure button is disabled during this process, in case it was enabled before an error and retry
-        self.root.after(0, lambda: self.start_stop_button.config(state="disabled"))
-
-        if self.asr_instance:
-            self.log_message("正在加载ASR主模型 (如果尚未加载)...")
-            if not self.asr_instance.ensure_asr_model_loaded():
-                self.log_message("ASR主模型加载失败。", True)
-                # self.asr_instance = None # Or handle error appropriately
-                return # Stop further model loading if main one fails
-
-            self.log_message("ASR主模型已就绪或正在加载。") # ensure_asr_model_loaded blocks until loaded or failed
-
-            if self.asr_instance.use_vad:
-                self.log_message("正在加载VAD模型 (如果需要)...")
-                if not self.asr_instance.load_vad_model_if_needed():
-                    self.log_message("VAD模型加载失败。", True)
-                else:
-                    self.log_message("VAD模型已就绪或已加载。")
-
-            if self.asr_instance.use_punc:
-                self.log_message("正在加载标点模型 (如果需要)...")
-                if not self.asr_instance.load_punc_model_if_needed():
-                    self.log_message("标点模型加载失败。ASR将不带标点运行或无法运行。", True)
-                    # Depending on severity, you might want to set all_models_loaded to False and return
-                    # For now, we allow proceeding without punc if it fails but other models are OK.
-                    # However, for critical models like ASR main, we do return.
-                else:
-                    self.log_message("标点模型已就绪或已加载。")
-            
-            # Check if all critical models are loaded
-            # For this example, ASR main model is critical. VAD and Punc are optional enhancements.
-            if self.asr_instance.asr_model: # asr_model is the main one
-                self.all_models_loaded = True
-                self.log_message("所有核心ASR模型已成功加载/验证。")
-                self.root.after(0, lambda: self.start_stop_button.config(state="normal"))
-                self.root.after(0, lambda: self.log_message("模型加载完毕，可以开始同传。", True))
-            else:
-                self.all_models_loaded = False # Ensure it's false if main ASR model failed
-                self.log_message("ASR主模型加载失败，无法启动同传。", True)
-                self.root.after(0, lambda: self.start_stop_button.config(state="disabled"))
+            self.log_message("edge_TTS.py 未找到或无法导入。语音合成功能将不可用。", level=logging.WARNING)
 
-        else:
-            self.log_message("ASR实例未创建，无法加载模型。")
-            self.all_models_loaded = False
-            self.root.after(0, lambda: self.start_stop_button.config(state="disabled"))
+        self._post_startup_progress(1)
+        try:
+            devices, default_device = self._query_audio_devices()
+            self.ui_updates.post_call(self.populate_audio_devices, devices, default_device)
+        except Exception as e:
+            self.ui_updates.post_call(self._show_audio_device_error, e)
 
-    def log_message(self, message, is_status=True):
-        print(message)
-        self.root.after(0, self._update_log_area, message + "\n")
+        self._post_startup_progress(2)
+        self.pipeline.create_translator()
+        self.ui_updates.post_call(self.populate_target_languages, get_language_codes())
+
+        self._post_startup_progress(3)
+        self.log_message("正在初始化 FunASR 实例...")
+        if not self.pipeline.create_asr():
+            self.log_message("错误: FunASR 实例未创建，语音识别不可用。", True, level=logging.ERROR)
+            self.ui_updates.post_call(self._set_status, "语音识别不可用", len(STARTUP_STEPS))
+            return
+
+        self._post_startup_progress(4)
+        self.pipeline.load_models()
+
+    def _post_startup_progress(self, step):
+        self.ui_updates.post_call(self._set_status, f"正在加载{STARTUP_STEPS[step]}...", step)
+
+    def _set_status(self, text, progress=None):
+        self.status_var.set(text)
+        if progress is not None:
+            self.startup_progress.config(value=progress)
+
+    @property
+    def is_running(self):
+        return self.pipeline.is_running
+
+    def _on_pipeline_text(self, stream, text, mode):
+        # 在流水线线程中调用，只投递到UI队列
+        self.ui_updates.post_text(self.stream_areas[stream], text, mode=mode)
+
+    def _on_pipeline_state(self, state):
+        self.ui_updates.post_call(self._apply_pipeline_state, state)
+
+    def _apply_pipeline_state(self, state):
+        if state == "models_ready":
+            self.start_stop_button.config(state="normal")
+            self._set_status("就绪", len(STARTUP_STEPS))
+            self.log_message("模型加载完毕，可以开始同传。", True)
+        elif state == "models_loading":
+            self.start_stop_button.config(state="disabled")
+        elif state == "models_failed":
+            self.start_stop_button.config(state="disabled")
+            self._set_status("模型加载失败，详见日志", len(STARTUP_STEPS))
+        elif state == "started":
+            self.start_stop_button.config(text="停止同传")
+        elif state == "stopped":
+            self.start_stop_button.config(text="开始同传")
+
+    def log_message(self, message, is_status=True, level=logging.INFO):
+        logger.log(level, message)
         if is_status:
              pass #保持这个状态，可以用来更新状态栏等
 
-    def _update_log_area(self, message):
+    def _insert_log_lines(self, lines):
+        # 一帧内的日志行合并为一次插入，面板只保留最近 MAX_LOG_PANE_LINES 行
         self.log_text_area.config(state="normal")
-        self.log_text_area.insert(tk.END, message)
+        self.log_text_area.insert(tk.END, "\n".join(lines) + "\n")
+        line_count = int(self.log_text_area.index("end-1c").split(".")[0])
+        if line_count > MAX_LOG_PANE_LINES:
+            self.log_text_area.delete("1.0", f"{line_count - MAX_LOG_PANE_LINES + 1}.0")
         self.log_text_area.see(tk.END)
         self.log_text_area.config(state="disabled")
 
-    def start_asyncio_loop(self):
-        def loop_runner():
-            self.async_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.async_loop)
-            try:
-                self.async_loop.run_forever()
-            finally:
-                self.async_loop.close()
-        self.async_loop_thread = threading.Thread(target=loop_runner, daemon=True)
-        self.async_loop_thread.start()
-        self.log_message("Asyncio事件循环已启动。")
-
-    def run_async_task(self, coro):
-        if not self.async_loop or not self.async_loop.is_running():
-            self.log_message("错误: Asyncio事件循环未运行。")
-            # As a fallback, try starting it if it's not already starting/running
-            if not hasattr(self, 'async_loop_thread') or not self.async_loop_thread.is_alive():
-                self.log_message("尝试重新启动Asyncio事件循环...")
-                self.start_asyncio_loop()
-            # Give it a moment to start, then check again
-            # This is a bit of a hack, robust applications might handle this more gracefully
-            time.sleep(0.1)
-            if not self.async_loop or not self.async_loop.is_running():
-                self.log_message("错误: Asyncio事件循环仍未运行。异步任务无法执行。")
-                return None
-        return asyncio.run_coroutine_threadsafe(coro, self.async_loop)
-
-    def populate_audio_devices(self):
+    def _query_audio_devices(self):
+        """导入 sounddevice 并查询设备（在启动线程中调用，PortAudio初始化不阻塞界面）"""
+        import sounddevice as sd
+        return sd.query_devices(), sd.default.device
+
+    def _show_audio_device_error(self, error):
+        self.log_message(f"加载音频设备失败: {error}", level=logging.ERROR)
+        self.input_device_dropdown['values'] = ["错误"]
+        self.input_device_var.set("错误")
+        self.output_device_dropdown['values'] = ["错误"]
+        self.output_device_var.set("错误")
+
+    def populate_audio_devices(self, devices, default_device):
         try:
-            devices = sd.query_devices()
             input_devices = [(i, device['name']) for i, device in enumerate(devices) if device['max_input_channels'] > 0]
-            output_devices = [(device['name'], device['name']) for device in devices if device['max_output_channels'] > 0] # Pygame uses name
+            output_devices = [(i, device['name']) for i, device in enumerate(devices) if device['max_output_channels'] > 0]
 
             if input_devices:
                 self.input_device_dropdown['values'] = [f"{name} (ID: {idx})" for idx, name in input_devices]
                 # Try to set a default input device
-                default_input_device = sd.default.device[0]
+                default_input_device = default_device[0]
                 for i, (idx, name) in enumerate(input_devices):
                     if idx == default_input_device:
                         self.input_device_var.set(self.input_device_dropdown['values'][i])
@@ -343,24 +297,23 @@ class SimultaneousTranslatorApp:
                 self.input_device_var.set("无可用输入设备")
 
             if output_devices:
-                self.output_device_dropdown['values'] = [name for _, name in output_devices]
-                 # Try to set a default output device for pygame (it's trickier as pygame doesn't list by index easily before init)
-                # For now, we select the first one. User can change.
-                # A more robust way would be to query pygame *after* a generic init, then re-init with selection.
-                # Or, list devices known to sounddevice and hope pygame can use their names.
-                self.output_device_var.set(output_devices[0][0])
-                self.selected_output_device_name = output_devices[0][0]
-                self.init_pygame_mixer() # Initialize with the default/first output device
+                self.output_device_dropdown['values'] = [f"{name} (ID: {idx})" for idx, name in output_devices]
+                # 默认选择系统默认输出设备，找不到时使用第一个
+                default_output_device = default_device[1]
+                selected = 0
+                for i, (idx, name) in enumerate(output_devices):
+                    if idx == default_output_device:
+                        selected = i
+                        break
+                self.output_device_var.set(self.output_device_dropdown['values'][selected])
+                self.selected_output_device_idx = output_devices[selected][0]
+                self.open_audio_output() # 使用默认/第一个输出设备打开输出流
             else:
                 self.output_device_dropdown['values'] = ["无可用输出设备"]
                 self.output_device_var.set("无可用输出设备")
 
         except Exception as e:
-            self.log_message(f"加载音频设备失败: {e}")
-            self.input_device_dropdown['values'] = ["错误"]
-            self.input_device_var.set("错误")
-            self.output_device_dropdown['values'] = ["错误"]
-            self.output_device_var.set("错误")
+            self._show_audio_device_error(e)
 
     def on_input_device_selected(self, event):
         selection = self.input_device_var.get()
@@ -369,64 +322,44 @@ class SimultaneousTranslatorApp:
                 # Extract index from format "Device Name (ID: index)"
                 self.selected_input_device_idx = int(selection.split(' (ID: ')[-1][:-1])
                 self.log_message(f"选择输入设备 ID: {self.selected_input_device_idx}")
+                self.config.input_device = self.selected_input_device_idx
                 # If ASR is running, it might need to be restarted to use the new device.
                 # For now, we assume selection is done before starting.
             except ValueError:
-                self.log_message(f"错误: 无法解析输入设备选择 '{selection}'")
+                self.log_message(f"错误: 无法解析输入设备选择 '{selection}'", level=logging.ERROR)
                 self.selected_input_device_idx = None # Fallback to default in ASR
+                self.config.input_device = None
 
     def on_output_device_selected(self, event):
         selection = self.output_device_var.get()
-        if selection and selection != "无可用输出设备" and selection != "错误":
-            self.selected_output_device_name = selection
-            self.log_message(f"选择输出设备: {self.selected_output_device_name}")
-            self.init_pygame_mixer() # Re-initialize mixer with the new device
+        if " (ID: " in selection:
+            try:
+                self.selected_output_device_idx = int(selection.split(' (ID: ')[-1][:-1])
+                self.log_message(f"选择输出设备 ID: {self.selected_output_device_idx}")
+                self.open_audio_output() # 只重建输出流，不影响已缓存的音频
+            except ValueError:
+                self.log_message(f"错误: 无法解析输出设备选择 '{selection}'", level=logging.ERROR)
         else:
-            self.selected_output_device_name = None
-            # Potentially uninitialize or set to a known safe state if mixer was initialized
-            if self.mixer_initialized:
-                pygame.mixer.quit()
-                self.mixer_initialized = False
-            self.log_message("未选择有效输出设备，TTS播放可能失败。")
-
-    def init_pygame_mixer(self):
-        if self.mixer_initialized:
-            pygame.mixer.quit()
-            self.mixer_initialized = False
+            self.selected_output_device_idx = None
+            self.pipeline.close_output_device()
+            self.log_message("未选择有效输出设备，TTS播放可能失败。", level=logging.WARNING)
 
-        try:
-            if self.selected_output_device_name:
-                self.log_message(f"正在初始化Pygame Mixer，使用设备: {self.selected_output_device_name}...")
-                # pygame.mixer.pre_init(devicename=self.selected_output_device_name)
-                pygame.mixer.init(devicename=self.selected_output_device_name)
-            else:
-                self.log_message("正在使用默认设备初始化Pygame Mixer...")
-                pygame.mixer.init()
-            self.mixer_initialized = True
-            self.log_message("Pygame Mixer 初始化成功。")
-        except Exception as e:
-            self.log_message(f"Pygame Mixer 初始化失败: {e}")
-            self.mixer_initialized = False
-            # Fallback to default device if specific one failed
-            if self.selected_output_device_name is not None:
-                self.log_message("尝试使用默认设备再次初始化 Pygame Mixer...")
-                self.selected_output_device_name = None # Clear selection to force default
-                try:
-                    pygame.mixer.init() # Default device
-                    self.mixer_initialized = True
-                    self.log_message("Pygame Mixer 已使用默认设备成功初始化。")
-                except Exception as e_default:
-                    self.log_message(f"使用默认设备初始化 Pygame Mixer 仍失败: {e_default}")
+    def open_audio_output(self):
+        # set_device 在指定设备打开失败时会回退到默认设备
+        self.pipeline.set_output_device(self.selected_output_device_idx)
 
     def _update_rate_label(self, value):
-        self.tts_rate_label_var.set(f"{int(float(value)):+d}%")
+        self.config.tts_rate = int(float(value))
+        self.tts_rate_label_var.set(self.config.rate_str)
 
     def _update_volume_label(self, value):
-        self.tts_volume_label_var.set(f"{int(float(value)):+d}%")
+        self.config.tts_volume = int(float(value))
+        self.tts_volume_label_var.set(self.config.volume_str)
 
-    def populate_target_languages(self):
-        if TranslationModule and LANGUAGE_CODES:
-            self.target_lang_dropdown['values'] = list(LANGUAGE_CODES.keys())
+    def populate_target_languages(self, language_codes):
+        self.language_codes = dict(language_codes)
+        if self.language_codes:
+            self.target_lang_dropdown['values'] = list(self.language_codes.keys())
             if self.target_lang_dropdown['values']:
                 self.target_lang_var.set(self.target_lang_dropdown['values'][0])
                 self.on_target_language_selected(None)
@@ -436,41 +369,37 @@ class SimultaneousTranslatorApp:
             self.target_lang_var.set("N/A")
 
     async def _fetch_voices_async(self, lang_code_for_tts):
-        if not edge_TTS:
+        tts = self.pipeline.tts
+        if not tts:
             self.log_message("edge_TTS模块不可用。")
             return []
         self.log_message(f"正在为语言代码 {lang_code_for_tts} 获取音色...")
-        tts_lang_map = {
-            "cn": "zh-CN", "en": "en-US", "ja": "ja-JP", "es": "es-ES",
-            "fr": "fr-FR", "de": "de-DE", "ko": "ko-KR", "ru": "ru-RU",
-        }
-        effective_lang_code = tts_lang_map.get(lang_code_for_tts.lower(), lang_code_for_tts)
         try:
-            voices_list = await edge_TTS.list_voices_by_language(effective_lang_code)
-            if not voices_list and "-" not in effective_lang_code:
-                 voices_list = await edge_TTS.list_voices_by_language(lang_code_for_tts)
+            # 语音目录会处理翻译语言代码到edge-tts地区代码的映射（如 cn -> zh-CN）
+            voices_list = await tts.list_voices_by_language(lang_code_for_tts)
             if voices_list:
                 voice_names = [v['ShortName'] for v in voices_list]
-                self.log_message(f"为 {effective_lang_code} 找到 {len(voice_names)} 个音色。")
+                self.log_message(f"为 {lang_code_for_tts} 找到 {len(voice_names)} 个音色。")
                 return voice_names
             else:
-                self.log_message(f"未找到语言代码 {effective_lang_code} (或 {lang_code_for_tts}) 的音色。")
+                self.log_message(f"未找到语言代码 {lang_code_for_tts} 的音色。")
                 return []
         except Exception as e:
-            self.log_message(f"获取音色时出错 ({effective_lang_code}): {e}")
+            self.log_message(f"获取音色时出错 ({lang_code_for_tts}): {e}", level=logging.ERROR)
             return []
 
     def on_target_language_selected(self, event):
         selected_language_name = self.target_lang_var.get()
-        if not TranslationModule or not edge_TTS or not selected_language_name or selected_language_name == "N/A":
+        if not self.language_codes or not self.pipeline.tts or not selected_language_name or selected_language_name == "N/A":
             self.tts_voice_dropdown['values'] = []
             self.tts_voice_var.set("")
             return
-        lang_code = LANGUAGE_CODES.get(selected_language_name)
+        lang_code = self.language_codes.get(selected_language_name)
         if not lang_code:
             self.log_message(f"未知目标语言名称: {selected_language_name}")
             return
-        future = self.run_async_task(self._fetch_voices_async(lang_code))
+        self.config.target_lang = lang_code
+        future = self.pipeline.run_async_task(self._fetch_voices_async(lang_code))
         if future:
             def update_voices_ui(f):
                 try:
@@ -478,17 +407,20 @@ class SimultaneousTranslatorApp:
                     self.tts_voice_dropdown['values'] = voice_names
                     if voice_names:
                         self.tts_voice_var.set(voice_names[0])
+                        self.on_tts_voice_selected(None)
                     else:
                         self.tts_voice_var.set("")
                 except Exception as e:
-                    self.log_message(f"更新音色UI时出错: {e}")
+                    self.log_message(f"更新音色UI时出错: {e}", level=logging.ERROR)
             self._check_future_for_ui(future, update_voices_ui)
 
+    def on_tts_voice_selected(self, event):
+        """选择音色后预先建立TTS连接，减少首句合成的握手延迟"""
+        self.pipeline.set_voice(self.tts_voice_var.get())
+
     def _check_future_for_ui(self, future, callback):
-        if future.done():
-            self.root.after(0, lambda: callback(future))
-        else:
-            self.root.after(100, self._check_future_for_ui, future, callback)
+        # Future完成时（在事件循环线程中）把回调投递到UI队列，无需轮询
+        future.add_done_callback(lambda f: self.ui_updates.post_call(callback, f))
 
     def toggle_translation(self):
         if self.is_running:
@@ -497,396 +429,60 @@ class SimultaneousTranslatorApp:
             self.start_translation_process()
 
     def start_translation_process(self):
-        if not self.all_models_loaded:
-            self.log_message("错误：模型尚未完全加载，请稍候或检查日志。", True)
-            # Optionally, try to trigger a reload if it failed previously and not currently loading
-            # For now, just inform the user.
+        if not self.pipeline.asr_instance:
+            self.log_message("错误：FunASR实例未初始化，无法开始。", True, level=logging.ERROR)
+            self.log_message("尝试重新初始化 FunASR 实例...")
+            self.start_stop_button.config(state="disabled") # Disable button during re-load
+            threading.Thread(target=self.pipeline.load_models, name="model-loader", daemon=True).start()
             return
-
-        if not self.asr_instance: # Check if ASR instance was created
-            self.log_message("错误：FunASR实例未初始化，无法开始。", True)
-            if FastLoadASR and not self.asr_instance:
-                self.log_message("尝试重新初始化 FunASR 实例...")
-                self.all_models_loaded = False # Mark models as not loaded before re-init
-                self.start_stop_button.config(state="disabled") # Disable button during re-load
-                try:
-                    self.asr_instance = FastLoadASR(
-                        use_vad=True,
-                        use_punc=True,
-                        text_output_callback=self.asr_text_callback,
-                        input_device_index=self.selected_input_device_idx # 使用选择的输入设备
-                    )
-                    if self.asr_instance: # 确保实例存在
-                        try:
-                            # 从UI控件获取当前值进行配置
-                            current_duration = self.asr_silence_duration_var.get()
-                            current_relative_vol = self.asr_relative_silence_var.get()
-                            self.asr_instance.silence_duration_threshold = current_duration
-                            self.asr_instance.relative_silence_threshold = current_relative_vol
-                            self.log_message(f"FunASR静音参数已配置 (re-init): Duration={current_duration:.2f}s, RelativeVol={current_relative_vol:.2f}")
-                        except AttributeError:
-                            self.log_message("警告: 无法动态修改FunASR的内部参数 (re-init)。")
-                    
-                    # Start model loading in a separate thread as it can be blocking
-                    threading.Thread(target=self._initial_model_load, daemon=True).start()
-                    self.log_message("FunASR 实例已重新初始化，正在加载模型...") # 保留此日志
-                except Exception as e:
-                    self.log_message(f"重新创建FunASR实例失败: {e}")
-                    self.all_models_loaded = False # Ensure flag is false on failure
-                    self.start_stop_button.config(state="disabled") # Keep disabled
-                    return # Exit if re-initialization fails
-            else:
-                 return # Exit if FastLoadASR not available or instance still None
-
-        if not self.translation_instance:
-            self.log_message("错误：翻译模块未初始化（请检查API密钥），无法开始。", True)
-            return
-        if not edge_TTS:
-            self.log_message("错误：edge_TTS模块未加载，无法开始。", True)
+        if not self.pipeline.all_models_loaded:
+            self.log_message("错误：模型尚未完全加载，请稍候或检查日志。", True, level=logging.ERROR)
             return
         if not self.target_lang_var.get() or self.target_lang_var.get() == "N/A" or not self.tts_voice_var.get():
-            self.log_message("错误：请选择有效的目标语言和音色。", True)
+            self.log_message("错误：请选择有效的目标语言和音色。", True, level=logging.ERROR)
             return
 
-        # Ensure models are loaded before starting session (if not already by _initial_model_load)
-        # This check might be redundant if _initial_model_load is guaranteed to finish and succeed.
-        # However, it's a safeguard.
-        if not self.asr_instance.asr_model: # Check if the main ASR model is loaded
-            self.log_message("ASR主模型尚未加载完成，请稍候...", True)
-            # Optionally, could try to trigger load again or just wait.
-            # For now, we assume _initial_model_load handles this.
-            # A more robust way would be to disable start button until models are ready.
-            if not self.asr_instance.ensure_asr_model_loaded(): # blocking call
-                 self.log_message("ASR主模型加载失败，无法启动。", True)
-                 return
-
-
-        self.is_running = True
-        self.start_stop_button.config(text="停止同传")
-        self.log_message("正在启动同声传译服务...", True)
-
+        self.config.voice = self.tts_voice_var.get()
+        self.pipeline.apply_asr_settings(self.asr_silence_duration_var.get(), self.asr_relative_silence_var.get())
         self._update_text_area(self.recognized_text_area, "", clear_all=True)
         self._update_text_area(self.translated_text_area, "", clear_all=True)
-        self.current_recognized_sentence = ""
-        self.last_final_asr_text = ""
-        self.recognized_text_has_interim = False
-        
-        # Reset and start ASR activity timer
-        self.last_asr_activity_time = time.time() # Initialize/reset activity time
-        if self.asr_timeout_check_timer_id:
-            self.root.after_cancel(self.asr_timeout_check_timer_id)
-            self.asr_timeout_check_timer_id = None
-        self._check_asr_activity_timeout() # Start the timeout check loop
-
-        # Start ASR instance (this should reset its internal state, not reload models)
-        try:
-            # FunASR's start method should handle starting the recording and processing threads.
-            # It should also reset internal states like buffers and caches.
-            threading.Thread(target=self.asr_instance.start, daemon=True).start()
-            self.log_message("同声传译已启动。 FunASR正在聆听...", True)
-        except Exception as e:
-            self.log_message(f"启动FunASR失败: {e}", True)
-            self.is_running = False
-            self.start_stop_button.config(text="开始同传")
-            return
-
-        # Start worker threads for translation and TTS
-        threading.Thread(target=self.translation_worker, daemon=True).start()
-        threading.Thread(target=self.tts_worker, daemon=True).start()
+        self.pipeline.start()
 
     def stop_translation_process(self):
-        self.log_message("正在停止同声传译服务...", True)
-        if self.asr_instance and self.is_running:
-            try:
-                self.asr_instance.stop() # This should stop recording and processing in FunASR
-            except Exception as e:
-                self.log_message(f"停止FunASR时出错: {e}")
-
-        self.is_running = False # Set to false to signal worker threads to stop
-        # Stop ASR activity timeout check BEFORE changing button text and logging stop, to ensure it's cleanly handled
-        if self.asr_timeout_check_timer_id:
-            self.root.after_cancel(self.asr_timeout_check_timer_id)
-            self.asr_timeout_check_timer_id = None
-            self.log_message("ASR活动超时检查已停止。")
-
-        self.start_stop_button.config(text="开始同传")
-
-        # Clear queues after stopping ASR and setting is_running to false
-        self.root.after(100, self._clear_queues)
-        self.log_message("同声传译已停止。", True)
-
-    def _clear_queues(self):
-        for q in [self.asr_output_queue, self.translation_output_queue]:
-            while not q.empty():
-                try: q.get_nowait()
-                except queue.Empty: break
-        self.log_message("处理队列已清空。")
-
-    def asr_text_callback(self, recognized_segment, current_full_sentence, is_sentence_end):
-        if not self.is_running: return
-        self.last_asr_activity_time = time.time() # Update activity time
-
-        if is_sentence_end:
-            final_text = current_full_sentence.strip()
-            if final_text and final_text != self.last_final_asr_text:
-                self.log_message(f"ASR (Final): {final_text}")
-                self.last_final_asr_text = final_text
-                self.raw_text_of_last_forced_sentence = None # Clear this as ASR provided a proper end
-                update_mode = 'replace_interim_with_final' if self.recognized_text_has_interim else 'append_final'
-                self.root.after(0, lambda: self._update_text_area(self.recognized_text_area, final_text + "\n", mode=update_mode))
-                self.asr_output_queue.put(final_text)
-                self.recognized_text_has_interim = False
-            elif not final_text:
-                 self.log_message(f"ASR (Final Empty Ignored)")
-                 if self.recognized_text_has_interim:
-                    self.root.after(0, lambda: self._update_text_area(self.recognized_text_area, "", mode='clear_interim'))
-                 self.recognized_text_has_interim = False
-            else:
-                self.log_message(f"ASR (Duplicate Final Ignored): {final_text}")
-            self.current_recognized_sentence = ""
+        self.pipeline.stop()
+        self.log_message(f"识别文本区域更新耗时: {self.text_views[self.recognized_text_area].get_frame_stats()}")
+        self.log_message(f"UI更新队列统计: {self.ui_updates.get_stats()}, 丢弃日志: {get_dropped_count()}")
+
+    def toggle_profiler(self):
+        # 停止时要等待采样线程并写文件（结果由分析器写入日志），不阻塞Tk主线程
+        if self.profiler.running:
+            threading.Thread(target=self.profiler.stop, name="profiler-stop", daemon=True).start()
         else:
-            # Handle interim results more carefully
-            current_full_sentence_from_asr = current_full_sentence # Keep original for clarity
-            
-            prefix_to_check_against = None
-            if self.raw_text_of_last_forced_sentence:
-                prefix_to_check_against = self.raw_text_of_last_forced_sentence
-            elif self.last_final_asr_text: # If no raw forced text, use the last final text (which might have punc)
-                # Basic attempt to strip common sentence-ending punctuation for comparison
-                # This is a heuristic and might not be perfect.
-                stripped_last_final = self.last_final_asr_text.strip()
-                if stripped_last_final.endswith(('.', '。', '?', '？', '!', '！')):
-                    stripped_last_final = stripped_last_final[:-1]
-                prefix_to_check_against = stripped_last_final.strip() 
-
-            if prefix_to_check_against and current_full_sentence_from_asr.startswith(prefix_to_check_against):
-                potential_new_segment = current_full_sentence_from_asr[len(prefix_to_check_against):].lstrip()
-                if potential_new_segment: 
-                    # self.current_recognized_sentence = prefix_to_check_against + " " + potential_new_segment
-                    # Let's make self.current_recognized_sentence represent the full line as ASR sees it for now.
-                    # The UI update logic in _update_text_area for 'update_interim' should handle replacing the line.
-                    self.current_recognized_sentence = current_full_sentence_from_asr
-                else:
-                    if recognized_segment:
-                         self.log_message(f"ASR (Interim segment, but no new full sentence change from prefix): {recognized_segment}")
-                    return 
-            else:
-                 self.current_recognized_sentence = current_full_sentence_from_asr
-
-            self.log_message(f"ASR (Interim Update): {self.current_recognized_sentence} (Segment: {recognized_segment})")
-            self.root.after(0, lambda: self._update_text_area(self.recognized_text_area, self.current_recognized_sentence, mode='update_interim'))
-            self.recognized_text_has_interim = True
-            # Do not schedule a new timeout check here, it's handled by start_translation_process
-
-    def _force_finalize_current_sentence(self):
-        if not self.is_running or not self.current_recognized_sentence: # Extra check
-            return
-
-        final_text_unpunc = self.current_recognized_sentence.strip()
-        self.raw_text_of_last_forced_sentence = final_text_unpunc # Store the raw text before punctuation
-        final_text = final_text_unpunc # Default to unpunctuated
+            self.profiler.start()
 
-        # Attempt to apply punctuation if model is available
-        if self.asr_instance and hasattr(self.asr_instance, 'punc_model') and self.asr_instance.punc_model and \
-           hasattr(self.asr_instance, 'use_punc') and self.asr_instance.use_punc and final_text_unpunc:
-            try:
-                self.log_message(f"Attempting to punctuate forced-final text: {final_text_unpunc}")
-                punc_res = self.asr_instance.punc_model.generate(final_text_unpunc)
-                # FunASR punc model typically returns a list of dicts, e.g., [{'text': 'punctuated text'}]
-                if punc_res and isinstance(punc_res, list) and len(punc_res) > 0 and 'text' in punc_res[0]:
-                    final_text = punc_res[0]['text']
-                    self.log_message(f"Punctuation applied to forced-final: {final_text}")
-                else:
-                    self.log_message(f"Punctuation model returned unexpected result for '{final_text_unpunc}'. Using unpunctuated.")
-            except Exception as e:
-                self.log_message(f"Error applying punctuation to forced-final text '{final_text_unpunc}': {e}. Using unpunctuated.")
-        
-        self.log_message(f"ASR (Forced Final due to timeout): {final_text}")
-        
-        # Similar logic to normal finalization in asr_text_callback
-        if final_text and final_text != self.last_final_asr_text:
-            self.last_final_asr_text = final_text
-            update_mode = 'replace_interim_with_final' if self.recognized_text_has_interim else 'append_final'
-            self.root.after(0, lambda: self._update_text_area(self.recognized_text_area, final_text + "\n", mode=update_mode))
-            self.asr_output_queue.put(final_text)
-        elif not final_text and self.recognized_text_has_interim: # Handle case where interim was there but final is empty
-            self.root.after(0, lambda: self._update_text_area(self.recognized_text_area, "", mode='clear_interim'))
-
-        self.current_recognized_sentence = "" # Crucial: clear current sentence
-        self.recognized_text_has_interim = False
-        self.last_asr_activity_time = None # Reset to prevent immediate re-trigger if no new audio
-
-    def _check_asr_activity_timeout(self):
-        if not self.is_running: # Stop if service is stopped
-            if self.asr_timeout_check_timer_id:
-                self.root.after_cancel(self.asr_timeout_check_timer_id)
-                self.asr_timeout_check_timer_id = None
-            return
-
-        if self.current_recognized_sentence and self.last_asr_activity_time:
-            if (time.time() - self.last_asr_activity_time) > self.force_sentence_end_timeout:
-                self.log_message("ASR activity timeout detected. Forcing sentence finalization.")
-                self._force_finalize_current_sentence()
-        
-        # Reschedule the check
-        if self.is_running: # Only reschedule if still running
-             self.asr_timeout_check_timer_id = self.root.after(200, self._check_asr_activity_timeout) # Check every 200ms
-
-    def translation_worker(self):
-        while True:
-            try:
-                source_text = self.asr_output_queue.get(timeout=0.5)
-                if not self.is_running and self.asr_output_queue.empty(): break
-                if not source_text or not self.translation_instance:
-                    if not self.is_running: break
-                    continue
-                from_lang_code = "cn"
-                target_lang_name = self.target_lang_var.get()
-                to_lang_code = LANGUAGE_CODES.get(target_lang_name)
-                if not to_lang_code:
-                    self.log_message(f"翻译错误：无效目标语言 {target_lang_name}")
-                    if not self.is_running: break
-                    continue
-                self.log_message(f"开始翻译: {source_text[:30]}... -> {to_lang_code}")
-                try:
-                    translated_text = self.translation_instance.translate(
-                        text=source_text,
-                        from_lang=from_lang_code,
-                        to_lang=to_lang_code
-                    )
-                    if translated_text:
-                        self.log_message(f"翻译完成: {translated_text[:30]}...")
-                        self.translation_output_queue.put(translated_text)
-                        self.root.after(0, lambda t=translated_text: self._update_text_area(self.translated_text_area, t + "\n", mode='append_final'))
-                    else:
-                        self.log_message(f"翻译结果为空 for: {source_text[:30]}")
-                except Exception as e:
-                    self.log_message(f"翻译API调用失败: {e}")
-                self.asr_output_queue.task_done()
-            except queue.Empty:
-                if not self.is_running: break
-                continue
-            except Exception as e:
-                self.log_message(f"翻译线程异常: {e}")
-                if not self.is_running: break
-                time.sleep(0.1)
-        self.log_message("翻译线程已停止。")
-
-    def tts_worker(self):
-        while True:
-            try:
-                translated_text = self.translation_output_queue.get(timeout=0.5)
-                if not self.is_running and self.translation_output_queue.empty(): break
-                if not translated_text or not edge_TTS:
-                    if not self.is_running: break
-                    continue
-                selected_voice = self.tts_voice_var.get()
-                if not selected_voice:
-                    self.log_message("TTS错误: 未选择音色。语音无法合成。")
-                    if not self.is_running: break
-                    continue
-
-                # Get rate and volume from scales
-                rate_val = int(self.tts_rate_var.get())
-                volume_val = int(self.tts_volume_var.get())
-
-                rate_str = f"{rate_val:+d}%"
-                volume_str = f"{volume_val:+d}%"
-
-                self.log_message(f"开始语音合成: {translated_text[:30]}... (音色: {selected_voice}, 语速: {rate_str}, 音量: {volume_str})")
-                future = self.run_async_task(
-                    edge_TTS.text_to_speech(translated_text, selected_voice, rate=rate_str, volume=volume_str)
-                )
-                if future:
-                    try:
-                        success = future.result(timeout=30)
-                        if success:
-                            self.log_message(f"语音播放成功: {translated_text[:30]}...")
-                        else:
-                             self.log_message(f"语音合成或播放失败: {translated_text[:30]}")
-                    except asyncio.TimeoutError:
-                        self.log_message(f"TTS任务超时: {translated_text[:30]}")
-                    except Exception as e:
-                        self.log_message(f"TTS播放时发生错误: {e}")
-                else:
-                    self.log_message("无法调度TTS任务进行播放。")
-                self.translation_output_queue.task_done()
-            except queue.Empty:
-                if not self.is_running: break
-                continue
-            except Exception as e:
-                self.log_message(f"TTS线程异常: {e}")
-                if not self.is_running: break
-                time.sleep(0.1)
-        self.log_message("TTS线程已停止。")
+    def _refresh_diagnostics_menu(self):
+        self.diagnostics_menu.entryconfig(0, label="停止性能采样" if self.profiler.running else "开始性能采样")
 
     def _update_text_area(self, area, text, mode='append_final', clear_all=False):
-        area.config(state="normal")
-        if clear_all:
-            area.delete(1.0, tk.END)
-        elif mode == 'append_final':
-            area.insert(tk.END, text)
-        elif mode == 'update_interim':
-            current_content = area.get(1.0, tk.END).rstrip('\n')
-            last_newline_idx = current_content.rfind('\n')
-            if not self.recognized_text_has_interim:
-                if current_content and not current_content.endswith('\n'):
-                    area.insert(tk.END, "\n")
-                area.insert(tk.END, text)
-            elif last_newline_idx == -1:
-                area.delete(1.0, tk.END)
-                area.insert(1.0, text)
-            else:
-                area.delete(f"1.0 + {last_newline_idx + 1}c", tk.END)
-                area.insert(tk.END, text)
-        elif mode == 'replace_interim_with_final':
-            current_content = area.get(1.0, tk.END).rstrip('\n')
-            last_newline_idx = current_content.rfind('\n')
-            if last_newline_idx == -1:
-                area.delete(1.0, tk.END)
-            else:
-                area.delete(f"1.0 + {last_newline_idx + 1}c", tk.END)
-            current_content_after_delete = area.get(1.0, tk.END).rstrip('\n')
-            if current_content_after_delete and not current_content_after_delete.endswith('\n'):
-                 area.insert(tk.END, "\n")
-            area.insert(tk.END, text)
-        elif mode == 'clear_interim':
-            current_content = area.get(1.0, tk.END).rstrip('\n')
-            last_newline_idx = current_content.rfind('\n')
-            if self.recognized_text_has_interim:
-                if last_newline_idx == -1:
-                    area.delete(1.0, tk.END)
-                else:
-                    area.delete(f"1.0 + {last_newline_idx + 1}c", tk.END)
-        area.see(tk.END)
-        area.config(state="disabled")
+        self.text_views[area].update(text, mode=mode, clear_all=clear_all)
 
     def process_ui_updates(self):
-        self.root.after(200, self.process_ui_updates)
+        # 每帧取出一次工作线程投递的更新
+        self.ui_updates.drain(self._update_text_area, self._insert_log_lines)
+        self.root.after(DEFAULT_FRAME_INTERVAL_MS, self.process_ui_updates)
 
     def on_closing(self):
         self.log_message("应用正在关闭...", True)
-        self.stop_translation_process()
-
-        if self.mixer_initialized: # 确保在关闭前退出mixer
-            self.log_message("正在关闭 Pygame Mixer...")
-            pygame.mixer.quit()
-            self.mixer_initialized = False
-            self.log_message("Pygame Mixer 已关闭。")
-
-        if self.async_loop and self.async_loop.is_running():
-            self.log_message("正在停止Asyncio事件循环...")
-            self.async_loop.call_soon_threadsafe(self.async_loop.stop)
-        if self.async_loop_thread and self.async_loop_thread.is_alive():
-            self.log_message("等待Asyncio线程结束...")
-            self.async_loop_thread.join(timeout=2)
-            if self.async_loop_thread.is_alive():
-                self.log_message("警告: Asyncio线程超时未结束。", True)
-            else:
-                self.log_message("Asyncio线程已停止。")
+        if self.is_running:
+            self.stop_translation_process()
+        self.pipeline.close()
+        self.profiler.stop()
+        for view in self.text_views.values():
+            view.close()
         self.log_message("正在销毁UI...")
+        remove_handler(self.log_pane_handler)
         self.root.destroy()
-        print("应用已关闭。")
+        logger.info("应用已关闭。")
 
     def _update_asr_duration_label(self, value_str):
         try:
@@ -905,30 +501,24 @@ class SimultaneousTranslatorApp:
             pass # Ignore
 
     def _apply_asr_settings_to_instance(self):
-        if self.asr_instance and self.is_running: # Apply only if ASR is active
+        # 运行中实时生效；未运行时只记录到配置，开始同传时再应用
+        if self.is_running:
             try:
-                duration = self.asr_silence_duration_var.get()
-                relative_vol = self.asr_relative_silence_var.get()
-                self.asr_instance.silence_duration_threshold = duration
-                self.asr_instance.relative_silence_threshold = relative_vol
-                # Log less frequently to avoid spamming, perhaps only on significant changes or after a delay
-                # For now, we log every time for debugging.
-                self.log_message(f"实时更新FunASR参数: Duration={duration:.2f}s, RelativeVol={relative_vol:.2f}")
-            except AttributeError:
-                self.log_message("警告: 无法动态修改FunASR的内部参数 (实时更新失败)。")
+                self.pipeline.apply_asr_settings(self.asr_silence_duration_var.get(), self.asr_relative_silence_var.get())
             except Exception as e:
-                self.log_message(f"实时更新FunASR参数时出错: {e}")
-        elif self.asr_instance and not self.is_running:
-             # Store for next run, or simply let the init/start_translation_process handle it.
-             # For now, we do nothing if not running, as init/start will pick up current UI values.
-             pass
+                self.log_message(f"实时更新FunASR参数时出错: {e}", level=logging.ERROR)
+        else:
+            self.config.silence_duration = self.asr_silence_duration_var.get()
+            self.config.relative_silence = self.asr_relative_silence_var.get()
 
 if __name__ == '__main__':
+    setup_logging()
+    install_signal_handler()
     root = tk.Tk()
     app = SimultaneousTranslatorApp(root)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     try:
         root.mainloop()
     except KeyboardInterrupt:
-        print("用户通过Ctrl+C中断mainloop。")
+        logger.info("用户通过Ctrl+C中断mainloop。")
         app.on_closing()
\ No newline at end of file
@@ -0,0 +1,294 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+流水线阶段之间的有界通道
+----------------------------
+ASR → 翻译、翻译 → TTS 之间不再使用无界的 queue.Queue：下游变慢时积压有上限，
+并按配置的策略降级，而不是让延迟与内存无限增长。
+
+满载策略:
+    block        生产者等待空位（可设等待上限，超时后丢弃新条目）
+    drop_oldest  丢弃最早排队的条目，保证输出跟上当前讲话
+    merge        把新条目合并进最后一个排队的条目（相邻句子合并为一句）
+    skip         丢弃新条目（用于TTS通道即跳过朗读，译文仍会显示）
+
+每个通道统计当前/最大深度、排队等待时间（平均/p95/最大）、阻塞时长以及丢弃与合并次数。
+
+生产者与消费者可以是线程（put/get），也可以是asyncio协程（put_async/get_async）：
+ASR处理线程用 put 放入，翻译与TTS协程在事件循环中 await get_async，
+条目到达时通过 call_soon_threadsafe 唤醒，不需要轮询。
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_MERGE = "merge"
+POLICY_SKIP = "skip"
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_MERGE, POLICY_SKIP)
+
+# 保留的等待时间样本数（用于分位数）
+WAIT_SAMPLES = 1000
+
+
+class StageChannel:
+    """
+    线程安全的有界通道，接口与 queue.Queue 的 put/get/get_nowait/empty/qsize 一致
+
+    参数:
+        name: 通道名称（日志与统计中使用）
+        maxsize: 最多排队的条目数（<=0 表示不限，此时策略不起作用）
+        policy: 满载策略，见 POLICIES
+        merge_func: merge 策略使用的函数 (older, newer) -> merged；为空时退化为 drop_oldest
+        on_drop: 条目因满载被丢弃时的回调 (item, reason)，reason 为策略名或 "closed"
+        on_merge: 条目被合并后的回调 (merged, newer)
+        block_timeout: block 策略的最长等待秒数，None表示一直等到有空位或通道关闭
+    """
+
+    def __init__(self, name, maxsize=0, policy=POLICY_BLOCK, merge_func=None,
+                 on_drop=None, on_merge=None, block_timeout=None):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的通道策略: {policy}（可选: {', '.join(POLICIES)}）")
+        self.name = name
+        self.maxsize = int(maxsize or 0)
+        self.policy = policy
+        self.merge_func = merge_func
+        self.on_drop = on_drop
+        self.on_merge = on_merge
+        self.block_timeout = block_timeout
+
+        self._items = deque()  # [item, 入队时间]
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._closed = False
+        # 等待中的协程 (事件循环, Future)
+        self._async_getters = []
+        self._async_putters = []
+
+        self.wait_times = deque(maxlen=WAIT_SAMPLES)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._mutex:
+            self.put_count = 0
+            self.get_count = 0
+            self.dropped = 0
+            self.merged = 0
+            self.max_depth = len(self._items)
+            self.blocked_seconds = 0.0
+            self.wait_times.clear()
+
+    def _full(self):
+        return 0 < self.maxsize <= len(self._items)
+
+    def put(self, item, block=True):
+        """
+        放入一个条目，按策略处理满载
+
+        参数:
+            block: 为False时 block 策略不等待空位，满载即丢弃新条目（供 put_async 使用）
+        返回:
+            True 表示条目已排队（或已合并进排队中的条目），False 表示被丢弃
+        """
+        dropped = []
+        merged = None
+        with self._mutex:
+            if self._closed:
+                accepted = False
+                dropped.append((item, "closed"))
+            else:
+                self.put_count += 1
+                accepted = True
+                if self._full():
+                    if self.policy == POLICY_BLOCK and not block:
+                        accepted = False
+                        dropped.append((item, POLICY_BLOCK))
+                    elif self.policy == POLICY_BLOCK:
+                        start = time.perf_counter()
+                        self._not_full.wait_for(lambda: self._closed or not self._full(), self.block_timeout)
+                        self.blocked_seconds += time.perf_counter() - start
+                        if self._closed or self._full():
+                            accepted = False
+                            dropped.append((item, POLICY_BLOCK))
+                    elif self.policy == POLICY_SKIP:
+                        accepted = False
+                        dropped.append((item, POLICY_SKIP))
+                    elif self.policy == POLICY_MERGE and self.merge_func is not None:
+                        last = self._items[-1]
+                        last[0] = merged = self.merge_func(last[0], item)
+                        self.merged += 1
+                    else:
+                        dropped.append((self._items.popleft()[0], POLICY_DROP_OLDEST))
+                    self.dropped += len(dropped)
+                if accepted and merged is None:
+                    self._items.append([item, time.perf_counter()])
+                    self.max_depth = max(self.max_depth, len(self._items))
+                    self._not_empty.notify()
+                    _wake(self._async_getters)
+
+        # 回调在锁外执行
+        for dropped_item, reason in dropped:
+            if reason != "closed":
+                logger.warning(f"通道 {self.name} 已满（{self.maxsize}条），按 {reason} 策略丢弃一条")
+            self._notify(self.on_drop, dropped_item, reason)
+        if merged is not None:
+            logger.info(f"通道 {self.name} 已满（{self.maxsize}条），新条目已与上一条合并")
+            self._notify(self.on_merge, merged, item)
+        return accepted
+
+    def _notify(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"通道 {self.name} 回调出错: {e}")
+
+    def get(self, block=True, timeout=None):
+        """取出最早的条目；无条目时等待，超时抛出 queue.Empty"""
+        with self._mutex:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+            elif not self._not_empty.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._pop()
+
+    def _pop(self):
+        """取出最早的条目（调用方持有锁）"""
+        item, enqueued_at = self._items.popleft()
+        self.get_count += 1
+        self.wait_times.append(time.perf_counter() - enqueued_at)
+        self._not_full.notify()
+        _wake(self._async_putters)
+        return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    async def get_async(self):
+        """在事件循环中等待并取出最早的条目；任务被取消时直接结束等待"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._mutex:
+                if self._items:
+                    return self._pop()
+                waiter = (loop, loop.create_future())
+                self._async_getters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                self._discard_waiter(self._async_getters, waiter)
+
+    async def put_async(self, item):
+        """
+        在事件循环中放入一个条目，block 策略下以 await 等待空位而不阻塞事件循环
+
+        返回:
+            同 put
+        """
+        if self.policy == POLICY_BLOCK:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            deadline = None if self.block_timeout is None else loop.time() + self.block_timeout
+            while True:
+                with self._mutex:
+                    if self._closed or not self._full():
+                        break
+                    waiter = (loop, loop.create_future())
+                    self._async_putters.append(waiter)
+                remaining = None if deadline is None else deadline - loop.time()
+                try:
+                    if remaining is not None and remaining <= 0:
+                        break
+                    await asyncio.wait_for(waiter[1], remaining)
+                except asyncio.TimeoutError:
+                    break
+                finally:
+                    self._discard_waiter(self._async_putters, waiter)
+            with self._mutex:
+                self.blocked_seconds += time.perf_counter() - start
+        return self.put(item, block=False)
+
+    def _discard_waiter(self, waiters, waiter):
+        with self._mutex:
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def empty(self):
+        with self._mutex:
+            return not self._items
+
+    def qsize(self):
+        with self._mutex:
+            return len(self._items)
+
+    def clear(self):
+        """清空排队的条目，返回被清除的条目列表"""
+        with self._mutex:
+            items = [entry[0] for entry in self._items]
+            self._items.clear()
+            self._not_full.notify_all()
+            _wake(self._async_putters)
+        return items
+
+    def close(self):
+        """关闭通道：唤醒等待中的生产者，之后放入的条目直接丢弃"""
+        with self._mutex:
+            self._closed = True
+            self._not_full.notify_all()
+            self._not_empty.notify_all()
+            _wake(self._async_putters)
+
+    def reopen(self):
+        with self._mutex:
+            self._closed = False
+
+    def get_stats(self):
+        """深度与等待时间仪表（毫秒）"""
+        with self._mutex:
+            waits = sorted(self.wait_times)
+            count = len(waits)
+            return {
+                "policy": self.policy,
+                "maxsize": self.maxsize,
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "put": self.put_count,
+                "got": self.get_count,
+                "dropped": self.dropped,
+                "merged": self.merged,
+                "blocked_ms": round(self.blocked_seconds * 1000, 1),
+                "wait_avg_ms": round(sum(waits) / count * 1000, 1) if count else 0.0,
+                "wait_p95_ms": round(waits[min(count - 1, int(count * 0.95))] * 1000, 1) if count else 0.0,
+                "wait_max_ms": round(waits[-1] * 1000, 1) if count else 0.0,
+            }
+
+
+def _set_waiter_result(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _wake(waiters):
+    """唤醒全部等待中的协程（调用方持有锁；可在任意线程调用）"""
+    for loop, future in waiters:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_set_waiter_result, future)
+    waiters.clear()
@@ -0,0 +1,143 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+启动导入耗时预算检查
+----------------------------
+在新的解释器中导入界面模块（python -X importtime），检查:
+- 导入耗时（多次取中位数）不超过预算
+- 导入后 torch/funasr/edge_tts/sounddevice 等重型依赖仍未加载（它们应在窗口显示后由启动线程导入）
+
+超出预算或提前导入了重型依赖时以非零状态退出，可放在提交前检查或CI中运行。
+
+环境变量:
+    APP_STARTUP_BUDGET_MS  导入耗时预算（毫秒），默认300
+
+使用方法:
+    python startup_budget.py
+    python startup_budget.py --budget-ms 200 --runs 5 --top 15
+    python startup_budget.py --module pipeline_core
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+DEFAULT_MODULE = "simultaneous_translator_app"
+DEFAULT_BUDGET_MS = 300.0
+DEFAULT_RUNS = 3
+
+# 导入界面模块时不应加载的依赖
+HEAVY_MODULES = (
+    "torch", "torchaudio", "funasr", "modelscope",
+    "edge_tts", "aiohttp", "httpx", "requests",
+    "sounddevice", "pygame", "soundfile",
+    "FunASR", "edge_TTS", "translation_module",
+)
+
+_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'elapsed_ms': elapsed * 1000, "
+    "'loaded': sorted(m for m in {heavy!r} if m in sys.modules)}}))\n"
+)
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块名, 自身耗时us, 累计耗时us)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return entries
+
+
+def probe_import(module, python=sys.executable):
+    """在子进程中导入模块一次，返回 (结果dict, importtime条目)"""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run([python, "-X", "importtime", "-c", code],
+                               capture_output=True, text=True, cwd=project_root)
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr.strip()[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(completed.stderr)
+
+
+def check_budget(module=DEFAULT_MODULE, budget_ms=DEFAULT_BUDGET_MS, runs=DEFAULT_RUNS):
+    """
+    多次导入模块并与预算比较
+
+    返回:
+        报告dict，其中 ok 表示是否通过
+    """
+    elapsed = []
+    loaded = set()
+    entries = []
+    for _ in range(max(1, runs)):
+        result, entries = probe_import(module)
+        elapsed.append(result["elapsed_ms"])
+        loaded.update(result["loaded"])
+    median_ms = statistics.median(elapsed)
+    return {
+        "module": module,
+        "budget_ms": budget_ms,
+        "median_ms": round(median_ms, 1),
+        "runs_ms": [round(value, 1) for value in elapsed],
+        "heavy_modules_loaded": sorted(loaded),
+        "ok": median_ms <= budget_ms and not loaded,
+        # 最后一次运行中累计耗时最多的模块
+        "slowest_imports": sorted(entries, key=lambda entry: entry[2], reverse=True),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查界面模块的导入耗时预算")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help=f"要导入的模块 (默认 {DEFAULT_MODULE})")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("APP_STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="导入耗时预算（毫秒，默认 APP_STARTUP_BUDGET_MS 或 300）")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="导入次数，取中位数")
+    parser.add_argument("--top", type=int, default=10, help="列出累计耗时最多的模块数")
+    args = parser.parse_args(argv)
+
+    try:
+        report = check_budget(args.module, args.budget_ms, args.runs)
+    except RuntimeError as e:
+        print(e)
+        return 2
+
+    print(f"导入 {report['module']}: 中位数 {report['median_ms']:.1f}ms "
+          f"(预算 {report['budget_ms']:.0f}ms, 各次 {report['runs_ms']})")
+    print("累计耗时最多的导入:")
+    for name, self_us, cumulative_us in report["slowest_imports"][:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  (自身 {self_us / 1000:6.1f}ms)  {name}")
+    if report["heavy_modules_loaded"]:
+        print(f"失败: 导入时加载了重型依赖 {', '.join(report['heavy_modules_loaded'])}")
+    if report["median_ms"] > report["budget_ms"]:
+        print("失败: 导入耗时超出预算")
+    if report["ok"]:
+        print("通过")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
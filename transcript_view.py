@@ -0,0 +1,263 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+识别/翻译文本区域的常数时间更新
+----------------------------
+- 中间结果所在行由Tk标记（mark）定位，替换中间结果只删除标记到末尾的内容，
+  不再读取整个文本框内容做 rfind，更新耗时与转写长度无关
+- 文本框只保留有限的滚动行数，更早的行按块转存到历史文件中
+- 记录每次更新（含Tk布局）的耗时，可用合成的高频更新测量帧时间
+
+使用方法:
+    python transcript_view.py --updates 5000 --rate 50
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+
+import tkinter as tk
+
+# 中间结果起点的标记名
+INTERIM_MARK = "interim_start"
+
+# 文本框默认保留的行数；超出后一次性转存一批，摊销删除开销
+DEFAULT_MAX_LINES = 500
+DEFAULT_TRIM_LINES = 100
+
+HISTORY_DIR = os.path.join(project_root, "history")
+
+
+class TranscriptHistory:
+    """滚出文本框的旧行写入的历史文件（追加写入，线程安全）"""
+
+    def __init__(self, name, history_dir=HISTORY_DIR):
+        self.path = os.path.join(history_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        self.history_dir = history_dir
+        self._file = None
+        self._lock = threading.Lock()
+        self.spilled_lines = 0
+
+    def write(self, text):
+        if not text:
+            return
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.history_dir, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(text if text.endswith("\n") else text + "\n")
+            self._file.flush()
+            self.spilled_lines += text.count("\n") or 1
+
+    def read_all(self):
+        """读取已转存的全部历史文本"""
+        if not os.path.exists(self.path):
+            return ""
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TranscriptView:
+    """
+    包装一个Tk文本框，提供与 _update_text_area 相同的更新模式，每次更新的耗时为常数
+
+    参数:
+        area: tk.Text / ScrolledText 实例（平时为disabled状态）
+        name: 历史文件名前缀
+        max_lines: 文本框保留的最大行数
+        trim_lines: 超出后一次转存的行数
+        history_dir: 历史文件目录，None表示直接丢弃旧行
+    """
+
+    def __init__(self, area, name="transcript", max_lines=DEFAULT_MAX_LINES,
+                 trim_lines=DEFAULT_TRIM_LINES, history_dir=HISTORY_DIR, autoscroll=True):
+        self.area = area
+        self.max_lines = max(1, int(max_lines))
+        self.trim_lines = max(1, min(int(trim_lines), self.max_lines))
+        self.history = TranscriptHistory(name, history_dir) if history_dir else None
+        self.autoscroll = autoscroll
+        self.has_interim = False
+        self.frame_times = deque(maxlen=2000)
+
+    # ---- 内部操作（调用前文本框须为normal状态） ----
+
+    def _ends_with_newline(self):
+        # 只取末尾一个字符（Tk总在最后附加一个换行，"end-1c"为其位置）
+        last_char = self.area.get("end-2c", "end-1c")
+        return not last_char or last_char == "\n"
+
+    def _line_count(self):
+        return int(self.area.index("end-1c").split(".")[0])
+
+    def _start_new_line(self):
+        if not self._ends_with_newline():
+            self.area.insert("end-1c", "\n")
+
+    def _drop_interim(self):
+        if self.has_interim:
+            self.area.delete(INTERIM_MARK, "end-1c")
+            self.area.mark_unset(INTERIM_MARK)
+            self.has_interim = False
+
+    def _trim_scrollback(self):
+        lines = self._line_count()
+        if lines <= self.max_lines:
+            return
+        cut = lines - self.max_lines + self.trim_lines
+        if self.has_interim:
+            # 不转存中间结果所在行
+            interim_line = int(self.area.index(INTERIM_MARK).split(".")[0])
+            cut = min(cut, interim_line - 1)
+        if cut <= 0:
+            return
+        end_index = f"{cut + 1}.0"
+        if self.history is not None:
+            self.history.write(self.area.get("1.0", end_index))
+        self.area.delete("1.0", end_index)
+
+    # ---- 更新模式 ----
+
+    def append_final(self, text):
+        self.area.insert("end-1c", text)
+
+    def update_interim(self, text):
+        if self.has_interim:
+            self.area.delete(INTERIM_MARK, "end-1c")
+        else:
+            self._start_new_line()
+            self.area.mark_set(INTERIM_MARK, "end-1c")
+            # 左重力：在标记处插入的文本位于标记之后
+            self.area.mark_gravity(INTERIM_MARK, tk.LEFT)
+            self.has_interim = True
+        self.area.insert(INTERIM_MARK, text)
+
+    def replace_interim_with_final(self, text):
+        self._drop_interim()
+        self._start_new_line()
+        self.area.insert("end-1c", text)
+
+    def clear_interim(self):
+        self._drop_interim()
+
+    def clear(self):
+        if self.has_interim:
+            self.area.mark_unset(INTERIM_MARK)
+            self.has_interim = False
+        self.area.delete("1.0", tk.END)
+
+    def update(self, text, mode='append_final', clear_all=False):
+        """按模式更新文本框（在Tk主线程中调用），返回本次耗时（秒）"""
+        start = time.perf_counter()
+        self.area.config(state="normal")
+        try:
+            if clear_all:
+                self.clear()
+            elif mode == 'append_final':
+                self.append_final(text)
+            elif mode == 'update_interim':
+                self.update_interim(text)
+            elif mode == 'replace_interim_with_final':
+                self.replace_interim_with_final(text)
+            elif mode == 'clear_interim':
+                self.clear_interim()
+            self._trim_scrollback()
+            if self.autoscroll:
+                self.area.see(tk.END)
+        finally:
+            self.area.config(state="disabled")
+        elapsed = time.perf_counter() - start
+        self.frame_times.append(elapsed)
+        return elapsed
+
+    def get_frame_stats(self):
+        """最近更新的耗时统计（毫秒）"""
+        if not self.frame_times:
+            return {"updates": 0}
+        times = sorted(self.frame_times)
+        count = len(times)
+        return {
+            "updates": count,
+            "avg_ms": round(sum(times) / count * 1000, 3),
+            "p50_ms": round(times[count // 2] * 1000, 3),
+            "p95_ms": round(times[min(count - 1, int(count * 0.95))] * 1000, 3),
+            "max_ms": round(times[-1] * 1000, 3),
+            "lines": self._line_count(),
+            "spilled_lines": self.history.spilled_lines if self.history else 0,
+        }
+
+    def close(self):
+        if self.history is not None:
+            self.history.close()
+
+
+def run_frame_benchmark(updates=5000, rate=50.0, words_per_sentence=12, max_lines=DEFAULT_MAX_LINES):
+    """
+    用合成的高频中间结果测量帧时间
+
+    每句话逐词产生中间结果（update_interim），句末以最终结果替换；
+    每次更新后执行 update_idletasks，使测得的耗时包含Tk布局与重绘。
+    rate为每秒更新次数，<=0 表示不限速。
+    """
+    import tempfile
+
+    root = tk.Tk()
+    root.withdraw()
+    area = tk.Text(root, height=8, wrap=tk.WORD, state="disabled")
+    area.pack()
+
+    with tempfile.TemporaryDirectory() as history_dir:
+        view = TranscriptView(area, name="benchmark", max_lines=max_lines, history_dir=history_dir)
+        frame_times = []
+        interval = 1.0 / rate if rate > 0 else 0.0
+        words = []
+        for i in range(updates):
+            start = time.perf_counter()
+            words.append(f"word{i % 97}")
+            if len(words) >= words_per_sentence:
+                view.update(" ".join(words) + "\n", mode='replace_interim_with_final')
+                words = []
+            else:
+                view.update(" ".join(words), mode='update_interim')
+            root.update_idletasks()
+            elapsed = time.perf_counter() - start
+            frame_times.append(elapsed)
+            if interval > elapsed:
+                time.sleep(interval - elapsed)
+
+        stats = view.get_frame_stats()
+        view.close()
+    root.destroy()
+
+    frame_times.sort()
+    count = len(frame_times)
+    stats["frame_p50_ms"] = round(frame_times[count // 2] * 1000, 3)
+    stats["frame_p95_ms"] = round(frame_times[min(count - 1, int(count * 0.95))] * 1000, 3)
+    stats["frame_max_ms"] = round(frame_times[-1] * 1000, 3)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="文本区域更新帧时间测量")
+    parser.add_argument("--updates", type=int, default=5000, help="合成更新次数 (默认5000)")
+    parser.add_argument("--rate", type=float, default=0, help="每秒更新次数，0为不限速 (默认0)")
+    parser.add_argument("--max-lines", type=int, default=DEFAULT_MAX_LINES, help="文本框保留行数")
+    args = parser.parse_args()
+
+    result = run_frame_benchmark(args.updates, args.rate, max_lines=args.max_lines)
+    print("\n=== 帧时间统计 ===")
+    for key, value in result.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,370 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+本地翻译记忆库
+----------------------------
+翻译缓存只有在 文本+语言+术语开关 完全相同时才命中，而ASR输出的标点、空白经常变化，
+还有大量近似重复的句子。翻译记忆库:
+- 规范化文本（NFKC、小写、去掉标点与空白）后精确匹配
+- 对字符n-gram计算MinHash签名，按LSH分段建桶，近似匹配只比较同桶的候选（亚线性）
+- 相似度（n-gram Jaccard）不低于阈值且数字一致时直接复用译文，不调用翻译API
+- 条目记录翻译时的术语开关，只复用开关相同的译文；术语表条目与开关无关
+- 以JSONL追加写入磁盘，下次启动时加载；可导入已有的双语术语表（CSV/TSV/JSON）
+
+使用方法:
+    python translation_memory.py import glossary.csv --from cn --to en
+    python translation_memory.py lookup "今天的会议到此结束" --from cn --to en
+    python translation_memory.py stats
+"""
+
+import argparse
+import csv
+import logging
+import re
+import sys
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_PATH = os.path.join(project_root, "memory", "translation_memory.jsonl")
+# 近似匹配复用译文的最低相似度
+DEFAULT_THRESHOLD = 0.85
+# MinHash 签名长度 = 分段数 × 每段行数；16×4 在相似度0.85时几乎必然成为候选，0.5时约64%
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 4
+
+ORIGIN_API = "api"
+ORIGIN_GLOSSARY = "glossary"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_text(text):
+    """NFKC规范化、转小写，去掉标点、符号与空白（用于匹配，不用于输出）"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(char for char in text
+                   if not char.isspace() and unicodedata.category(char)[0] not in "PSZC")
+
+
+def shingles(normalized):
+    """字符n-gram集合：含中日韩文字时用2-gram，否则用3-gram；文本短于n时为整个文本"""
+    n = 2 if any(ord(char) > 0x2e80 for char in normalized) else 3
+    if len(normalized) <= n:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _record(source, target, from_lang, to_lang, origin, terminology):
+    """条目 → JSONL记录（术语开关为 None 时不写出）"""
+    record = {"source": source, "target": target, "from": from_lang, "to": to_lang, "origin": origin}
+    if terminology is not None:
+        record["terminology"] = terminology
+    return record
+
+
+class MemoryMatch:
+    """一次查询的结果"""
+
+    __slots__ = ['source', 'target', 'score', 'exact', 'origin']
+
+    def __init__(self, source, target, score, exact, origin):
+        self.source = source
+        self.target = target
+        self.score = score
+        self.exact = exact
+        self.origin = origin
+
+    def __repr__(self):
+        return f"MemoryMatch(score={self.score:.3f}, exact={self.exact}, source={self.source!r}, target={self.target!r})"
+
+
+class TranslationMemory:
+    """
+    带MinHash/LSH近似索引的翻译记忆库（线程安全）
+
+    参数:
+        path: JSONL文件路径，None表示只在内存中保存
+        threshold: 近似匹配复用译文的最低相似度（0~1），1表示只做规范化后的精确匹配
+        bands / rows: LSH分段数与每段的签名行数
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH, threshold=DEFAULT_THRESHOLD,
+                 bands=DEFAULT_BANDS, rows=DEFAULT_ROWS):
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.RandomState(20250522)
+        num_perm = bands * rows
+        # (a*x + b) mod p 的随机参数；crc32 < 2^32、a < 2^31，乘积不会溢出uint64
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._lock = threading.RLock()
+        self._entries = []        # [source, target, from, to, normalized, shingles, origin, digits, terminology]
+        self._exact = {}          # (from, to, terminology, normalized) -> 条目下标
+        self._buckets = {}        # (from, to, terminology, 段号, 段签名) -> [条目下标]
+        self._file = None
+
+        self.lookups = 0
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    # ---- 索引 ----
+
+    def _signature(self, shingle_set):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+                             dtype=np.uint64, count=len(shingle_set))
+        values = (np.outer(hashes, self._a) + self._b) % np.uint64(_MERSENNE_PRIME)
+        return values.min(axis=0)
+
+    def _band_keys(self, from_lang, to_lang, terminology, signature):
+        rows = self.rows
+        return [(from_lang, to_lang, terminology, band, signature[band * rows:(band + 1) * rows].tobytes())
+                for band in range(self.bands)]
+
+    def _insert(self, source, target, from_lang, to_lang, origin, terminology):
+        """加入（或更新）一个条目，返回是否有变化"""
+        normalized = normalize_text(source)
+        if not normalized or not target:
+            return False
+        key = (from_lang, to_lang, terminology, normalized)
+        index = self._exact.get(key)
+        if index is not None:
+            entry = self._entries[index]
+            # 术语表条目不被API结果覆盖
+            if entry[1] == target or (entry[6] == ORIGIN_GLOSSARY and origin != ORIGIN_GLOSSARY):
+                return False
+            entry[0], entry[1], entry[6] = source, target, origin
+            return True
+        shingle_set = shingles(normalized)
+        index = len(self._entries)
+        self._entries.append([source, target, from_lang, to_lang, normalized, shingle_set, origin,
+                              _DIGITS.findall(normalized), terminology])
+        self._exact[key] = index
+        for band_key in self._band_keys(from_lang, to_lang, terminology, self._signature(shingle_set)):
+            self._buckets.setdefault(band_key, []).append(index)
+        return True
+
+    # ---- 查询与写入 ----
+
+    def lookup(self, text, from_lang, to_lang, threshold=None, terminology=None):
+        """
+        查找可复用的译文
+
+        参数:
+            terminology: 翻译时的术语开关（True/False），只匹配开关相同的条目与术语表条目；
+                None 表示术语开关不影响译文，只匹配同样记录为 None 的条目
+
+        返回:
+            MemoryMatch（相似度不低于阈值的最佳条目），没有时返回None
+        """
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        # 术语表条目记录为 None，优先于API译文
+        lanes = (None,) if terminology is None else (None, terminology)
+        with self._lock:
+            self.lookups += 1
+            for lane in lanes:
+                index = self._exact.get((from_lang, to_lang, lane, normalized))
+                if index is not None:
+                    self.exact_hits += 1
+                    entry = self._entries[index]
+                    return MemoryMatch(entry[0], entry[1], 1.0, True, entry[6])
+            if threshold >= 1.0 or not self._entries:
+                return None
+
+            shingle_set = shingles(normalized)
+            signature = self._signature(shingle_set)
+            candidates = set()
+            for lane in lanes:
+                for band_key in self._band_keys(from_lang, to_lang, lane, signature):
+                    candidates.update(self._buckets.get(band_key, ()))
+            digits = _DIGITS.findall(normalized)
+            best, best_score = None, threshold
+            for index in candidates:
+                entry = self._entries[index]
+                # 数字不同的句子（金额、时间、编号）不能套用译文；先比数字，模板化的句子不必逐个算相似度
+                if entry[7] != digits:
+                    continue
+                score = jaccard(shingle_set, entry[5])
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                return None
+            self.fuzzy_hits += 1
+            return MemoryMatch(best[0], best[1], best_score, False, best[6])
+
+    def add(self, source, target, from_lang, to_lang, origin=ORIGIN_API, terminology=None):
+        """记录一对（原文, 译文），terminology 为翻译时的术语开关，有变化时追加写入磁盘"""
+        if origin == ORIGIN_GLOSSARY:
+            terminology = None
+        with self._lock:
+            if self._insert(source, target, from_lang, to_lang, origin, terminology):
+                self._append(_record(source, target, from_lang, to_lang, origin, terminology))
+
+    # ---- 持久化 ----
+
+    def _load(self, path):
+        loaded = skipped = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._insert(record["source"], record["target"], record["from"], record["to"],
+                                 record.get("origin", ORIGIN_API), record.get("terminology"))
+                    loaded += 1
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+        logger.info(f"翻译记忆库已加载 {len(self._entries)} 条 ({path})"
+                    + (f"，跳过 {skipped} 行损坏记录" if skipped else ""))
+        # 同一原文被多次更新时文件会变长，超过条目数两倍时重写
+        if loaded > 2 * len(self._entries) + 100:
+            self.compact()
+
+    def _append(self, record):
+        if not self.path:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.error(f"写入翻译记忆库失败: {e}")
+
+    def compact(self):
+        """按当前条目重写文件"""
+        if not self.path:
+            return
+        with self._lock:
+            self.close()
+            tmp_path = self.path + ".tmp"
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for source, target, from_lang, to_lang, _, _, origin, _, terminology in self._entries:
+                    f.write(json.dumps(_record(source, target, from_lang, to_lang, origin, terminology),
+                                       ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def import_glossary(self, path, from_lang, to_lang):
+        """
+        导入双语术语表，返回导入的条目数
+
+        支持:
+            .json  {"原文": "译文", ...} 或 [["原文", "译文"], ...]
+            .csv / .tsv / 其他  每行 原文,译文（含制表符时按TSV读取），多余的列被忽略
+        """
+        pairs = []
+        if path.lower().endswith(".json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            pairs = list(data.items()) if isinstance(data, dict) else [tuple(item[:2]) for item in data]
+        else:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                delimiter = "\t" if "\t" in sample else ","
+                pairs = [(row[0], row[1]) for row in csv.reader(f, delimiter=delimiter) if len(row) >= 2]
+        count = 0
+        for source, target in pairs:
+            source, target = str(source).strip(), str(target).strip()
+            if source and target:
+                self.add(source, target, from_lang, to_lang, origin=ORIGIN_GLOSSARY)
+                count += 1
+        logger.info(f"已从 {path} 导入 {count} 条术语 ({from_lang} -> {to_lang})")
+        return count
+
+    # ---- 统计 ----
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.fuzzy_hits
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地翻译记忆库")
+    parser.add_argument("--path", default=DEFAULT_MEMORY_PATH, help="记忆库文件 (默认 memory/translation_memory.jsonl)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="导入双语术语表")
+    import_parser.add_argument("glossary", help="CSV/TSV/JSON 术语表")
+    import_parser.add_argument("--from", dest="from_lang", required=True, help="源语言代码，如 cn")
+    import_parser.add_argument("--to", dest="to_lang", required=True, help="目标语言代码，如 en")
+
+    lookup_parser = subparsers.add_parser("lookup", help="查询可复用的译文")
+    lookup_parser.add_argument("text")
+    lookup_parser.add_argument("--from", dest="from_lang", default="cn")
+    lookup_parser.add_argument("--to", dest="to_lang", default="en")
+    lookup_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    lookup_parser.add_argument("--no-terminology", dest="terminology", action="store_false",
+                               help="查询未使用术语资源时记录的译文")
+
+    subparsers.add_parser("stats", help="条目数")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    memory = TranslationMemory(args.path)
+    try:
+        if args.command == "import":
+            memory.import_glossary(args.glossary, args.from_lang, args.to_lang)
+        elif args.command == "lookup":
+            match = memory.lookup(args.text, args.from_lang, args.to_lang, threshold=args.threshold,
+                                  terminology=args.terminology)
+            print(match if match else "未找到可复用的译文")
+            return 0 if match else 1
+        else:
+            print(json.dumps(memory.get_stats(), ensure_ascii=False, indent=2))
+    finally:
+        memory.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
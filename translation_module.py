@@ -13,35 +13,71 @@ from time import mktime
 import hashlib
 import base64
 import hmac
+import logging
 from urllib.parse import urlencode
 from threading import Lock
 import time
 import threading
-from collections import OrderedDict
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import sys
 import os
 
+from runtime_metrics import observe
+# 语言检测（表驱动，覆盖 LANGUAGE_CODES 中的全部语言）；批量检测请直接使用 language_detect.detect_languages
+from language_detect import detect_language
+
+logger = logging.getLogger(__name__)
+
 # 尝试使用更快的JSON库
 try:
     import ujson as json
 
-    print("使用ujson加速JSON处理")
+    logger.debug("使用ujson加速JSON处理")
 except ImportError:
     import json
 
-    print("使用标准json库")
+    logger.debug("使用标准json库")
 
 # 尝试使用更快的HTTP库
 try:
     import httpx
 
     use_httpx = True
-    print("使用httpx加速HTTP请求")
+    logger.debug("使用httpx加速HTTP请求")
 except ImportError:
     import requests
 
     use_httpx = False
-    print("使用标准requests库")
+    logger.debug("使用标准requests库")
+
+# HTTP/2 多路复用需要 h2 包（pip install "httpx[http2]"），未安装时使用HTTP/1.1
+try:
+    import h2  # noqa: F401
+
+    has_h2 = True
+except ImportError:
+    has_h2 = False
+
+# 连接池：空闲连接保留时长（秒；httpx默认只有5秒，会议中稍一停顿首句就要重新握手）与连接数上限
+KEEPALIVE_EXPIRY = 60.0
+MAX_CONNECTIONS = 4
+# 保温：空闲超过该秒数时发一个轻量请求刷新连接（最长空闲约为两倍间隔，应小于服务端空闲超时与 KEEPALIVE_EXPIRY）
+KEEP_WARM_INTERVAL = 20.0
+
+# 请求对冲：请求耗时超过最近请求的p95时再发一个相同请求，取先返回的结果
+LATENCY_WINDOW = 200        # 滚动窗口内的请求耗时样本数
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20      # 样本不足时不对冲
+HEDGE_MIN_DELAY = 0.2       # 对冲等待的下限（秒），避免p95很小时几乎每个请求都对冲
+HEDGE_BUDGET = 0.1          # 最近 HEDGE_WINDOW 个请求中最多对冲的比例
+HEDGE_WINDOW = 100
+
+# 熔断：连续失败达到次数后断开，冷却期内直接失败（回退到缓存/翻译记忆库），之后放行一个探测请求
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 10.0
+# 熔断期间从翻译记忆库取近似译文的最低相似度（比正常复用宽松）
+FALLBACK_MEMORY_THRESHOLD = 0.7
 
 # 支持的语言代码
 LANGUAGE_CODES = {
@@ -120,6 +156,9 @@ LANGUAGE_CODES = {
 # 语言代码反向映射（用于显示）
 LANGUAGE_NAMES = {code: name for name, code in LANGUAGE_CODES.items()}
 
+# 术语资源（res_id）只对中英互译生效
+TERMINOLOGY_PAIRS = {("cn", "en"), ("en", "cn")}
+
 
 class LRUCache:
     """基于OrderedDict实现的LRU缓存"""
@@ -161,15 +200,137 @@ class LRUCache:
         return len(self.cache)
 
 
+class ConnectionStats:
+    """翻译请求的连接复用统计（通过httpx的trace扩展判断每个请求是否新建了连接）"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.requests = 0
+        self.warmups = 0
+        self.new_connections = 0
+        self.reused = 0
+        self.handshake_seconds = []
+        self.http_versions = Counter()
+
+    def trace(self):
+        """返回单个请求的trace回调与结果字典"""
+        events = {}
+
+        def callback(event_name, info):
+            # 只有新建连接时才会出现 connect_tcp / start_tls 事件
+            if event_name.startswith("connection."):
+                events[event_name] = time.perf_counter()
+
+        return callback, events
+
+    def record(self, events, http_version, warmup=False):
+        with self.lock:
+            if warmup:
+                self.warmups += 1
+            else:
+                self.requests += 1
+            self.http_versions[http_version] += 1
+            started = events.get("connection.connect_tcp.started")
+            if started is None:
+                self.reused += 1
+                return
+            self.new_connections += 1
+            finished = events.get("connection.start_tls.complete", events.get("connection.connect_tcp.complete"))
+            if finished is not None:
+                self.handshake_seconds.append(finished - started)
+
+    def get_stats(self):
+        with self.lock:
+            total = self.new_connections + self.reused
+            handshakes = self.handshake_seconds
+            return {
+                "requests": self.requests,
+                "warmups": self.warmups,
+                "new_connections": self.new_connections,
+                "reused": self.reused,
+                "reuse_rate": round(self.reused / total, 3) if total else 0.0,
+                "handshake_avg_ms": round(sum(handshakes) / len(handshakes) * 1000, 1) if handshakes else 0.0,
+                "handshake_max_ms": round(max(handshakes) * 1000, 1) if handshakes else 0.0,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+class CircuitBreaker:
+    """
+    翻译服务熔断器
+
+    closed 正常放行；连续失败 failure_threshold 次后 open，cooldown 秒内直接拒绝；
+    冷却结束后 half_open 放行一个探测请求，成功则恢复 closed，失败则重新 open。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.lock = Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self):
+        """是否放行一个请求"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            # 冷却中，或半开状态的探测请求尚未返回
+            self.rejected += 1
+            return False
+
+    @property
+    def degraded(self):
+        return self.state != self.CLOSED
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info("翻译服务已恢复，熔断器关闭")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.opens += 1
+                logger.warning(f"翻译服务连续失败{self.failures}次，熔断{self.cooldown:.0f}秒（期间使用缓存/翻译记忆库）")
+
+    def get_stats(self):
+        with self.lock:
+            return {"state": self.state, "failures": self.failures,
+                    "opens": self.opens, "rejected": self.rejected}
+
+
 class TranslationModule:
     """优化的星火机器翻译模块 - 性能优化版"""
 
     # 使用__slots__减少内存占用
-    __slots__ = ['app_id', 'api_secret', 'api_key', 'url', 'res_id',
+    __slots__ = ['app_id', 'api_secret', 'api_key', 'url', 'host', 'res_id',
                  'lock', 'cache', 'cache_size', 'last_request_time',
-                 'request_interval', 'client', 'timeout', 'session_lock']
-
-    def __init__(self, app_id, api_secret, api_key, cache_size=200):
+                 'request_interval', 'client', 'timeout', 'http2',
+                 'cache_hits', 'cache_misses', 'request_count', 'request_errors',
+                 'memory', 'memory_hits', 'connection_stats', 'last_activity',
+                 'keep_warm_interval', 'keep_warm_thread', 'keep_warm_stop',
+                 'hedging', 'executor', 'request_latencies', 'latencies', 'hedge_window',
+                 'hedged_requests', 'hedge_wins', 'breaker', 'fallbacks']
+
+    def __init__(self, app_id, api_secret, api_key, cache_size=200, memory=None,
+                 url='https://itrans.xf-yun.com/v1/its', http2=None, verify=True,
+                 keep_warm_interval=KEEP_WARM_INTERVAL, hedging=True):
         """
         初始化翻译模块
 
@@ -178,11 +339,18 @@ class TranslationModule:
             api_secret: APISecret
             api_key: APIKey
             cache_size: 缓存大小，默认200条
+            memory: 翻译记忆库（translation_memory.TranslationMemory），None表示不使用
+            url: 翻译接口地址（本地替身服务器测试时修改）
+            http2: 是否启用HTTP/2（服务端支持时多路复用），None表示安装了h2即启用
+            verify: TLS证书校验，可传入CA证书路径（如替身服务器的自签名证书）
+            keep_warm_interval: 保温间隔秒数，见 start_keep_warm
+            hedging: 请求慢于最近p95时是否发送对冲请求
         """
         self.app_id = app_id
         self.api_secret = api_secret
         self.api_key = api_key
-        self.url = 'https://itrans.xf-yun.com/v1/its'
+        self.url = url
+        self.host = self.parse_url(url)["host"]
         self.res_id = "its_en_cn_word"  # 术语资源ID
 
         # 线程安全锁
@@ -191,6 +359,29 @@ class TranslationModule:
         # 翻译结果缓存，使用LRU策略
         self.cache_size = cache_size
         self.cache = LRUCache(capacity=cache_size)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # 翻译记忆库：缓存未命中时先查相同或近似的历史译文
+        self.memory = memory
+        self.memory_hits = 0
+
+        # 请求统计
+        self.request_count = 0
+        self.request_errors = 0
+        # 单个HTTP请求耗时（决定对冲时机）与调用方看到的翻译耗时（含对冲，用于p50/p99）
+        self.request_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+        # 请求对冲与熔断
+        self.hedging = hedging
+        self.executor = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS,
+                                           thread_name_prefix="translation-request") if hedging else None
+        self.hedge_window = deque(maxlen=HEDGE_WINDOW)
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.breaker = CircuitBreaker()
+        self.fallbacks = 0
 
         # 请求速率控制
         self.last_request_time = 0
@@ -198,11 +389,27 @@ class TranslationModule:
 
         # HTTP客户端设置
         self.timeout = 5.0  # 请求超时设置
-
-        # 如果使用httpx，创建一个客户端实例
+        self.http2 = has_h2 if http2 is None else bool(http2 and has_h2)
+        if http2 and not has_h2:
+            logger.warning("未安装h2包，翻译请求使用HTTP/1.1（pip install \"httpx[http2]\"）")
+
+        # 连接复用统计与保温
+        self.connection_stats = ConnectionStats()
+        self.last_activity = 0.0
+        self.keep_warm_interval = keep_warm_interval
+        self.keep_warm_thread = None
+        self.keep_warm_stop = threading.Event()
+
+        # 如果使用httpx，创建一个客户端实例（线程安全，HTTP/2时并发请求共用一条连接）
         if use_httpx:
-            self.client = httpx.Client(timeout=self.timeout)
-            self.session_lock = Lock()
+            self.client = httpx.Client(
+                timeout=self.timeout,
+                http2=self.http2,
+                verify=verify,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_CONNECTIONS,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY)
+            )
         else:
             self.client = None
 
@@ -279,7 +486,7 @@ class TranslationModule:
         }
 
         # 添加术语资源
-        if use_terminology and (from_lang == "cn" and to_lang == "en" or from_lang == "en" and to_lang == "cn"):
+        if use_terminology and (from_lang, to_lang) in TERMINOLOGY_PAIRS:
             body["header"]["res_id"] = self.res_id
 
         return body
@@ -288,7 +495,7 @@ class TranslationModule:
         """准备请求头"""
         return {
             'content-type': "application/json",
-            'host': 'itrans.xf-yun.com',
+            'host': self.host,
             'app_id': self.app_id
         }
 
@@ -322,26 +529,27 @@ class TranslationModule:
                     # 如果不是JSON格式，返回原始文本
                     return translated_text
             else:
-                print(f"翻译API错误: {result}")
+                logger.error(f"翻译API错误: {result}")
                 return None
         except Exception as e:
-            print(f"解析响应出错: {str(e)}")
+            logger.error(f"解析响应出错: {str(e)}")
             return None
 
     def _rate_limit(self):
         """简单的请求速率限制"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
+        with self.lock:
+            current_time = time.time()
+            elapsed = current_time - self.last_request_time
 
-        # 如果距离上次请求时间太短，则等待
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
+            # 如果距离上次请求时间太短，则等待
+            if elapsed < self.request_interval:
+                time.sleep(self.request_interval - elapsed)
 
-        # 更新最后请求时间
-        self.last_request_time = time.time()
+            # 更新最后请求时间
+            self.last_request_time = time.time()
 
-    def _do_translate(self, text, from_lang, to_lang, use_terminology):
-        """实际执行翻译的方法（不含缓存）"""
+    def _send_request(self, text, from_lang, to_lang, use_terminology):
+        """发送一次翻译请求，返回译文（出错时为None）"""
         try:
             # 应用速率限制
             self._rate_limit()
@@ -352,13 +560,18 @@ class TranslationModule:
             headers = self._prepare_headers()
 
             # 发送请求（使用更高效的HTTP客户端）
+            request_start = time.perf_counter()
+            self.request_count += 1
+            self.last_activity = time.monotonic()
             if use_httpx:
-                with self.session_lock:
-                    response = self.client.post(
-                        request_url,
-                        json=body,  # httpx会自动处理JSON序列化
-                        headers=headers
-                    )
+                trace, events = self.connection_stats.trace()
+                response = self.client.post(
+                    request_url,
+                    json=body,  # httpx会自动处理JSON序列化
+                    headers=headers,
+                    extensions={"trace": trace}
+                )
+                self.connection_stats.record(events, response.http_version)
             else:
                 # 使用标准requests
                 json_data = json.dumps(body)
@@ -369,12 +582,72 @@ class TranslationModule:
                     timeout=self.timeout
                 )
 
+            elapsed = time.perf_counter() - request_start
+            observe("translation.request", elapsed)
+
             # 解析响应
-            return self._parse_response(response)
+            result = self._parse_response(response)
+            if result is None:
+                self.request_errors += 1
+            else:
+                self.request_latencies.append(elapsed)
+            return result
 
         except Exception as e:
-            print(f"翻译过程出错: {str(e)}")
+            self.request_errors += 1
+            logger.error(f"翻译过程出错: {str(e)}")
+            return None
+
+    def _hedge_delay(self):
+        """对冲前等待的秒数（最近请求耗时的p95）；样本不足或未启用对冲时为None"""
+        if not self.hedging or len(self.request_latencies) < HEDGE_MIN_SAMPLES:
             return None
+        samples = sorted(self.request_latencies)
+        return max(HEDGE_MIN_DELAY, samples[min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE))])
+
+    def _hedge_allowed(self):
+        # 对冲预算：最近的请求中对冲比例不超过 HEDGE_BUDGET
+        return sum(self.hedge_window) < max(1.0, HEDGE_BUDGET * len(self.hedge_window))
+
+    def _send_hedged(self, delay, *args):
+        """先发一个请求，delay秒内未返回且预算允许时再发一个，返回先成功的结果"""
+        futures = [self.executor.submit(self._send_request, *args)]
+        done, _ = wait(futures, timeout=delay)
+        hedged = not done and self._hedge_allowed()
+        self.hedge_window.append(hedged)
+        if hedged:
+            self.hedged_requests += 1
+            futures.append(self.executor.submit(self._send_request, *args))
+
+        # 落后的请求无法中止，在线程池中结束后结果被丢弃
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    if future is not futures[0]:
+                        self.hedge_wins += 1
+                    return result
+        return None
+
+    def _do_translate(self, text, from_lang, to_lang, use_terminology):
+        """实际执行翻译的方法（不含缓存）：熔断时直接失败，慢请求按需对冲"""
+        if not self.breaker.allow():
+            return None
+        start = time.perf_counter()
+        delay = self._hedge_delay()
+        args = (text, from_lang, to_lang, use_terminology)
+        if delay is None:
+            result = self._send_request(*args)
+        else:
+            result = self._send_hedged(delay, *args)
+        if result is None:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            self.latencies.append(time.perf_counter() - start)
+        return result
 
     def translate(self, text, from_lang="cn", to_lang="en", use_terminology=True, use_cache=True):
         """
@@ -407,18 +680,40 @@ class TranslationModule:
         # 生成缓存键
         if use_cache:
             cache_key = f"{text}_{from_lang}_{to_lang}_{use_terminology}"
+            # 翻译记忆库按术语开关分开存取；术语资源不生效的语言对与开关无关（None）
+            terminology = bool(use_terminology) if (from_lang, to_lang) in TERMINOLOGY_PAIRS else None
 
             # 检查缓存
             cached_result = self.cache.get(cache_key)
             if cached_result is not None:
+                self.cache_hits += 1
                 return cached_result
+            self.cache_misses += 1
+
+            # 检查翻译记忆库
+            if self.memory is not None:
+                match = self.memory.lookup(text, from_lang, to_lang, terminology=terminology)
+                if match is not None:
+                    self.memory_hits += 1
+                    self.cache.put(cache_key, match.target)
+                    return match.target
 
         # 执行翻译
         result = self._do_translate(text, from_lang, to_lang, use_terminology)
 
-        # 更新缓存
+        # 翻译服务熔断或失败时，从翻译记忆库取相似度稍低的历史译文
+        if result is None and use_cache and self.breaker.degraded and self.memory is not None:
+            match = self.memory.lookup(text, from_lang, to_lang, threshold=FALLBACK_MEMORY_THRESHOLD,
+                                       terminology=terminology)
+            if match is not None:
+                self.fallbacks += 1
+                return match.target
+
+        # 更新缓存与翻译记忆库
         if use_cache and result:
             self.cache.put(cache_key, result)
+            if self.memory is not None:
+                self.memory.add(text, result, from_lang, to_lang, terminology=terminology)
 
         return result
 
@@ -450,11 +745,88 @@ class TranslationModule:
 
     def get_cache_stats(self):
         """获取缓存统计信息"""
-        return {
+        lookups = self.cache_hits + self.cache_misses
+        stats = {
             "capacity": self.cache_size,
-            "current_size": len(self.cache)
+            "current_size": len(self.cache),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "memory_hits": self.memory_hits,
+            "requests": self.request_count,
+            "request_errors": self.request_errors,
+            "connections": self.connection_stats.get_stats(),
+        }
+        stats.update(self.get_request_stats())
+        if self.memory is not None:
+            stats["memory"] = self.memory.get_stats()
+        return stats
+
+    def get_request_stats(self):
+        """翻译耗时分位数（毫秒，含对冲）、对冲率与熔断状态"""
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        window = len(self.hedge_window)
+        return {
+            "latency_p50_ms": round(latencies[int(count * 0.5)] * 1000, 1) if count else 0.0,
+            "latency_p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 1) if count else 0.0,
+            "hedge_delay_ms": round((self._hedge_delay() or 0.0) * 1000, 1),
+            "hedged": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(sum(self.hedge_window) / window, 3) if window else 0.0,
+            "breaker": self.breaker.get_stats(),
+            "fallbacks": self.fallbacks,
         }
 
+    def warm_up(self):
+        """
+        预先建立（或刷新）到翻译服务的连接，使下一个翻译请求不必等待TCP/TLS握手
+
+        发送不带认证的HEAD请求，只为建立连接，响应状态不重要。
+        返回:
+            是否成功（未使用httpx或网络错误时为False）
+        """
+        if not use_httpx or self.client is None:
+            return False
+        self.last_activity = time.monotonic()
+        trace, events = self.connection_stats.trace()
+        try:
+            response = self.client.head(self.url, extensions={"trace": trace})
+        except httpx.HTTPError as e:
+            logger.warning(f"翻译连接预热失败: {e}")
+            return False
+        self.connection_stats.record(events, response.http_version, warmup=True)
+        return True
+
+    def start_keep_warm(self):
+        """会话开始时预先建立连接，之后在空闲超过 keep_warm_interval 秒时刷新，避免空闲断开后首句重新握手"""
+        if not use_httpx or (self.keep_warm_thread and self.keep_warm_thread.is_alive()):
+            return
+        self.keep_warm_stop.clear()
+        self.keep_warm_thread = threading.Thread(target=self._keep_warm_loop, name="translation-keep-warm", daemon=True)
+        self.keep_warm_thread.start()
+
+    def stop_keep_warm(self):
+        self.keep_warm_stop.set()
+        if self.keep_warm_thread:
+            self.keep_warm_thread.join(timeout=self.timeout)
+            self.keep_warm_thread = None
+
+    def _keep_warm_loop(self):
+        self.warm_up()
+        while not self.keep_warm_stop.wait(self.keep_warm_interval):
+            if time.monotonic() - self.last_activity >= self.keep_warm_interval:
+                logger.debug("翻译连接空闲，刷新连接")
+                self.warm_up()
+
+    def close(self):
+        """停止保温并关闭HTTP客户端"""
+        self.stop_keep_warm()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        if use_httpx and self.client:
+            self.client.close()
+
     def __del__(self):
         """清理资源"""
         try:
@@ -465,57 +837,6 @@ class TranslationModule:
             pass
 
 
-def detect_language(text):
-    """
-    简单的语言检测函数，根据文本特征推测语言
-
-    参数:
-        text: 要检测的文本
-
-    返回:
-        检测到的语言代码
-    """
-    # 计算不同字符集的字符出现频率
-    char_counts = {
-        'cn': 0,  # 中文
-        'en': 0,  # 英文
-        'ja': 0,  # 日文（假设日文包含汉字）
-        'es': 0,  # 西班牙文
-        'other': 0  # 其他语言
-    }
-
-    # 简单的语言检测逻辑
-    for char in text:
-        if '\u4e00' <= char <= '\u9fff':
-            # 汉字范围 (中文/日文)
-            char_counts['cn'] += 1
-        elif ('a' <= char.lower() <= 'z') or char in "''":
-            # 英文字母
-            char_counts['en'] += 1
-        elif '\u3040' <= char <= '\u30ff':
-            # 日文平假名和片假名
-            char_counts['ja'] += 1
-        elif char in 'áéíóúüñ¿¡':
-            # 西班牙文特殊字符
-            char_counts['es'] += 1
-        elif char.isalpha():
-            # 其他字母
-            char_counts['other'] += 1
-
-    # 确定主要语言
-    if char_counts['ja'] > 0:
-        return 'ja'  # 有日文假名，判断为日文
-    elif char_counts['cn'] > char_counts['en'] and char_counts['cn'] > char_counts['other']:
-        return 'cn'  # 中文字符占多数
-    elif char_counts['es'] > 0 and char_counts['en'] > 0:
-        return 'es'  # 有西班牙文特殊字符
-    elif char_counts['en'] > 0:
-        return 'en'  # 英文字符占多数
-
-    # 默认返回英文
-    return 'en'
-
-
 def clear_screen():
     """清除终端屏幕"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -606,6 +927,9 @@ def interactive_translation():
 
 # 主程序入口
 if __name__ == "__main__":
+    from log_config import setup_logging
+
+    setup_logging()
     try:
         interactive_translation()
     except KeyboardInterrupt:
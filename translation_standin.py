@@ -0,0 +1,313 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+本地TLS翻译替身服务器
+----------------------------
+在本机模拟讯飞 itrans 接口（HTTPS，响应格式相同），用于在不访问真实服务、不消耗额度的情况下
+检查 TranslationModule 的连接行为：连接是否复用、空闲断开后是否重新握手、保温是否生效。
+
+- 证书: 启动时用 openssl 生成自签名证书，客户端以 verify=证书路径 信任它
+- 空闲超时: 连接空闲超过 idle_timeout 秒后服务端主动关闭（模拟真实服务端的keep-alive超时）
+- 响应: 译文为 "[目标语言] 原文"，可设置固定处理延迟，以及按比例出现的慢响应（长尾）
+- 故障: failing 为True时返回错误响应（检查熔断与回退）
+- 统计: 服务端接受的TCP连接数与请求数
+
+只支持HTTP/1.1（ALPN协商为 http/1.1），客户端启用HTTP/2时会自动回落。
+
+使用方法:
+    python translation_standin.py                                  # 对比保温关闭/开启时的首句延迟与新建连接数
+    python translation_standin.py --requests 8 --idle 3 --server-idle-timeout 2 --keep-warm-interval 0.5
+    python translation_standin.py --tail                           # 长尾延迟下对冲关闭/开启的p50/p99，以及服务故障时的熔断
+    python translation_standin.py --serve --port 8443              # 只运行替身服务器
+"""
+
+import argparse
+import base64
+import logging
+import random
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 尝试使用更快的JSON库
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger(__name__)
+
+
+def make_self_signed_cert(directory, host="localhost"):
+    """
+    生成自签名证书
+
+    返回:
+        (证书路径, 私钥路径)
+    """
+    openssl = shutil.which("openssl")
+    if openssl is None:
+        raise RuntimeError("未找到openssl，无法生成替身服务器的自签名证书")
+    cert_path = os.path.join(directory, "standin_cert.pem")
+    key_path = os.path.join(directory, "standin_key.pem")
+    subprocess.run(
+        [openssl, "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key_path, "-out", cert_path, "-subj", f"/CN={host}",
+         "-addext", f"subjectAltName=DNS:{host},IP:127.0.0.1"],
+        check=True, capture_output=True)
+    return cert_path, key_path
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # 读取下一个请求时的超时即连接空闲超时，超时后关闭连接
+        self.timeout = self.server.idle_timeout
+        super().setup()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.count_request()
+        its = body.get("parameter", {}).get("its", {})
+        text = base64.b64decode(body.get("payload", {}).get("input_data", {}).get("text", "")).decode("utf-8")
+        delay = self.server.response_delay()
+        if delay > 0:
+            time.sleep(delay)
+        if self.server.failing:
+            payload = json.dumps({"header": {"code": 10163, "message": "standin failure"}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        result = json.dumps({"trans_result": {"dst": f"[{its.get('to', '')}] {text}"}}, ensure_ascii=False)
+        payload = json.dumps({
+            "header": {"code": 0, "message": "success"},
+            "payload": {"result": {"text": base64.b64encode(result.encode("utf-8")).decode("ascii")}},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("替身服务器: " + format, *args)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    本地HTTPS翻译替身服务器（在后台线程中运行）
+
+    参数:
+        port: 监听端口，0表示自动分配
+        latency_ms: 每个翻译请求的处理延迟
+        idle_timeout: 连接空闲多少秒后由服务端关闭
+        cert_dir: 证书目录，None表示使用临时目录
+        slow_ratio: 慢响应的比例（0~1）
+        slow_ms: 慢响应的处理延迟
+        seed: 慢响应随机数种子（结果可复现）
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=30.0, idle_timeout=5.0, cert_dir=None,
+                 slow_ratio=0.0, slow_ms=1500.0, seed=0):
+        super().__init__(("127.0.0.1", port), _StandinHandler)
+        self.latency = latency_ms / 1000.0
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_ms / 1000.0
+        self.random = random.Random(seed)
+        self.failing = False
+        self.idle_timeout = idle_timeout
+        self._tempdir = None
+        if cert_dir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="translation_standin_")
+            cert_dir = self._tempdir.name
+        self.cafile, key_path = make_self_signed_cert(cert_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cafile, key_path)
+        context.set_alpn_protocols(["http/1.1"])
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"https://localhost:{self.server_address[1]}/v1/its"
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def response_delay(self):
+        with self.lock:
+            slow = self.slow_ratio > 0 and self.random.random() < self.slow_ratio
+        return self.slow_latency if slow else self.latency
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="translation-standin", daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+
+def run_scenario(requests=6, idle=3.0, keep_warm=False, keep_warm_interval=0.5,
+                 server_idle_timeout=2.0, latency_ms=30.0):
+    """
+    模拟会议中间歇的句子：每句之间空闲 idle 秒（长于服务端空闲超时时连接会被关闭）
+
+    返回:
+        报告字典（各句延迟、客户端连接统计、服务端连接数）
+    """
+    from translation_module import TranslationModule
+
+    server = StandinServer(latency_ms=latency_ms, idle_timeout=server_idle_timeout)
+    server.start()
+    translator = TranslationModule(app_id="standin", api_secret="secret", api_key="key",
+                                   url=server.url, verify=server.cafile,
+                                   keep_warm_interval=keep_warm_interval)
+    latencies = []
+    try:
+        if keep_warm:
+            translator.start_keep_warm()
+        for index in range(requests):
+            if index:
+                time.sleep(idle)
+            start = time.perf_counter()
+            result = translator.translate(f"第{index + 1}句测试文本", from_lang="cn", to_lang="en", use_cache=False)
+            latencies.append(round((time.perf_counter() - start) * 1000, 1))
+            if not result:
+                raise RuntimeError("替身服务器翻译失败")
+    finally:
+        translator.close()
+        server.stop()
+    return {
+        "keep_warm": keep_warm,
+        "latencies_ms": latencies,
+        "connections": translator.connection_stats.get_stats(),
+        "server_connections": server.connections,
+        "server_requests": server.requests,
+    }
+
+
+def run_tail_scenario(requests=120, hedging=True, slow_ratio=0.05, slow_ms=1500.0,
+                      latency_ms=30.0, outage_requests=10):
+    """
+    长尾延迟场景：slow_ratio 比例的响应需要 slow_ms；之后服务端持续返回错误，检查熔断与回退
+
+    返回:
+        报告字典（请求统计：p50/p99、对冲次数与对冲率、熔断状态；故障期间的平均失败耗时）
+    """
+    from translation_module import TranslationModule
+
+    server = StandinServer(latency_ms=latency_ms, slow_ratio=slow_ratio, slow_ms=slow_ms)
+    server.start()
+    translator = TranslationModule(app_id="standin", api_secret="secret", api_key="key",
+                                   url=server.url, verify=server.cafile, hedging=hedging)
+    try:
+        for index in range(requests):
+            translator.translate(f"第{index + 1}句测试文本", from_lang="cn", to_lang="en", use_cache=False)
+        stats = translator.get_request_stats()
+
+        server.failing = True
+        start = time.perf_counter()
+        for index in range(outage_requests):
+            translator.translate(f"故障期间第{index + 1}句", from_lang="cn", to_lang="en", use_cache=False)
+        outage_ms = (time.perf_counter() - start) * 1000 / max(1, outage_requests)
+    finally:
+        translator.close()
+        server.stop()
+    return {
+        "hedging": hedging,
+        "requests": stats,
+        "breaker": translator.breaker.get_stats(),
+        "outage_avg_ms": round(outage_ms, 1),
+        "server_requests": server.requests,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地TLS翻译替身服务器与连接保温对比")
+    parser.add_argument("--serve", action="store_true", help="只运行替身服务器，直到Ctrl+C")
+    parser.add_argument("--port", type=int, default=0, help="--serve 时的监听端口")
+    parser.add_argument("--requests", type=int, default=6, help="每种场景的翻译请求数")
+    parser.add_argument("--idle", type=float, default=3.0, help="请求之间的空闲秒数")
+    parser.add_argument("--server-idle-timeout", type=float, default=2.0, help="服务端关闭空闲连接的秒数")
+    parser.add_argument("--keep-warm-interval", type=float, default=0.5, help="客户端保温间隔秒数")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="替身服务器处理延迟")
+    parser.add_argument("--tail", action="store_true", help="运行长尾延迟/熔断场景")
+    parser.add_argument("--slow-ratio", type=float, default=0.05, help="--tail 时慢响应的比例")
+    parser.add_argument("--slow-ms", type=float, default=1500.0, help="--tail 时慢响应的处理延迟")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.serve:
+        server = StandinServer(port=args.port, latency_ms=args.latency_ms, idle_timeout=args.server_idle_timeout)
+        print(f"替身服务器: {server.start()}  (CA证书: {server.cafile})")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+        return 0
+
+    if args.tail:
+        for hedging in (False, True):
+            report = run_tail_scenario(max(args.requests, 120), hedging, args.slow_ratio, args.slow_ms, args.latency_ms)
+            stats = report["requests"]
+            print(f"对冲{'开启' if hedging else '关闭'}: p50 {stats['latency_p50_ms']}ms, p99 {stats['latency_p99_ms']}ms, "
+                  f"对冲 {stats['hedged']} 次 (对冲率 {stats['hedge_rate']:.1%}, 对冲请求先返回 {stats['hedge_wins']} 次)")
+            print(f"  服务故障: 熔断 {report['breaker']['opens']} 次, 直接拒绝 {report['breaker']['rejected']} 次, "
+                  f"平均失败耗时 {report['outage_avg_ms']}ms, 服务端共收到 {report['server_requests']} 个请求")
+        return 0
+
+    for keep_warm in (False, True):
+        report = run_scenario(args.requests, args.idle, keep_warm, args.keep_warm_interval,
+                              args.server_idle_timeout, args.latency_ms)
+        stats = report["connections"]
+        print(f"保温{'开启' if keep_warm else '关闭'}: 各句延迟(ms) {report['latencies_ms']}")
+        print(f"  新建连接 {stats['new_connections']} 次 (握手平均 {stats['handshake_avg_ms']}ms), "
+              f"复用 {stats['reused']} 次, 预热 {stats['warmups']} 次, "
+              f"服务端连接 {report['server_connections']} 个, 协议 {stats['http_versions']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
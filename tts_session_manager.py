@@ -0,0 +1,415 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+edge-tts 持久WebSocket会话管理
+----------------------------
+edge_tts.Communicate 每次合成都会新建一条 TLS WebSocket 连接，短句合成时握手耗时占比很高。
+本模块按音色维护“热”连接：同一连接上可以连续发送多轮 speech.config/ssml 请求
+（每轮以 Path:turn.end 结束），连接被服务端关闭或空闲过久时透明重连。
+
+endpoint 可指向本地替身服务器（ws://127.0.0.1:PORT/...，见 tts_standin.py），用于离线测试握手次数与延迟。
+"""
+
+import asyncio
+import logging
+import ssl as ssl_module
+import time
+import uuid
+import weakref
+from xml.sax.saxutils import escape
+
+import aiohttp
+import edge_tts
+
+try:
+    from edge_tts.constants import WSS_URL, SEC_MS_GEC_VERSION
+except ImportError:  # 较旧的edge-tts版本
+    WSS_URL = ("wss://speech.platform.bing.com/consumer/speech/synthesize/readaloud/edge/v1"
+               "?TrustedClientToken=6A5AA1D4EAFF4E9FB37E23D68491D6F4")
+    SEC_MS_GEC_VERSION = None
+
+try:
+    from edge_tts.constants import WSS_HEADERS
+except ImportError:
+    WSS_HEADERS = {
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Origin": "chrome-extension://jdiccldimpdaibmpdkjnbmckianbfold",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+try:
+    from edge_tts.drm import DRM
+except ImportError:
+    DRM = None
+
+try:
+    import certifi
+    _DEFAULT_SSL_CONTEXT = ssl_module.create_default_context(cafile=certifi.where())
+except ImportError:
+    _DEFAULT_SSL_CONTEXT = None
+
+logger = logging.getLogger(__name__)
+
+# 单条SSML消息中文本的最大字节数（与edge-tts保持一致的保守值）
+MAX_SSML_TEXT_BYTES = 4096
+
+# 合成输出格式
+OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+OUTPUT_SAMPLE_RATE = 24000
+OUTPUT_BITRATE = 48000
+
+
+def _date_to_string():
+    """生成edge服务要求格式的时间戳"""
+    return time.strftime("%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)", time.gmtime())
+
+
+def _voice_full_name(short_name):
+    """将 'en-US-AriaNeural' 转换为服务端使用的完整语音名"""
+    if short_name.startswith("Microsoft Server Speech Text to Speech Voice"):
+        return short_name
+    locale, _, name = short_name.rpartition("-")
+    if not locale:
+        return short_name
+    return f"Microsoft Server Speech Text to Speech Voice ({locale}, {name})"
+
+
+def _clean_text(text):
+    """替换服务端不接受的控制字符，并进行XML转义"""
+    cleaned = "".join(" " if (ord(ch) < 32 and ch not in "\t\n\r") else ch for ch in text)
+    return escape(cleaned)
+
+
+def _split_by_byte_length(text, byte_limit=MAX_SSML_TEXT_BYTES):
+    """按UTF-8字节长度切分已转义文本，尽量在空白处断开且不切断转义实体"""
+    pieces = []
+    data = text.encode("utf-8")
+    while len(data) > byte_limit:
+        cut = data.rfind(b" ", 0, byte_limit)
+        if cut <= 0:
+            cut = byte_limit
+            # 不切断多字节字符
+            while cut > 0 and (data[cut] & 0xC0) == 0x80:
+                cut -= 1
+        # 不切断 &amp; 之类的实体
+        amp = data.rfind(b"&", 0, cut)
+        if amp != -1 and data.find(b";", amp, cut) == -1 and amp > 0:
+            cut = amp
+        piece = data[:cut].strip()
+        if piece:
+            pieces.append(piece.decode("utf-8"))
+        data = data[cut:]
+    if data.strip():
+        pieces.append(data.strip().decode("utf-8"))
+    return pieces
+
+
+def _parse_headers(header_bytes):
+    headers = {}
+    for line in header_bytes.split(b"\r\n"):
+        if not line:
+            continue
+        key, _, value = line.partition(b":")
+        headers[key] = value.strip()
+    return headers
+
+
+class _VoiceSession:
+    """单个音色对应的一条热连接"""
+
+    __slots__ = ['voice', 'ws', 'lock', 'connected_at', 'last_used', 'turns']
+
+    def __init__(self, voice):
+        self.voice = voice
+        self.ws = None
+        self.lock = asyncio.Lock()
+        self.connected_at = 0.0
+        self.last_used = 0.0
+        self.turns = 0
+
+    @property
+    def is_open(self):
+        return self.ws is not None and not self.ws.closed
+
+
+class _ConnectionLost(Exception):
+    """连接在收到任何音频之前被关闭，可透明重连重试"""
+
+
+class TTSConnectionManager:
+    """
+    按音色维护edge-tts持久WebSocket连接
+
+    参数:
+        endpoint: WebSocket地址，默认为edge在线服务；可替换为本地替身服务器
+        max_idle_seconds: 连接空闲超过该时长后，下次使用前主动重连（服务端会关闭长时间空闲的连接）
+        connect_timeout: 建立连接的超时时间（秒）
+        receive_timeout: 等待服务端消息的超时时间（秒）
+        ssl: 传给aiohttp的ssl参数（本地测试时可传入自签名证书的SSLContext或False）
+        max_connections_per_voice: 同一音色的最大并发连接数（长句分段并发合成时使用）
+    """
+
+    def __init__(self, endpoint=None, max_idle_seconds=20.0, connect_timeout=10.0,
+                 receive_timeout=30.0, ssl=None, proxy=None, max_connections_per_voice=2):
+        self.endpoint = endpoint
+        self.max_connections_per_voice = max(1, int(max_connections_per_voice))
+        self.max_idle_seconds = max_idle_seconds
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.ssl = ssl
+        self.proxy = proxy
+
+        self._http_session = None
+        self._sessions = {}  # voice -> [_VoiceSession, ...]
+        self._next_session = 0
+
+        # 统计信息
+        self.handshake_count = 0
+        self.handshake_total_time = 0.0
+        self.handshake_max_time = 0.0
+        self.last_handshake_time = 0.0
+        self.reused_turns = 0
+        self.reconnects = 0
+        self.total_turns = 0
+
+    def _build_url(self):
+        if self.endpoint:
+            return self.endpoint
+        url = f"{WSS_URL}&ConnectionId={uuid.uuid4().hex}"
+        if DRM is not None and SEC_MS_GEC_VERSION:
+            url += f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}"
+        return url
+
+    def _build_headers(self):
+        if self.endpoint is None and DRM is not None and hasattr(DRM, "headers_with_muid"):
+            return DRM.headers_with_muid(WSS_HEADERS)
+        return WSS_HEADERS
+
+    async def _ensure_http_session(self):
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(trust_env=True)
+        return self._http_session
+
+    async def _connect(self, session):
+        """建立WebSocket连接并发送speech.config，记录握手耗时"""
+        if session.ws is not None and not session.ws.closed:
+            await session.ws.close()
+        http_session = await self._ensure_http_session()
+        start = time.perf_counter()
+        session.ws = await asyncio.wait_for(
+            http_session.ws_connect(
+                self._build_url(),
+                headers=self._build_headers(),
+                compress=15,
+                proxy=self.proxy,
+                ssl=self.ssl if self.ssl is not None or self.endpoint else _DEFAULT_SSL_CONTEXT,
+            ),
+            timeout=self.connect_timeout,
+        )
+        elapsed = time.perf_counter() - start
+
+        self.handshake_count += 1
+        self.handshake_total_time += elapsed
+        self.handshake_max_time = max(self.handshake_max_time, elapsed)
+        self.last_handshake_time = elapsed
+        session.connected_at = time.monotonic()
+        session.last_used = session.connected_at
+        session.turns = 0
+
+        await session.ws.send_str(
+            f"X-Timestamp:{_date_to_string()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+            '"sentenceBoundaryEnabled":"false","wordBoundaryEnabled":"false"},'
+            f'"outputFormat":"{OUTPUT_FORMAT}"'
+            "}}}}\r\n"
+        )
+        logger.info(f"TTS连接已建立 (音色: {session.voice}, 握手耗时: {elapsed * 1000:.0f}ms)")
+
+    def _get_session(self, voice):
+        """选择一条空闲连接；全部繁忙且未达上限时新建，否则轮流排队"""
+        sessions = self._sessions.setdefault(voice, [])
+        for session in sessions:
+            if not session.lock.locked():
+                return session
+        if len(sessions) < self.max_connections_per_voice:
+            session = _VoiceSession(voice)
+            sessions.append(session)
+            return session
+        self._next_session += 1
+        return sessions[self._next_session % len(sessions)]
+
+    def _needs_reconnect(self, session):
+        if not session.is_open:
+            return True
+        return (time.monotonic() - session.last_used) > self.max_idle_seconds
+
+    async def prewarm(self, voice):
+        """预先为某音色建立连接（选择音色时调用），失败只记录日志"""
+        session = self._get_session(voice)
+        async with session.lock:
+            if not self._needs_reconnect(session):
+                return True
+            try:
+                await self._connect(session)
+                return True
+            except Exception as e:
+                logger.warning(f"TTS连接预热失败 (音色: {voice}): {e}")
+                return False
+
+    async def _run_turn(self, session, ssml):
+        """在当前连接上执行一轮合成，逐块产出音频数据"""
+        request_id = uuid.uuid4().hex
+        try:
+            await session.ws.send_str(
+                f"X-RequestId:{request_id}\r\n"
+                "Content-Type:application/ssml+xml\r\n"
+                f"X-Timestamp:{_date_to_string()}Z\r\n"
+                "Path:ssml\r\n\r\n"
+                f"{ssml}"
+            )
+        except (ConnectionResetError, aiohttp.ClientError, RuntimeError) as e:
+            raise _ConnectionLost(str(e)) from e
+
+        received_audio = False
+        while True:
+            try:
+                message = await session.ws.receive(timeout=self.receive_timeout)
+            except asyncio.TimeoutError:
+                # 连接状态未知，关闭后下次使用时重连
+                await session.ws.close()
+                raise
+
+            if message.type == aiohttp.WSMsgType.TEXT:
+                data = message.data.encode("utf-8")
+                headers = _parse_headers(data[:data.find(b"\r\n\r\n")])
+                if headers.get(b"X-RequestId", request_id.encode()) != request_id.encode():
+                    continue  # 上一轮遗留的消息
+                if headers.get(b"Path") == b"turn.end":
+                    return
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                if len(message.data) < 2:
+                    continue
+                header_length = int.from_bytes(message.data[:2], "big")
+                headers = _parse_headers(message.data[2:2 + header_length])
+                if headers.get(b"Path") != b"audio":
+                    continue
+                if headers.get(b"X-RequestId", request_id.encode()) != request_id.encode():
+                    continue
+                audio = message.data[2 + header_length:]
+                if audio:
+                    received_audio = True
+                    yield audio
+            elif message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                  aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                if received_audio:
+                    raise edge_tts.exceptions.NoAudioReceived("TTS连接在合成过程中被关闭")
+                raise _ConnectionLost("TTS连接已被服务端关闭")
+
+    def _build_ssml(self, text, voice, rate, volume, pitch):
+        return (
+            "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
+            f"<voice name='{_voice_full_name(voice)}'>"
+            f"<prosody pitch='{pitch}' rate='{rate}' volume='{volume}'>"
+            f"{text}"
+            "</prosody></voice></speak>"
+        )
+
+    async def stream(self, text, voice, rate=None, volume=None, pitch=None):
+        """
+        合成文本并逐块产出MP3音频数据
+
+        连接在发送请求前或收到首个音频块前断开时，会透明重连并重试一次。
+        """
+        rate = rate or "+0%"
+        volume = volume or "+0%"
+        pitch = pitch or "+0Hz"
+        pieces = _split_by_byte_length(_clean_text(text))
+        if not pieces:
+            raise edge_tts.exceptions.NoAudioReceived("没有可合成的文本")
+
+        session = self._get_session(voice)
+        async with session.lock:
+            for piece in pieces:
+                ssml = self._build_ssml(piece, voice, rate, volume, pitch)
+                for attempt in range(2):
+                    reused = not self._needs_reconnect(session)
+                    if not reused:
+                        if session.connected_at:
+                            self.reconnects += 1
+                        await self._connect(session)
+                    got_audio = False
+                    try:
+                        async for audio in self._run_turn(session, ssml):
+                            got_audio = True
+                            yield audio
+                    except _ConnectionLost:
+                        if got_audio or attempt:
+                            raise edge_tts.exceptions.NoAudioReceived("TTS连接中断，且重连后仍失败")
+                        if session.ws is not None:
+                            await session.ws.close()
+                        continue
+                    session.turns += 1
+                    session.last_used = time.monotonic()
+                    self.total_turns += 1
+                    if not got_audio:
+                        raise edge_tts.exceptions.NoAudioReceived("未收到音频数据")
+                    # 只在复用的连接上成功完成一轮后计数（失效的旧连接算作重连）
+                    if reused:
+                        self.reused_turns += 1
+                    break
+
+    async def synthesize(self, text, voice, rate=None, volume=None, pitch=None):
+        """合成文本并返回完整的MP3数据"""
+        chunks = []
+        async for audio in self.stream(text, voice, rate=rate, volume=volume, pitch=pitch):
+            chunks.append(audio)
+        return b"".join(chunks)
+
+    async def close(self, voice=None):
+        """关闭指定音色（或全部）的连接"""
+        voices = [voice] if voice else list(self._sessions)
+        for v in voices:
+            for session in self._sessions.pop(v, []):
+                if session.ws is not None and not session.ws.closed:
+                    await session.ws.close()
+        if voice is None and self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+            self._http_session = None
+
+    def get_stats(self):
+        """获取握手次数、握手延迟和连接复用统计"""
+        return {
+            "handshakes": self.handshake_count,
+            "handshake_avg_ms": (self.handshake_total_time / self.handshake_count * 1000)
+            if self.handshake_count else 0.0,
+            "handshake_max_ms": self.handshake_max_time * 1000,
+            "last_handshake_ms": self.last_handshake_time * 1000,
+            "turns": self.total_turns,
+            "reused_turns": self.reused_turns,
+            "reconnects": self.reconnects,
+            "open_sessions": sum(1 for sessions in self._sessions.values() for s in sessions if s.is_open),
+        }
+
+
+# 每个事件循环一个管理器（aiohttp会话与事件循环绑定）
+_managers = weakref.WeakKeyDictionary()
+
+
+def get_connection_manager(**kwargs):
+    """获取当前事件循环对应的连接管理器（首次调用时创建）"""
+    loop = asyncio.get_running_loop()
+    manager = _managers.get(loop)
+    if manager is None:
+        manager = TTSConnectionManager(**kwargs)
+        _managers[loop] = manager
+    return manager
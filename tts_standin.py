@@ -0,0 +1,199 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+本地edge-tts WebSocket替身服务器
+----------------------------
+在本机模拟edge在线合成服务的WebSocket协议（speech.config / ssml 请求，turn.start / audio / turn.end 响应），
+用于在不访问真实服务的情况下检查 TTSConnectionManager 的连接行为：
+
+- 同一音色连续合成多句时只握手一次，其余各轮复用连接
+- 服务端关闭连接后，下一句透明重连并成功合成（失效的旧连接不计入复用）
+
+音频数据是固定的占位字节，不是可播放的MP3；每个连接接受的轮数与服务端握手次数都有统计。
+
+使用方法:
+    python tts_standin.py                  # 运行连接检查，不符合预期时退出码为1
+    python tts_standin.py --utterances 20 --first-byte-ms 50
+    python tts_standin.py --serve --port 8765
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_AUDIO = b"\xff\xf3" + b"\x00" * 254
+
+
+def _parse_message(data):
+    """文本消息 → (头部字典, 正文)"""
+    head, _, body = data.partition("\r\n\r\n")
+    headers = {}
+    for line in head.split("\r\n"):
+        key, _, value = line.partition(":")
+        headers[key] = value.strip()
+    return headers, body
+
+
+def _audio_message(request_id, audio):
+    header = (f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n").encode("utf-8")
+    return len(header).to_bytes(2, "big") + header + audio
+
+
+class TTSStandinServer:
+    """
+    edge-tts 协议的本地替身服务器（在调用方的事件循环中运行）
+
+    参数:
+        port: 监听端口，0表示自动分配
+        first_byte_ms: 收到ssml后发出首个音频块前的延迟
+        chunks: 每轮发送的音频块数
+    """
+
+    def __init__(self, port=0, first_byte_ms=20.0, chunks=3):
+        self.port = port
+        self.first_byte = first_byte_ms / 1000.0
+        self.chunks = chunks
+        self.handshakes = 0
+        self.turns = 0
+        self._sockets = set()
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/tts"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/tts", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.url
+
+    async def stop(self):
+        await self.drop_connections()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def drop_connections(self):
+        """关闭所有已建立的连接（模拟服务端关闭空闲连接）"""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.handshakes += 1
+        self._sockets.add(ws)
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                headers, _ = _parse_message(message.data)
+                if headers.get("Path") != "ssml":
+                    continue
+                request_id = headers.get("X-RequestId", "")
+                self.turns += 1
+                await ws.send_str(f"X-RequestId:{request_id}\r\nPath:turn.start\r\n\r\n{{}}")
+                await asyncio.sleep(self.first_byte)
+                for _ in range(self.chunks):
+                    await ws.send_bytes(_audio_message(request_id, PLACEHOLDER_AUDIO))
+                await ws.send_str(f"X-RequestId:{request_id}\r\nPath:turn.end\r\n\r\n{{}}")
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+
+async def run_check(utterances=5, first_byte_ms=20.0, voice="en-US-AriaNeural"):
+    """
+    连续合成 utterances 句，之后由服务端关闭连接再合成一句
+
+    返回:
+        (失败项列表, 连接统计)；失败项为空表示符合预期
+    """
+    from tts_session_manager import TTSConnectionManager
+
+    server = TTSStandinServer(first_byte_ms=first_byte_ms)
+    await server.start()
+    manager = TTSConnectionManager(endpoint=server.url, max_connections_per_voice=1)
+    failures = []
+    try:
+        for index in range(utterances):
+            start = time.perf_counter()
+            audio = await manager.synthesize(f"Sentence number {index + 1}.", voice)
+            logger.info(f"第{index + 1}句: {len(audio)} 字节, {(time.perf_counter() - start) * 1000:.1f}ms")
+        stats = manager.get_stats()
+        if stats["handshakes"] != 1 or server.handshakes != 1:
+            failures.append(f"{utterances}句应只握手1次，实际客户端{stats['handshakes']}次、服务端{server.handshakes}次")
+        if stats["reused_turns"] != utterances - 1:
+            failures.append(f"复用轮数应为{utterances - 1}，实际{stats['reused_turns']}")
+
+        # 服务端关闭连接；客户端尚未察觉，下一句在失效的连接上发出后透明重连
+        await server.drop_connections()
+        audio = await manager.synthesize("After the server dropped the socket.", voice)
+        stats = manager.get_stats()
+        if not audio:
+            failures.append("重连后未收到音频")
+        if stats["handshakes"] != 2 or stats["reconnects"] != 1:
+            failures.append(f"断开后应重连1次，实际握手{stats['handshakes']}次、重连{stats['reconnects']}次")
+        if stats["reused_turns"] != utterances - 1:
+            failures.append(f"失效连接上的一轮不应计为复用，复用轮数{stats['reused_turns']}")
+        if stats["turns"] != utterances + 1:
+            failures.append(f"完成轮数应为{utterances + 1}，实际{stats['turns']}")
+    finally:
+        await manager.close()
+        await server.stop()
+    return failures, stats
+
+
+async def _serve(port, first_byte_ms):
+    server = TTSStandinServer(port=port, first_byte_ms=first_byte_ms)
+    print(f"TTS替身服务器: {await server.start()}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地edge-tts WebSocket替身服务器与连接复用检查")
+    parser.add_argument("--serve", action="store_true", help="只运行替身服务器，直到Ctrl+C")
+    parser.add_argument("--port", type=int, default=0, help="--serve 时的监听端口")
+    parser.add_argument("--utterances", type=int, default=5, help="断开前连续合成的句数")
+    parser.add_argument("--first-byte-ms", type=float, default=20.0, help="替身服务器首个音频块的延迟")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.serve:
+        try:
+            asyncio.run(_serve(args.port, args.first_byte_ms))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    failures, stats = asyncio.run(run_check(args.utterances, args.first_byte_ms))
+    print(f"连接统计: 握手{stats['handshakes']}次 (平均{stats['handshake_avg_ms']:.1f}ms), "
+          f"合成{stats['turns']}轮, 复用{stats['reused_turns']}轮, 重连{stats['reconnects']}次")
+    for failure in failures:
+        print(f"不符合: {failure}")
+    print("检查通过" if not failures else "检查失败")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import os
+
+project_root = os.getcwd()
+
+os.environ["FUNASR_CACHE"] = os.path.join(project_root, "models", "cached_models")
+os.environ["HF_HOME"] = os.path.join(project_root, "models", "hf_cache")
+os.environ["MODELSCOPE_CACHE"] = os.path.join(project_root, "models", "modelscope_cache")
+
+"""
+合并、限速的UI更新分发器
+----------------------------
+工作线程（ASR回调、运行翻译/TTS协程的asyncio循环）不再各自调用 root.after(0, ...)，
+而是把更新推入同一个队列，由Tk主线程每帧取出一次统一执行：
+- 同一文本区域尚未执行的中间结果只保留最新的一条（合并）
+- 日志行在一帧内批量插入
+- 待插入的日志行超过上限时丢弃最旧的行
+- 统计投递、合并、丢弃的事件数
+"""
+
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 每帧间隔（毫秒），约30帧/秒
+DEFAULT_FRAME_INTERVAL_MS = 33
+# 等待插入的日志行上限
+DEFAULT_MAX_PENDING_LOG_LINES = 2000
+
+_TEXT = 0
+_CALL = 1
+
+
+class UIUpdateDispatcher:
+    """
+    线程安全的UI更新队列
+
+    参数:
+        max_pending_log_lines: 两帧之间最多缓存的日志行数，超出时丢弃最旧的行
+    """
+
+    def __init__(self, max_pending_log_lines=DEFAULT_MAX_PENDING_LOG_LINES):
+        self.max_pending_log_lines = max_pending_log_lines
+        self._lock = threading.Lock()
+        self._ops = deque()
+        self._log_lines = deque()
+        # 区域 -> 队列中尚未执行的中间结果操作（可原地替换文本）
+        self._pending_interim = {}
+
+        self.posted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.frames = 0
+        self.max_batch = 0
+
+    def post_text(self, area, text, mode='append_final', clear_all=False):
+        """投递一次文本区域更新（参数同 _update_text_area）"""
+        with self._lock:
+            self.posted += 1
+            if mode == 'update_interim' and not clear_all:
+                pending = self._pending_interim.get(area)
+                if pending is not None:
+                    # 上一条中间结果还没显示，直接替换为最新文本
+                    pending[2] = text
+                    self.coalesced += 1
+                    return
+                op = [_TEXT, area, text, mode, clear_all]
+                self._pending_interim[area] = op
+            else:
+                op = [_TEXT, area, text, mode, clear_all]
+                # 之后的中间结果不能与此前的合并，否则会越过这条最终结果
+                self._pending_interim.pop(area, None)
+            self._ops.append(op)
+
+    def post_call(self, func, *args):
+        """投递一个在Tk主线程执行的任意调用"""
+        with self._lock:
+            self.posted += 1
+            self._ops.append([_CALL, func, args])
+
+    def post_log(self, line):
+        """投递一行日志（不含换行符）"""
+        with self._lock:
+            self.posted += 1
+            self._log_lines.append(line)
+            while len(self._log_lines) > self.max_pending_log_lines:
+                self._log_lines.popleft()
+                self.dropped += 1
+
+    def drain(self, apply_text, insert_log_lines):
+        """
+        在Tk主线程中调用：执行本帧所有排队的更新
+
+        参数:
+            apply_text: 函数 (area, text, mode, clear_all)
+            insert_log_lines: 函数 (lines)，一次插入多行日志
+        返回:
+            本帧执行的事件数
+        """
+        with self._lock:
+            ops, self._ops = self._ops, deque()
+            log_lines, self._log_lines = self._log_lines, deque()
+            self._pending_interim.clear()
+
+        for op in ops:
+            try:
+                if op[0] == _TEXT:
+                    apply_text(op[1], op[2], op[3], op[4])
+                else:
+                    op[1](*op[2])
+            except Exception as e:
+                logger.error(f"执行UI更新时出错: {e}")
+        if log_lines:
+            try:
+                insert_log_lines(log_lines)
+            except Exception as e:
+                logger.error(f"插入日志时出错: {e}")
+
+        batch = len(ops) + len(log_lines)
+        if batch:
+            self.frames += 1
+            self.max_batch = max(self.max_batch, batch)
+        return batch
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "posted": self.posted,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "frames": self.frames,
+                "max_batch": self.max_batch,
+                "pending": len(self._ops) + len(self._log_lines),
+            }